@@ -0,0 +1,119 @@
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+# Mô hình dữ liệu batch dùng chung cho các helper.
+# Mỗi batch IcoMoon (batchN-vX.Y) chỉ được quét và parse JSON một lần,
+# sau đó các bước merge / enrich / split / CSS / demo / font dùng chung.
+
+# - Bắt đầu bằng 'batch'
+# - Sau đó là một hoặc nhiều chữ số (\d+)
+# - Có thể theo sau bởi bất kỳ ký tự nào (-, _, .)
+BATCH_PATTERN = re.compile(r'batch(\d+)[^\d]*.*')
+
+
+def find_batch_dirs(root_dir: str) -> List[str]:
+    """
+    Tìm tất cả các thư mục con khớp với mẫu 'batchX...' và sắp xếp chúng theo thứ tự số.
+    """
+    found_batches = []
+    for item in os.listdir(root_dir):
+        if os.path.isdir(os.path.join(root_dir, item)):
+            match = BATCH_PATTERN.match(item)
+            if match:
+                found_batches.append((int(match.group(1)), item))
+
+    found_batches.sort(key=lambda x: x[0])
+    return [name for num, name in found_batches]
+
+
+def find_selection_file(batch_path: str, batch_dir: str) -> Optional[str]:
+    """Tìm selection.json của batch, hoặc file json trùng tên batch (ví dụ: batch1.json)"""
+    sel_path = os.path.join(batch_path, "selection.json")
+    if os.path.isfile(sel_path):
+        return sel_path
+    sel_path = os.path.join(batch_path, batch_dir.split('-')[0] + '.json')
+    if os.path.isfile(sel_path):
+        return sel_path
+    return None
+
+
+def find_font_file(batch_path: str, batch_dir: str, ext: str = "woff") -> Optional[str]:
+    """Font IcoMoon của batch: fonts/batchN.woff"""
+    font_path = os.path.join(batch_path, "fonts", f"{batch_dir.split('-')[0]}.{ext}")
+    return font_path if os.path.isfile(font_path) else None
+
+
+def scan_batches(root_dir: str) -> List[Dict[str, Any]]:
+    """
+    Quét thư mục chứa batch nhưng chưa parse JSON.
+    Mỗi phần tử: {'name', 'path', 'selection_path', 'font_path'}.
+    Batch thiếu selection.json sẽ bị bỏ qua (có cảnh báo).
+    """
+    batches = []
+    for batch_dir in find_batch_dirs(root_dir):
+        batch_path = os.path.join(root_dir, batch_dir)
+        sel_path = find_selection_file(batch_path, batch_dir)
+        if not sel_path:
+            print(f"⚠️ Bỏ qua: thiếu selection.json trong {batch_dir}")
+            continue
+
+        batches.append({
+            "name": batch_dir,
+            "path": batch_path,
+            "selection_path": sel_path,
+            "font_path": find_font_file(batch_path, batch_dir)
+        })
+    return batches
+
+
+def parse_batches(batches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Parse selection.json của từng batch đúng một lần, lưu vào batch['data'].
+    Batch có JSON lỗi sẽ bị bỏ qua (có cảnh báo).
+    """
+    parsed = []
+    for batch in batches:
+        if "data" not in batch:
+            try:
+                with open(batch["selection_path"], "r", encoding="utf-8") as f:
+                    batch["data"] = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"❌ Lỗi đọc {batch['selection_path']}: {e}")
+                continue
+        parsed.append(batch)
+    return parsed
+
+
+def load_batches(root_dir: str) -> List[Dict[str, Any]]:
+    """
+    Quét thư mục chứa batch và parse selection.json của từng batch đúng một lần.
+    Mỗi phần tử: {'name', 'path', 'selection_path', 'font_path', 'data'}.
+    """
+    return parse_batches(scan_batches(root_dir))
+
+
+def get_icon_name(icon: Dict[str, Any]) -> Optional[str]:
+    """Tên icon theo cấu trúc IcoMoon mới (properties) hoặc cũ (attrs)"""
+    name = icon.get("properties", {}).get("name")
+    if name is None:
+        name = (icon.get("attrs") or [{}])[0].get("name")
+    return name
+
+
+def get_icon_aliases(icon: Dict[str, Any]) -> List[str]:
+    """Tên khác của icon (glyph trùng hình học đã gộp, xem dedup_icons.py)"""
+    return list(icon.get("properties", {}).get("aliases") or [])
+
+
+def get_icon_code(icon: Dict[str, Any]) -> Optional[int]:
+    """Mã unicode của icon (int), hỗ trợ dạng chuỗi '0x...'"""
+    code = icon.get("properties", {}).get("code")
+    if code is None:
+        code = (icon.get("attrs") or [{}])[0].get("code")
+    if isinstance(code, str) and code.startswith('0x'):
+        return int(code, 16)
+    if isinstance(code, int):
+        return code
+    return None
@@ -0,0 +1,384 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional
+
+import build
+import instrument
+from batches import get_icon_name, parse_batches, scan_batches
+
+# Benchmark pipeline helper trên collection IcoMoon tổng hợp (1k / 10k / 100k icon):
+# - sinh thư mục batch giống dữ liệu thật (extracted_folder/batchN/selection.json + fonts/batchN.woff),
+#   path có số đoạn / lệnh / số path mỗi icon gần với Lawnicons & Simple Icons, tag 1–6 từ,
+#   có sẵn vài tên trùng (merge đổi tên) và hình trùng (dedup)
+# - chạy đúng các bước của build.py (STAGE_RUNNERS) cộng bước không nằm trong build
+#   (extract_icons của create_file_demo)
+# - mỗi kích thước chạy trong một process mới; từng bước được đo bằng helper/instrument.py
+#   (thời gian thực / CPU, RSS của bước, byte đọc/ghi, icon/giây)
+# - kết quả ghi ra JSON; --compare so với file kết quả cũ (ví dụ của commit trước) và đánh dấu bước chậm đi
+#
+# Ví dụ:
+#   python helper/benchmark.py --sizes 1000,10000 --output bench.json
+#   python helper/benchmark.py --sizes 1000 --stages merge,enrich,split,css --compare bench-main.json
+#   python helper/benchmark.py --compare bench-main.json --fail-on-regression   # cho build đêm
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_OUTPUT = "benchmark-results.json"
+BATCH_SIZE = 2500
+MAX_FONT_GLYPHS = 65535  # numGlyphs của TrueType là uint16
+SEED = 1024
+EXTRA_STAGES = ["extract_icons"]
+RESULT_VERSION = 1
+
+WORDS = [
+    "account", "add", "alarm", "album", "android", "app", "archive", "arrow", "audio", "back", "badge", "bank",
+    "battery", "bell", "bike", "bluetooth", "book", "bookmark", "box", "brush", "bug", "build", "calendar",
+    "call", "camera", "car", "cart", "cast", "chart", "chat", "check", "circle", "clock", "cloud", "code",
+    "coffee", "compass", "copy", "credit", "crop", "delete", "desktop", "device", "dialog", "download", "drive",
+    "edit", "email", "eye", "face", "file", "film", "filter", "fire", "flag", "flash", "folder", "game", "gift",
+    "globe", "graph", "grid", "heart", "help", "home", "image", "inbox", "key", "laptop", "layers", "leaf",
+    "light", "link", "list", "location", "lock", "mail", "map", "menu", "message", "mic", "money", "moon",
+    "music", "note", "notification", "palette", "pause", "pen", "person", "phone", "photo", "pin", "play",
+    "plus", "power", "print", "radio", "refresh", "remove", "save", "search", "send", "settings", "share",
+    "shield", "shop", "shopping", "signal", "smile", "sound", "speaker", "square", "star", "store", "sun",
+    "sync", "tag", "task", "terminal", "ticket", "timer", "tool", "train", "trash", "tv", "upload", "user",
+    "video", "volume", "wallet", "watch", "weather", "wifi", "window", "work", "zoom",
+]
+# Tỉ lệ lệnh trong path thật (đã bỏ M/Z): chủ yếu cubic tương đối
+COMMAND_WEIGHTS = [("c", 55), ("l", 15), ("h", 8), ("v", 8), ("s", 9), ("q", 3), ("t", 2)]
+
+
+def icon_code(index: int) -> int:
+    """Codepoint thứ index: PUA của BMP từ U+E900, hết thì sang PUA-A (U+F0000) rồi PUA-B (U+100000)"""
+    if index < 0xF900 - 0xE900:
+        return 0xE900 + index
+    index -= 0xF900 - 0xE900
+    return 0xF0000 + index if index < 0xFFFE else 0x100000 + index - 0xFFFE
+
+
+def format_coordinate(value: float) -> str:
+    """Số 3 chữ số thập phân như IcoMoon xuất (bỏ 0 thừa)"""
+    text = f"{value:.3f}".rstrip("0").rstrip(".")
+    return "0" if text in ("", "-0") else text
+
+
+def synthetic_path(rng: random.Random, segments: int) -> str:
+    """Path SVG tương đối gồm 1–4 contour đóng, toạ độ giữ trong lưới 1024"""
+    commands, names = zip(*COMMAND_WEIGHTS)
+    contours = max(1, min(4, segments // 20))
+    parts = []
+    for contour in range(contours):
+        x, y = rng.uniform(64, 960), rng.uniform(64, 960)
+        parts.append(f"M{format_coordinate(x)} {format_coordinate(y)}")
+        for command in rng.choices(commands, weights=names, k=max(2, segments // contours)):
+            dx, dy = rng.gauss(0, 40), rng.gauss(0, 40)
+            # Đổi hướng nếu sắp ra ngoài lưới
+            dx = -dx if not 0 <= x + dx <= 1024 else dx
+            dy = -dy if not 0 <= y + dy <= 1024 else dy
+            if command == "h":
+                parts.append(f"h{format_coordinate(dx)}")
+                x += dx
+                continue
+            if command == "v":
+                parts.append(f"v{format_coordinate(dy)}")
+                y += dy
+                continue
+            controls = {"c": 2, "s": 1, "q": 1}.get(command, 0)
+            numbers = [v for _ in range(controls) for v in (dx * rng.random(), dy * rng.random())] + [dx, dy]
+            parts.append(command + " ".join(format_coordinate(v) for v in numbers).replace(" -", "-"))
+            x += dx
+            y += dy
+        parts.append("z")
+    return "".join(parts)
+
+
+def synthetic_icon(rng: random.Random, index: int, name: str, tags: List[str]) -> Dict[str, Any]:
+    total_segments = max(6, int(rng.lognormvariate(4.1, 0.6)))
+    path_count = rng.choices([1, 2, 3], weights=[70, 20, 10])[0]
+    paths = [synthetic_path(rng, max(3, total_segments // path_count)) for _ in range(path_count)]
+    return {
+        "icon": {"paths": paths, "attrs": [{} for _ in paths], "isMulticolor": False, "isMulticolor2": False,
+                 "grid": 0, "tags": tags},
+        "attrs": [{} for _ in paths],
+        "properties": {"order": index, "id": index, "name": name, "prevSize": 32, "code": icon_code(index)},
+        "setIdx": 0, "setId": 0, "iconIdx": index,
+    }
+
+
+def synthetic_icons(count: int, seed: int = SEED) -> List[Dict[str, Any]]:
+    """count icon tổng hợp; ~1% trùng tên với icon trước đó, ~0.5% trùng hình (để merge/dedup có việc)"""
+    rng = random.Random(seed + count)
+    icons = []
+    for index in range(count):
+        words = rng.sample(WORDS, rng.choices([1, 2, 3], weights=[30, 50, 20])[0])
+        name = "_".join(words) + f"_{index:x}"
+        tags = words + rng.sample(WORDS, rng.randint(0, 3))
+        if icons and rng.random() < 0.01:
+            name = get_icon_name(rng.choice(icons))
+        icon = synthetic_icon(rng, index, name, tags)
+        if icons and rng.random() < 0.005:
+            icon["icon"]["paths"] = list(rng.choice(icons)["icon"]["paths"])
+            icon["icon"]["attrs"] = icon["attrs"] = [{} for _ in icon["icon"]["paths"]]
+        icons.append(icon)
+    return icons
+
+
+def write_collection(root: str, icons: List[Dict[str, Any]], prefix: str, with_fonts: bool) -> List[str]:
+    """Ghi các batch IcoMoon (selection.json + fonts/batchN.woff nếu cần) vào root/extracted_folder"""
+    batch_dirs = []
+    for number, start in enumerate(range(0, len(icons), BATCH_SIZE), 1):
+        batch_icons = icons[start:start + BATCH_SIZE]
+        batch_dir = os.path.join(root, "extracted_folder", f"batch{number}-v1.0")
+        os.makedirs(os.path.join(batch_dir, "fonts"), exist_ok=True)
+        selection = {
+            "IcoMoonType": "selection", "icons": batch_icons, "height": 1024,
+            "metadata": {"name": f"batch{number}"},
+            "preferences": {"fontPref": {"prefix": prefix, "metadata": {"fontFamily": f"batch{number}"}}},
+        }
+        with open(os.path.join(batch_dir, "selection.json"), "w", encoding="utf-8") as f:
+            json.dump(selection, f, indent=2)
+        if with_fonts:
+            import font_compiler
+            import scripts
+            ttf_data, _ = font_compiler.build_font(batch_icons, f"batch{number}", workers=1)
+            with open(os.path.join(batch_dir, "fonts", f"batch{number}.woff"), "wb") as f:
+                f.write(scripts.encode_font(ttf_data, "woff"))
+        batch_dirs.append(batch_dir)
+    return batch_dirs
+
+
+def collection_config(size: int) -> Dict[str, Any]:
+    """Cấu hình collection giống build-config.json (mọi bước tuỳ chọn đều bật)"""
+    return {
+        "id": f"bench{size}", "title": f"Benchmark {size}", "batch_root": "extracted_folder", "output_dir": "out",
+        "selection_file": "selection-all.json", "prefix": "bench-", "css_family": "bench",
+        "font_name": f"bench{size}", "chunk_size": 300, "slim": True, "encoding": "min", "geometry_scale": 16,
+        "selection_encoding": "pretty", "font_shards": True, "css_mode": "compact", "css_chunks": True,
+        "sprites": True, "demo_mode": "virtual", "dedup": True, "simplify": True, "mapping": None,
+    }
+
+
+def stage_extract_icons(ctx) -> int:
+    import create_file_demo
+    icons = create_file_demo.extract_icons_from_json(build.collection_path(ctx, "selection_file"))
+    return len(icons or [])
+
+
+EXTRA_RUNNERS = {"extract_icons": stage_extract_icons}
+
+
+def run_size(size: int, stages: List[str], work_dir: str, verbose: bool = False) -> Dict[str, Any]:
+    """Chạy trong process con mới: sinh collection size icon rồi đo từng bước"""
+    root = os.path.join(work_dir, f"bench-{size}")
+    config = collection_config(size)
+    font_stages = {"fonts", "shards"} & set(stages)
+    notes = []
+    if font_stages and size > MAX_FONT_GLYPHS:
+        notes.append(f"bỏ {', '.join(sorted(font_stages))}: font TrueType tối đa {MAX_FONT_GLYPHS} glyph")
+        stages = [s for s in stages if s not in font_stages]
+        font_stages = set()
+
+    setup_started = time.perf_counter()
+    icons = synthetic_icons(size)
+    write_collection(root, icons, config["prefix"], with_fonts=bool(font_stages))
+    del icons
+    result = {
+        "icons": size,
+        "setup_seconds": round(time.perf_counter() - setup_started, 3),
+        "stages": {},
+        "notes": notes,
+        "error": None,
+    }
+
+    ctx = {
+        "config": config,
+        "root": root,
+        "output_dir": os.path.join(root, config["output_dir"]),
+        "batches": scan_batches(os.path.join(root, config["batch_root"])),
+        "mapping_path": None,
+        "merged": None,
+        "report_encodings": False,
+    }
+    os.makedirs(ctx["output_dir"], exist_ok=True)
+    input_bytes = sum(os.path.getsize(b["selection_path"]) for b in ctx["batches"])
+    result["input_bytes"] = input_bytes
+    ctx["batches"] = parse_batches(ctx["batches"])
+
+    baseline_rss = instrument.peak_rss_mb()
+    for stage in stages:
+        runner = build.STAGE_RUNNERS.get(stage) or EXTRA_RUNNERS[stage]
+        try:
+            # Các bước in tiến độ rất nhiều; chỉ giữ khi --verbose
+            with contextlib.redirect_stdout(sys.stdout if verbose else io.StringIO()), \
+                    instrument.measure(ctx["output_dir"]) as metrics:
+                items = runner(ctx)
+                metrics["icons"] = size
+        except (Exception, SystemExit) as e:
+            result["error"] = f"{stage}: {e}"
+            break
+        result["stages"][stage] = {"items": items if isinstance(items, int) else None, **metrics}
+    result["baseline_rss_mb"] = baseline_rss
+    result["peak_rss_mb"] = instrument.peak_rss_mb()
+    result["total_seconds"] = round(sum(s["seconds"] for s in result["stages"].values()), 3)
+    return result
+
+
+def git_commit(root: str) -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True,
+                              text=True, check=True).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def resolve_benchmark_stages(requested: Optional[List[str]]) -> List[str]:
+    """Bước build theo thứ tự phụ thuộc (thêm bước phụ thuộc còn thiếu), bước riêng của benchmark ở cuối"""
+    requested = requested or list(build.STAGE_DEPENDENCIES) + EXTRA_STAGES
+    unknown = [s for s in requested if s not in build.STAGE_DEPENDENCIES and s not in EXTRA_RUNNERS]
+    if unknown:
+        raise ValueError(f"Bước không hợp lệ: {', '.join(unknown)}")
+    extras = [s for s in EXTRA_STAGES if s in requested]
+    # extract_icons đọc selection đã lưu (sau dedup)
+    build_stages = [s for s in requested if s in build.STAGE_DEPENDENCIES]
+    if extras:
+        build_stages += ["dedup"]
+    return build.resolve_stages(build_stages) + extras
+
+
+def run_benchmark(sizes: List[int], stages: List[str], work_dir: str, verbose: bool = False) -> Dict[str, Any]:
+    results = {
+        "version": RESULT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": git_commit(os.path.dirname(os.path.abspath(__file__))),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "stages": stages,
+        "sizes": {},
+    }
+    # Mỗi kích thước một process mới (spawn) để peak RSS không bị lần chạy trước đẩy lên
+    context = get_context("spawn")
+    for size in sizes:
+        print(f"▶️ {size:,} icon...")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            result = pool.submit(run_size, size, stages, work_dir, verbose).result()
+        results["sizes"][str(size)] = result
+        status = f"❌ {result['error']}" if result["error"] else "✅"
+        print(f"{status} {size:,} icon: {result['total_seconds']}s (sinh dữ liệu {result['setup_seconds']}s),"
+              f" peak RSS {result['peak_rss_mb']} MB")
+        for note in result["notes"]:
+            print(f"   ⚠️ {note}")
+    return results
+
+
+def format_table(results: Dict[str, Any]) -> List[str]:
+    """Bảng giây theo bước × kích thước"""
+    sizes = list(results["sizes"])
+    lines = [f"{'bước':<14}" + "".join(f"{int(s):>12,}" for s in sizes)]
+    for stage in results["stages"]:
+        cells = []
+        for size in sizes:
+            entry = results["sizes"][size]["stages"].get(stage)
+            cells.append(f"{entry['seconds']:>11.3f}s" if entry else f"{'–':>12}")
+        lines.append(f"{stage:<14}" + "".join(cells))
+    lines.append(f"{'peak RSS MB':<14}" + "".join(f"{results['sizes'][s]['peak_rss_mb'] or 0:>12.1f}" for s in sizes))
+    return lines
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.1,
+                    min_seconds: float = 0.05) -> Dict[str, Any]:
+    """
+    So sánh theo từng (kích thước, bước) có trong cả hai file.
+    Chậm đi quá threshold (tỉ lệ) và quá min_seconds (tuyệt đối) thì tính là regression.
+    """
+    rows, regressions = [], []
+    for size, entry in current["sizes"].items():
+        base_entry = baseline.get("sizes", {}).get(size)
+        if not base_entry:
+            continue
+        for stage, now in entry["stages"].items():
+            before = base_entry["stages"].get(stage)
+            if not before:
+                continue
+            delta = now["seconds"] - before["seconds"]
+            ratio = delta / before["seconds"] if before["seconds"] > 0 else 0.0
+            row = {"size": int(size), "stage": stage, "before": before["seconds"], "after": now["seconds"],
+                   "ratio": round(ratio, 3), "rss_before": before.get("stage_rss_mb"), "rss_after": now.get("stage_rss_mb"),
+                   "bytes_before": before.get("output_bytes"), "bytes_after": now.get("output_bytes")}
+            rows.append(row)
+            if ratio > threshold and delta > min_seconds:
+                regressions.append(row)
+    return {"rows": rows, "regressions": regressions}
+
+
+def format_comparison(comparison: Dict[str, Any], baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    lines = [f"🔍 So với {baseline.get('commit') or 'baseline'} → {current.get('commit') or 'hiện tại'}:"]
+    for row in comparison["rows"]:
+        mark = "⚠️" if row in comparison["regressions"] else "  "
+        size_change = ""
+        if row["bytes_before"] is not None and row["bytes_after"] != row["bytes_before"]:
+            size_change = f", {row['bytes_before']:,} → {row['bytes_after']:,} B"
+        lines.append(f"{mark} {row['size']:>7,} {row['stage']:<14} {row['before']:>9.3f}s → {row['after']:>9.3f}s"
+                     f" ({row['ratio']:+.1%}){size_change}")
+    lines.append(f"{'⚠️' if comparison['regressions'] else '✅'} {len(comparison['regressions'])} bước chậm đi")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pipeline helper trên collection IcoMoon tổng hợp')
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)),
+                        help='Số icon của các collection tổng hợp, cách nhau bởi dấu phẩy (mặc định 1000,10000,100000)')
+    parser.add_argument('--stages', help='Các bước cần đo (mặc định: mọi bước của build + '
+                                         f'{", ".join(EXTRA_STAGES)}); bước phụ thuộc được thêm tự động')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f'File JSON kết quả (mặc định {DEFAULT_OUTPUT})')
+    parser.add_argument('--work-dir', help='Thư mục chứa dữ liệu tổng hợp (mặc định: thư mục tạm, xoá sau khi chạy)')
+    parser.add_argument('--compare', metavar='JSON', help='File kết quả cũ để so sánh')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Ngưỡng chậm đi tính là regression (mặc định 0.1 = 10%%)')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Thoát mã 1 nếu có bước chậm đi quá ngưỡng')
+    parser.add_argument('--verbose', action='store_true', help='Hiện log của từng bước')
+    args = parser.parse_args()
+
+    print("=== ⏱️ BENCHMARK PIPELINE ===")
+    try:
+        sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+        stages = resolve_benchmark_stages([s.strip() for s in args.stages.split(",") if s.strip()] if args.stages else None)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"🔗 Bước: {' → '.join(stages)}")
+
+    if args.work_dir:
+        os.makedirs(args.work_dir, exist_ok=True)
+        results = run_benchmark(sizes, stages, args.work_dir, args.verbose)
+    else:
+        with tempfile.TemporaryDirectory(prefix="icon-bench-") as work_dir:
+            results = run_benchmark(sizes, stages, work_dir, args.verbose)
+
+    print("\n".join(format_table(results)))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"💾 Đã lưu: {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        comparison = compare_results(baseline, results, args.threshold)
+        print("\n".join(format_comparison(comparison, baseline, results)))
+        if comparison["regressions"] and args.fail_on_regression:
+            sys.exit(1)
+    if any(entry["error"] for entry in results["sizes"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,705 @@
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from graphlib import TopologicalSorter
+from typing import Any, Callable, Dict, List, Optional
+
+from batches import get_icon_aliases, get_icon_code, get_icon_name, parse_batches, scan_batches
+import build_search_index
+import font_subset
+import instrument
+import precompress
+from build_cache import BuildCache, file_hash, json_hash, write_bytes_if_changed
+
+# Pipeline build không tương tác: merge → gộp glyph trùng → đơn giản hoá outline → enrich → split
+# → chỉ mục tìm kiếm → CSS → demo → font → shard font → SVG sprite → nén sẵn (.br/.gz).
+# Mỗi collection trong file cấu hình chạy các bước theo thứ tự phụ thuộc (DAG),
+# selection.json của từng batch chỉ được parse một lần và dùng chung giữa các bước.
+# Các collection độc lập chạy song song trong process pool.
+# Build tăng dần: khoá hash nội dung của từng bước được lưu trong .build-cache/,
+# bước nào có đầu vào không đổi sẽ được bỏ qua (--force để build lại toàn bộ).
+# Chỉ các bước cũ (stale) chạy lại; dữ liệu trong bộ nhớ chúng cần được lấy từ đầu ra đã có
+# (selection gộp đã lưu, font .ttf), chỉ các bước biến đổi trong bộ nhớ (simplify, enrich)
+# được áp dụng lại khi cần.
+# Khoá của CSS, demo, font, shard, sprite chỉ tính từ phần selection mà bước đó đọc (tên/mã/alias,
+# mã + outline): sửa tag hay mô tả chỉ làm chạy lại merge → enrich, split, index và nén.
+# Font mặc định gộp từ font IcoMoon của từng batch; "font_source": "selection" trong cấu hình
+# biên dịch thẳng từ SVG path (helper/font_compiler.py), không cần xuất font từ IcoMoon; chỉ khi đó
+# outline đã đơn giản hoá ("simplify": true) mới vào font, còn chunk/sprite luôn dùng outline sau bước này.
+#
+# Mỗi bước được đo (helper/instrument.py): thời gian, CPU, RSS của bước, byte đọc/ghi, icon/giây;
+# kết quả ghi ra build-report.json ở thư mục gốc (--report để đổi) kèm bảng tóm tắt.
+#
+# Ví dụ:
+#   python helper/build.py
+#   python helper/build.py --collection simpleicons --stages split,css
+#   python helper/build.py --force --trace-memory --profile .build-profile   # file .prof cho từng bước
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "build-config.json")
+DEFAULT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_REPORT = "build-report.json"
+REPORT_VERSION = 1
+
+# Bước → các bước phải chạy trước
+STAGE_DEPENDENCIES = {
+    "merge": [],
+    "dedup": ["merge"],
+    "simplify": ["dedup"],
+    "enrich": ["simplify"],
+    "split": ["enrich"],
+    "index": ["split"],
+    "css": ["dedup"],
+    "demo": ["dedup"],
+    "fonts": ["simplify"],
+    "shards": ["dedup", "fonts"],
+    "sprites": ["enrich"],
+    "compress": ["split", "index", "css", "demo", "sprites"],
+}
+
+# Các bước biến đổi selection gộp trong bộ nhớ, theo thứ tự
+SELECTION_CHAIN = ["merge", "dedup", "simplify", "enrich"]
+# Bước → trạng thái selection gộp (bước cuối của SELECTION_CHAIN đã áp dụng) cần có trước khi chạy
+STAGE_SELECTION = {
+    "dedup": "merge",
+    "simplify": "dedup",
+    "enrich": "simplify",
+    "split": "enrich",
+    "css": "dedup",
+    "demo": "dedup",
+    "shards": "dedup",
+    "sprites": "enrich",
+}
+
+
+def resolve_stages(requested: List[str]) -> List[str]:
+    """Thêm các bước phụ thuộc còn thiếu và sắp xếp theo thứ tự topo"""
+    unknown = [s for s in requested if s not in STAGE_DEPENDENCIES]
+    if unknown:
+        raise ValueError(f"Bước không hợp lệ: {', '.join(unknown)}")
+
+    needed = set()
+    pending = list(requested)
+    while pending:
+        stage = pending.pop()
+        if stage not in needed:
+            needed.add(stage)
+            pending.extend(STAGE_DEPENDENCIES[stage])
+
+    graph = {stage: [d for d in STAGE_DEPENDENCIES[stage] if d in needed] for stage in needed}
+    return list(TopologicalSorter(graph).static_order())
+
+
+def collection_path(ctx: Dict[str, Any], key: str, default: str = "") -> str:
+    """Đường dẫn đầu ra trong output_dir của collection"""
+    config = ctx["config"]
+    return os.path.join(ctx["output_dir"], config.get(key) or default)
+
+
+def input_hashes(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Hash nội dung selection.json, font của từng batch và file mapping (tính một lần cho mỗi lần build)"""
+    if "input_hashes" not in ctx:
+        mapping = ctx["mapping_path"]
+        ctx["input_hashes"] = {
+            "selections": [[b["name"], file_hash(b["selection_path"])] for b in ctx["batches"]],
+            "fonts": [[b["name"], file_hash(b["font_path"]) if b["font_path"] else None] for b in ctx["batches"]],
+            "mapping": file_hash(mapping) if mapping and os.path.isfile(mapping) else None,
+        }
+    return ctx["input_hashes"]
+
+
+def icon_geometry(icon: Dict[str, Any]) -> List[Any]:
+    data = icon.get("icon", {})
+    return [get_icon_code(icon), data.get("paths"), data.get("width"), data.get("attrs")]
+
+
+def icon_classes(icon: Dict[str, Any]) -> List[Any]:
+    return [get_icon_name(icon), get_icon_code(icon), get_icon_aliases(icon)]
+
+
+def stage_projection(config: Dict[str, Any], stage: str) -> Optional[Callable[[Dict[str, Any]], Any]]:
+    """
+    Phần selection gộp mà đầu ra của bước thực sự đọc (theo thứ tự icon); None nếu khoá của bước
+    không cần selection. Sửa tag/mô tả không đổi phần này nên font, shard, CSS, demo, sprite được giữ.
+    """
+    if stage in ("css", "demo"):
+        return lambda merged: [icon_classes(icon) for icon in merged["icons"]]
+    if stage == "shards":
+        return lambda merged: [get_icon_code(icon) for icon in merged["icons"]]
+    if stage == "sprites":
+        return lambda merged: [merged.get("height"), [[get_icon_name(icon)] + icon_geometry(icon)
+                                                      for icon in merged["icons"]]]
+    if stage == "fonts" and config.get("font_source") == "selection":
+        return lambda merged: [merged.get("height"), [icon_geometry(icon) for icon in merged["icons"]]]
+    if stage == "fonts" and config.get("dedup"):
+        # Font gộp từ batch: chỉ cần tập mã còn lại sau dedup
+        return lambda merged: sorted({get_icon_code(icon) for icon in merged["icons"]} - {None})
+    return None
+
+
+def projection_hash(ctx: Dict[str, Any], stage: str, keys: Dict[str, Optional[str]], cache: BuildCache) -> str:
+    """
+    Hash phần selection mà bước đọc. Được lưu trong cache theo khoá của trạng thái selection nguồn,
+    nên khi selection không đổi thì không cần parse; khi đổi thì các bước selection vừa chạy đã có sẵn dữ liệu.
+    """
+    need = selection_needed(ctx["config"], stage)
+    cached = cache.projection(stage, keys[need])
+    if cached is not None:
+        return cached
+    prepare_selection(ctx, need)
+    value = json_hash(stage_projection(ctx["config"], stage)(ctx["merged"]))
+    cache.set_projection(stage, keys[need], value)
+    return value
+
+
+def stage_keys(ctx: Dict[str, Any], projections: Dict[str, str]) -> Dict[str, Optional[str]]:
+    """
+    Khoá cache cho từng bước, tính từ hash nội dung đầu vào (không cần parse JSON).
+    Khoá của bước sau bao gồm khoá của bước trước nên thay đổi được lan truyền.
+    Bước có stage_projection chỉ dùng hash phần selection nó đọc (projections) thay cho khoá
+    của bước selection; chưa có hash đó thì khoá là None (xem projection_hash).
+    """
+    import maketag
+    config = ctx["config"]
+    hashes = input_hashes(ctx)
+
+    def projected(stage: str, *parts) -> Optional[str]:
+        if stage_projection(config, stage) is not None and stage not in projections:
+            return None
+        return json_hash([stage, projections.get(stage), *parts])
+
+    merge = json_hash(["merge", hashes["selections"], config.get("font_name"), config["prefix"],
+                       config.get("selection_encoding", "pretty")])
+    dedup = json_hash(["dedup", merge, config.get("dedup", False), config.get("dedup_scale")])
+    simplify = json_hash(["simplify", dedup, config.get("simplify", False), config.get("simplify_tolerance"),
+                          config.get("simplify_precision")])
+    enrich = json_hash(["enrich", simplify, maketag.load_enrichment_rules(), hashes["mapping"]])
+    keys = {
+        "merge": merge,
+        "dedup": dedup,
+        "simplify": simplify,
+        "enrich": enrich,
+        "split": json_hash(["split", enrich, config.get("chunk_size", 500), config.get("slim", False),
+                            config.get("encoding", "pretty"), config.get("geometry_scale")]),
+        "css": projected("css", config["prefix"], config.get("css_family"), config.get("font_name"),
+                         config.get("title"), config.get("font_shards", False), config.get("chunk_size", 500),
+                         config.get("css_mode", "standard"), config.get("css_chunks", False)),
+        "demo": projected("demo", config["prefix"], config.get("title"), config.get("css_file"),
+                          config.get("demo_mode", "cards")),
+        "sprites": projected("sprites", config["prefix"], config.get("chunk_size", 500),
+                             config.get("sprites", False), config.get("sprite_precision")),
+    }
+    if config.get("font_source") == "selection":
+        # Font biên dịch từ SVG path → chỉ phụ thuộc mã + outline sau simplify, không cần font của batch
+        keys["fonts"] = projected("fonts", "selection", config.get("font_name"), config.get("font_max_err"))
+    else:
+        # Font chỉ phụ thuộc dữ liệu selection khi bật dedup (bỏ glyph đã gộp)
+        keys["fonts"] = projected("fonts", hashes["fonts"], config.get("font_name"))
+    keys["shards"] = keys["fonts"] and projected("shards", keys["fonts"], config.get("chunk_size", 500),
+                                                 config.get("font_shards", False))
+    keys["index"] = json_hash(["index", keys["split"], build_search_index.INDEX_VERSION])
+    parts = [keys[s] for s in ("split", "index", "css", "demo", "sprites")]
+    keys["compress"] = json_hash(["compress", *parts, precompress.available_formats()]) if all(parts) else None
+    return keys
+
+
+def stage_outputs(ctx: Dict[str, Any], stage: str) -> List[str]:
+    """File đầu ra của bước; thiếu file nào thì bước phải chạy lại"""
+    font_base = os.path.join(ctx["output_dir"], ctx["config"].get("font_name", ctx["config"]["id"]))
+    # Bật dedup thì selection gộp được ghi sau bước dedup
+    selection = [collection_path(ctx, "selection_file")] if ctx["config"].get("selection_file") else []
+    dedup = bool(ctx["config"].get("dedup"))
+    outputs = {
+        "merge": [] if dedup else selection,
+        "dedup": selection if dedup else [],
+        "simplify": [],
+        "enrich": [],
+        "split": [os.path.join(collection_path(ctx, "chunks_dir", "chunks"), "metadata.json")],
+        "index": [os.path.join(collection_path(ctx, "chunks_dir", "chunks"), build_search_index.INDEX_FILE)],
+        "css": [collection_path(ctx, "css_file", "all.css")]
+               + ([collection_path(ctx, "css_dir", "css")] if ctx["config"].get("css_chunks") else []),
+        "demo": [collection_path(ctx, "demo_file", "demo.html")],
+        # WOFF2 cần brotli (xem scripts.compress_font)
+        "fonts": [f"{font_base}.ttf", f"{font_base}.woff"]
+                 + ([f"{font_base}.woff2"] if "brotli" in precompress.available_formats() else []),
+        "shards": [os.path.join(ctx["output_dir"], "shards")] if ctx["config"].get("font_shards") else [],
+        "sprites": [os.path.join(collection_path(ctx, "sprites_dir", "sprites"), "index.json")]
+                   if ctx["config"].get("sprites") else [],
+        "compress": [],
+    }
+    return outputs[stage]
+
+
+def selection_needed(config: Dict[str, Any], stage: str) -> Optional[str]:
+    """Trạng thái selection gộp mà bước cần, None nếu bước không dùng selection"""
+    if stage == "fonts":
+        if config.get("font_source") == "selection":
+            return "simplify"
+        # Font gộp từ batch chỉ cần selection để biết glyph nào đã bị dedup gộp
+        return "dedup" if config.get("dedup") else None
+    return STAGE_SELECTION.get(stage)
+
+
+def load_saved_selection(ctx, need: str) -> bool:
+    """Nạp selection gộp đã lưu (sau dedup) thay vì merge lại từ batch"""
+    config = ctx["config"]
+    # Bước dedup cần selection trước khi gộp, bản đã lưu thì đã gộp rồi
+    if not config.get("selection_file") or (need == "merge" and config.get("dedup")):
+        return False
+    path = collection_path(ctx, "selection_file")
+    if not os.path.isfile(path):
+        return False
+    import json_codec
+    ctx["merged"] = json_codec.load_file(path)
+    ctx["selection_stage"] = "dedup"
+    print(f"📂 [{config['id']}] Dùng selection gộp đã lưu: {path}")
+    return True
+
+
+def prepare_selection(ctx, need: Optional[str]):
+    """
+    Đưa selection gộp trong bộ nhớ tới trạng thái need khi các bước trước đó còn mới (không chạy lần này):
+    nạp selection đã lưu, nếu không có thì merge lại từ batch, rồi áp dụng lại các bước còn thiếu.
+    """
+    if need is None:
+        return
+    if ctx["merged"] is None and not load_saved_selection(ctx, need):
+        STAGE_RUNNERS["merge"](ctx)
+        ctx["selection_stage"] = "merge"
+    while SELECTION_CHAIN.index(ctx["selection_stage"]) < SELECTION_CHAIN.index(need):
+        stage = SELECTION_CHAIN[SELECTION_CHAIN.index(ctx["selection_stage"]) + 1]
+        print(f"🔁 [{ctx['config']['id']}] {stage}: áp dụng lại trong bộ nhớ")
+        STAGE_RUNNERS[stage](ctx)
+        ctx["selection_stage"] = stage
+
+
+def stage_merge(ctx):
+    merge_selections = importlib.import_module("merge-selections")
+    config = ctx["config"]
+    # Chỉ parse JSON của batch khi thật sự phải merge
+    ctx["batches"] = parse_batches(ctx["batches"])
+    merged, total = merge_selections.merge_selection_data(
+        ctx["batches"], name=config.get("font_name", config["id"]), prefix=config["prefix"]
+    )
+    ctx["merged"] = merged
+    if not config.get("dedup"):
+        save_selection(ctx)
+    return total
+
+
+def save_selection(ctx):
+    config = ctx["config"]
+    if not config.get("selection_file"):
+        return
+    merge_selections = importlib.import_module("merge-selections")
+    output_path = collection_path(ctx, "selection_file")
+    merge_selections.ensure_parent_dir(output_path)
+    merge_selections.save_merged(ctx["merged"], output_path, config.get("selection_encoding", "pretty"))
+    print(f"💾 [{config['id']}] Đã lưu selection gộp: {output_path}")
+
+
+def stage_dedup(ctx):
+    config = ctx["config"]
+    if not config.get("dedup"):
+        print(f"⏭️ [{config['id']}] dedup: chưa bật dedup trong cấu hình")
+        return 0
+    import dedup_icons
+    report = dedup_icons.dedup_icons(ctx["merged"], config.get("dedup_scale", dedup_icons.DEFAULT_SCALE))
+    print("\n".join(f"[{config['id']}] {line}" for line in dedup_icons.format_report(report)))
+    ctx["dedup_removed"] = report["removed_codes"]
+    save_selection(ctx)
+    return report["before"] - report["after"]
+
+
+def stage_simplify(ctx):
+    # Chỉ sửa dữ liệu trong bộ nhớ: selection gộp đã lưu vẫn giữ outline gốc
+    config = ctx["config"]
+    if not config.get("simplify"):
+        print(f"⏭️ [{config['id']}] simplify: chưa bật simplify trong cấu hình")
+        return 0
+    import simplify_outlines
+    report = simplify_outlines.simplify_icons(
+        ctx["merged"]["icons"], config.get("simplify_tolerance", simplify_outlines.DEFAULT_TOLERANCE),
+        config.get("simplify_precision", simplify_outlines.DEFAULT_PRECISION))
+    print("\n".join(f"[{config['id']}] {line}" for line in simplify_outlines.format_report(report, examples=3)))
+    return report["segments_before"] - report["segments_after"]
+
+
+def stage_enrich(ctx):
+    import maketag
+    count = maketag.enrich_icons(ctx["merged"], maketag.load_external_mapping(ctx["mapping_path"]))
+    if count is None:
+        raise RuntimeError("không nhận diện được cấu trúc selection để làm giàu dữ liệu")
+    return count
+
+
+def stage_split(ctx):
+    import split_selections
+    config = ctx["config"]
+    chunks_dir = collection_path(ctx, "chunks_dir", "chunks")
+    split_selections.write_chunks(
+        ctx["merged"], chunks_dir,
+        config.get("chunk_size", 500), config.get("slim", False), config.get("encoding", "pretty"),
+        config.get("geometry_scale"), search_index=build_search_index.INDEX_FILE
+    )
+    if ctx["report_encodings"]:
+        import json_codec
+        results = json_codec.measure(json_codec.chunk_values(chunks_dir))
+        print("\n".join(json_codec.format_report(config["id"], results)))
+    return len(ctx["merged"]["icons"])
+
+
+def stage_index(ctx):
+    # Đọc lại chunk đã ghi nên ordinal khớp đúng thứ tự icon trong chunk
+    config = ctx["config"]
+    metadata_path = os.path.join(collection_path(ctx, "chunks_dir", "chunks"), "metadata.json")
+    output_path, count, size = build_search_index.write_index(metadata_path)
+    print(f"🔎 [{config['id']}] Chỉ mục tìm kiếm: {count} icon → {output_path} ({size / 1024:.1f} KB)")
+    return count
+
+
+def stage_css(ctx):
+    import make_css
+    config = ctx["config"]
+    prefix = config["prefix"]
+    family = config.get("css_family") or prefix.rstrip('-')
+    rules, prefix = make_css.collect_css_rules([ctx["merged"]], family, prefix_override=prefix)
+    css_path = collection_path(ctx, "css_file", "all.css")
+    font_name = config.get("font_name", f"{family}-all")
+    shards = None
+    if config.get("font_shards"):
+        # Cùng cách chia với bước shards: shard i ↔ chunk i
+        code_sets = font_subset.chunk_code_sets(ctx["merged"]["icons"], config.get("chunk_size", 500))
+        shards = [(f"shards/{font_name}-{i}.woff2", font_subset.unicode_range(codes))
+                  for i, codes in enumerate(code_sets) if codes]
+    title = config.get("title", config["id"])
+    compact = config.get("css_mode") == "compact"
+    if compact:
+        make_css.write_compact_css(css_path, rules, family, prefix, title, font_name, shards)
+    else:
+        make_css.write_css(css_path, rules, family, prefix, title, font_name, shards)
+    print(f"✅ [{config['id']}] Đã tạo CSS{' (compact)' if compact else ''}: {css_path}")
+
+    with open(css_path, "r", encoding="utf-8") as f:
+        full_css = f.read()
+    chunk_texts = []
+    if config.get("css_chunks"):
+        # core.css nằm trong css/ nên đường dẫn font lùi một cấp
+        head = make_css.compact_head_css(family, prefix, f"../{font_name}",
+                                         [(f"../{url}", urange) for url, urange in shards] if shards else None)
+        chunk_rules = make_css.chunk_css_rules(ctx["merged"]["icons"], prefix, config.get("chunk_size", 500))
+        paths = make_css.write_chunk_css(collection_path(ctx, "css_dir", make_css.CHUNK_CSS_DIR), chunk_rules, head)
+        print(f"✅ [{config['id']}] Đã tạo {len(chunk_rules)} CSS theo chunk")
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                chunk_texts.append(f.read())
+
+    # Mọi class phải trỏ đúng codepoint, cả trong all.css lẫn core.css + các chunk_N.css
+    errors = make_css.verify_css(rules, [full_css])
+    if chunk_texts:
+        errors += make_css.verify_css(rules, chunk_texts)
+    if errors:
+        raise RuntimeError(f"CSS không khớp codepoint ({len(errors)} lỗi): {', '.join(errors[:5])}")
+
+    if compact or chunk_texts:
+        report = {"thường": make_css.standard_css(rules, family, prefix, title, font_name, shards),
+                  os.path.basename(css_path): full_css}
+        if len(chunk_texts) > 1:
+            report["core + chunk_0"] = chunk_texts[0] + chunk_texts[1]
+        print("\n".join(f"[{config['id']}] {line}" for line in make_css.css_size_report(report)))
+    return len(rules)
+
+
+def stage_demo(ctx):
+    import create_file_demo
+    config = ctx["config"]
+    icons = create_file_demo.icons_from_data(ctx["merged"], prefix=config["prefix"])
+    ok = create_file_demo.generate_icon_demo(
+        collection_path(ctx, "css_file", "all.css"), None,
+        collection_path(ctx, "demo_file", "demo.html"),
+        config.get("title", config["id"]), icons=icons, mode=config.get("demo_mode", "cards")
+    )
+    if not ok:
+        raise RuntimeError("không tạo được file demo")
+    return len(icons)
+
+
+def compile_selection_font(ctx, ttf_path: str) -> bytes:
+    """Biên dịch font từ SVG path trong selection đã gộp (font_source: "selection")"""
+    import font_compiler
+    config = ctx["config"]
+    merged = ctx["merged"]
+    ttf_data, report = font_compiler.build_font(
+        merged["icons"], config.get("font_name", config["id"]), merged.get("height", font_compiler.DEFAULT_HEIGHT),
+        workers=config.get("font_workers"), max_err=config.get("font_max_err", font_compiler.MAX_ERR))
+    if report["errors"]:
+        raise RuntimeError(f"{len(report['errors'])} glyph lỗi: {'; '.join(report['errors'][:3])}")
+    write_bytes_if_changed(ttf_path, ttf_data)
+    print(f"🔤 [{config['id']}] Biên dịch {report['glyphs']} glyph từ SVG path: {len(ttf_data):,} B ({report['seconds']}s)")
+    return ttf_data
+
+
+def stage_fonts(ctx):
+    import scripts
+    config = ctx["config"]
+    font_name = config.get("font_name", config["id"])
+    ttf_path = os.path.join(ctx["output_dir"], f"{font_name}.ttf")
+    if config.get("font_source") == "selection":
+        ttf_data = compile_selection_font(ctx, ttf_path)
+        if not scripts.compress_font(ttf_path, os.path.join(ctx["output_dir"], font_name), ttf_data,
+                                     workers=config.get("font_workers")):
+            raise RuntimeError("nén font thất bại")
+        return len(ctx["merged"]["icons"])
+
+    font_paths = [b["font_path"] for b in ctx["batches"]]
+    missing = [b["name"] for b in ctx["batches"] if not b["font_path"]]
+    if missing:
+        raise RuntimeError(f"thiếu font trong batch: {', '.join(missing)}")
+
+    ttf_data = scripts.merge_fonts(font_paths, ctx["output_dir"], ttf_path)
+    if ttf_data is None:
+        raise RuntimeError("merge font thất bại")
+    removed = ctx.get("dedup_removed")
+    if removed is None and config.get("dedup"):
+        # dedup không chạy lần này: glyph đã gộp là glyph không còn trong selection đã lưu
+        font_codes = set(scripts.font_codes(ttf_data))
+        removed = font_codes - {get_icon_code(icon) for icon in ctx["merged"]["icons"]}
+    else:
+        removed = set(removed or ())
+        font_codes = set(scripts.font_codes(ttf_data)) if removed else set()
+    if removed & font_codes:
+        # Bỏ glyph của các icon đã gộp thành alias ở bước dedup
+        before = len(ttf_data)
+        ttf_data = scripts.drop_glyphs(ttf_data, font_codes - removed)
+        write_bytes_if_changed(ttf_path, ttf_data)
+        print(f"🧬 [{config['id']}] Font sau dedup: {before:,} → {len(ttf_data):,} B (giảm {before - len(ttf_data):,} B)")
+    if not scripts.compress_font(ttf_path, os.path.join(ctx["output_dir"], font_name), ttf_data,
+                                 workers=config.get("font_workers")):
+        raise RuntimeError("nén font thất bại")
+    return len(font_paths)
+
+
+def stage_shards(ctx):
+    config = ctx["config"]
+    if not config.get("font_shards"):
+        print(f"⏭️ [{config['id']}] shards: chưa bật font_shards trong cấu hình")
+        return 0
+    import scripts
+    font_name = config.get("font_name", config["id"])
+    ttf_path = os.path.join(ctx["output_dir"], f"{font_name}.ttf")
+    if not os.path.isfile(ttf_path):
+        raise RuntimeError(f"chưa có font gộp: {ttf_path}")
+    code_sets = font_subset.chunk_code_sets(ctx["merged"]["icons"], config.get("chunk_size", 500))
+    shards = scripts.shard_font(ttf_path, code_sets, os.path.join(ctx["output_dir"], "shards"), font_name)
+    return len(shards)
+
+
+def stage_sprites(ctx):
+    config = ctx["config"]
+    if not config.get("sprites"):
+        print(f"⏭️ [{config['id']}] sprites: chưa bật sprites trong cấu hình")
+        return 0
+    import make_sprites
+    result = make_sprites.make_sprites(
+        ctx["merged"]["icons"], collection_path(ctx, "sprites_dir", make_sprites.SPRITES_DIR), config["prefix"],
+        ctx["merged"].get("height", make_sprites.DEFAULT_HEIGHT), config.get("chunk_size", 500),
+        precision=config.get("sprite_precision"), workers=config.get("sprite_workers")
+    )
+    print("\n".join(f"[{config['id']}] {line}" for line in make_sprites.format_report(result)))
+    return len(result["files"])
+
+
+def stage_compress(ctx):
+    # File nén đã mới hơn file gốc được bỏ qua, nên chỉ các file vừa thay đổi bị nén lại.
+    # Selection gộp (hàng MB, brotli-11 mất hàng chục giây) là đầu vào của các bước build: không nén,
+    # giống extracted_folder
+    config = ctx["config"]
+    skip = [collection_path(ctx, "selection_file")] if config.get("selection_file") else []
+    results = precompress.precompress([ctx["output_dir"]], workers=config.get("compress_workers"), skip=skip)
+    print("\n".join(f"[{config['id']}] {line}" for line in precompress.format_report(results, ctx["root"], top=3)))
+    return len(results)
+
+
+STAGE_RUNNERS = {
+    "merge": stage_merge,
+    "dedup": stage_dedup,
+    "simplify": stage_simplify,
+    "enrich": stage_enrich,
+    "split": stage_split,
+    "index": stage_index,
+    "css": stage_css,
+    "demo": stage_demo,
+    "fonts": stage_fonts,
+    "shards": stage_shards,
+    "sprites": stage_sprites,
+    "compress": stage_compress,
+}
+
+
+def stage_icon_count(ctx: Dict[str, Any]) -> int:
+    """Số icon bước vừa xử lý: selection đã gộp, hoặc tổng icon của các batch nếu chưa merge"""
+    if ctx["merged"] is not None:
+        return len(ctx["merged"].get("icons", []))
+    return sum(len(b["data"].get("icons", [])) for b in ctx["batches"] if b.get("data"))
+
+
+def run_collection(config: Dict[str, Any], stages: List[str], root: str, force: bool = False,
+                   report_encodings: bool = False, profile_dir: Optional[str] = None,
+                   trace_memory: bool = False) -> Dict[str, Any]:
+    """
+    Chạy các bước cho một collection (chạy trong process con). Trả về tóm tắt kết quả
+    kèm số liệu đo của từng bước (instrument.measure).
+    """
+    started = time.perf_counter()
+    summary = {"id": config["id"], "stages": {}, "skipped": [], "error": None, "warning": None}
+
+    batch_root = os.path.join(root, config["batch_root"])
+    if not os.path.isdir(batch_root):
+        # Batch IcoMoon không nằm trong repo (ví dụ chỉ có file đã build): bỏ qua, không coi là lỗi
+        summary["warning"] = f"không tìm thấy thư mục batch: {batch_root}, bỏ qua collection"
+        summary["skipped"] = list(stages)
+        summary["seconds"] = round(time.perf_counter() - started, 3)
+        return summary
+
+    ctx = {
+        "config": config,
+        "root": root,
+        "output_dir": os.path.join(root, config["output_dir"]),
+        "batches": scan_batches(batch_root),
+        "mapping_path": os.path.join(root, config["mapping"]) if config.get("mapping") else None,
+        "merged": None,
+        "selection_stage": None,
+        "report_encodings": report_encodings,
+    }
+    if not ctx["batches"]:
+        summary["error"] = f"không có batch hợp lệ trong {batch_root}"
+        return summary
+    os.makedirs(ctx["output_dir"], exist_ok=True)
+
+    cache = BuildCache(root, config["id"])
+    projections = {}
+    keys = stage_keys(ctx, projections)
+    # Chỉ các bước cũ (stale) chạy. Khoá của bước sau chứa khoá của bước trước nên bước phía sau
+    # một bước cũ cũng cũ, trừ khi phần selection nó đọc không đổi (stage_projection);
+    # bước phía trước còn mới thì không chạy lại (xem prepare_selection).
+    for stage in stages:
+        profile_path = os.path.join(profile_dir, f"{config['id']}-{stage}.prof") if profile_dir else None
+        try:
+            if keys[stage] is None:
+                # Thứ tự topo: các bước phụ thuộc đã có khoá, chỉ còn thiếu hash selection của chính bước này
+                projections[stage] = projection_hash(ctx, stage, keys, cache)
+                keys = stage_keys(ctx, projections)
+            if not force and cache.is_fresh(stage, keys[stage], stage_outputs(ctx, stage)):
+                summary["skipped"].append(stage)
+                print(f"⏭️ [{config['id']}] {stage}: không có thay đổi, bỏ qua")
+                continue
+            print(f"▶️ [{config['id']}] {stage}")
+            prepare_selection(ctx, selection_needed(config, stage))
+            with instrument.measure(ctx["output_dir"], profile_path, trace_memory) as metrics:
+                result = STAGE_RUNNERS[stage](ctx)
+                metrics["icons"] = stage_icon_count(ctx)
+        except (Exception, SystemExit) as e:
+            summary["error"] = f"{stage}: {e}"
+            break
+        if stage in SELECTION_CHAIN:
+            ctx["selection_stage"] = stage
+        summary["stages"][stage] = {"items": result, **metrics}
+        cache.mark(stage, keys[stage])
+
+    cache.save()
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def load_config(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build toàn bộ collection icon từ file cấu hình (không tương tác)')
+    parser.add_argument('--config', default=DEFAULT_CONFIG, help='File cấu hình build (mặc định: helper/build-config.json)')
+    parser.add_argument('--root', default=DEFAULT_ROOT, help='Thư mục gốc của site; đường dẫn trong cấu hình tính từ đây')
+    parser.add_argument('--collection', action='append', help='Chỉ build collection này (có thể lặp lại)')
+    parser.add_argument('--stages', help='Danh sách bước, phân cách bởi dấu phẩy (ví dụ: split,css)')
+    parser.add_argument('--workers', type=int, help='Số process chạy song song (mặc định: theo cấu hình hoặc số CPU)')
+    parser.add_argument('--force', action='store_true', help='Bỏ qua cache, build lại mọi bước')
+    parser.add_argument('--report-encodings', action='store_true',
+                        help='Sau bước split, so sánh kích thước/thời gian parse của các kiểu mã hoá chunk')
+    parser.add_argument('--report', help=f'File báo cáo JSON (mặc định: {DEFAULT_REPORT} ở thư mục gốc)')
+    parser.add_argument('--profile', metavar='DIR', help='Ghi file cProfile <collection>-<bước>.prof cho từng bước vào DIR')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Đo peak bộ nhớ Python của từng bước bằng tracemalloc (chậm hơn)')
+    args = parser.parse_args()
+
+    print("=== 🏗️ BUILD ICON COLLECTIONS ===")
+    config = load_config(args.config)
+
+    collections = config.get("collections", [])
+    if args.collection:
+        collections = [c for c in collections if c["id"] in args.collection]
+    if not collections:
+        print("❌ Không có collection nào để build.")
+        sys.exit(1)
+
+    requested = args.stages.split(',') if args.stages else config.get("stages", list(STAGE_DEPENDENCIES))
+    try:
+        stages = resolve_stages([s.strip() for s in requested if s.strip()])
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"🔗 Thứ tự bước: {' → '.join(stages)}")
+    print(f"📦 Collection: {', '.join(c['id'] for c in collections)}")
+
+    workers = args.workers or config.get("workers") or min(len(collections), os.cpu_count() or 1)
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_collection, c, stages, args.root, args.force, args.report_encodings,
+                               args.profile and os.path.abspath(args.profile), args.trace_memory): c["id"]
+                   for c in collections}
+        for future in as_completed(futures):
+            results.append(future.result())
+
+    print("\n" + "=" * 50)
+    failed = 0
+    for summary in sorted(results, key=lambda r: r["id"]):
+        if summary["error"]:
+            failed += 1
+            print(f"❌ {summary['id']}: {summary['error']}")
+        elif summary["warning"]:
+            print(f"⚠️ {summary['id']}: {summary['warning']}")
+        else:
+            done = ', '.join(f"{s} {info['seconds']}s" for s, info in summary["stages"].items()) or "không có gì thay đổi"
+            skipped = f" | bỏ qua: {', '.join(summary['skipped'])}" if summary["skipped"] else ""
+            print(f"✅ {summary['id']} ({summary['seconds']}s): {done}{skipped}")
+    total_seconds = time.perf_counter() - started
+    table = instrument.format_table(sorted(results, key=lambda r: r["id"]))
+    if table:
+        print("\n".join(table))
+    print(f"⏱️ Tổng thời gian: {total_seconds:.2f}s")
+
+    report_path = args.report or os.path.join(args.root, DEFAULT_REPORT)
+    report = {
+        "version": REPORT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": os.path.abspath(args.config),
+        "stages": stages,
+        "workers": workers,
+        "seconds": round(total_seconds, 3),
+        "collections": sorted(results, key=lambda r: r["id"]),
+    }
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"📊 Báo cáo build: {report_path}")
+    print("=" * 50)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+# Cache build bền vững (persistent) dựa trên hash nội dung.
+# Mỗi collection có một file .build-cache/<id>.json ở thư mục gốc site:
+# {
+#   "version": 1,
+#   "stages": { "split": "<khoá>", "fonts": "<khoá>", ... },
+#   "projections": { "fonts": ["<khoá selection nguồn>", "<hash>"], ... }
+# }
+# Khoá của một bước được tính từ hash nội dung đầu vào (selection.json, font
+# của từng batch, bộ quy tắc maketag, tham số cấu hình). Bước có khoá không
+# đổi và đủ file đầu ra thì được bỏ qua.
+# "projections" nhớ hash phần selection mà một bước đọc (ví dụ mã + outline cho font)
+# ứng với khoá selection nguồn, để kiểm tra bước đó không cần parse lại selection.
+
+# Tăng khi định dạng đầu ra của một bước thay đổi (cache cũ bị bỏ, build lại toàn bộ)
+CACHE_VERSION = 2
+CACHE_DIR = ".build-cache"
+
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 nội dung file (đọc theo khối để không tốn bộ nhớ)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def json_hash(value: Any) -> str:
+    """SHA-256 của một giá trị JSON (key được sắp xếp để ổn định)"""
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def write_if_changed(path: str, content: str) -> bool:
+    """
+    Chỉ ghi file khi nội dung khác với file hiện có.
+    File không đổi giữ nguyên byte và mtime, nên cache trình duyệt/IndexedDB vẫn hợp lệ.
+    Trả về True nếu file được ghi.
+    """
+    return write_bytes_if_changed(path, content.encode("utf-8"))
+
+
+def write_bytes_if_changed(path: str, data: bytes) -> bool:
+    """Như write_if_changed nhưng cho dữ liệu nhị phân"""
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+
+    with open(path, "wb") as f:
+        f.write(data)
+    return True
+
+
+def write_json_if_changed(path: str, value: Any, **dump_kwargs) -> bool:
+    """Như write_if_changed nhưng cho dữ liệu JSON (tham số giống json.dumps)"""
+    dump_kwargs.setdefault("ensure_ascii", False)
+    return write_if_changed(path, json.dumps(value, **dump_kwargs))
+
+
+def files_equal(path_a: str, path_b: str, block_size: int = 1 << 20) -> bool:
+    """So sánh nội dung hai file theo khối (không đọc toàn bộ vào bộ nhớ)"""
+    try:
+        if os.path.getsize(path_a) != os.path.getsize(path_b):
+            return False
+        with open(path_a, "rb") as fa, open(path_b, "rb") as fb:
+            while True:
+                block_a, block_b = fa.read(block_size), fb.read(block_size)
+                if block_a != block_b:
+                    return False
+                if not block_a:
+                    return True
+    except FileNotFoundError:
+        return False
+
+
+def replace_if_changed(tmp_path: str, path: str) -> bool:
+    """
+    Dùng cho file được ghi theo luồng ra tmp_path: thay file đích nếu nội dung khác,
+    ngược lại xoá file tạm. Trả về True nếu file đích được ghi.
+    """
+    if files_equal(tmp_path, path):
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, path)
+    return True
+
+
+class BuildCache:
+    """Lưu khoá hash của từng bước build cho một collection"""
+
+    def __init__(self, root_dir: str, collection_id: str):
+        self.path = os.path.join(root_dir, CACHE_DIR, f"{collection_id}.json")
+        self.stages: Dict[str, str] = {}
+        self.projections: Dict[str, List[str]] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self.stages = data.get("stages", {})
+                self.projections = data.get("projections", {})
+        except (OSError, json.JSONDecodeError):
+            pass
+
+    def is_fresh(self, stage: str, key: str, outputs: Iterable[str] = ()) -> bool:
+        """Bước còn mới nếu khoá trùng và mọi file đầu ra vẫn tồn tại"""
+        return self.stages.get(stage) == key and all(os.path.exists(p) for p in outputs)
+
+    def mark(self, stage: str, key: str):
+        self.stages[stage] = key
+
+    def projection(self, stage: str, source: str) -> Optional[str]:
+        """Hash phần selection của bước đã tính cho khoá selection nguồn source, None nếu chưa có"""
+        entry = self.projections.get(stage)
+        return entry[1] if entry and entry[0] == source else None
+
+    def set_projection(self, stage: str, source: str, value: str):
+        self.projections[stage] = [source, value]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        write_json_if_changed(self.path, {"version": CACHE_VERSION, "stages": self.stages,
+                                          "projections": self.projections},
+                              indent=2, sort_keys=True)
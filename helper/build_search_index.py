@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import json_codec
+from build_cache import write_json_if_changed
+
+# Chỉ mục đảo ngược (inverted index) cho tìm kiếm phía trình duyệt.
+# Mỗi collection có một file search-index.json dạng:
+# {
+#   "version": 2,
+#   "count": <số icon>,
+#   "gram": 3,
+#   "trigram": { "arr": [12, 1, 40, ...] } # trigram của từng trường văn bản
+# }
+# Truy vấn ngắn hơn gram ký tự không dùng chỉ mục: scripts.js quét toàn bộ để giữ nguyên
+# kiểu khớp chuỗi con (includes) như khi không có chỉ mục.
+# Posting list là danh sách số thứ tự (ordinal) icon đã sắp xếp, lưu dạng delta
+# (phần tử đầu là giá trị thật, các phần tử sau là khoảng cách tới phần tử trước).
+# Posting list phủ hơn một nửa số icon được lưu dạng phần bù: {"x": [delta...]}
+# là danh sách các ordinal KHÔNG chứa token.
+# Ordinal trùng với thứ tự icon trong các chunk mà scripts.js hiển thị. Font Awesome
+# (icons-optimized.json / styles/) chưa dùng chỉ mục nên không được dựng.
+# Trong pipeline build (helper/build.py), chỉ mục là bước "index" chạy sau "split".
+#
+# Ví dụ:
+#   python helper/build_search_index.py
+#   python helper/build_search_index.py --collection simpleicons
+
+INDEX_VERSION = 2
+INDEX_FILE = 'search-index.json'
+GRAM_SIZE = 3
+
+
+def load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def extract_icomoon_fields(icon: Dict) -> List[str]:
+    """Trích các trường tìm kiếm giống hệt bộ lọc trong scripts.js::handleSearch"""
+    if 'n' in icon:
+        # Chunk rút gọn search_N.json
+        return ([icon['n']] + list(icon.get('t') or []) + [icon.get('d', ''), icon.get('c', '')]
+                + list(icon.get('al') or []))
+    name = icon.get('properties', {}).get('name') or icon.get('name') or ''
+    terms = icon.get('icon', {}).get('tags') or icon.get('tags') or []
+    return ([name] + list(terms) + list(icon.get('tags') or []) + [icon.get('description', ''), icon.get('category', '')]
+            + list(icon.get('properties', {}).get('aliases') or []))
+
+
+def load_lazy_records(metadata_path: str) -> List[List[str]]:
+    """Đọc toàn bộ chunk theo thứ tự trong metadata.json (ưu tiên chunk rút gọn)"""
+    metadata = load_json(metadata_path)
+    base_dir = os.path.dirname(metadata_path)
+    records = []
+    for entry in metadata.get('chunks', []):
+        chunk_path = os.path.join(base_dir, entry.get('search') or entry['file'])
+        chunk = json_codec.load_file(chunk_path)
+        records.extend(extract_icomoon_fields(icon) for icon in chunk.get('icons', []))
+    return records
+
+
+def iter_grams(text: str, size: int = GRAM_SIZE):
+    """Sinh các n-gram của một chuỗi (theo code point, giống Array.from() bên JS)"""
+    chars = list(text)
+    for i in range(len(chars) - size + 1):
+        yield ''.join(chars[i:i + size])
+
+
+def delta_encode(ordinals: List[int]) -> List[int]:
+    previous = 0
+    encoded = []
+    for value in ordinals:
+        encoded.append(value - previous)
+        previous = value
+    return encoded
+
+
+def encode_postings(ordinals: set, count: int):
+    """Mã hoá posting list: danh sách delta, hoặc phần bù nếu list quá dày"""
+    if len(ordinals) > count // 2:
+        return {"x": delta_encode([i for i in range(count) if i not in ordinals])}
+    return delta_encode(sorted(ordinals))
+
+
+def build_index(records: List[List[str]]) -> Dict:
+    """
+    Dựng chỉ mục trigram cho danh sách icon.
+    records[i] là danh sách chuỗi cần tìm kiếm của icon có ordinal i.
+    """
+    trigram_postings = defaultdict(set)
+
+    for ordinal, fields in enumerate(records):
+        for field in fields:
+            if not field:
+                continue
+            text = str(field).lower()
+            for gram in iter_grams(text):
+                trigram_postings[gram].add(ordinal)
+
+    count = len(records)
+    return {
+        "version": INDEX_VERSION,
+        "count": count,
+        "gram": GRAM_SIZE,
+        "trigram": {gram: encode_postings(p, count) for gram, p in sorted(trigram_postings.items())}
+    }
+
+
+def find_collections(root_dir: str) -> List[Tuple[str, Dict]]:
+    """
+    Lấy các collection từ collections-database.json, chỉ giữ các family
+    được công bố trong collections-manifest.json.
+    """
+    manifest = load_json(os.path.join(root_dir, 'data', 'collections-manifest.json'))
+    database = load_json(os.path.join(root_dir, 'data', 'collections-database.json'))
+    families = {entry['id'] for entry in manifest}
+    return [(cid, config) for cid, config in database.items() if config.get('family') in families]
+
+
+def write_index(metadata_path: str) -> Tuple[str, int, int]:
+    """
+    Dựng search-index.json từ các chunk khai báo trong metadata.json, ghi cạnh metadata
+    (chỉ ghi lại khi nội dung thay đổi). Trả về (đường dẫn, số icon, số byte).
+    """
+    records = load_lazy_records(metadata_path)
+    output_path = os.path.join(os.path.dirname(metadata_path), INDEX_FILE)
+    write_json_if_changed(output_path, build_index(records), separators=(',', ':'))
+    return output_path, len(records), os.path.getsize(output_path)
+
+
+def build_collection_index(root_dir: str, collection_id: str, config: Dict):
+    """Dựng và ghi search-index.json cho một collection. Trả về (đường dẫn, số icon, số byte)."""
+    if not config.get('metadata'):
+        print(f"⚠️ Bỏ qua {collection_id}: chỉ hỗ trợ collection chia chunk (có metadata)")
+        return None
+
+    metadata_path = os.path.join(root_dir, config['metadata'])
+    result = write_index(metadata_path)
+
+    # Ghi đường dẫn chỉ mục vào metadata.json để scripts.js biết mà dùng
+    # (split_selections.write_chunks giữ key này khi chia lại chunk)
+    metadata = load_json(metadata_path)
+    metadata['search_index'] = INDEX_FILE
+    write_json_if_changed(metadata_path, metadata, indent=2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tạo chỉ mục tìm kiếm (trigram) cho các collection')
+    parser.add_argument('--root', default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        help='Thư mục gốc của site (chứa thư mục data/)')
+    parser.add_argument('--collection', action='append', help='Chỉ dựng cho collection này (có thể lặp lại)')
+    args = parser.parse_args()
+
+    print("=== 🔎 TẠO CHỈ MỤC TÌM KIẾM ===")
+    collections = find_collections(args.root)
+    if args.collection:
+        collections = [(cid, c) for cid, c in collections if cid in args.collection]
+    if not collections:
+        print("❌ Không tìm thấy collection nào.")
+        sys.exit(1)
+
+    for collection_id, config in collections:
+        try:
+            result = build_collection_index(args.root, collection_id, config)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ {collection_id}: lỗi khi dựng chỉ mục → {e}")
+            continue
+        if result:
+            output_path, count, size = result
+            print(f"✅ {collection_id}: {count} icon → {output_path} ({size / 1024:.1f} KB)")
+
+    print("\n🎉 Hoàn tất!")
+
+
+if __name__ == "__main__":
+    main()
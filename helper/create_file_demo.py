@@ -3,6 +3,7 @@ import os
 import argparse
 import sys
 import json
+import html
 
 def extract_icons_from_json(json_file_path):
     """
@@ -23,6 +24,12 @@ def extract_icons_from_json(json_file_path):
         print(f"Lỗi khi đọc file JSON: {str(e)}")
         return None
     
+    return icons_from_data(data)
+
+def icons_from_data(data, prefix='icons-'):
+    """
+    Trích xuất danh sách icons từ dữ liệu selection đã parse sẵn
+    """
     icons = []
     
     # Kiểm tra cấu trúc JSON (giả định có mảng 'icons' hoặc chính nó là mảng)
@@ -47,14 +54,13 @@ def extract_icons_from_json(json_file_path):
             unicode = f"{code_int:x}" 
             
             # Tạo label đẹp từ tên icon
-            label = name.replace('_', ' ').replace('-', ' ')
-            label = ' '.join(word.capitalize() for word in label.split())
+            label = make_label(name)
             
             icons.append({
                 'name': name,
                 'label': label,
                 'unicode': unicode,
-                'class': f'icons-{name}' # Giả định tiền tố class vẫn là 'icons-'
+                'class': f'{prefix}{name}' # Mặc định tiền tố class là 'icons-'
             })
         except KeyError as e:
             print(f"Cảnh báo: Bỏ qua một icon do thiếu key: {e} trong mục JSON.")
@@ -62,71 +68,21 @@ def extract_icons_from_json(json_file_path):
             
     return icons
 
-def generate_icon_demo(input_css_file, input_json_file, output_html_file, collection_title="Icon Collection"):
-    """
-    Tạo file HTML demo hiển thị tất cả các icon từ file JSON.
-    """
-    
-    # 1. Đọc và trích xuất icons từ JSON (Ưu tiên nguồn dữ liệu chính xác)
-    icons = extract_icons_from_json(input_json_file)
-    if not icons:
-        print("Lỗi: Không thể trích xuất icon từ file JSON. Hủy tạo file demo.")
-        return False
-
-    print(f"✅ Đã trích xuất {len(icons)} icons duy nhất từ JSON.")
-    
-    # 2. Kiểm tra file CSS (Chỉ để lấy tên file cho HTML link)
-    if not os.path.exists(input_css_file):
-        print(f"Cảnh báo: Không tìm thấy file CSS: {input_css_file}. File HTML demo sẽ không hiển thị icon đúng cách.")
-
-    # --- TẠO CHUỖI ICON HTML ---
-    icon_cards_html = []
-    for icon in icons:
-        # Xác định category (Ứng dụng/Công cụ)
-        category = 'apps' if 'app' in icon['name'].lower() or 'app' in icon['label'].lower() else 'tools'
-        
-        # Tạo HTML cho thẻ icon
-        card_html = f"""
-        <div class="icon-card" data-name="{icon['name']}" data-label="{icon['label']}" data-category="{category}">
-            <i class="{icon['class']}"></i>
-            <div class="icon-name">{icon['name']}</div>
-            <div class="icon-label">{icon['label']}</div>
-            <div class="tooltip">Nhấp để sao chép mã</div>
-        </div>
-        """
-        icon_cards_html.append(card_html)
-    
-    # Ghép tất cả các thẻ icon lại thành một chuỗi duy nhất
-    icon_grid_content = ''.join(icon_cards_html)
-    # --------------------------------------------------------
-    
-    # Lấy tên file CSS cơ sở để nhúng vào HTML
-    css_file_name = os.path.basename(input_css_file)
-
-    # Tạo nội dung HTML chính
-    html_content = f"""<!DOCTYPE html>
-<html lang="vi">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Collection Demo - {collection_title}</title>
-    <link rel="stylesheet" href="{css_file_name}">
-    <style>
-        * {{
+DEMO_STYLE = """        * {
             box-sizing: border-box;
             margin: 0;
             padding: 0;
-        }}
+        }
         
-        body {{
+        body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
             background-color: #f5f5f5;
             color: #333;
             padding: 20px;
             line-height: 1.6;
-        }}
+        }
         
-        .header {{
+        .header {
             text-align: center;
             margin-bottom: 30px;
             padding: 20px;
@@ -134,25 +90,25 @@ def generate_icon_demo(input_css_file, input_json_file, output_html_file, collec
             color: white;
             border-radius: 12px;
             box-shadow: 0 4px 20px rgba(0,0,0,0.1);
-        }}
+        }
         
-        .header h1 {{
+        .header h1 {
             font-size: 2.5rem;
             margin-bottom: 10px;
-        }}
+        }
         
-        .header p {{
+        .header p {
             font-size: 1.1rem;
             opacity: 0.9;
-        }}
+        }
         
-        .search-container {{
+        .search-container {
             max-width: 800px;
             margin: 0 auto 30px;
             position: relative;
-        }}
+        }
         
-        .search-container input {{
+        .search-container input {
             width: 100%;
             padding: 15px 20px;
             border: none;
@@ -160,29 +116,29 @@ def generate_icon_demo(input_css_file, input_json_file, output_html_file, collec
             font-size: 16px;
             box-shadow: 0 2px 10px rgba(0,0,0,0.1);
             transition: all 0.3s;
-        }}
+        }
         
-        .search-container input:focus {{
+        .search-container input:focus {
             outline: none;
             box-shadow: 0 2px 15px rgba(102, 126, 234, 0.4);
-        }}
+        }
         
-        .stats {{
+        .stats {
             text-align: center;
             margin: 20px 0;
             font-size: 1.2rem;
             color: #555;
-        }}
+        }
         
-        .icon-grid {{
+        .icon-grid {
             display: grid;
             grid-template-columns: repeat(auto-fill, minmax(150px, 1fr));
             gap: 20px;
             max-width: 1400px;
             margin: 0 auto;
-        }}
+        }
         
-        .icon-card {{
+        .icon-card {
             background: white;
             border-radius: 12px;
             padding: 20px;
@@ -192,36 +148,36 @@ def generate_icon_demo(input_css_file, input_json_file, output_html_file, collec
             cursor: pointer;
             position: relative;
             overflow: hidden;
-        }}
+        }
         
-        .icon-card:hover {{
+        .icon-card:hover {
             transform: translateY(-5px);
             box-shadow: 0 8px 25px rgba(0,0,0,0.15);
-        }}
+        }
         
-        .icon-card i {{
+        .icon-card i {
             font-size: 2.5rem;
             margin-bottom: 15px;
             color: #4a6cf7;
             display: block;
-        }}
+        }
         
-        .icon-name {{
+        .icon-name {
             font-weight: 600;
             font-size: 0.9rem;
             color: #1e293b;
             margin-bottom: 5px;
             word-wrap: break-word;
-        }}
+        }
         
-        .icon-label {{
+        .icon-label {
             font-size: 0.85rem;
             color: #64748b;
             font-style: italic;
             min-height: 1.5em;
-        }}
+        }
         
-        .tooltip {{
+        .tooltip {
             position: absolute;
             bottom: 100%;
             left: 50%;
@@ -236,15 +192,15 @@ def generate_icon_demo(input_css_file, input_json_file, output_html_file, collec
             transition: all 0.3s;
             white-space: nowrap;
             z-index: 1000;
-        }}
+        }
         
-        .icon-card:hover .tooltip {{
+        .icon-card:hover .tooltip {
             opacity: 1;
             visibility: visible;
             transform: translateX(-50%) translateY(0);
-        }}
+        }
         
-        .copied {{
+        .copied {
             position: fixed;
             top: 20px;
             right: 20px;
@@ -256,21 +212,21 @@ def generate_icon_demo(input_css_file, input_json_file, output_html_file, collec
             transform: translateX(200%);
             transition: transform 0.3s ease;
             z-index: 1000;
-        }}
+        }
         
-        .copied.show {{
+        .copied.show {
             transform: translateX(0);
-        }}
+        }
         
-        .filter-container {{
+        .filter-container {
             display: flex;
             justify-content: center;
             margin: 20px 0;
             flex-wrap: wrap;
             gap: 10px;
-        }}
+        }
         
-        .filter-btn {{
+        .filter-btn {
             padding: 8px 16px;
             background: #e2e8f0;
             border: none;
@@ -278,23 +234,59 @@ def generate_icon_demo(input_css_file, input_json_file, output_html_file, collec
             cursor: pointer;
             font-weight: 500;
             transition: all 0.2s;
-        }}
+        }
         
-        .filter-btn:hover, .filter-btn.active {{
+        .filter-btn:hover, .filter-btn.active {
             background: #4a6cf7;
             color: white;
-        }}
+        }
         
-        @media (max-width: 768px) {{
-            .icon-grid {{
+        @media (max-width: 768px) {
+            .icon-grid {
                 grid-template-columns: repeat(auto-fill, minmax(120px, 1fr));
-            }}
+            }
             
-            .header h1 {{
+            .header h1 {
                 font-size: 2rem;
-            }}
-        }}
-    </style>
+            }
+        }
+"""
+
+def render_card_demo(icons, css_file_name, collection_title):
+    """
+    HTML demo dạng thẻ: mỗi icon một <div class="icon-card"> viết sẵn trong trang
+    """
+    # --- TẠO CHUỖI ICON HTML ---
+    icon_cards_html = []
+    for icon in icons:
+        # Xác định category (Ứng dụng/Công cụ)
+        category = 'apps' if 'app' in icon['name'].lower() or 'app' in icon['label'].lower() else 'tools'
+        
+        # Tạo HTML cho thẻ icon
+        card_html = f"""
+        <div class="icon-card" data-name="{icon['name']}" data-label="{icon['label']}" data-category="{category}">
+            <i class="{icon['class']}"></i>
+            <div class="icon-name">{icon['name']}</div>
+            <div class="icon-label">{icon['label']}</div>
+            <div class="tooltip">Nhấp để sao chép mã</div>
+        </div>
+        """
+        icon_cards_html.append(card_html)
+    
+    # Ghép tất cả các thẻ icon lại thành một chuỗi duy nhất
+    icon_grid_content = ''.join(icon_cards_html)
+    # --------------------------------------------------------
+    
+    # Tạo nội dung HTML chính
+    html_content = f"""<!DOCTYPE html>
+<html lang="vi">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Collection Demo - {collection_title}</title>
+    <link rel="stylesheet" href="{css_file_name}">
+    <style>
+{DEMO_STYLE}    </style>
 </head>
 <body>
     <div class="header">
@@ -437,6 +429,342 @@ def generate_icon_demo(input_css_file, input_json_file, output_html_file, collec
 </body>
 </html>
 """
+    return html_content
+
+VIRTUAL_STYLE = """
+        /* Chế độ virtual: thẻ cao cố định để tính vị trí theo hàng, chỉ các hàng trong khung nhìn có DOM */
+        .icon-grid.virtual {
+            display: block;
+            position: relative;
+        }
+
+        .virtual-window {
+            display: grid;
+            gap: 20px;
+            grid-auto-rows: 150px;
+            position: absolute;
+            top: 0;
+            left: 0;
+            right: 0;
+            will-change: transform;
+        }
+
+        .virtual .icon-card {
+            height: 150px;
+        }
+
+        .virtual .icon-name, .virtual .icon-label {
+            white-space: nowrap;
+            overflow: hidden;
+            text-overflow: ellipsis;
+        }
+"""
+
+VIRTUAL_SCRIPT = """
+        (function() {
+            const CARD_HEIGHT = 150;
+            const GAP = 20;
+            const ROW_HEIGHT = CARD_HEIGHT + GAP;
+            const OVERSCAN = 3; // số hàng dựng thêm trên/dưới khung nhìn
+
+            const grid = document.getElementById('iconGrid');
+            const searchInput = document.getElementById('searchInput');
+            const copiedNotification = document.getElementById('copiedNotification');
+            const totalIconsElement = document.getElementById('totalIcons');
+            const filterButtons = document.querySelectorAll('.filter-btn');
+            const windowElement = document.createElement('div');
+            windowElement.className = 'virtual-window';
+            grid.appendChild(windowElement);
+
+            let names = [], classes = [], labels = [], categories = [], haystack = [];
+            let visible = new Int32Array(0);
+            let currentFilter = 'all';
+            let columns = 1, rows = 0, firstRow = -1, lastRow = -1;
+            let framePending = false;
+            const pool = [];
+
+            function makeLabel(name) {
+                return name.replace(/[_-]/g, ' ').split(/\\s+/).filter(Boolean)
+                    .map(word => word.charAt(0).toUpperCase() + word.slice(1).toLowerCase()).join(' ');
+            }
+
+            function load(data) {
+                names = data.names;
+                classes = data.classes || names.map(name => data.prefix + name);
+                const custom = data.labels || {};
+                labels = names.map((name, i) => custom[i] !== undefined ? custom[i] : makeLabel(name));
+                // Chuỗi tìm kiếm và danh mục tính một lần, mỗi lần gõ chỉ duyệt mảng trong bộ nhớ
+                haystack = names.map((name, i) => (name + '\\n' + labels[i]).toLowerCase());
+                categories = haystack.map(text => text.includes('app') ? 'apps' : 'tools');
+                applyFilter();
+            }
+
+            function applyFilter() {
+                const searchTerm = searchInput.value.toLowerCase();
+                const matches = new Int32Array(names.length);
+                let count = 0;
+                for (let i = 0; i < names.length; i++) {
+                    if (haystack[i].includes(searchTerm) && (currentFilter === 'all' || categories[i] === currentFilter)) {
+                        matches[count++] = i;
+                    }
+                }
+                visible = matches.subarray(0, count);
+                totalIconsElement.textContent = count;
+                layout();
+            }
+
+            function layout() {
+                const cardMin = window.matchMedia('(max-width: 768px)').matches ? 120 : 150;
+                columns = Math.max(1, Math.floor((grid.clientWidth + GAP) / (cardMin + GAP)));
+                rows = Math.ceil(visible.length / columns);
+                windowElement.style.gridTemplateColumns = `repeat(${columns}, 1fr)`;
+                grid.style.height = `${Math.max(0, rows * ROW_HEIGHT - GAP)}px`;
+                firstRow = lastRow = -1;
+                render();
+            }
+
+            function createCard() {
+                const card = document.createElement('div');
+                card.className = 'icon-card';
+                card.innerHTML = '<i></i><div class="icon-name"></div><div class="icon-label"></div>'
+                    + '<div class="tooltip">Nhấp để sao chép mã</div>';
+                card.iconIndex = -1;
+                windowElement.appendChild(card);
+                return card;
+            }
+
+            function render() {
+                framePending = false;
+                const top = grid.getBoundingClientRect().top;
+                const start = Math.max(0, Math.floor(-top / ROW_HEIGHT) - OVERSCAN);
+                const end = Math.min(rows, Math.ceil((window.innerHeight - top) / ROW_HEIGHT) + OVERSCAN);
+                if (start === firstRow && end === lastRow) {
+                    return;
+                }
+                firstRow = start;
+                lastRow = end;
+                windowElement.style.transform = `translateY(${start * ROW_HEIGHT}px)`;
+
+                const offset = start * columns;
+                const count = Math.max(0, Math.min(visible.length, end * columns) - offset);
+                while (pool.length < count) {
+                    pool.push(createCard());
+                }
+                // Thẻ được dùng lại: chỉ cập nhật nội dung của thẻ đổi icon
+                for (let k = 0; k < pool.length; k++) {
+                    const card = pool[k];
+                    if (k >= count) {
+                        card.hidden = true;
+                        continue;
+                    }
+                    const index = visible[offset + k];
+                    card.hidden = false;
+                    if (card.iconIndex !== index) {
+                        card.iconIndex = index;
+                        card.children[0].className = classes[index];
+                        card.children[1].textContent = names[index];
+                        card.children[2].textContent = labels[index];
+                        card.title = labels[index];
+                    }
+                }
+            }
+
+            function scheduleRender() {
+                if (!framePending) {
+                    framePending = true;
+                    requestAnimationFrame(render);
+                }
+            }
+
+            function showCopied() {
+                copiedNotification.classList.add('show');
+                setTimeout(() => {
+                    copiedNotification.classList.remove('show');
+                }, 2000);
+            }
+
+            function copyText(text) {
+                if (navigator.clipboard) {
+                    navigator.clipboard.writeText(text).then(showCopied);
+                    return;
+                }
+                // Fallback cho môi trường không hỗ trợ navigator.clipboard
+                const textArea = document.createElement('textarea');
+                textArea.value = text;
+                textArea.style.position = 'fixed';
+                textArea.style.opacity = '0';
+                document.body.appendChild(textArea);
+                textArea.focus();
+                textArea.select();
+                try {
+                    document.execCommand('copy');
+                    showCopied();
+                } catch (err) {
+                    console.error('Không thể sao chép văn bản: ', err);
+                }
+                document.body.removeChild(textArea);
+            }
+
+            // Một listener cho cả lưới thay vì mỗi thẻ một listener
+            windowElement.addEventListener('click', function(e) {
+                const card = e.target.closest('.icon-card');
+                if (card && card.iconIndex >= 0) {
+                    copyText(`<i class="${classes[card.iconIndex]}"></i>`);
+                }
+            });
+
+            let searchTimer = null;
+            searchInput.addEventListener('input', function() {
+                clearTimeout(searchTimer);
+                searchTimer = setTimeout(applyFilter, 60);
+            });
+
+            filterButtons.forEach(btn => {
+                btn.addEventListener('click', function(e) {
+                    e.preventDefault();
+                    filterButtons.forEach(b => b.classList.remove('active'));
+                    this.classList.add('active');
+                    currentFilter = this.getAttribute('data-filter');
+                    applyFilter();
+                    grid.scrollIntoView({ behavior: 'smooth' });
+                });
+            });
+
+            window.addEventListener('scroll', scheduleRender, { passive: true });
+            window.addEventListener('resize', layout);
+
+            const embedded = document.getElementById('iconData');
+            if (embedded) {
+                load(JSON.parse(embedded.textContent));
+            } else {
+                fetch(grid.getAttribute('data-src'))
+                    .then(response => response.json())
+                    .then(load)
+                    .catch(err => {
+                        totalIconsElement.textContent = 0;
+                        console.error('Không tải được dữ liệu icon: ', err);
+                    });
+            }
+        })();
+"""
+
+
+def make_label(name):
+    """
+    Nhãn hiển thị từ tên icon: "arrow_left-2" → "Arrow Left 2" (trang virtual tính lại bằng JS y hệt)
+    """
+    label = name.replace('_', ' ').replace('-', ' ')
+    return ' '.join(word.capitalize() for word in label.split())
+
+
+def demo_data(icons):
+    """
+    Danh sách icon dạng cột cho chế độ virtual: {'prefix', 'names'} và chỉ khi cần thì thêm
+    'classes' (class không theo dạng prefix + tên) / 'labels' (nhãn khác nhãn tự sinh, theo chỉ số)
+    """
+    names = [icon['name'] for icon in icons]
+    first = icons[0]['class'] if icons else ''
+    prefix = first[:len(first) - len(names[0])] if icons and first.endswith(names[0]) else ''
+    data = {'prefix': prefix, 'names': names}
+    if any(icon['class'] != prefix + icon['name'] for icon in icons):
+        data['classes'] = [icon['class'] for icon in icons]
+    labels = {str(i): icon['label'] for i, icon in enumerate(icons) if icon['label'] != make_label(icon['name'])}
+    if labels:
+        data['labels'] = labels
+    return data
+
+
+def render_virtual_demo(icons, css_file_name, collection_title, data_src=None):
+    """
+    HTML demo dạng lưới ảo: danh sách icon là JSON gọn (nhúng trong trang, hoặc tải từ data_src),
+    chỉ các hàng thẻ trong khung nhìn được dựng và thẻ được dùng lại khi cuộn,
+    tìm kiếm/lọc chạy trên mảng trong bộ nhớ.
+    """
+    if data_src:
+        data_block = ''
+        grid_attrs = f' data-src="{html.escape(data_src)}"'
+    else:
+        # "</" trong JSON có thể đóng thẻ <script> sớm
+        payload = json.dumps(demo_data(icons), ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+        data_block = f'\n    <script type="application/json" id="iconData">{payload}</script>'
+        grid_attrs = ''
+
+    return f"""<!DOCTYPE html>
+<html lang="vi">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Collection Demo - {collection_title}</title>
+    <link rel="stylesheet" href="{css_file_name}">
+    <style>
+{DEMO_STYLE}{VIRTUAL_STYLE}    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>Collection - {collection_title}</h1>
+        <p>Thư viện đầy đủ {len(icons)} icon - Nhấp vào icon để sao chép mã HTML</p>
+    </div>
+    
+    <div class="search-container">
+        <input type="text" id="searchInput" placeholder="Tìm kiếm icon theo tên hoặc nhãn...">
+    </div>
+    
+    <div class="stats">
+        <span id="totalIcons">{len(icons)}</span> icons được hiển thị
+    </div>
+    
+    <div class="filter-container">
+        <button class="filter-btn active" data-filter="all">Tất cả</button>
+        <button class="filter-btn" data-filter="apps">Ứng dụng</button>
+        <button class="filter-btn" data-filter="tools">Công cụ</button>
+        <button class="filter-btn" data-filter="games">Trò chơi</button>
+        <button class="filter-btn" data-filter="social">Mạng xã hội</button>
+    </div>
+    
+    <div class="icon-grid virtual" id="iconGrid"{grid_attrs}></div>
+    
+    <div class="copied" id="copiedNotification">Đã sao chép mã HTML</div>
+{data_block}
+    <script>{VIRTUAL_SCRIPT}    </script>
+</body>
+</html>
+"""
+
+
+def generate_icon_demo(input_css_file, input_json_file, output_html_file, collection_title="Icon Collection", icons=None,
+                       mode='cards', data_file=None):
+    """
+    Tạo file HTML demo hiển thị tất cả các icon từ file JSON.
+    Nếu truyền sẵn `icons` (kết quả của icons_from_data) thì không đọc lại file JSON.
+    mode='cards'  : mỗi icon một thẻ HTML viết sẵn trong trang (như trước)
+    mode='virtual': danh sách icon là JSON gọn, trang chỉ dựng các thẻ đang nằm trong khung nhìn
+                    (data_file: ghi JSON ra file riêng thay vì nhúng, trang tải bằng fetch)
+    """
+    
+    # 1. Đọc và trích xuất icons từ JSON (Ưu tiên nguồn dữ liệu chính xác)
+    if icons is None:
+        icons = extract_icons_from_json(input_json_file)
+    if not icons:
+        print("Lỗi: Không thể trích xuất icon từ file JSON. Hủy tạo file demo.")
+        return False
+
+    print(f"✅ Đã trích xuất {len(icons)} icons duy nhất từ JSON.")
+    
+    # 2. Kiểm tra file CSS (Chỉ để lấy tên file cho HTML link)
+    if not os.path.exists(input_css_file):
+        print(f"Cảnh báo: Không tìm thấy file CSS: {input_css_file}. File HTML demo sẽ không hiển thị icon đúng cách.")
+
+    # Lấy tên file CSS cơ sở để nhúng vào HTML
+    css_file_name = os.path.basename(input_css_file)
+
+    # 3. Dữ liệu icon của chế độ virtual: nhúng vào HTML hoặc ghi ra file riêng (data_file)
+    data_src = None
+    if mode == 'virtual':
+        if data_file:
+            data_src = os.path.relpath(data_file, os.path.dirname(output_html_file) or '.').replace(os.sep, '/')
+        html_content = render_virtual_demo(icons, css_file_name, collection_title, data_src)
+    else:
+        html_content = render_card_demo(icons, css_file_name, collection_title)
 
     # Tạo thư mục nếu chưa tồn tại
     output_dir = os.path.dirname(output_html_file)
@@ -448,6 +776,17 @@ def generate_icon_demo(input_css_file, input_json_file, output_html_file, collec
             print(f"Lỗi khi tạo thư mục {output_dir}: {str(e)}")
             return False
     
+    # Ghi file dữ liệu (chế độ virtual với data_file)
+    if data_src:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(data_file)), exist_ok=True)
+            with open(data_file, 'w', encoding='utf-8') as f:
+                json.dump(demo_data(icons), f, ensure_ascii=False, separators=(',', ':'))
+            print(f"✅ Đã ghi dữ liệu icon: {data_file}")
+        except Exception as e:
+            print(f"Lỗi khi ghi file dữ liệu {data_file}: {str(e)}")
+            return False
+
     # Ghi file HTML
     try:
         with open(output_html_file, 'w', encoding='utf-8') as f:
@@ -489,6 +828,10 @@ def main():
     parser.add_argument('--output', help='Đường dẫn file HTML đầu ra')
     parser.add_argument('--title', help='Tiêu đề của bộ sưu tập icon (cho header HTML)')
     parser.add_argument('--auto', action='store_true', help='Chế độ tự động với đường dẫn mặc định')
+    parser.add_argument('--mode', choices=['cards', 'virtual'], default='cards',
+                        help='cards: mỗi icon một thẻ HTML; virtual: dữ liệu JSON + lưới ảo (nhanh với hàng nghìn icon)')
+    parser.add_argument('--data-file', help='Chế độ virtual: ghi dữ liệu icon ra file JSON riêng thay vì nhúng vào HTML'
+                                            ' (trang cần mở qua web server để fetch được)')
     
     args = parser.parse_args()
     
@@ -512,7 +855,8 @@ def main():
         print(f"- Tiêu đề: Collection - {collection_title}")
         
         # Tạo file demo
-        generate_icon_demo(css_file_path, json_file_path, html_output_path, collection_title)
+        generate_icon_demo(css_file_path, json_file_path, html_output_path, collection_title,
+                           mode=args.mode, data_file=args.data_file)
         return
     
     # Xử lý tham số dòng lệnh
@@ -529,7 +873,8 @@ def main():
         print(f"- Tiêu đề: Collection - {collection_title}")
         
         # Tạo file demo
-        generate_icon_demo(css_file_path, json_file_path, html_output_path, collection_title)
+        generate_icon_demo(css_file_path, json_file_path, html_output_path, collection_title,
+                           mode=args.mode, data_file=args.data_file)
         return
     
     # Chế độ tương tác - yêu cầu người dùng nhập đường dẫn
@@ -574,7 +919,8 @@ def main():
         return
     
     # Tạo file demo
-    generate_icon_demo(css_file_path, json_file_path, html_output_path, collection_title)
+    generate_icon_demo(css_file_path, json_file_path, html_output_path, collection_title,
+                           mode=args.mode, data_file=args.data_file)
 
 
 if __name__ == "__main__":
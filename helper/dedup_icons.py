@@ -0,0 +1,185 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+import json_codec
+import svg_path
+from batches import get_icon_aliases, get_icon_code, get_icon_name
+
+try:
+    import geometry_codec
+except ImportError:  # NumPy là tuỳ chọn: thiếu thì chuẩn hoá path bằng svg_path (chậm hơn)
+    geometry_codec = None
+
+# Gộp các icon có hình học giống hệt nhau (khác tên) trong selection đã gộp.
+# merge-selections chỉ xử lý trùng tên (home → home_2); glyph giống nhau mang tên khác
+# vẫn chiếm codepoint, glyph trong font và dữ liệu chunk riêng.
+# - mỗi icon được chuẩn hoá: path đổi sang toạ độ tuyệt đối (geometry_codec.parse_paths), lượng
+#   tử hoá theo 1/scale đơn vị lưới, H/V coi như L; hash gồm lệnh, điểm và width + attrs (màu từng path)
+# - icon đầu tiên của mỗi nhóm được giữ lại, tên các icon còn lại (và tag) gộp vào
+#   properties.aliases → CSS sinh class cho alias cùng codepoint, tìm kiếm vẫn ra theo alias
+# - font bỏ glyph của các codepoint đã gộp (xem build.py::stage_fonts)
+#
+# Ví dụ:
+#   python helper/dedup_icons.py data/lawnicons/selection-all.json              # chỉ báo cáo
+#   python helper/dedup_icons.py data/lawnicons/selection-all.json --output out.json
+
+DEFAULT_SCALE = 16
+
+
+def _extras(icon: Dict[str, Any]) -> bytes:
+    data = icon.get("icon") or {}
+    return json.dumps([data.get("width"), data.get("attrs") or []], sort_keys=True,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def _json_size(icon: Dict[str, Any]) -> int:
+    return len(json.dumps(icon, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def geometry_hashes(icons: List[Dict[str, Any]], scale: int = DEFAULT_SCALE) -> List[Optional[str]]:
+    """Hash hình học đã chuẩn hoá của từng icon (None nếu icon không có path)"""
+    if geometry_codec is None:
+        precision = max(0, len(str(scale)) - 1)
+        hashes = []
+        for icon in icons:
+            paths = (icon.get("icon") or {}).get("paths") or []
+            canonical = "|".join(svg_path.minify_path(d, precision) for d in paths).encode("utf-8")
+            hashes.append(hashlib.blake2b(canonical + b"#" + _extras(icon), digest_size=16).hexdigest()
+                          if paths else None)
+        return hashes
+
+    paths, icon_offsets = [], [0]
+    for icon in icons:
+        paths.extend((icon.get("icon") or {}).get("paths") or [])
+        icon_offsets.append(len(paths))
+    if not paths:
+        return [None] * len(icons)
+
+    np = geometry_codec.np
+    parsed = geometry_codec.parse_paths(paths)
+    opcodes = parsed["opcode"].copy()
+    ops = geometry_codec.OPCODES
+    # Đoạn thẳng viết bằng H/V hay L đều là L; đoạn thẳng/M chỉ cần điểm cuối
+    opcodes[(opcodes == ops["H"]) | (opcodes == ops["V"])] = ops["L"]
+    ends = np.rint(np.stack([parsed["end_x"], parsed["end_y"]], axis=1) * scale).astype("<i4")
+    curve = ~np.isin(parsed["opcode"], [ops["M"], ops["L"], ops["H"], ops["V"], ops["Z"]])
+    number_mask = curve[parsed["segment"]]
+    controls = np.rint(parsed["value"][number_mask] * np.where(parsed["role"][number_mask] == 3, 1, scale)).astype("<i4")
+    control_segment = parsed["segment"][number_mask]
+
+    path_segments = np.searchsorted(parsed["path"], np.arange(len(paths) + 1))
+    segment_controls = np.searchsorted(control_segment, path_segments)
+    hashes = []
+    for i, icon in enumerate(icons):
+        first, last = icon_offsets[i], icon_offsets[i + 1]
+        if first == last:
+            hashes.append(None)
+            continue
+        s0, s1 = path_segments[first], path_segments[last]
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update((path_segments[first:last + 1] - s0).astype("<u4").tobytes())
+        digest.update(opcodes[s0:s1].tobytes())
+        digest.update(ends[s0:s1].tobytes())
+        digest.update(controls[segment_controls[first]:segment_controls[last]].tobytes())
+        digest.update(_extras(icon))
+        hashes.append(digest.hexdigest())
+    return hashes
+
+
+def dedup_icons(data: Dict[str, Any], scale: int = DEFAULT_SCALE) -> Dict[str, Any]:
+    """
+    Gộp icon trùng hình học trong data['icons'] (sửa tại chỗ).
+    Trả về báo cáo: {'before', 'after', 'groups', 'aliases': {tên giữ lại: [alias...]},
+    'removed_codes', 'bytes_before', 'bytes_after'}.
+    """
+    icons = data.get("icons", [])
+    hashes = geometry_hashes(icons, scale)
+    keep_by_hash = {}
+    kept = []
+    aliases = {}
+    removed_codes = []
+    bytes_before = sum(map(_json_size, icons))
+
+    for icon, key in zip(icons, hashes):
+        if key is None or get_icon_code(icon) is None or not get_icon_name(icon):
+            kept.append(icon)
+            continue
+        target = keep_by_hash.get(key)
+        if target is None:
+            keep_by_hash[key] = icon
+            kept.append(icon)
+            continue
+
+        names = get_icon_aliases(target)
+        for name in [get_icon_name(icon)] + get_icon_aliases(icon):
+            if name not in names and name != get_icon_name(target):
+                names.append(name)
+        target.setdefault("properties", {})["aliases"] = names
+        # Tag của icon bị gộp vẫn tìm được qua icon giữ lại
+        target_tags = target.setdefault("icon", {}).setdefault("tags", [])
+        for tag in (icon.get("icon") or {}).get("tags") or []:
+            if tag not in target_tags:
+                target_tags.append(tag)
+        aliases[get_icon_name(target)] = names
+        if get_icon_code(icon) != get_icon_code(target):
+            removed_codes.append(get_icon_code(icon))
+
+    data["icons"] = kept
+    return {
+        "before": len(icons),
+        "after": len(kept),
+        "groups": len(aliases),
+        "aliases": aliases,
+        "removed_codes": removed_codes,
+        "bytes_before": bytes_before,
+        "bytes_after": sum(map(_json_size, kept)),  # icon giữ lại đã có thêm alias/tag
+    }
+
+
+def format_report(report: Dict[str, Any], examples: int = 5) -> List[str]:
+    removed = report["before"] - report["after"]
+    saved = report["bytes_before"] - report["bytes_after"]
+    lines = [f"🧬 Gộp glyph trùng hình học: {report['before']} → {report['after']} icon"
+             f" (bỏ {removed}, {report['groups']} nhóm alias)",
+             f"   dữ liệu icon: {report['bytes_before']:,} → {report['bytes_after']:,} B"
+             f" (giảm {saved:,} B, {saved / max(report['bytes_before'], 1):.1%})"]
+    for name, names in list(report["aliases"].items())[:examples]:
+        lines.append(f"   • {name} ← {', '.join(names)}")
+    if report["groups"] > examples:
+        lines.append(f"   … và {report['groups'] - examples} nhóm khác")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gộp icon trùng hình học (khác tên) thành alias của một codepoint')
+    parser.add_argument('selection', help='File selection (IcoMoon) đã gộp')
+    parser.add_argument('--scale', type=int, default=DEFAULT_SCALE,
+                        help=f'Lượng tử hoá toạ độ khi so sánh: 1/scale đơn vị lưới (mặc định {DEFAULT_SCALE})')
+    parser.add_argument('--output', help='Ghi selection đã gộp ra file này (mặc định chỉ báo cáo)')
+    parser.add_argument('--encoding', default="pretty", choices=json_codec.ENCODINGS,
+                        help='Kiểu mã hoá file ra (mặc định pretty)')
+    args = parser.parse_args()
+
+    print("=== 🧬 GỘP GLYPH TRÙNG HÌNH HỌC ===")
+    if not os.path.isfile(args.selection):
+        print(f"❌ Không tìm thấy: {args.selection}")
+        sys.exit(1)
+    if geometry_codec is None:
+        print("⚠️ Không có NumPy → so sánh bằng svg_path (chậm hơn)")
+
+    data = json_codec.load_file(args.selection)
+    report = dedup_icons(data, args.scale)
+    print("\n".join(format_report(report, examples=10)))
+
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(json_codec.dumps(data, args.encoding))
+        print(f"💾 Đã lưu: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+import argparse
+import asyncio
+import email.utils
+import fnmatch
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+import precompress
+import publish
+
+# Static server cục bộ (asyncio) để đo hành vi cache giống production trên một máy:
+# - ETag mạnh (SHA-256 nội dung của đúng bản được gửi: gốc, .br hoặc .gz) + If-None-Match → 304
+# - Range / If-Range (một khoảng byte) → 206, khoảng sai → 416; dùng cho font .woff2/.ttf
+# - Accept-Encoding: trả file .br/.gz nằm cạnh (helper/precompress.py) nếu còn mới hơn file gốc,
+#   kèm Content-Encoding và Vary: Accept-Encoding
+# - Cache-Control theo mẫu đường dẫn, khớp mẫu đầu tiên theo thứ tự: --cache-rule (ưu tiên cao nhất),
+#   file tên hash của helper/publish.py là immutable một năm, HTML/manifest/metadata là no-cache,
+#   còn lại max-age=600 như GitHub Pages
+# - HTTP/1.1 keep-alive; log từng request: mã trạng thái, kích thước, encoding, độ trễ
+# - stat/đọc file/tính ETag chạy trong thread (asyncio.to_thread), body gửi bằng loop.sendfile,
+#   nên một file lớn không chặn các kết nối khác
+#
+# Ví dụ:
+#   python helper/dev_server.py                        # thư mục gốc site, http://127.0.0.1:8000/render.html
+#   python helper/dev_server.py --root dist --port 8080
+#   python helper/dev_server.py --cache-rule "data/*/chunks/*=no-store" --quiet
+
+DEFAULT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PORT = 8000
+INDEX_FILES = ("index.html", "home.html")
+READ_BLOCK = 1 << 16
+KEEPALIVE_TIMEOUT = 15
+MAX_HEADER_BYTES = 64 * 1024
+# Body lớn hơn (request không phải GET/HEAD) thì đóng kết nối thay vì đọc bỏ
+MAX_DISCARD_BYTES = 1 << 20
+ETAG_CACHE_SIZE = 4096
+# Tên file theo hash nội dung do publish.py tạo: name.<hash>.ext
+HASHED_NAME_PATTERN = re.compile(rf"\.[0-9a-f]{{{publish.HASH_LENGTH}}}\.[^./]+$")
+DEFAULT_CACHE_RULES = [
+    ("*.html", "no-cache"),
+    ("data/collections-*.json", "no-cache"),
+    ("*/metadata.json", "no-cache"),
+    ("asset-manifest.json", "no-cache"),
+    ("*", "public, max-age=600"),
+]
+# Thứ tự ưu tiên khi client nhận cả hai
+ENCODINGS = [("br", precompress.SIDECARS["brotli"]), ("gzip", precompress.SIDECARS["gzip"])]
+CONTENT_TYPES = {
+    ".woff2": "font/woff2",
+    ".woff": "font/woff",
+    ".ttf": "font/ttf",
+    ".geo": "application/octet-stream",
+    ".bin": "application/octet-stream",
+    ".js": "text/javascript; charset=utf-8",
+    ".json": "application/json; charset=utf-8",
+}
+REASONS = {200: "OK", 206: "Partial Content", 304: "Not Modified", 400: "Bad Request", 403: "Forbidden",
+           404: "Not Found", 405: "Method Not Allowed", 416: "Range Not Satisfiable", 500: "Internal Server Error"}
+
+
+def content_type(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in CONTENT_TYPES:
+        return CONTENT_TYPES[ext]
+    guessed = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return f"{guessed}; charset=utf-8" if guessed.startswith("text/") or guessed.endswith(("+xml", "/xml")) else guessed
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Accept-Encoding → {encoding: q}; q=0 nghĩa là không nhận"""
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    'bytes=a-b' / 'bytes=a-' / 'bytes=-n' → (start, end) gồm cả end.
+    Trả về None nếu header không dùng được (bỏ qua, gửi cả file); (-1, -1) nếu khoảng nằm ngoài file (416).
+    Nhiều khoảng cùng lúc không hỗ trợ (gửi cả file, được phép theo RFC 9110).
+    """
+    match = re.fullmatch(r"\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*", header)
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        if length == 0:
+            return -1, -1
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        return -1, -1
+    return start, end
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match dùng so sánh yếu (bỏ tiền tố W/)"""
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+class StaticServer:
+    """Phục vụ file tĩnh trong root với ETag, Range, bản nén sẵn và Cache-Control theo mẫu"""
+
+    def __init__(self, root: str, cache_rules: List[Tuple[str, str]], quiet: bool = False):
+        """cache_rules: mẫu của người dùng (--cache-rule), ưu tiên hơn quy tắc tên hash và DEFAULT_CACHE_RULES"""
+        self.root = os.path.abspath(root)
+        self.cache_rules = cache_rules
+        self.quiet = quiet
+        self.etags: Dict[Tuple[str, int, int], str] = {}
+        self.stats = {"requests": 0, "bytes": 0, "seconds": 0.0, "status": {}}
+
+    def cache_control(self, rel: str) -> str:
+        for pattern, policy in self.cache_rules:
+            if fnmatch.fnmatch(rel, pattern):
+                return policy
+        if HASHED_NAME_PATTERN.search(rel):
+            return publish.IMMUTABLE_CACHE_CONTROL
+        for pattern, policy in DEFAULT_CACHE_RULES:
+            if fnmatch.fnmatch(rel, pattern):
+                return policy
+        return "no-cache"
+
+    def etag(self, path: str, stat: os.stat_result) -> str:
+        """
+        ETag mạnh từ hash nội dung; nhớ theo (đường dẫn, kích thước, mtime) để không đọc lại file.
+        Gọi từ thread của respond: thao tác trên dict là nguyên tử, hai thread cùng tính thì kết quả như nhau.
+        """
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        if key not in self.etags:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            if len(self.etags) >= ETAG_CACHE_SIZE:
+                self.etags.pop(next(iter(self.etags)), None)
+            self.etags[key] = f'"{digest.hexdigest()[:32]}"'
+        return self.etags[key]
+
+    def resolve(self, url_path: str) -> Tuple[Optional[str], Optional[str]]:
+        """(đường dẫn file, đường dẫn tương đối dạng posix); không cho ra ngoài root hay vào file/thư mục ẩn"""
+        rel = posixpath.normpath(unquote(url_path)).lstrip("/")
+        if rel in ("", "."):
+            rel = ""
+        if rel.startswith("..") or any(part.startswith(".") for part in rel.split("/") if part):
+            return None, None
+        path = os.path.join(self.root, *rel.split("/")) if rel else self.root
+        if os.path.isdir(path):
+            for index in INDEX_FILES:
+                if os.path.isfile(os.path.join(path, index)):
+                    return os.path.join(path, index), posixpath.join(rel, index)
+            return None, None
+        return (path, rel) if os.path.isfile(path) else (None, None)
+
+    def choose_encoding(self, path: str, accept_encoding: str) -> Tuple[str, Optional[str]]:
+        """(file sẽ gửi, Content-Encoding) theo Accept-Encoding và các bản nén còn mới"""
+        accepted = parse_accept_encoding(accept_encoding)
+        for name, suffix in sorted(ENCODINGS, key=lambda e: -accepted.get(e[0], accepted.get("*", 0.0))):
+            if accepted.get(name, accepted.get("*", 0.0)) > 0 and precompress.is_up_to_date(path, path + suffix):
+                return path + suffix, name
+        return path, None
+
+    def respond(self, method: str, target: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], Optional[str], Tuple[int, int]]:
+        """
+        (mã trạng thái, header, file cần gửi hoặc None, khoảng byte) cho một request.
+        Có stat và đọc file (ETag) nên chạy trong thread, không chạy trên event loop.
+        """
+        if method not in ("GET", "HEAD"):
+            return 405, {"Allow": "GET, HEAD"}, None, (0, -1)
+        path, rel = self.resolve(urlsplit(target).path)
+        if path is None:
+            return 404, {}, None, (0, -1)
+
+        response = {"Cache-Control": self.cache_control(rel), "Accept-Ranges": "bytes"}
+        has_sidecar = any(os.path.isfile(path + suffix) for _, suffix in ENCODINGS)
+        if has_sidecar:
+            response["Vary"] = "Accept-Encoding"
+        # Range áp dụng cho bản gốc (font không nén sẵn); không trộn với Content-Encoding
+        range_header = headers.get("range")
+        body_path, encoding = (path, None) if range_header else self.choose_encoding(path, headers.get("accept-encoding", ""))
+        stat = os.stat(body_path)
+        etag = self.etag(body_path, stat)
+        response.update({
+            "Content-Type": content_type(path),
+            "ETag": etag,
+            "Last-Modified": email.utils.formatdate(stat.st_mtime, usegmt=True),
+        })
+        if encoding:
+            response["Content-Encoding"] = encoding
+
+        if "if-none-match" in headers and etag_matches(headers["if-none-match"], etag):
+            return 304, response, None, (0, -1)
+
+        size = stat.st_size
+        if range_header and headers.get("if-range", etag) == etag:
+            byte_range = parse_range(range_header, size)
+            if byte_range == (-1, -1):
+                response["Content-Range"] = f"bytes */{size}"
+                return 416, response, None, (0, -1)
+            if byte_range:
+                start, end = byte_range
+                response["Content-Range"] = f"bytes {start}-{end}/{size}"
+                response["Content-Length"] = str(end - start + 1)
+                return 206, response, body_path, (start, end)
+        response["Content-Length"] = str(size)
+        return 200, response, body_path, (0, size - 1)
+
+    async def send(self, writer: asyncio.StreamWriter, method: str, status: int, headers: Dict[str, str],
+                   body_path: Optional[str], byte_range: Tuple[int, int], keep_alive: bool) -> int:
+        """Ghi response; trả về số byte body đã gửi"""
+        if body_path is None and status != 304:
+            message = f"{status} {REASONS.get(status, '')}\n".encode("utf-8")
+            headers = dict(headers, **{"Content-Type": "text/plain; charset=utf-8",
+                                       "Content-Length": str(len(message)), "Cache-Control": "no-store"})
+        else:
+            message = b""
+        headers = dict(headers, Date=email.utils.formatdate(usegmt=True),
+                       Connection="keep-alive" if keep_alive else "close")
+        head = f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+        writer.write(head.encode("latin-1") + b"\r\n")
+        if method == "HEAD":
+            await writer.drain()
+            return 0
+        sent = 0
+        if message:
+            writer.write(message)
+            sent = len(message)
+        elif body_path and status in (200, 206):
+            start, end = byte_range
+            await writer.drain()
+            f = await asyncio.to_thread(open, body_path, "rb")
+            try:
+                # sendfile của hệ điều hành; transport không hỗ trợ thì asyncio tự đọc từng khối
+                sent = await asyncio.get_running_loop().sendfile(writer.transport, f, start, end - start + 1)
+            finally:
+                f.close()
+        await writer.drain()
+        return sent
+
+    async def discard_body(self, reader: asyncio.StreamReader, headers: Dict[str, str]) -> bool:
+        """
+        Đọc bỏ body của request (ví dụ POST → 405) để phần còn lại không bị hiểu là request kế tiếp.
+        Trả về False nếu không đọc hết được (chunked, quá lớn, Content-Length sai): phải đóng kết nối.
+        """
+        if "transfer-encoding" in headers:
+            return False
+        try:
+            remaining = int(headers.get("content-length", "0"))
+        except ValueError:
+            return False
+        if remaining < 0 or remaining > MAX_DISCARD_BYTES:
+            return False
+        try:
+            while remaining > 0:
+                block = await asyncio.wait_for(reader.read(min(READ_BLOCK, remaining)), KEEPALIVE_TIMEOUT)
+                if not block:
+                    return False
+                remaining -= len(block)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    raw = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                started = time.perf_counter()
+                lines = raw.decode("latin-1").split("\r\n")
+                parts = lines[0].split()
+                if len(parts) != 3:
+                    await self.send(writer, "GET", 400, {}, None, (0, -1), False)
+                    return
+                method, target, version = parts
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                if not await self.discard_body(reader, headers):
+                    keep_alive = False
+
+                try:
+                    status, response, body_path, byte_range = await asyncio.to_thread(self.respond, method, target, headers)
+                except OSError:
+                    status, response, body_path, byte_range = 500, {}, None, (0, -1)
+                sent = await self.send(writer, method, status, response, body_path, byte_range, keep_alive)
+                self.log(method, target, status, sent, response.get("Content-Encoding"), time.perf_counter() - started)
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def log(self, method: str, target: str, status: int, sent: int, encoding: Optional[str], seconds: float):
+        self.stats["requests"] += 1
+        self.stats["bytes"] += sent
+        self.stats["seconds"] += seconds
+        self.stats["status"][status] = self.stats["status"].get(status, 0) + 1
+        if not self.quiet:
+            print(f"{status} {method:<4} {target} {precompress.format_size(sent):>9} {encoding or '-':<4} {seconds * 1000:.1f} ms")
+
+    def format_stats(self) -> str:
+        stats = self.stats
+        average = stats["seconds"] / stats["requests"] * 1000 if stats["requests"] else 0.0
+        statuses = ", ".join(f"{code}×{count}" for code, count in sorted(stats["status"].items())) or "–"
+        return (f"📊 {stats['requests']} request ({statuses}), {precompress.format_size(stats['bytes'])},"
+                f" trung bình {average:.1f} ms")
+
+
+async def run_server(server: StaticServer, host: str, port: int):
+    listener = await asyncio.start_server(server.handle, host, port, limit=MAX_HEADER_BYTES)
+    print(f"🌐 http://{host}:{port}/ → {server.root}")
+    async with listener:
+        await listener.serve_forever()
+
+
+def parse_cache_rules(rules: List[str]) -> List[Tuple[str, str]]:
+    parsed = []
+    for rule in rules:
+        pattern, sep, policy = rule.partition("=")
+        if not sep or not pattern or not policy:
+            raise ValueError(f"Quy tắc cache không hợp lệ (cần MẪU=CHÍNH_SÁCH): {rule}")
+        parsed.append((pattern.strip(), policy.strip()))
+    return parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Static server cục bộ với ETag, Range, .br/.gz và Cache-Control theo mẫu')
+    parser.add_argument('--root', default=DEFAULT_ROOT, help='Thư mục phục vụ (mặc định: thư mục gốc site; dùng dist/ sau publish)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--cache-rule', action='append', default=[], metavar='MẪU=CHÍNH_SÁCH',
+                        help='Cache-Control cho đường dẫn khớp mẫu fnmatch (ưu tiên hơn mọi quy tắc mặc định, '
+                             'kể cả immutable cho file tên hash; có thể lặp lại)')
+    parser.add_argument('--quiet', action='store_true', help='Không log từng request (chỉ in thống kê khi dừng)')
+    args = parser.parse_args()
+
+    try:
+        rules = parse_cache_rules(args.cache_rule)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if not os.path.isdir(args.root):
+        print(f"❌ Không tìm thấy thư mục: {args.root}")
+        sys.exit(1)
+
+    print("=== 🖥️ DEV SERVER ===")
+    server = StaticServer(args.root, rules, args.quiet)
+    try:
+        asyncio.run(run_server(server, args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n👋 Dừng server.")
+    finally:
+        print(server.format_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from build_cache import CACHE_DIR, file_hash, write_json_if_changed
+
+# Sinh metadata/icons-optimized.json cho Font Awesome từ icons.yml (+ icon-families.yml từ bản 6).
+# Định dạng rút gọn mà scripts.js::parseFontAwesome đọc:
+#   { "<tên>": { "l": label, "f": [style...], "t": [search term...] }, ... }
+# - style lấy từ familyStylesByLicense.free trong icon-families.yml nếu có (FA 6+),
+#   ngược lại lấy 'styles' trong icons.yml (FA 5)
+# - JSON minified, thứ tự key giữ nguyên như trong icons.yml
+#
+# Kèm theo là bản chia theo style trong metadata/styles/ để trang web tải dần khi đổi phiên bản:
+#   styles/index.json  : { "styles": [{ "name", "file", "count" }, ...] }   # nhiều icon nhất trước
+#   styles/<style>.json: { "<tên>": { "l": label, "t": [search term...] }, ... }
+#
+# YAML được parse bằng loader C (CSafeLoader) nếu PyYAML có libyaml, và được cache dạng
+# pickle trong .build-cache/yaml/: khớp mtime + kích thước thì dùng ngay; mtime đổi
+# nhưng hash nội dung không đổi thì vẫn dùng lại. Các phiên bản FA chạy song song.
+#
+# Ví dụ:
+#   python helper/fa_metadata.py                 # mọi bản FA trong data/fontawesome/
+#   python helper/fa_metadata.py --check         # chỉ so sánh với file hiện có
+#   python helper/fa_metadata.py data/fontawesome/fontawesome-free-7.1.0-web/metadata
+
+DEFAULT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+YAML_CACHE_DIR = os.path.join(CACHE_DIR, "yaml")
+YAML_CACHE_VERSION = 1
+OUTPUT_FILE = "icons-optimized.json"
+STYLES_DIR = "styles"
+STYLES_INDEX = "index.json"
+
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def load_yaml_cached(path: str, cache_dir: str) -> Any:
+    """Parse YAML, dùng lại bản pickle nếu file không đổi (mtime/kích thước, hoặc hash)"""
+    stat = os.stat(path)
+    cache_name = hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()[:16] + ".pickle"
+    cache_path = os.path.join(cache_dir, cache_name)
+
+    entry = None
+    try:
+        with open(cache_path, "rb") as f:
+            entry = pickle.load(f)
+        if entry.get("version") != YAML_CACHE_VERSION:
+            entry = None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        entry = None
+
+    if entry and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+        return entry["data"]
+
+    digest = file_hash(path)
+    if entry and entry["hash"] == digest:
+        data = entry["data"]
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.load(f, Loader=YamlLoader)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump({"version": YAML_CACHE_VERSION, "mtime": stat.st_mtime_ns, "size": stat.st_size,
+                     "hash": digest, "data": data}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+    return data
+
+
+def free_styles(family_info: Optional[Dict[str, Any]]) -> Optional[List[str]]:
+    """Style bản free theo icon-families.yml (None nếu icon không có thông tin)"""
+    if not family_info:
+        return None
+    free = (family_info.get("familyStylesByLicense") or {}).get("free")
+    if free is None:
+        return None
+    return [entry["style"] for entry in free]
+
+
+def optimize_icons(icons: Dict[Any, Dict[str, Any]],
+                   families: Optional[Dict[Any, Dict[str, Any]]] = None) -> Dict[str, Dict[str, Any]]:
+    """Chuyển icons.yml (+ icon-families.yml) sang dạng rút gọn l/f/t"""
+    optimized = {}
+    for name, info in icons.items():
+        info = info or {}
+        styles = free_styles((families or {}).get(name)) if families else None
+        if styles is None:
+            styles = list(info.get("styles") or [])
+        optimized[str(name)] = {
+            "l": info.get("label", ""),
+            "f": styles,
+            "t": list((info.get("search") or {}).get("terms") or []),
+        }
+    return optimized
+
+
+def split_styles(optimized: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Chia dữ liệu rút gọn theo style: trả về {tên file trong styles/: dữ liệu},
+    gồm index.json (danh sách style) và một file cho mỗi style.
+    """
+    counts = Counter(style for info in optimized.values() for style in info["f"])
+    # Style nhiều icon nhất đứng đầu (trang web hiển thị trước); cùng số lượng thì theo tên
+    styles = sorted(counts, key=lambda style: (-counts[style], style))
+
+    shards = {style: {} for style in styles}
+    for name, info in optimized.items():
+        for style in info["f"]:
+            shards[style][name] = {"l": info["l"], "t": info["t"]}
+
+    files = {
+        STYLES_INDEX: {"styles": [{"name": style, "file": f"{style}.json", "count": counts[style]}
+                                  for style in styles]},
+    }
+    files.update((f"{style}.json", shards[style]) for style in styles)
+    return files
+
+
+def json_matches(path: str, value: Any) -> bool:
+    """File JSON hiện có giống value (kể cả thứ tự key ở cấp ngoài cùng)"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            existing = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return False
+    return existing == value and list(existing) == list(value)
+
+
+def remove_stale_styles(styles_dir: str, keep: List[str]) -> int:
+    """Xoá file style không còn (ví dụ style bị bỏ khỏi bản free)"""
+    removed = 0
+    if os.path.isdir(styles_dir):
+        for name in os.listdir(styles_dir):
+            if name.endswith(".json") and name not in keep:
+                os.remove(os.path.join(styles_dir, name))
+                removed += 1
+    return removed
+
+
+def convert_version(metadata_dir: str, cache_dir: str, check: bool = False) -> Dict[str, Any]:
+    """
+    Sinh icons-optimized.json và styles/ cho một thư mục metadata (chạy trong process con).
+    Trả về tóm tắt: {'dir', 'icons', 'styles', 'changed', 'seconds', 'error'}.
+    """
+    started = time.perf_counter()
+    summary = {"dir": metadata_dir, "icons": 0, "styles": {}, "changed": False, "error": None}
+    icons_path = os.path.join(metadata_dir, "icons.yml")
+    families_path = os.path.join(metadata_dir, "icon-families.yml")
+    styles_dir = os.path.join(metadata_dir, STYLES_DIR)
+
+    try:
+        icons = load_yaml_cached(icons_path, cache_dir)
+        families = load_yaml_cached(families_path, cache_dir) if os.path.isfile(families_path) else None
+        optimized = optimize_icons(icons, families)
+        style_files = split_styles(optimized)
+        summary["icons"] = len(optimized)
+        summary["styles"] = {s["name"]: s["count"] for s in style_files[STYLES_INDEX]["styles"]}
+
+        outputs = {os.path.join(metadata_dir, OUTPUT_FILE): optimized}
+        outputs.update((os.path.join(styles_dir, name), value) for name, value in style_files.items())
+
+        if check:
+            summary["changed"] = not all(json_matches(path, value) for path, value in outputs.items())
+        else:
+            os.makedirs(styles_dir, exist_ok=True)
+            for path, value in outputs.items():
+                if write_json_if_changed(path, value, separators=(",", ":"), ensure_ascii=True):
+                    summary["changed"] = True
+            if remove_stale_styles(styles_dir, list(style_files)):
+                summary["changed"] = True
+    except (OSError, yaml.YAMLError) as e:
+        summary["error"] = str(e)
+
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def find_metadata_dirs(root: str) -> List[str]:
+    """Mọi thư mục data/fontawesome/<bản>/metadata có icons.yml"""
+    fa_dir = os.path.join(root, "data", "fontawesome")
+    if not os.path.isdir(fa_dir):
+        return []
+    dirs = []
+    for name in sorted(os.listdir(fa_dir)):
+        metadata_dir = os.path.join(fa_dir, name, "metadata")
+        if os.path.isfile(os.path.join(metadata_dir, "icons.yml")):
+            dirs.append(metadata_dir)
+    return dirs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sinh icons-optimized.json (và bản chia theo style) cho Font Awesome từ YAML metadata')
+    parser.add_argument('metadata_dirs', nargs='*', help='Thư mục metadata (mặc định: mọi bản trong data/fontawesome/)')
+    parser.add_argument('--root', default=DEFAULT_ROOT, help='Thư mục gốc của site')
+    parser.add_argument('--check', action='store_true', help='Chỉ kiểm tra file hiện có đã khớp chưa (không ghi)')
+    parser.add_argument('--workers', type=int, help='Số process chạy song song (mặc định: số phiên bản)')
+    args = parser.parse_args()
+
+    print("=== 🏳️ FONT AWESOME METADATA → icons-optimized.json ===")
+    if YamlLoader is yaml.SafeLoader:
+        print("⚠️ PyYAML không có libyaml → dùng SafeLoader (chậm hơn)")
+
+    metadata_dirs = args.metadata_dirs or find_metadata_dirs(args.root)
+    if not metadata_dirs:
+        print("❌ Không tìm thấy thư mục metadata nào có icons.yml")
+        sys.exit(1)
+
+    cache_dir = os.path.join(args.root, YAML_CACHE_DIR)
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers or len(metadata_dirs)) as pool:
+        results = list(pool.map(convert_version, metadata_dirs, [cache_dir] * len(metadata_dirs),
+                                [args.check] * len(metadata_dirs)))
+
+    failed = 0
+    for r in results:
+        name = os.path.relpath(r["dir"], args.root)
+        styles = ", ".join(f"{style} {count}" for style, count in r["styles"].items())
+        if r["error"]:
+            failed += 1
+            print(f"❌ {name}: {r['error']}")
+        elif args.check:
+            print(f"{'⚠️ khác' if r['changed'] else '✅ khớp'} {name}: {r['icons']} icon [{styles}] ({r['seconds']}s)")
+        else:
+            print(f"{'💾 cập nhật' if r['changed'] else '✅ không đổi'} {name}: {r['icons']} icon [{styles}] ({r['seconds']}s)")
+    print(f"⏱️ Tổng thời gian: {time.perf_counter() - started:.2f}s")
+
+    if failed or (args.check and any(r["changed"] for r in results)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
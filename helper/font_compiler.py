@@ -0,0 +1,210 @@
+import argparse
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from fontTools.fontBuilder import FontBuilder
+from fontTools.misc.timeTools import timestampSinceEpoch
+from fontTools.pens.boundsPen import BoundsPen
+from fontTools.pens.cu2quPen import Cu2QuPen
+from fontTools.pens.transformPen import TransformPen
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.svgLib.path import parse_path
+from fontTools.ttLib import TTFont
+
+import json_codec
+from batches import get_icon_code, get_icon_name
+from build_cache import write_bytes_if_changed
+
+# Biên dịch font TTF trực tiếp từ selection đã gộp (icon.paths + properties.code), không cần
+# file font IcoMoon xuất theo từng batch:
+#   SVG path → TransformPen (lật trục y, đường cơ sở như IcoMoon: ascent 15/16, descent 1/16
+#   chiều cao lưới) → Cu2QuPen (cubic → quadratic, sai số ≤ max_err đơn vị font) → TTGlyphPen
+# Glyph được chuyển song song theo lô trong process pool rồi ghép một lần bằng FontBuilder.
+# Tên glyph uniXXXX, bảng post bản 3 (không lưu tên glyph), timestamp lấy từ SOURCE_DATE_EPOCH
+# (mặc định 0) để cùng selection cho cùng byte.
+#
+# Ví dụ:
+#   python helper/font_compiler.py data/simpleicons/selections-all.json --name simpleicons --output-dir out/
+#   python helper/font_compiler.py selection.json --name lawnicons-all --compare data/lawnicons/lawnicons-all.ttf
+
+DEFAULT_HEIGHT = 1024
+MAX_ERR = 1.0
+BATCH_SIZE = 200
+SPACE = 0x20
+
+
+def glyph_name(code: int) -> str:
+    return f"uni{code:04X}" if code <= 0xFFFF else f"u{code:X}"
+
+
+def font_metrics(height: int) -> Tuple[int, int]:
+    """(ascent, descent) theo cách IcoMoon đặt đường cơ sở: 960/64 với lưới 1024"""
+    descent = round(height / 16)
+    return height - descent, descent
+
+
+def draw_icon(paths: List[str], pen, ascent: int):
+    """Vẽ các path SVG (trục y hướng xuống) lên pen theo toạ độ font (trục y hướng lên)"""
+    flipped = TransformPen(pen, (1, 0, 0, -1, 0, ascent))
+    for d in paths:
+        parse_path(d, flipped)
+
+
+def compile_glyphs(job: Tuple[List[Tuple[str, int, int, List[str]]], int, float]) -> Dict[str, Any]:
+    """Chạy trong process con: một lô icon → {'glyphs': [(tên glyph, Glyph, advance)], 'errors'}"""
+    icons, ascent, max_err = job
+    glyphs, errors = [], []
+    for name, code, width, paths in icons:
+        pen = TTGlyphPen(None)
+        try:
+            draw_icon(paths, Cu2QuPen(pen, max_err, all_quadratic=True), ascent)
+            glyph = pen.glyph()
+        except Exception as e:
+            errors.append(f"{name}: {e}")
+            glyph = TTGlyphPen(None).glyph()
+        glyphs.append((glyph_name(code), glyph, width))
+    return {"glyphs": glyphs, "errors": errors}
+
+
+def icon_entries(icons: List[Dict[str, Any]], height: int) -> List[Tuple[str, int, int, List[str]]]:
+    """(tên, mã, chiều rộng, paths) của các icon có mã; mã trùng chỉ giữ icon đầu tiên"""
+    entries, seen = [], set()
+    for icon in icons:
+        code = get_icon_code(icon)
+        if code is None or code in seen or code == SPACE:
+            continue
+        seen.add(code)
+        data = icon.get("icon") or {}
+        entries.append((get_icon_name(icon) or glyph_name(code), code,
+                        int(data.get("width") or height), list(data.get("paths") or [])))
+    return entries
+
+
+def build_font(icons: List[Dict[str, Any]], family: str, height: int = DEFAULT_HEIGHT,
+               workers: Optional[int] = None, max_err: float = MAX_ERR) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    Biên dịch TTF từ danh sách icon (định dạng selection IcoMoon).
+    Trả về (bytes TTF, báo cáo {'glyphs', 'errors', 'seconds'}).
+    """
+    started = time.perf_counter()
+    ascent, descent = font_metrics(height)
+    entries = icon_entries(icons, height)
+    jobs = [(entries[i:i + BATCH_SIZE], ascent, max_err) for i in range(0, len(entries), BATCH_SIZE)]
+
+    # .notdef và dấu cách (U+0020) rỗng như font IcoMoon
+    glyphs = {".notdef": TTGlyphPen(None).glyph(), "space": TTGlyphPen(None).glyph()}
+    advances, errors = {".notdef": height, "space": height // 2}, []
+    if len(jobs) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(compile_glyphs, jobs))
+    else:
+        results = [compile_glyphs(job) for job in jobs]
+    for result in results:
+        errors.extend(result["errors"])
+        for name, glyph, width in result["glyphs"]:
+            glyphs[name] = glyph
+            advances[name] = width
+
+    builder = FontBuilder(height, isTTF=True)
+    builder.setupGlyphOrder(list(glyphs))
+    cmap = {SPACE: "space"}
+    cmap.update((code, glyph_name(code)) for _, code, _, _ in entries)
+    builder.setupCharacterMap(cmap)
+    builder.setupGlyf(glyphs)
+    glyf = builder.font["glyf"]
+    builder.setupHorizontalMetrics({name: (advances[name], getattr(glyf[name], "xMin", 0)) for name in glyphs})
+    builder.setupHorizontalHeader(ascent=ascent, descent=-descent)
+    builder.setupNameTable({"familyName": family, "styleName": "Regular"})
+    builder.setupOS2(sTypoAscender=ascent, sTypoDescender=-descent, sTypoLineGap=0,
+                     usWinAscent=ascent, usWinDescent=descent)
+    builder.setupPost(keepGlyphNames=False)
+
+    # Timestamp cố định để build lặp lại cho cùng byte (chuẩn reproducible build)
+    timestamp = timestampSinceEpoch(int(os.environ.get("SOURCE_DATE_EPOCH", 0)))
+    builder.font["head"].created = builder.font["head"].modified = timestamp
+    builder.font.recalcTimestamp = False
+    buffer = io.BytesIO()
+    builder.save(buffer)
+    return buffer.getvalue(), {"glyphs": len(entries), "errors": errors,
+                               "seconds": round(time.perf_counter() - started, 3)}
+
+
+def compare_fonts(compiled: bytes, reference_path: str, tolerance: int = 2) -> Dict[str, Any]:
+    """
+    So sánh với font IcoMoon: mã thiếu/thừa và glyph có bbox hoặc advance lệch quá tolerance đơn vị.
+    Bbox là biên thực của đường cong (BoundsPen): điểm điều khiển của cu2qu khác của IcoMoon,
+    còn header glyph của font IcoMoon ghi bbox cả khung icon.
+    """
+    ours = TTFont(io.BytesIO(compiled))
+    theirs = TTFont(reference_path)
+    our_cmap, their_cmap = ours.getBestCmap(), theirs.getBestCmap()
+    our_glyphs, their_glyphs = ours.getGlyphSet(), theirs.getGlyphSet()
+    different = []
+    for code in sorted(set(our_cmap) & set(their_cmap)):
+        a, b = our_glyphs[our_cmap[code]], their_glyphs[their_cmap[code]]
+        bounds_a, bounds_b = BoundsPen(our_glyphs), BoundsPen(their_glyphs)
+        a.draw(bounds_a)
+        b.draw(bounds_b)
+        box_a, box_b = bounds_a.bounds or (0, 0, 0, 0), bounds_b.bounds or (0, 0, 0, 0)
+        if max(abs(x - y) for x, y in zip(box_a, box_b)) > tolerance or a.width != b.width:
+            different.append(code)
+    return {
+        "missing": sorted(set(their_cmap) - set(our_cmap)),
+        "extra": sorted(set(our_cmap) - set(their_cmap)),
+        "different": different,
+        "common": len(set(our_cmap) & set(their_cmap)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Biên dịch font TTF/WOFF/WOFF2 trực tiếp từ SVG path trong selection')
+    parser.add_argument('selection', help='File selection (IcoMoon) đã gộp')
+    parser.add_argument('--name', required=True, help='Tên font (font-family và tên file)')
+    parser.add_argument('--output-dir', default='.', help='Thư mục ghi <name>.ttf/.woff/.woff2')
+    parser.add_argument('--workers', type=int, help='Số process chuyển glyph song song (mặc định: số CPU)')
+    parser.add_argument('--max-err', type=float, default=MAX_ERR,
+                        help=f'Sai số tối đa khi đổi cubic → quadratic (đơn vị font, mặc định {MAX_ERR})')
+    parser.add_argument('--no-web', action='store_true', help='Chỉ ghi TTF, không tạo WOFF/WOFF2')
+    parser.add_argument('--compare', metavar='FONT', help='So sánh với font IcoMoon (bbox/advance từng glyph)')
+    args = parser.parse_args()
+
+    print("=== 🔤 BIÊN DỊCH FONT TỪ SVG PATH ===")
+    if not os.path.isfile(args.selection):
+        print(f"❌ Không tìm thấy: {args.selection}")
+        sys.exit(1)
+
+    data = json_codec.load_file(args.selection)
+    ttf_data, report = build_font(data.get("icons", []), args.name, data.get("height", DEFAULT_HEIGHT),
+                                  args.workers, args.max_err)
+    print(f"✅ {report['glyphs']} glyph, {len(ttf_data):,} byte TTF ({report['seconds']}s)")
+    for error in report["errors"][:10]:
+        print(f"   ⚠️ {error}")
+    if len(report["errors"]) > 10:
+        print(f"   … và {len(report['errors']) - 10} lỗi khác")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    ttf_path = os.path.join(args.output_dir, f"{args.name}.ttf")
+    write_bytes_if_changed(ttf_path, ttf_data)
+    print(f"💾 {ttf_path}")
+    if not args.no_web:
+        import scripts
+        if not scripts.compress_font(ttf_path, os.path.join(args.output_dir, args.name), ttf_data):
+            sys.exit(1)
+
+    if args.compare:
+        result = compare_fonts(ttf_data, args.compare)
+        print(f"🔍 So với {args.compare}: {result['common']} mã chung, thiếu {len(result['missing'])},"
+              f" thừa {len(result['extra'])}, khác bbox/advance {len(result['different'])}")
+        for code in result["different"][:10]:
+            print(f"   • U+{code:04X}")
+
+    if report["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
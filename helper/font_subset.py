@@ -0,0 +1,393 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from fontTools import subset
+from fontTools.ttLib import TTFont
+
+import json_codec
+from batches import get_icon_aliases, get_icon_code, get_icon_name
+from build_cache import CACHE_DIR, file_hash
+from make_css import base_rule_css, css_escape_code, font_face_css, icon_rules_css
+
+# Font subset theo yêu cầu: từ danh sách tên icon → mã unicode (qua dữ liệu selection/chunk)
+# → WOFF2 chỉ chứa đúng các glyph đó + CSS tương ứng.
+# Kết quả được lưu trong cache LRU trên đĩa (.build-cache/subsets/<key>.woff2), khoá là
+# hash của font gốc + tập mã đã sắp xếp, nên cùng tập icon luôn dùng lại cùng một file.
+#
+# CSS subset dùng cùng font-family với all.css nhưng có unicode-range, nên nhiều subset
+# (mỗi trang một subset) cùng tồn tại mà trình duyệt vẫn chọn đúng file cho từng glyph.
+#
+# Ví dụ:
+#   python helper/font_subset.py --collection lawnicons --icons home,search --output out/
+#   python helper/font_subset.py --serve --port 8765
+#       GET /subset.css?collection=lawnicons&icons=home,search
+#       GET /fonts/<key>.woff2
+# Trang web dùng endpoint khi collection trong collections-database.json có
+# "subsetEndpoint": "http://localhost:8765" (xem loadSubsetCss trong scripts.js).
+
+DEFAULT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "build-config.json")
+SUBSET_CACHE_DIR = os.path.join(CACHE_DIR, "subsets")
+MAX_ENTRIES = 500
+MAX_BYTES = 200 * 1024 * 1024
+# Giới hạn số icon mỗi yêu cầu HTTP (một trang hiển thị 100 icon)
+MAX_ICONS_PER_REQUEST = 2000
+
+
+def unicode_range(codes: Iterable[int]) -> str:
+    """Gộp các mã liên tiếp thành khoảng: U+E900-E905, U+E90A"""
+    parts = []
+    ordered = sorted(set(codes))
+    i = 0
+    while i < len(ordered):
+        start = end = ordered[i]
+        while i + 1 < len(ordered) and ordered[i + 1] == end + 1:
+            i += 1
+            end = ordered[i]
+        parts.append(f"U+{start:X}" if start == end else f"U+{start:X}-{end:X}")
+        i += 1
+    return ", ".join(parts)
+
+
+def load_code_map(source: str) -> Dict[str, int]:
+    """
+    Bảng tên icon → mã unicode.
+    source là file selection (IcoMoon) hoặc thư mục chunks có metadata.json.
+    """
+    if os.path.isdir(source):
+        with open(os.path.join(source, "metadata.json"), "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        icons = []
+        for entry in metadata.get("chunks", []):
+            icons.extend(json_codec.load_file(os.path.join(source, entry["file"])).get("icons", []))
+    else:
+        icons = json_codec.load_file(source).get("icons", [])
+
+    code_map = {}
+    for icon in icons:
+        name, code = get_icon_name(icon), get_icon_code(icon)
+        if name and code is not None:
+            for key in [name] + get_icon_aliases(icon):
+                code_map.setdefault(key, code)
+    return code_map
+
+
+def chunk_code_sets(icons: List[Dict[str, Any]], chunk_size: int) -> List[List[int]]:
+    """Tập mã của từng chunk, chia giống hệt split_selections (theo thứ tự icon)"""
+    code_sets = []
+    for start in range(0, len(icons), chunk_size):
+        codes = {get_icon_code(icon) for icon in icons[start:start + chunk_size]}
+        code_sets.append(sorted(c for c in codes if c is not None))
+    return code_sets
+
+
+def load_chunk_code_sets(chunks_dir: str) -> List[List[int]]:
+    """Tập mã của từng chunk đọc từ thư mục chunks (theo metadata.json)"""
+    with open(os.path.join(chunks_dir, "metadata.json"), "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+    code_sets = []
+    for entry in metadata.get("chunks", []):
+        icons = json_codec.load_file(os.path.join(chunks_dir, entry["file"])).get("icons", [])
+        code_sets.append(sorted({c for c in map(get_icon_code, icons) if c is not None}))
+    return code_sets
+
+
+def resolve_codes(names: Iterable[str], code_map: Dict[str, int]) -> Tuple[Dict[str, int], List[str]]:
+    """Tách danh sách tên thành (tên → mã) và các tên không tồn tại"""
+    found, missing = {}, []
+    for name in names:
+        if name in code_map:
+            found[name] = code_map[name]
+        elif name:
+            missing.append(name)
+    return found, missing
+
+
+def subset_font(font_path: str, codes: Iterable[int], flavor: Optional[str] = "woff2",
+                layout_features: Iterable[str] = ()) -> bytes:
+    """
+    Font chỉ giữ glyph của các mã cho trước (giữ nguyên metrics/tên font); flavor=None → TTF.
+    font_path có thể là file object (ví dụ io.BytesIO của font đang ở trong bộ nhớ).
+    """
+    options = subset.Options()
+    options.flavor = flavor
+    options.layout_features = list(layout_features)
+    options.name_IDs = ["*"]
+    options.notdef_outline = True
+    font = TTFont(font_path)
+    # Giữ head.modified của font gốc: cùng font + cùng tập mã → cùng byte (shard/subset được cache lâu dài)
+    font.recalcTimestamp = False
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=sorted(set(codes)))
+    subsetter.subset(font)
+    font.flavor = flavor
+    buffer = io.BytesIO()
+    font.save(buffer)
+    font.close()
+    return buffer.getvalue()
+
+
+def subset_key(font_digest: str, codes: Iterable[int]) -> str:
+    """Khoá cache: hash font gốc + tập mã đã sắp xếp"""
+    encoded = font_digest + ":" + ",".join(f"{c:X}" for c in sorted(set(codes)))
+    return hashlib.sha256(encoded.encode("ascii")).hexdigest()[:24]
+
+
+def subset_css(icons: Dict[str, int], font_name: str, prefix: str, font_url: str) -> str:
+    """CSS cho một subset: @font-face có unicode-range + rule chung + rule của từng icon"""
+    rules = {f"{prefix}{name}": css_escape_code(code) for name, code in icons.items()}
+    return "".join([
+        font_face_css(font_name, [(font_url, "woff2")], unicode_range(icons.values())),
+        base_rule_css(font_name, prefix),
+        icon_rules_css(rules),
+    ])
+
+
+class SubsetCache:
+    """Cache LRU trên đĩa: mỗi subset một file <key>.woff2, mtime là thời điểm dùng gần nhất"""
+
+    def __init__(self, cache_dir: str, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.woff2")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.path(key)
+        if not os.path.isfile(path):
+            return None
+        os.utime(path)  # Đánh dấu vừa dùng
+        return path
+
+    def put(self, key: str, data: bytes) -> str:
+        path = self.path(key)
+        tmp_path = f"{path}.tmp{threading.get_ident()}"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.evict()
+        return path
+
+    def evict(self) -> int:
+        """Xoá các subset dùng lâu nhất khi vượt giới hạn số file hoặc dung lượng"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".woff2"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        entries.sort(reverse=True)
+
+        removed = 0
+        total = 0
+        for index, (_, size, name) in enumerate(entries):
+            total += size
+            if index >= self.max_entries or total > self.max_bytes:
+                os.remove(os.path.join(self.cache_dir, name))
+                removed += 1
+        return removed
+
+
+class SubsetService:
+    """Tạo subset cho các collection trong build-config.json (font gộp + thư mục chunks)"""
+
+    def __init__(self, root: str, config: Dict[str, Any], cache: SubsetCache):
+        self.cache = cache
+        self.collections: Dict[str, Dict[str, Any]] = {}
+        # key → (collection, mã) để tạo lại font nếu file đã bị đẩy khỏi cache; LRU cùng giới hạn
+        # số mục với SubsetCache, khoá riêng để tra cứu không phải chờ lúc đang tạo subset (self.lock)
+        self.known: "OrderedDict[str, Tuple[str, List[int]]]" = OrderedDict()
+        self.known_lock = threading.Lock()
+        self.lock = threading.Lock()
+
+        for collection in config.get("collections", []):
+            output_dir = os.path.join(root, collection["output_dir"])
+            font_base = os.path.join(output_dir, collection.get("font_name", collection["id"]))
+            font_path = next((f"{font_base}.{ext}" for ext in ("ttf", "woff2", "woff")
+                              if os.path.isfile(f"{font_base}.{ext}")), None)
+            chunks_dir = os.path.join(output_dir, collection.get("chunks_dir") or "chunks")
+            if not font_path or not os.path.isfile(os.path.join(chunks_dir, "metadata.json")):
+                print(f"⚠️ Bỏ qua {collection['id']}: thiếu font hoặc chunks")
+                continue
+            self.collections[collection["id"]] = {
+                "font_path": font_path,
+                "font_digest": file_hash(font_path),
+                "code_map": load_code_map(chunks_dir),
+                "font_name": collection.get("css_family") or collection["prefix"].rstrip("-"),
+                "prefix": collection["prefix"],
+            }
+
+    def font_for(self, collection_id: str, codes: List[int]) -> Tuple[str, str]:
+        """(key, đường dẫn WOFF2) của subset, tạo mới nếu chưa có trong cache"""
+        info = self.collections[collection_id]
+        key = subset_key(info["font_digest"], codes)
+        self.remember(key, collection_id, codes)
+        path = self.cache.get(key)
+        if path:
+            return key, path
+        with self.lock:
+            path = self.cache.get(key)
+            if not path:
+                path = self.cache.put(key, subset_font(info["font_path"], codes))
+        return key, path
+
+    def remember(self, key: str, collection_id: str, codes: List[int]):
+        with self.known_lock:
+            self.known[key] = (collection_id, codes)
+            self.known.move_to_end(key)
+            while len(self.known) > self.cache.max_entries:
+                self.known.popitem(last=False)
+
+    def font_by_key(self, key: str) -> Optional[str]:
+        path = self.cache.get(key)
+        if path:
+            return path
+        with self.known_lock:
+            entry = self.known.get(key)
+        return self.font_for(*entry)[1] if entry else None
+
+    def subset_for(self, collection_id: str, names: List[str]) -> Tuple[Dict[str, int], List[str], Optional[str], Optional[str]]:
+        """(tên → mã, tên không tìm thấy, key, đường dẫn WOFF2) cho một danh sách icon"""
+        icons, missing = resolve_codes(names, self.collections[collection_id]["code_map"])
+        if not icons:
+            return icons, missing, None, None
+        key, path = self.font_for(collection_id, sorted(set(icons.values())))
+        return icons, missing, key, path
+
+    def css_for(self, collection_id: str, names: List[str]) -> Tuple[str, List[str]]:
+        """(CSS, các tên không tìm thấy); font nằm ở fonts/<key>.woff2 tương đối với CSS"""
+        icons, missing, key, _ = self.subset_for(collection_id, names)
+        if not icons:
+            return "", missing
+        info = self.collections[collection_id]
+        return subset_css(icons, info["font_name"], info["prefix"], f"fonts/{key}.woff2"), missing
+
+
+class SubsetRequestHandler(BaseHTTPRequestHandler):
+    service: SubsetService = None
+
+    def send_body(self, status: int, body: bytes, content_type: str, cache_control: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", cache_control)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_text(self, status: int, message: str):
+        self.send_body(status, message.encode("utf-8"), "text/plain; charset=utf-8", "no-store")
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/subset.css":
+            query = parse_qs(url.query)
+            collection_id = query.get("collection", [""])[0]
+            names = [n for n in ",".join(query.get("icons", [])).split(",") if n]
+            if collection_id not in self.service.collections:
+                return self.send_text(404, f"Không có collection: {collection_id}")
+            if not names or len(names) > MAX_ICONS_PER_REQUEST:
+                return self.send_text(400, f"Cần từ 1 đến {MAX_ICONS_PER_REQUEST} icon")
+            css, missing = self.service.css_for(collection_id, names)
+            if missing:
+                css = f"/* Không tìm thấy: {', '.join(missing[:20])} */\n" + css
+            return self.send_body(200, css.encode("utf-8"), "text/css; charset=utf-8", "public, max-age=3600")
+
+        if url.path.startswith("/fonts/") and url.path.endswith(".woff2"):
+            key = url.path[len("/fonts/"):-len(".woff2")]
+            path = self.service.font_by_key(key) if key.isalnum() else None
+            if not path:
+                return self.send_text(404, "Không tìm thấy subset")
+            with open(path, "rb") as f:
+                body = f.read()
+            # Khoá là hash nội dung nên file không bao giờ đổi
+            return self.send_body(200, body, "font/woff2", "public, max-age=31536000, immutable")
+
+        self.send_text(404, "Không tìm thấy")
+
+
+def serve(service: SubsetService, host: str = "127.0.0.1", port: int = 8765):
+    SubsetRequestHandler.service = service
+    server = ThreadingHTTPServer((host, port), SubsetRequestHandler)
+    print(f"🌐 Font subset endpoint: http://{host}:{port}/subset.css?collection=<id>&icons=a,b,c")
+    print(f"📦 Collection: {', '.join(service.collections) or '(không có)'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Dừng server.")
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tạo font subset (WOFF2 + CSS) chỉ gồm các icon cần dùng')
+    parser.add_argument('--config', default=DEFAULT_CONFIG, help='File cấu hình build (danh sách collection)')
+    parser.add_argument('--root', default=DEFAULT_ROOT, help='Thư mục gốc của site')
+    parser.add_argument('--collection', help='Collection cần subset (ví dụ: lawnicons)')
+    parser.add_argument('--icons', help='Danh sách tên icon, phân cách bởi dấu phẩy')
+    parser.add_argument('--icons-file', help='File chứa tên icon (mỗi dòng một tên)')
+    parser.add_argument('--output', help='Thư mục lưu <collection>-subset.woff2 và .css')
+    parser.add_argument('--serve', action='store_true', help='Chạy HTTP endpoint cục bộ')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-entries', type=int, default=MAX_ENTRIES, help='Số subset tối đa trong cache')
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    if args.collection:
+        config["collections"] = [c for c in config.get("collections", []) if c["id"] == args.collection]
+    cache = SubsetCache(os.path.join(args.root, SUBSET_CACHE_DIR), args.max_entries)
+    service = SubsetService(args.root, config, cache)
+
+    if args.serve:
+        serve(service, args.host, args.port)
+        return
+
+    if not args.collection or args.collection not in service.collections:
+        print("❌ Cần --collection hợp lệ (có font gộp và thư mục chunks).")
+        sys.exit(1)
+    names = [n.strip() for n in (args.icons or "").split(",") if n.strip()]
+    if args.icons_file:
+        with open(args.icons_file, "r", encoding="utf-8") as f:
+            names.extend(line.strip() for line in f if line.strip())
+    if not names:
+        print("❌ Cần --icons hoặc --icons-file.")
+        sys.exit(1)
+
+    output_dir = args.output or "."
+    os.makedirs(output_dir, exist_ok=True)
+    base_name = f"{args.collection}-subset"
+    icons, missing, _, font_path = service.subset_for(args.collection, names)
+    if missing:
+        print(f"⚠️ Không tìm thấy {len(missing)} icon: {', '.join(missing[:10])}")
+    if not icons:
+        print("❌ Không có icon hợp lệ nào.")
+        sys.exit(1)
+
+    info = service.collections[args.collection]
+    with open(font_path, "rb") as f:
+        font_bytes = f.read()
+    with open(os.path.join(output_dir, f"{base_name}.woff2"), "wb") as f:
+        f.write(font_bytes)
+    with open(os.path.join(output_dir, f"{base_name}.css"), "w", encoding="utf-8") as f:
+        f.write(subset_css(icons, info["font_name"], info["prefix"], f"{base_name}.woff2"))
+
+    original = os.path.getsize(info["font_path"])
+    print(f"✅ {len(icons)} icon → {base_name}.woff2 ({len(font_bytes):,} byte, "
+          f"font gốc {original:,} byte) + {base_name}.css")
+
+
+if __name__ == "__main__":
+    main()
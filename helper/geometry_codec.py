@@ -0,0 +1,429 @@
+import argparse
+import gzip
+import json
+import math
+import os
+import re
+import struct
+import sys
+import time
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+
+import json_codec
+import svg_path
+
+# Mã hoá hình học icon (icon.paths) thành file nhị phân "ICGQ" để đọc trực tiếp bằng mmap:
+# - mọi path của một chunk được tách token một lượt, phần số được xử lý bằng NumPy
+#   (đổi sang toạ độ tuyệt đối bằng cumsum có reset, không lặp từng số trong Python)
+# - toạ độ được lượng tử hoá về lưới 1/scale rồi lưu dạng int16: x/y là độ lệch so với điểm
+#   hiện tại (đã lượng tử hoá) đầu mỗi đoạn, bán kính/góc của lệnh A lưu giá trị tuyệt đối
+# - sai số mọi điểm ≤ 0.5/scale đơn vị lưới (không cộng dồn vì lượng tử hoá ở dạng tuyệt đối)
+#
+# Định dạng (little-endian, mỗi phần căn lề 4 byte):
+#   header 32 byte: b"ICGQ" | u8 version | 3 byte trống | u32 scale | u32 height
+#                   | u32 số icon | u32 số path | u32 số đoạn | u32 số toạ độ
+#   u32[icon+1]  : path đầu tiên của mỗi icon (bảng offset theo icon)
+#   u32[path+1]  : đoạn đầu tiên của mỗi path
+#   u32[path+1]  : toạ độ đầu tiên của mỗi path
+#   u32[icon]    : mã unicode (0 nếu không có)
+#   u16[icon]    : chiều rộng icon
+#   i16[toạ độ]  : dữ liệu toạ độ; ngoài ±32767 ghi thành ESCAPE (-32768) + int32 (hai word)
+#   u8[đoạn]     : mã lệnh (chỉ số trong COMMANDS, luôn là lệnh tuyệt đối khi giải mã)
+#   u32[icon+1] + UTF-8: tên icon
+#
+# Ví dụ:
+#   python helper/geometry_codec.py data/lawnicons/chunks             # báo cáo kích thước + sai số
+#   python helper/geometry_codec.py data/lawnicons/selection-all.json --output /tmp/all.geo
+
+MAGIC = b"ICGQ"
+VERSION = 1
+HEADER = struct.Struct("<4sB3xIIIIII")
+EXTENSION = ".geo"
+DEFAULT_SCALE = 16
+DEFAULT_HEIGHT = 1024
+
+COMMANDS = "MLHVCSQTAZ"
+ESCAPE = -32768  # word đánh dấu giá trị int32 (hai word tiếp theo, little-endian)
+
+OPCODES = {c: i for i, c in enumerate(COMMANDS)}
+ARG_COUNTS = np.array([svg_path.ARG_COUNTS[c] for c in COMMANDS])
+# Vai trò của từng tham số: 0 = x, 1 = y, 2 = giá trị khác (bán kính, góc), 3 = cờ 0/1
+ROLES = {
+    "M": [0, 1], "L": [0, 1], "T": [0, 1], "H": [0], "V": [1],
+    "C": [0, 1, 0, 1, 0, 1], "S": [0, 1, 0, 1], "Q": [0, 1, 0, 1],
+    "A": [2, 2, 2, 3, 3, 0, 1], "Z": [],
+}
+ROLE_TABLE = np.full((len(COMMANDS), 7), -1, dtype=np.int8)
+for _c, _roles in ROLES.items():
+    ROLE_TABLE[OPCODES[_c], :len(_roles)] = _roles
+
+# Ký tự phân cách path khi ghép mọi path thành một chuỗi (không phải lệnh SVG)
+PATH_SEPARATOR = "X"
+TOKEN = re.compile(r"[A-Za-z]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+def _normalize_arcs(d: str) -> str:
+    # Cờ của lệnh A có thể viết liền ("011") nên regex không tách được: chuẩn hoá qua svg_path
+    return " ".join(f"{c} {' '.join(repr(v) for v in args)}" for c, args in svg_path.parse_path(d))
+
+
+def _reset_cumsum(values: np.ndarray, is_reset: np.ndarray) -> np.ndarray:
+    """E[k] = values[k] nếu is_reset[k], ngược lại E[k-1] + values[k] (cumsum khởi động lại)"""
+    index = np.arange(len(values))
+    last_reset = np.maximum.accumulate(np.where(is_reset, index, 0))
+    csum = np.cumsum(np.where(is_reset, 0.0, values))
+    return values[last_reset] + csum - csum[last_reset]
+
+
+def parse_paths(paths: Sequence[str]) -> Dict[str, np.ndarray]:
+    """
+    Tách và đổi mọi path sang toạ độ tuyệt đối bằng NumPy.
+    Trả về mảng theo đoạn ('opcode', 'path', 'end_x', 'end_y') và theo số ('segment', 'role', 'value').
+    """
+    text = PATH_SEPARATOR.join(_normalize_arcs(d) if ("a" in d or "A" in d) else d for d in paths)
+    tokens = np.array(TOKEN.findall(PATH_SEPARATOR + text), dtype=str)
+    if len(tokens) == 0:
+        raise ValueError("Không có path nào")
+
+    is_letter = np.char.isalpha(tokens)
+    letters = tokens[is_letter]
+    is_separator = letters == PATH_SEPARATOR
+    upper = np.char.upper(letters)
+    known = np.isin(upper, list(COMMANDS)) | is_separator
+    if not known.all():
+        raise ValueError(f"Lệnh path không hỗ trợ: {sorted(set(letters[~known]))}")
+    letter_opcode = np.array([OPCODES.get(c, -1) for c in upper], dtype=np.int16)
+    letter_relative = (letters != upper)
+
+    # Với mỗi token: lệnh gần nhất phía trước và vị trí của số trong nhóm tham số
+    letter_index = np.cumsum(is_letter) - 1
+    token_index = np.arange(len(tokens))
+    letter_pos = np.flatnonzero(is_letter)
+    number_mask = ~is_letter
+    numbers_letter = letter_index[number_mask]
+    if (numbers_letter < 0).any() or is_separator[numbers_letter].any():
+        raise ValueError("Path phải bắt đầu bằng lệnh M")
+    number_opcode = letter_opcode[numbers_letter]
+    counts = ARG_COUNTS[number_opcode]
+    if (counts == 0).any():
+        raise ValueError("Path không hợp lệ: có số sau lệnh Z")
+    position = token_index[number_mask] - letter_pos[numbers_letter] - 1
+    role_index = position % counts
+    repeat = position // counts
+    values = tokens[number_mask].astype(np.float64)
+
+    # Số tham số của mỗi nhóm lệnh phải chia hết cho số tham số của lệnh
+    per_letter = np.bincount(numbers_letter, minlength=len(letters))
+    letter_counts = np.where(letter_opcode >= 0, ARG_COUNTS[np.maximum(letter_opcode, 0)], 0)
+    bad = (letter_counts > 0) & ((per_letter == 0) | (per_letter % np.maximum(letter_counts, 1) != 0))
+    if bad.any():
+        raise ValueError(f"Path không hợp lệ: thiếu tham số cho lệnh {letters[np.flatnonzero(bad)[0]]!r}")
+
+    # Đoạn: mỗi nhóm tham số (số đầu tiên có role_index 0) và mỗi lệnh Z
+    starts = np.zeros(len(tokens), dtype=bool)
+    starts[np.flatnonzero(number_mask)[role_index == 0]] = True
+    z_letters = letter_pos[letter_opcode == OPCODES["Z"]]
+    starts[z_letters] = True
+    segment_of_token = np.cumsum(starts) - 1
+    segment_tokens = np.flatnonzero(starts)
+    segment_letter = letter_index[segment_tokens]
+    opcode = letter_opcode[segment_letter].astype(np.uint8)
+    relative = letter_relative[segment_letter].copy()
+    # Cặp toạ độ lặp lại sau M là L
+    segment_repeat = np.zeros(len(segment_tokens), dtype=np.int64)
+    number_starts = role_index == 0
+    segment_repeat[segment_of_token[np.flatnonzero(number_mask)[number_starts]]] = repeat[number_starts]
+    opcode[(opcode == OPCODES["M"]) & (segment_repeat > 0)] = OPCODES["L"]
+    path_id = (np.cumsum(is_separator) - 1)[segment_letter]
+    first_in_path = np.ones(len(opcode), dtype=bool)
+    first_in_path[1:] = path_id[1:] != path_id[:-1]
+    if (opcode[first_in_path] != OPCODES["M"]).any():
+        raise ValueError("Path phải bắt đầu bằng lệnh M")
+    relative[first_in_path] = False  # m đầu path được hiểu là tuyệt đối
+
+    number_segment = segment_of_token[number_mask]
+    role = ROLE_TABLE[number_opcode, role_index]
+    is_end = role_index >= counts - 2  # hai số cuối (hoặc một số với H/V) là điểm cuối
+    is_z = opcode == OPCODES["Z"]
+    is_m = opcode == OPCODES["M"]
+    index = np.arange(len(opcode))
+    last_m = np.maximum.accumulate(np.where(is_m, index, 0))
+
+    ends = []
+    for axis in (0, 1):
+        end_value = np.zeros(len(opcode))
+        has_axis = np.zeros(len(opcode), dtype=bool)
+        sel = is_end & (role == axis)
+        end_value[number_segment[sel]] = values[sel]
+        has_axis[number_segment[sel]] = True
+        # Không có toạ độ trục này (H với y, V với x): độ lệch 0 so với điểm hiện tại
+        is_reset = (has_axis & ~relative) | is_z | first_in_path
+        end_value = np.where(is_z, np.nan, end_value)
+        end = _reset_cumsum(end_value, is_reset)
+        # Z quay về điểm đầu subpath (điểm cuối của M gần nhất); lặp nếu M đó tương đối sau một Z khác
+        while np.isnan(end[is_z]).any():
+            resolved = end_value.copy()
+            resolved[is_z] = end[last_m[is_z]]
+            if np.array_equal(np.isnan(resolved[is_z]), np.isnan(end_value[is_z])):
+                raise ValueError("Không xác định được điểm đầu subpath cho lệnh Z")
+            end_value = resolved
+            end = _reset_cumsum(end_value, is_reset)
+        ends.append(end)
+
+    # Toạ độ tuyệt đối của từng số: cộng điểm hiện tại (điểm cuối của đoạn trước) nếu đoạn tương đối
+    previous = [np.concatenate(([0.0], e[:-1])) for e in ends]
+    for axis in (0, 1):
+        previous[axis][first_in_path] = 0.0
+        sel = (role == axis) & relative[number_segment]
+        values[sel] += previous[axis][number_segment[sel]]
+
+    return {
+        "opcode": opcode, "path": path_id, "end_x": ends[0], "end_y": ends[1],
+        "segment": number_segment, "role": role, "value": values,
+        "path_count": int(is_separator.sum()),
+    }
+
+
+def _pack_words(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ghi số nguyên thành mảng int16; giá trị ngoài phạm vi (hiếm, ví dụ điểm điều khiển rất xa)
+    thành ESCAPE + hai word của int32. Trả về (mảng int16, vị trí word của từng số + tổng).
+    """
+    wide = (values > 32767) | (values < -32767)
+    if (np.abs(values[wide]) > 2 ** 31 - 1).any():
+        raise ValueError("Toạ độ vượt phạm vi int32, hãy giảm scale")
+    widths = np.where(wide, 3, 1)
+    offsets = np.concatenate(([0], np.cumsum(widths)))
+    words = np.empty(offsets[-1], dtype="<i2")
+    starts = offsets[:-1]
+    words[starts[~wide]] = values[~wide]
+    if wide.any():
+        as_int32 = values[wide].astype("<i4").view("<u2").reshape(-1, 2).view("<i2")
+        words[starts[wide]] = ESCAPE
+        words[starts[wide] + 1] = as_int32[:, 0]
+        words[starts[wide] + 2] = as_int32[:, 1]
+    return words, offsets
+
+
+def encode_icons(icons: List[Dict[str, Any]], scale: int = DEFAULT_SCALE, height: int = DEFAULT_HEIGHT) -> bytes:
+    """Mã hoá danh sách icon (định dạng selection IcoMoon) thành bytes ICGQ"""
+    names, codes, widths, paths, icon_offsets = [], [], [], [], [0]
+    for icon in icons:
+        data = icon.get("icon") or {}
+        names.append(icon.get("properties", {}).get("name") or icon.get("name") or "")
+        code = icon.get("properties", {}).get("code")
+        codes.append(int(code, 16) if isinstance(code, str) else (code or 0))
+        widths.append(int(data.get("width", height)))
+        paths.extend(data.get("paths") or [])
+        icon_offsets.append(len(paths))
+
+    if paths:
+        parsed = parse_paths(paths)
+        opcode, segment, role = parsed["opcode"], parsed["segment"], parsed["role"]
+        quantized = np.rint(parsed["value"] * np.where(role == 3, 1, scale)).astype(np.int64)
+        # x/y lưu độ lệch so với điểm hiện tại đã lượng tử hoá (điểm cuối đoạn trước trong cùng path)
+        for axis, end in ((0, parsed["end_x"]), (1, parsed["end_y"])):
+            q_end = np.rint(end * scale).astype(np.int64)
+            q_prev = np.concatenate(([0], q_end[:-1]))
+            q_prev[np.concatenate(([True], parsed["path"][1:] != parsed["path"][:-1]))] = 0
+            sel = role == axis
+            quantized[sel] -= q_prev[segment[sel]]
+        coords, word_offsets = _pack_words(quantized)
+        path_segments = np.searchsorted(parsed["path"], np.arange(len(paths) + 1))
+        segment_coords = np.searchsorted(segment, np.arange(len(opcode) + 1))
+        path_coords = word_offsets[segment_coords[path_segments]]
+    else:
+        opcode = np.zeros(0, dtype=np.uint8)
+        coords = np.zeros(0, dtype="<i2")
+        path_segments = path_coords = np.zeros(1, dtype=np.int64)
+
+    encoded_names = [n.encode("utf-8") for n in names]
+    name_offsets = np.concatenate(([0], np.cumsum([len(n) for n in encoded_names]))).astype("<u4")
+
+    sections = [
+        np.asarray(icon_offsets, dtype="<u4"), path_segments.astype("<u4"), path_coords.astype("<u4"),
+        np.asarray(codes, dtype="<u4"), np.asarray(widths, dtype="<u2"), coords,
+        opcode.astype(np.uint8), name_offsets,
+    ]
+    out = bytearray(HEADER.pack(MAGIC, VERSION, scale, height, len(icons), len(paths), len(opcode), len(coords)))
+    for array in sections:
+        out.extend(array.tobytes())
+        out.extend(b"\0" * (-len(out) % 4))
+    out.extend(b"".join(encoded_names))
+    return bytes(out)
+
+
+def decimal_places(scale: int) -> int:
+    """Số chữ số thập phân đủ để ghi chính xác k/scale (scale = 2^a·5^b → max(a, b))"""
+    twos = fives = 0
+    while scale % 2 == 0:
+        scale //= 2
+        twos += 1
+    while scale % 5 == 0:
+        scale //= 5
+        fives += 1
+    if scale != 1:
+        # Không biểu diễn chính xác được: đủ chữ số để sai số làm tròn nhỏ hơn bước lượng tử
+        return max(twos, fives) + math.ceil(math.log10(scale)) + 1
+    return max(twos, fives)
+
+
+class GeometryFile:
+    """
+    Đọc file ICGQ (bytes hoặc đường dẫn, đường dẫn được mmap) mà không giải nén toàn bộ:
+    len(), names, paths(i) → danh sách chuỗi d tuyệt đối, segments(i) → đoạn của svg_path.
+    """
+
+    def __init__(self, source: Union[str, bytes]):
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self.buffer = np.frombuffer(source, dtype=np.uint8)
+        else:
+            self.buffer = np.memmap(source, dtype=np.uint8, mode="r")
+        magic, version, self.scale, self.height, icons, paths, segments, coords = \
+            HEADER.unpack(self.buffer[:HEADER.size].tobytes())
+        if magic != MAGIC:
+            raise ValueError("Không phải file ICGQ")
+        if version != VERSION:
+            raise ValueError(f"Phiên bản ICGQ không hỗ trợ: {version}")
+
+        offset = HEADER.size
+        layout = [("icon_paths", "<u4", icons + 1), ("path_segments", "<u4", paths + 1),
+                  ("path_coords", "<u4", paths + 1), ("codes", "<u4", icons), ("widths", "<u2", icons),
+                  ("coords", "<i2", coords), ("opcodes", "u1", segments), ("name_offsets", "<u4", icons + 1)]
+        for name, dtype, count in layout:
+            size = np.dtype(dtype).itemsize * count
+            setattr(self, name, self.buffer[offset:offset + size].view(dtype))
+            offset += size + (-(offset + size) % 4)
+        self.names_blob = self.buffer[offset:]
+        self.precision = decimal_places(self.scale)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def name(self, i: int) -> str:
+        return self.names_blob[self.name_offsets[i]:self.name_offsets[i + 1]].tobytes().decode("utf-8")
+
+    @property
+    def names(self) -> List[str]:
+        return [self.name(i) for i in range(len(self))]
+
+    def path_segments_of(self, p: int) -> List[svg_path.Segment]:
+        """Đoạn tuyệt đối (dạng svg_path) của path thứ p"""
+        segments = []
+        pos = int(self.path_coords[p])
+        x = y = start_x = start_y = 0
+        for op in self.opcodes[self.path_segments[p]:self.path_segments[p + 1]]:
+            command = COMMANDS[op]
+            count = svg_path.ARG_COUNTS[command]
+            raw = []
+            while len(raw) < count:
+                word = int(self.coords[pos])
+                if word == ESCAPE:
+                    word = int(self.coords[pos + 1:pos + 3].view("<i4")[0])
+                    pos += 2
+                raw.append(word)
+                pos += 1
+            if command == "Z":
+                x, y = start_x, start_y
+                segments.append(("Z", []))
+                continue
+            q = []
+            for value, role in zip(raw, ROLES[command]):
+                q.append(value + (x if role == 0 else y if role == 1 else 0))
+            if command == "H":
+                x = q[0]
+            elif command == "V":
+                y = q[0]
+            else:
+                x, y = q[-2], q[-1]
+            if command == "M":
+                start_x, start_y = x, y
+            segments.append((command, [v if role == 3 else v / self.scale for v, role in zip(q, ROLES[command])]))
+        return segments
+
+    def segments(self, i: int) -> List[List[svg_path.Segment]]:
+        return [self.path_segments_of(p) for p in range(self.icon_paths[i], self.icon_paths[i + 1])]
+
+    def paths(self, i: int) -> List[str]:
+        return [svg_path.serialize_path(s, self.precision) for s in self.segments(i)]
+
+
+def max_error(icons: List[Dict[str, Any]], geometry: GeometryFile) -> float:
+    """Sai số lớn nhất (đơn vị lưới) giữa path gốc và path giải mã"""
+    worst = 0.0
+    for i, icon in enumerate(icons):
+        originals = (icon.get("icon") or {}).get("paths") or []
+        decoded = geometry.segments(i)
+        if len(originals) != len(decoded):
+            raise ValueError(f"Icon {i}: số path khác nhau ({len(originals)} ≠ {len(decoded)})")
+        for d, segments in zip(originals, decoded):
+            a = svg_path.path_points(svg_path.absolutize(svg_path.parse_path(d)))
+            b = svg_path.path_points(segments)
+            if len(a) != len(b):
+                raise ValueError(f"Icon {i}: số điểm khác nhau ({len(a)} ≠ {len(b)})")
+            if a:
+                worst = max(worst, float(np.abs(np.asarray(a) - np.asarray(b)).max()))
+    return worst
+
+
+def load_icons(source: str) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """[(nhãn, icon)] từ selection.json hoặc từng chunk của thư mục chunks"""
+    if not os.path.isdir(source):
+        return [(os.path.basename(source), json_codec.load_file(source).get("icons", []))]
+    with open(os.path.join(source, "metadata.json"), "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+    return [(entry["file"], json_codec.load_file(os.path.join(source, entry["file"])).get("icons", []))
+            for entry in metadata.get("chunks", [])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mã hoá icon.paths thành file nhị phân ICGQ (int16 lượng tử hoá)')
+    parser.add_argument('source', help='selection.json hoặc thư mục chunks có metadata.json')
+    parser.add_argument('--scale', type=int, default=DEFAULT_SCALE,
+                        help=f'Số bước lượng tử trên một đơn vị lưới (mặc định {DEFAULT_SCALE}, sai số ≤ 0.5/scale)')
+    parser.add_argument('--output', help='Ghi toàn bộ icon vào một file .geo')
+    args = parser.parse_args()
+
+    print("=== 📐 MÃ HOÁ HÌNH HỌC ICON (ICGQ) ===")
+    if not os.path.exists(args.source):
+        print(f"❌ Không tìm thấy: {args.source}")
+        sys.exit(1)
+
+    totals = {"json": 0, "json_gz": 0, "geo": 0, "geo_gz": 0, "icons": 0}
+    worst = 0.0
+    encode_seconds = 0.0
+    all_icons = []
+    for label, icons in load_icons(args.source):
+        started = time.perf_counter()
+        blob = encode_icons(icons, args.scale)
+        encode_seconds += time.perf_counter() - started
+        worst = max(worst, max_error(icons, GeometryFile(blob)))
+        paths_json = json.dumps([(icon.get("icon") or {}).get("paths") for icon in icons],
+                                separators=(",", ":")).encode("utf-8")
+        totals["json"] += len(paths_json)
+        totals["json_gz"] += len(gzip.compress(paths_json, 6))
+        totals["geo"] += len(blob)
+        totals["geo_gz"] += len(gzip.compress(blob, 6))
+        totals["icons"] += len(icons)
+        all_icons.extend(icons)
+        print(f"   {label:<28}{len(icons):>6} icon{len(paths_json):>12,} B → {len(blob):>10,} B")
+
+    print(f"📊 {totals['icons']} icon: path JSON {totals['json']:,} B (gzip {totals['json_gz']:,})"
+          f" → ICGQ {totals['geo']:,} B (gzip {totals['geo_gz']:,}),"
+          f" giảm {1 - totals['geo'] / max(totals['json'], 1):.0%}")
+    print(f"🎯 Sai số lớn nhất: {worst:.4f} đơn vị (giới hạn {0.5 / args.scale:.4f})")
+    print(f"⏱️ Mã hoá: {encode_seconds:.2f}s")
+    if worst > 0.5 / args.scale + 1e-9:
+        print("❌ Sai số vượt giới hạn")
+        sys.exit(1)
+
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(encode_icons(all_icons, args.scale))
+        print(f"💾 Đã lưu: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
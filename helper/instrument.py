@@ -0,0 +1,212 @@
+import contextlib
+import cProfile
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: không đo được peak RSS và CPU của process con
+    resource = None
+
+# Đo từng bước của pipeline: thời gian thực, CPU (kể cả process con), RSS của riêng bước,
+# peak bộ nhớ Python (tracemalloc, tuỳ chọn vì làm chậm 30–100%), byte đọc/ghi,
+# số icon/giây và file cProfile (tuỳ chọn) cho từng bước.
+# Byte đọc/ghi lấy từ /proc/self/io (rchar/wchar: mọi lệnh read/write của process, chỉ có trên Linux,
+# không gồm process con); output_bytes là tổng kích thước file trong thư mục đầu ra được ghi trong
+# lúc chạy bước, nên tính cả file do process con ghi.
+# RSS của bước được lấy mẫu trong lúc chạy (/proc/self/statm, chỉ process hiện tại): stage_rss_mb là
+# RSS cao nhất trong bước, rss_growth_mb là phần tăng so với lúc bắt đầu bước. process_peak_rss_mb
+# là peak RSS từ đầu process (ru_maxrss), không tách được theo bước.
+#
+# Ví dụ:
+#   with instrument.measure(output_dir="data/lawnicons") as metrics:
+#       count = run_split()
+#       metrics["icons"] = count
+#   print(metrics["seconds"], metrics["icons_per_second"])
+
+MB = 1 << 20
+RSS_SAMPLE_INTERVAL = 0.01
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Peak RSS từ đầu process (lấy max với process con đã kết thúc), không phải của riêng một bước;
+    ru_maxrss tính bằng KB trên Linux, byte trên macOS
+    """
+    if resource is None:
+        return None
+    unit = 1 if sys.platform == "darwin" else 1024
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(peak * unit / MB, 1)
+
+
+def current_rss_mb() -> Optional[float]:
+    """RSS hiện tại của process (Linux), None nếu không có /proc"""
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / MB
+
+
+class RssSampler:
+    """Luồng nền lấy mẫu RSS hiện tại mỗi interval giây, giữ giá trị đầu và giá trị cao nhất"""
+
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.start_mb = current_rss_mb()
+        self.peak_mb = self.start_mb
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        rss = current_rss_mb()
+        if rss is not None and (self.peak_mb is None or rss > self.peak_mb):
+            self.peak_mb = rss
+
+    def start(self) -> "RssSampler":
+        if self.start_mb is not None:
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread.is_alive():
+            self._stop.set()
+            self._thread.join()
+        # Mẫu cuối: bước quá ngắn có thể chưa kịp lấy mẫu nào
+        self._sample()
+
+
+def cpu_seconds() -> float:
+    """CPU của process và các process con đã kết thúc (process pool của các bước)"""
+    if resource is None:
+        return time.process_time()
+    usage = [resource.getrusage(who) for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+    return sum(u.ru_utime + u.ru_stime for u in usage)
+
+
+def io_counters() -> Optional[Dict[str, int]]:
+    """{'read', 'written'} byte qua read()/write() của process (Linux), None nếu không có /proc"""
+    try:
+        with open("/proc/self/io", "r", encoding="ascii") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return None
+    return {"read": int(fields["rchar"]), "written": int(fields["wchar"])}
+
+
+def written_bytes(output_dir: str, since: float) -> int:
+    """Tổng kích thước các file trong output_dir có mtime từ thời điểm since (file không đổi giữ nguyên mtime)"""
+    total = 0
+    for dirpath, _, filenames in os.walk(output_dir):
+        for filename in filenames:
+            try:
+                stat = os.stat(os.path.join(dirpath, filename))
+            except OSError:
+                continue
+            if stat.st_mtime >= since:
+                total += stat.st_size
+    return total
+
+
+@contextlib.contextmanager
+def measure(output_dir: Optional[str] = None, profile_path: Optional[str] = None,
+            trace_memory: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Đo khối lệnh bên trong; trả về dict số liệu (được điền khi khối kết thúc, kể cả khi có lỗi).
+    Gán metrics["icons"] bên trong khối để có icons_per_second.
+    trace_memory: bật tracemalloc (nếu chưa bật) và lấy peak bộ nhớ Python của riêng bước này.
+    """
+    metrics: Dict[str, Any] = {}
+    if trace_memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+    profiler = cProfile.Profile() if profile_path else None
+    io_before = io_counters()
+    sampler = RssSampler().start()
+    wall_started = time.time()
+    started, cpu_started = time.perf_counter(), cpu_seconds()
+    if profiler:
+        profiler.enable()
+    try:
+        yield metrics
+    finally:
+        if profiler:
+            profiler.disable()
+        seconds = time.perf_counter() - started
+        sampler.stop()
+        metrics["seconds"] = round(seconds, 3)
+        metrics["cpu_seconds"] = round(cpu_seconds() - cpu_started, 3)
+        if sampler.peak_mb is not None:
+            metrics["stage_rss_mb"] = round(sampler.peak_mb, 1)
+            metrics["rss_growth_mb"] = round(sampler.peak_mb - sampler.start_mb, 1)
+        metrics["process_peak_rss_mb"] = peak_rss_mb()
+        if trace_memory:
+            metrics["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / MB, 1)
+        io_after = io_counters()
+        if io_before and io_after:
+            metrics["bytes_read"] = io_after["read"] - io_before["read"]
+            metrics["bytes_written"] = io_after["written"] - io_before["written"]
+        if output_dir and os.path.isdir(output_dir):
+            metrics["output_bytes"] = written_bytes(output_dir, wall_started)
+        if metrics.get("icons") is not None and seconds > 0:
+            metrics["icons_per_second"] = round(metrics["icons"] / seconds, 1)
+        if profiler:
+            os.makedirs(os.path.dirname(os.path.abspath(profile_path)), exist_ok=True)
+            profiler.dump_stats(profile_path)
+            metrics["profile"] = profile_path
+
+
+def format_bytes(value: Optional[int]) -> str:
+    if value is None:
+        return "–"
+    for unit in ("B", "KB", "MB"):
+        if value < 1024:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
+
+
+def format_mb(value: Optional[float]) -> str:
+    return f"{value:.1f}" if value is not None else "–"
+
+
+def format_table(collections: List[Dict[str, Any]]) -> List[str]:
+    """Bảng tóm tắt theo collection × bước, kèm tỉ lệ thời gian và bước tốn thời gian nhất"""
+    rows = [(c["id"], stage, m) for c in collections for stage, m in c.get("stages", {}).items()]
+    if not rows:
+        return []
+    total = sum(m["seconds"] for _, _, m in rows) or 1.0
+    # RSS bước: RSS cao nhất lấy mẫu trong bước; +RSS: phần tăng so với lúc bắt đầu bước
+    lines = [f"{'collection':<14}{'bước':<10}{'thời gian':>10}{'CPU':>9}{'%':>6}{'RSS bước':>10}{'+RSS':>7}"
+             f"{'py MB':>7}{'đọc':>10}{'ghi ra':>10}{'icon/s':>12}"]
+    for collection_id, stage, m in rows:
+        traced = m.get("peak_traced_mb")
+        per_second = m.get("icons_per_second")
+        growth = m.get("rss_growth_mb")
+        lines.append(
+            f"{collection_id:<14}{stage:<10}{m['seconds']:>9.3f}s{m['cpu_seconds']:>8.2f}s"
+            f"{m['seconds'] / total:>6.0%}{format_mb(m.get('stage_rss_mb')):>10}"
+            f"{(f'{growth:+.1f}' if growth is not None else '–'):>7}"
+            f"{(f'{traced:.1f}' if traced is not None else '–'):>7}"
+            f"{format_bytes(m.get('bytes_read')):>10}{format_bytes(m.get('output_bytes', m.get('bytes_written'))):>10}"
+            f"{(f'{per_second:,.0f}' if per_second else '–'):>12}")
+    by_stage: Dict[str, float] = {}
+    for _, stage, m in rows:
+        by_stage[stage] = by_stage.get(stage, 0.0) + m["seconds"]
+    slowest = max(by_stage, key=by_stage.get)
+    lines.append(f"🐢 Bước tốn thời gian nhất: {slowest} ({by_stage[slowest]:.2f}s, {by_stage[slowest] / total:.0%})")
+    process_peak = max((m.get("process_peak_rss_mb") or 0 for _, _, m in rows), default=0)
+    if process_peak:
+        lines.append(f"🧠 Peak RSS của process (từ đầu, không theo bước): {process_peak:.1f} MB")
+    return lines
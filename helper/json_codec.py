@@ -0,0 +1,330 @@
+import argparse
+import gzip
+import json
+import os
+import struct
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+# Các kiểu mã hoá dữ liệu đầu ra (chunk, search, geometry, ...):
+# - 'pretty' : JSON thụt lề 2 (mặc định cũ, dễ đọc/diff)
+# - 'min'    : JSON minified
+# - 'short'  : JSON minified + đổi tên key dài của IcoMoon sang key ngắn (SHORT_KEYS),
+#              object gốc có thêm "$schema": SHORT_SCHEMA để nhận biết
+# - 'packed' : nhị phân "ICPK" gồm bảng chuỗi (key + giá trị chuỗi, mỗi chuỗi lưu một lần)
+#              và cây giá trị kiểu MessagePack
+#
+# Hợp đồng giải mã phía trình duyệt nằm ở scripts.js (decodeShortKeys, decodePacked):
+# metadata.json ghi "encoding", mỗi chunk trong metadata ghi tên file thực tế.
+#
+# Định dạng 'packed' (số nguyên không dấu là varint LEB128):
+#   b"ICPK" | u8 version | varint số chuỗi | (varint độ dài byte + UTF-8) * n | giá trị
+# Giá trị: 1 byte tag rồi dữ liệu
+#   0 null | 1 false | 2 true | 3 int (zigzag varint) | 4 float64 LE
+#   5 chuỗi (varint chỉ số bảng chuỗi) | 6 mảng (varint n, n giá trị)
+#   7 object (varint n, n cặp [varint chỉ số key, giá trị])
+#
+# Ví dụ báo cáo kích thước / thời gian parse:
+#   python helper/json_codec.py data/lawnicons/chunks data/simpleicons/chunks
+
+ENCODINGS = ("pretty", "min", "short", "packed")
+# Kiểu mã hoá vẫn là JSON hợp lệ cho IcoMoon (dùng cho selection.json gộp)
+JSON_ENCODINGS = ("pretty", "min")
+
+PACKED_MAGIC = b"ICPK"
+PACKED_VERSION = 1
+SHORT_SCHEMA = "short-keys/1"
+SHORT_MARKER = "$schema"
+ESCAPE = "~"
+
+# Key đầy đủ → key ngắn. Không dùng n/t/d/c/u để không đụng key của search/geometry chunk.
+SHORT_KEYS = {
+    "icons": "is",
+    "icon": "i",
+    "paths": "p",
+    "attrs": "a",
+    "isMulticolor": "m",
+    "isMulticolor2": "m2",
+    "colorPermutations": "cp",
+    "grid": "g",
+    "tags": "tg",
+    "properties": "P",
+    "order": "o",
+    "name": "nm",
+    "prevSize": "ps",
+    "code": "cd",
+    "setIdx": "si",
+    "setId": "sd",
+    "iconIdx": "ii",
+    "description": "ds",
+    "category": "ct",
+    "opacity": "op",
+    "index": "x",
+    "start": "s",
+    "end": "e",
+    "count": "k",
+}
+LONG_KEYS = {short: full for full, short in SHORT_KEYS.items()}
+
+TAG_NULL, TAG_FALSE, TAG_TRUE, TAG_INT, TAG_FLOAT, TAG_STR, TAG_ARRAY, TAG_OBJECT = range(8)
+
+
+def file_extension(encoding: str) -> str:
+    return ".bin" if encoding == "packed" else ".json"
+
+
+# ---------- short-key ----------
+
+def _shorten_key(key: str) -> str:
+    # Key gốc trùng key ngắn (hoặc bắt đầu bằng ~) được thoát bằng "~" để giải mã không nhầm
+    if key in LONG_KEYS or key.startswith(ESCAPE) or key == SHORT_MARKER:
+        return ESCAPE + key
+    return SHORT_KEYS.get(key, key)
+
+
+def _expand_key(key: str) -> str:
+    if key.startswith(ESCAPE):
+        return key[1:]
+    return LONG_KEYS.get(key, key)
+
+
+def shorten_keys(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {_shorten_key(k): shorten_keys(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [shorten_keys(v) for v in value]
+    return value
+
+
+def expand_keys(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {_expand_key(k): expand_keys(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [expand_keys(v) for v in value]
+    return value
+
+
+# ---------- packed ----------
+
+def _write_varint(out: bytearray, n: int):
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _collect_strings(value: Any, counter: Counter):
+    if isinstance(value, str):
+        counter[value] += 1
+    elif isinstance(value, dict):
+        for k, v in value.items():
+            counter[k] += 1
+            _collect_strings(v, counter)
+    elif isinstance(value, list):
+        for v in value:
+            _collect_strings(v, counter)
+
+
+def pack(value: Any) -> bytes:
+    """Mã hoá giá trị JSON sang định dạng 'packed'"""
+    counter: Counter = Counter()
+    _collect_strings(value, counter)
+    # Chuỗi dùng nhiều nhất có chỉ số nhỏ nhất (varint 1 byte)
+    strings = [s for s, _ in counter.most_common()]
+    table = {s: i for i, s in enumerate(strings)}
+
+    out = bytearray(PACKED_MAGIC)
+    out.append(PACKED_VERSION)
+    _write_varint(out, len(strings))
+    for s in strings:
+        encoded = s.encode("utf-8")
+        _write_varint(out, len(encoded))
+        out += encoded
+
+    def write(v):
+        if v is None:
+            out.append(TAG_NULL)
+        elif v is True:
+            out.append(TAG_TRUE)
+        elif v is False:
+            out.append(TAG_FALSE)
+        elif isinstance(v, int):
+            out.append(TAG_INT)
+            _write_varint(out, v * 2 if v >= 0 else -v * 2 - 1)
+        elif isinstance(v, float):
+            out.append(TAG_FLOAT)
+            out.extend(struct.pack("<d", v))
+        elif isinstance(v, str):
+            out.append(TAG_STR)
+            _write_varint(out, table[v])
+        elif isinstance(v, (list, tuple)):
+            out.append(TAG_ARRAY)
+            _write_varint(out, len(v))
+            for item in v:
+                write(item)
+        elif isinstance(v, dict):
+            out.append(TAG_OBJECT)
+            _write_varint(out, len(v))
+            for k, item in v.items():
+                _write_varint(out, table[k])
+                write(item)
+        else:
+            raise TypeError(f"Kiểu không hỗ trợ khi mã hoá packed: {type(v).__name__}")
+
+    write(value)
+    return bytes(out)
+
+
+def unpack(data: bytes) -> Any:
+    """Giải mã định dạng 'packed'"""
+    if data[:4] != PACKED_MAGIC:
+        raise ValueError("Không phải dữ liệu packed (thiếu ICPK)")
+    if data[4] != PACKED_VERSION:
+        raise ValueError(f"Phiên bản packed không hỗ trợ: {data[4]}")
+    pos = 5
+    count, pos = _read_varint(data, pos)
+    strings = []
+    for _ in range(count):
+        length, pos = _read_varint(data, pos)
+        strings.append(data[pos:pos + length].decode("utf-8"))
+        pos += length
+
+    def read(pos):
+        tag = data[pos]
+        pos += 1
+        if tag == TAG_STR:
+            index, pos = _read_varint(data, pos)
+            return strings[index], pos
+        if tag == TAG_INT:
+            n, pos = _read_varint(data, pos)
+            return (n >> 1) if not n & 1 else -((n + 1) >> 1), pos
+        if tag == TAG_OBJECT:
+            n, pos = _read_varint(data, pos)
+            obj = {}
+            for _ in range(n):
+                key, pos = _read_varint(data, pos)
+                obj[strings[key]], pos = read(pos)
+            return obj, pos
+        if tag == TAG_ARRAY:
+            n, pos = _read_varint(data, pos)
+            arr = []
+            for _ in range(n):
+                item, pos = read(pos)
+                arr.append(item)
+            return arr, pos
+        if tag == TAG_FLOAT:
+            return struct.unpack_from("<d", data, pos)[0], pos + 8
+        if tag in (TAG_NULL, TAG_FALSE, TAG_TRUE):
+            return (None, False, True)[tag], pos
+        raise ValueError(f"Tag packed không hợp lệ: {tag} tại vị trí {pos - 1}")
+
+    return read(pos)[0]
+
+
+# ---------- API chung ----------
+
+def dumps(value: Any, encoding: str = "pretty") -> bytes:
+    """Mã hoá giá trị theo kiểu encoding, trả về bytes để ghi file"""
+    if encoding == "pretty":
+        return json.dumps(value, ensure_ascii=False, indent=2).encode("utf-8")
+    if encoding == "min":
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if encoding == "short":
+        # Chỉ object gốc mang được "$schema"; giá trị gốc khác giữ nguyên key (như 'min')
+        # để loads() không trả về key đã rút gọn mà không biết
+        if isinstance(value, dict):
+            value = {SHORT_MARKER: SHORT_SCHEMA, **shorten_keys(value)}
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if encoding == "packed":
+        return pack(value)
+    raise ValueError(f"Kiểu mã hoá không hỗ trợ: {encoding} (chọn: {', '.join(ENCODINGS)})")
+
+
+def loads(data: bytes) -> Any:
+    """Giải mã bytes của bất kỳ kiểu nào ở trên (tự nhận biết)"""
+    if data[:4] == PACKED_MAGIC:
+        return unpack(data)
+    value = json.loads(data)
+    if isinstance(value, dict) and value.get(SHORT_MARKER) == SHORT_SCHEMA:
+        del value[SHORT_MARKER]
+        return expand_keys(value)
+    return value
+
+
+def load_file(path: str) -> Any:
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+# ---------- báo cáo ----------
+
+def measure(values: List[Any], repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    """Tổng kích thước (thô, gzip) và thời gian giải mã tốt nhất cho từng kiểu mã hoá"""
+    results = {}
+    for encoding in ENCODINGS:
+        blobs = [dumps(v, encoding) for v in values]
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for blob in blobs:
+                loads(blob)
+            best = min(best, time.perf_counter() - started)
+        results[encoding] = {
+            "bytes": sum(len(b) for b in blobs),
+            "gzip": sum(len(gzip.compress(b, 6)) for b in blobs),
+            "parse_ms": best * 1000,
+        }
+    return results
+
+
+def chunk_values(chunks_dir: str) -> List[Any]:
+    """Đọc mọi chunk/search/geometry liệt kê trong metadata.json của thư mục chunks"""
+    with open(os.path.join(chunks_dir, "metadata.json"), "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+    values = []
+    for entry in metadata.get("chunks", []):
+        for key in ("file", "search", "geometry"):
+            if entry.get(key):
+                values.append(load_file(os.path.join(chunks_dir, entry[key])))
+    return values
+
+
+def format_report(title: str, results: Dict[str, Dict[str, float]]) -> List[str]:
+    base = results["pretty"]
+    lines = [f"📊 {title}",
+             f"   {'kiểu':<8}{'bytes':>14}{'gzip':>12}{'parse (ms)':>12}{'tiết kiệm':>11}"]
+    for encoding, r in results.items():
+        saved = 1 - r["bytes"] / base["bytes"] if base["bytes"] else 0
+        lines.append(f"   {encoding:<8}{r['bytes']:>14,}{r['gzip']:>12,}{r['parse_ms']:>12.1f}{saved:>10.0%}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description='So sánh kích thước và thời gian parse của các kiểu mã hoá')
+    parser.add_argument('chunks_dirs', nargs='+', help='Thư mục chunks có metadata.json')
+    parser.add_argument('--repeat', type=int, default=3, help='Số lần đo thời gian parse (lấy nhanh nhất)')
+    args = parser.parse_args()
+
+    for chunks_dir in args.chunks_dirs:
+        if not os.path.isfile(os.path.join(chunks_dir, "metadata.json")):
+            print(f"❌ Không tìm thấy metadata.json trong {chunks_dir}")
+            sys.exit(1)
+        results = measure(chunk_values(chunks_dir), args.repeat)
+        print("\n".join(format_report(chunks_dir, results)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,17 @@
 import os
-import json
 import sys
 import re
-from typing import List
+import gzip
+from typing import Dict, List, Optional, Tuple
+
+from batches import get_icon_aliases, get_icon_code, get_icon_name, load_batches
+from build_cache import write_if_changed
+
+# Chế độ compact: CSS minified, ::before → :before, các class cùng codepoint dùng chung một rule,
+# tuỳ chọn tách rule icon theo chunk (cùng khoảng với split_selections.py) thành
+# css/chunk_N.css + css/core.css (@font-face và rule chung) để trang chỉ tải rule đang hiển thị.
+CHUNK_CSS_DIR = "css"
+CORE_CSS_FILE = "core.css"
 
 def input_path(prompt):
     """
@@ -14,38 +23,277 @@ def input_path(prompt):
         sys.exit(1)
     return path
 
-def find_batch_dirs(root_dir: str) -> List[str]:
+def css_escape_code(code_int: int) -> str:
+    """CSS \\xxxx (hỗ trợ > U+FFFF)"""
+    if code_int > 0xFFFF:
+        return f"\\{code_int:X} "
+    return f"\\{code_int:04X}"
+
+
+def collect_css_rules(selections: List[Dict], font_name: str,
+                      prefix_override: Optional[str] = None) -> Tuple[Dict[str, str], str]:
     """
-    Tìm tất cả các thư mục con khớp với mẫu 'batchX...' và sắp xếp chúng theo thứ tự số.
+    Gom class → mã CSS từ các selection (IcoMoon) đã parse sẵn.
+    Trả về (all_icons, prefix); class trùng tên chỉ giữ lần xuất hiện đầu tiên.
+    prefix_override: dùng prefix này thay vì đọc từ metadata của selection.
     """
-    found_batches = []
-    # Mẫu regex linh hoạt hơn:
-    # - Bắt đầu bằng 'batch'
-    # - Sau đó là một hoặc nhiều chữ số (\d+)
-    # - Có thể theo sau bởi bất kỳ ký tự nào (-, _, .)
-    batch_pattern = re.compile(r'batch(\d+)[^\d]*.*')
-    
-    print(f"DEBUG: Đang quét thư mục: {root_dir}")
+    all_icons = {}
+    prefix = prefix_override or f"{font_name}-"
+
+    for data in selections:
+        # Prefix: thử từ metadata → fallback đến tên font động + "-"
+        prefix_fallback = f"{font_name}-"
+        prefix = prefix_override or data.get("metadata", {}).get("prefix", prefix_fallback)
+        
+        # Đảm bảo prefix kết thúc bằng dấu gạch ngang
+        if not prefix.endswith('-') and prefix:
+            prefix += '-'
+
+        for item in data.get("icons", []):
+            # Lấy code & name (hỗ trợ cả cấu trúc cũ trong attrs)
+            name = get_icon_name(item)
+            code_int = get_icon_code(item)
+            if not name or code_int is None:
+                continue
+
+            # Xây dựng full class (ví dụ: icons-home); alias (glyph đã gộp) dùng chung mã
+            for alias in [name] + get_icon_aliases(item):
+                full_class = f"{prefix}{alias}"
+                if full_class not in all_icons:
+                    all_icons[full_class] = css_escape_code(code_int)
+
+    return all_icons, prefix
+
+
+def font_face_css(font_name: str, sources: List[Tuple[str, str]], unicode_range: Optional[str] = None) -> str:
+    """Khối @font-face; sources là danh sách (url, format)"""
+    src = ",\n       ".join(f"url('{url}') format('{fmt}')" for url, fmt in sources)
+    range_line = f"\n  unicode-range: {unicode_range};" if unicode_range else ""
+    return f"""@font-face {{
+  font-family: '{font_name}';
+  src: {src};
+  font-weight: normal;
+  font-style: normal;
+  font-display: swap;{range_line}
+}}
+"""
+
+
+def base_rule_css(font_name: str, prefix: str) -> str:
+    """Rule chung gán font cho mọi class bắt đầu bằng prefix"""
+    final_prefix_selector = prefix.rstrip('-') if prefix else font_name
+    return f"""/* Áp dụng font cho mọi class bắt đầu bằng '{final_prefix_selector}-' */
+i[class^="{final_prefix_selector}-"],
+span[class^="{final_prefix_selector}-"] {{
+  font-family: '{font_name}' !important;
+  speak: never;
+  font-style: normal;
+  font-weight: normal;
+  font-variant: normal;
+  text-transform: none;
+  line-height: 1;
+  -webkit-font-smoothing: antialiased;
+  -moz-osx-font-smoothing: grayscale;
+}}
+"""
+
+
+def icon_rules_css(all_icons: Dict[str, str]) -> str:
+    """Mỗi icon một rule ::before, sắp xếp theo tên class"""
+    return "".join(f".{cls}::before {{ content: \"{content}\"; }}\n" for cls, content in sorted(all_icons.items()))
+
+
+# ---------- compact ----------
+
+CSS_IDENT = re.compile(r'^-?[A-Za-z_][\w-]*$')
+ICON_RULE = re.compile(r'([^{}]+)\{\s*content:\s*"((?:\\[0-9A-Fa-f]{1,6} ?)+)";?\s*\}')
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+ICON_SELECTOR = re.compile(r'^\.([\w-]+)::?before$')
+
+
+def css_ident_or_string(value: str) -> str:
+    """Giá trị không cần dấu nháy nếu là identifier CSS hợp lệ"""
+    return value if CSS_IDENT.match(value) else "'" + value.replace("'", "\\'") + "'"
+
+
+def escape_codepoint(content: str) -> int:
+    """Ngược lại css_escape_code: \\E900 → 0xE900"""
+    return int(content.strip().lstrip("\\"), 16)
+
+
+def compact_escape(content: str) -> str:
+    """\\0041 → \\41: bỏ số 0 đầu và khoảng trắng thừa (ký tự sau là dấu nháy đóng)"""
+    return f"\\{escape_codepoint(content):X}"
 
-    for item in os.listdir(root_dir):
-        full_path = os.path.join(root_dir, item)
-        if os.path.isdir(full_path):
-            match = batch_pattern.match(item)
+
+def compact_font_face_css(font_name: str, sources: List[Tuple[str, str]], unicode_range: Optional[str] = None) -> str:
+    """@font-face minified (font-weight/font-style normal là mặc định nên bỏ)"""
+    def url(u):
+        return f"url({u})" if re.match(r'^[^\s()\'"]+$', u) else f"url('{u}')"
+    src = ",".join(f"{url(u)} format(\"{fmt}\")" for u, fmt in sources)
+    range_part = f";unicode-range:{unicode_range.replace(', ', ',')}" if unicode_range else ""
+    return f"@font-face{{font-family:{css_ident_or_string(font_name)};src:{src};font-display:swap{range_part}}}"
+
+
+def compact_base_rule_css(font_name: str, prefix: str) -> str:
+    """Rule chung như base_rule_css, selector thuộc tính không cần dấu nháy"""
+    selector = prefix.rstrip('-') if prefix else font_name
+    value = css_ident_or_string(f"{selector}-").replace("'", '"')
+    return (f"i[class^={value}],span[class^={value}]{{font-family:{css_ident_or_string(font_name)}!important;"
+            "speak:never;font-style:normal;font-weight:normal;font-variant:normal;text-transform:none;"
+            "line-height:1;-webkit-font-smoothing:antialiased;-moz-osx-font-smoothing:grayscale}")
+
+
+def compact_icon_rules_css(all_icons: Dict[str, str]) -> str:
+    """Rule :before minified; các class cùng codepoint (alias) gộp chung selector"""
+    groups: Dict[str, List[str]] = {}
+    for cls, content in sorted(all_icons.items()):
+        groups.setdefault(compact_escape(content), []).append(cls)
+    return "".join(",".join(f".{cls}:before" for cls in classes) + f'{{content:"{content}"}}'
+                   for content, classes in sorted(groups.items(), key=lambda item: item[1][0]))
+
+
+def compact_head_css(font_name: str, prefix: str, font_file_base: str,
+                     shards: Optional[List[Tuple[str, str]]] = None) -> str:
+    """@font-face (hoặc các shard) + rule chung, dạng compact"""
+    if shards:
+        faces = "".join(compact_font_face_css(font_name, [(url, "woff2")], urange) for url, urange in shards)
+    else:
+        faces = compact_font_face_css(font_name, [(f"{font_file_base}.woff2", "woff2"),
+                                                  (f"{font_file_base}.woff", "woff")])
+    return faces + compact_base_rule_css(font_name, prefix)
+
+
+def compact_css(all_icons: Dict[str, str], font_name: str, prefix: str, collection_title: str,
+                font_file_base: str, shards: Optional[List[Tuple[str, str]]] = None) -> str:
+    """Toàn bộ CSS dạng compact (một dòng chú thích, một dòng đầu, một dòng rule icon)"""
+    return (f"/* {collection_title} */\n" + compact_head_css(font_name, prefix, font_file_base, shards) + "\n"
+            + compact_icon_rules_css(all_icons) + "\n")
+
+
+def write_compact_css(css_path: str, all_icons: Dict[str, str], font_name: str, prefix: str,
+                      collection_title: str, font_file_base: str,
+                      shards: Optional[List[Tuple[str, str]]] = None) -> bool:
+    """Như write_css nhưng minified. Trả về True nếu file thay đổi."""
+    os.makedirs(os.path.dirname(css_path) if os.path.dirname(css_path) else ".", exist_ok=True)
+    return write_if_changed(css_path, compact_css(all_icons, font_name, prefix, collection_title,
+                                                  font_file_base, shards))
+
+
+def chunk_css_rules(icons: List[Dict], prefix: str, chunk_size: int) -> List[Dict[str, str]]:
+    """Class → mã CSS cho từng chunk, cùng khoảng với split_selections.write_chunks"""
+    seen = set()
+    chunks = []
+    for start in range(0, len(icons), chunk_size):
+        rules = {}
+        for item in icons[start:start + chunk_size]:
+            name = get_icon_name(item)
+            code_int = get_icon_code(item)
+            if not name or code_int is None:
+                continue
+            for alias in [name] + get_icon_aliases(item):
+                full_class = f"{prefix}{alias}"
+                if full_class not in seen:
+                    seen.add(full_class)
+                    rules[full_class] = css_escape_code(code_int)
+        chunks.append(rules)
+    return chunks
+
+
+def write_chunk_css(css_dir: str, chunk_rules: List[Dict[str, str]], head_css: str) -> List[str]:
+    """
+    Ghi css/core.css (@font-face + rule chung) và css/chunk_N.css (rule icon của chunk N).
+    Xoá chunk_N.css thừa từ lần chạy trước. Trả về danh sách file đã ghi.
+    """
+    os.makedirs(css_dir, exist_ok=True)
+    paths = [os.path.join(css_dir, CORE_CSS_FILE)]
+    write_if_changed(paths[0], head_css + "\n")
+    for i, rules in enumerate(chunk_rules):
+        path = os.path.join(css_dir, f"chunk_{i}.css")
+        write_if_changed(path, compact_icon_rules_css(rules) + "\n")
+        paths.append(path)
+
+    expected = {os.path.basename(p) for p in paths}
+    for name in os.listdir(css_dir):
+        if re.match(r'^chunk_\d+\.css$', name) and name not in expected:
+            os.remove(os.path.join(css_dir, name))
+    return paths
+
+
+def parse_icon_rules(css: str) -> Dict[str, int]:
+    """Đọc ngược class → codepoint từ CSS (cả dạng thường lẫn compact)"""
+    resolved = {}
+    css = CSS_COMMENT.sub("", css)
+    for selectors, content in ICON_RULE.findall(css):
+        codepoint = escape_codepoint(content.split("\\")[1])
+        for selector in selectors.split(","):
+            match = ICON_SELECTOR.match(selector.strip())
             if match:
-                # Lấy số thứ tự (ví dụ: '1' từ 'batch1-v1.0')
-                try:
-                    batch_number = int(match.group(1))
-                    found_batches.append((batch_number, item))
-                    print(f"DEBUG: Tìm thấy thư mục batch hợp lệ: {item} (Số thứ tự: {batch_number})")
-                except ValueError:
-                    print(f"DEBUG: Bỏ qua thư mục: {item} (Không trích xuất được số)")
-            else:
-                print(f"DEBUG: Bỏ qua thư mục: {item} (Không khớp mẫu)")
-
-    # Sắp xếp theo số thứ tự batch
-    found_batches.sort(key=lambda x: x[0])
-    
-    return [name for num, name in found_batches]
+                resolved.setdefault(match.group(1), codepoint)
+    return resolved
+
+
+def verify_css(all_icons: Dict[str, str], css_texts: List[str]) -> List[str]:
+    """
+    Kiểm tra mọi class vẫn trỏ đúng codepoint trong (các) file CSS đã sinh.
+    Trả về danh sách lỗi (rỗng nếu khớp).
+    """
+    resolved = {}
+    for css in css_texts:
+        for cls, codepoint in parse_icon_rules(css).items():
+            resolved.setdefault(cls, codepoint)
+    errors = []
+    for cls, content in all_icons.items():
+        expected = escape_codepoint(content)
+        if cls not in resolved:
+            errors.append(f"thiếu .{cls}")
+        elif resolved[cls] != expected:
+            errors.append(f".{cls}: U+{resolved[cls]:04X} thay vì U+{expected:04X}")
+    errors.extend(f"thừa .{cls}" for cls in resolved if cls not in all_icons)
+    return errors
+
+
+def css_size_report(files: Dict[str, str]) -> List[str]:
+    """Bảng kích thước (thô, gzip) của các biến thể CSS; dòng đầu là mốc so sánh"""
+    lines = []
+    base = None
+    for label, css in files.items():
+        raw = len(css.encode("utf-8"))
+        packed = len(gzip.compress(css.encode("utf-8"), 9))
+        base = base or (raw, packed)
+        lines.append(f"   {label:<28}{raw:>12,} B{packed:>10,} B gzip"
+                     f"   (-{1 - raw / base[0]:.0%} / -{1 - packed / base[1]:.0%})")
+    return lines
+
+
+def standard_css(all_icons: Dict[str, str], font_name: str, prefix: str, collection_title: str,
+                 font_file_base: str, shards: Optional[List[Tuple[str, str]]] = None) -> str:
+    """CSS dạng thường: @font-face, rule chung và một rule ::before cho mỗi icon"""
+    sources = [(f"{font_file_base}.woff2", "woff2"), (f"{font_file_base}.woff", "woff")]
+    parts = [f"/* Generated by generate-css.py (Collection: {collection_title}) */\n"]
+    if shards:
+        parts.append("".join(font_face_css(font_name, [(url, "woff2")], urange) for url, urange in shards))
+    else:
+        parts.append(font_face_css(font_name, sources))
+    parts.append("\n")
+    parts.append(base_rule_css(font_name, prefix))
+    parts.append("\n/* Các icon */\n")
+    parts.append(icon_rules_css(all_icons))
+    return "".join(parts)
+
+
+def write_css(css_path: str, all_icons: Dict[str, str], font_name: str, prefix: str,
+              collection_title: str, font_file_base: str,
+              shards: Optional[List[Tuple[str, str]]] = None):
+    """
+    Ghi file CSS gồm @font-face, rule chung và một rule ::before cho mỗi icon.
+    shards: danh sách (url WOFF2, unicode-range) thay cho font đầy đủ; mỗi shard một
+    @font-face cùng font-family, trình duyệt chỉ tải shard chứa glyph đang hiển thị.
+    """
+    os.makedirs(os.path.dirname(css_path) if os.path.dirname(css_path) else ".", exist_ok=True)
+
+    with open(css_path, "w", encoding="utf-8") as f:
+        f.write(standard_css(all_icons, font_name, prefix, collection_title, font_file_base, shards))
 
 
 def generate_css():
@@ -78,82 +326,18 @@ def generate_css():
     
     root_dir = input_path("📁 Nhập đường dẫn thư mục chứa các thư mục batch: ")
 
-    # 2. Tự động phát hiện batch (sử dụng logic linh hoạt)
-    batch_dirs = find_batch_dirs(root_dir)
+    # 2. Tự động phát hiện batch và đọc toàn bộ icon (selection.json hoặc batchN.json)
+    batches = load_batches(root_dir)
 
-    if not batch_dirs:
+    if not batches:
         print("❌ Không tìm thấy thư mục batch nào theo mẫu 'batchX...' bên trong thư mục này.")
         sys.exit(1)
 
-    print(f"🔍 Phát hiện {len(batch_dirs)} batch: {', '.join(batch_dirs)}")
-
-    # 3. Đọc toàn bộ icon
-    all_icons = {}
-    total = 0
-
-    for batch_dir in batch_dirs:
-        # Giả định file selection.json nằm trong thư mục con của batch
-        sel_path = os.path.join(root_dir, batch_dir, "selection.json")
-        if not os.path.exists(sel_path):
-            # Nếu không tìm thấy, thử tìm file json với tên batch
-            json_name = batch_dir.split('-')[0] + '.json'
-            sel_path = os.path.join(root_dir, batch_dir, json_name)
-            if not os.path.exists(sel_path):
-                 print(f"⚠️ Bỏ qua: thiếu selection.json hoặc {json_name} trong {batch_dir}")
-                 continue
-
-        try:
-            with open(sel_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except Exception as e:
-            print(f"❌ Lỗi đọc {sel_path}: {e}")
-            continue
+    print(f"🔍 Phát hiện {len(batches)} batch: {', '.join(b['name'] for b in batches)}")
+    selections = [b["data"] for b in batches]
 
-        # Prefix: thử từ metadata → fallback đến tên font động + "-"
-        prefix_fallback = f"{font_name}-"
-        prefix = data.get("metadata", {}).get("prefix", prefix_fallback)
-        
-        # Đảm bảo prefix kết thúc bằng dấu gạch ngang
-        if not prefix.endswith('-') and prefix:
-            prefix += '-'
-
-        for item in data.get("icons", []):
-            # Lấy code & name
-            code = item.get("properties", {}).get("code")
-            name = item.get("properties", {}).get("name")
-
-            if code is None:
-                # Thử cấu trúc cũ
-                code = item.get("attrs", [{}])[0].get("code")
-            if name is None:
-                # Thử cấu trúc cũ
-                name = item.get("attrs", [{}])[0].get("name")
-
-            if not name or code is None:
-                continue
-
-            # Xây dựng full class (ví dụ: icons-home)
-            full_class = f"{prefix}{name}"
-            if full_class in all_icons:
-                continue
-
-            # CSS \xxxx (hỗ trợ > U+FFFF)
-            if isinstance(code, str) and code.startswith('0x'):
-                 # Nếu code là chuỗi hex
-                 code_int = int(code, 16)
-            elif isinstance(code, int):
-                 code_int = code
-            else:
-                 continue
-
-            if code_int > 0xFFFF:
-                hex_code = f"{code_int:X}"
-                css_code = f"\\{hex_code} "
-            else:
-                css_code = f"\\{code_int:04X}"
-
-            all_icons[full_class] = css_code
-            total += 1
+    all_icons, prefix = collect_css_rules(selections, font_name)
+    total = len(all_icons)
 
     if not all_icons:
         print("❌ Không tìm thấy icon nào trong các selection.json!")
@@ -166,47 +350,46 @@ def generate_css():
     css_path = input(f"💾 Nhập đường dẫn đầy đủ để lưu file CSS (Enter để dùng mặc định: {root_dir}/{default_css_filename}): ").strip().strip('"')
     if not css_path:
         css_path = os.path.join(root_dir, default_css_filename)
-        
-    os.makedirs(os.path.dirname(css_path) if os.path.dirname(css_path) else ".", exist_ok=True)
 
     # Tên font file
     font_file_base = f"{font_name}-all"
 
+    compact = input("🗜️ Xuất CSS dạng compact (minified, gộp selector)? (y/N): ").strip().lower() == "y"
+    chunk_size = 0
+    if compact:
+        raw_chunk_size = input("🔪 Tách CSS theo chunk? Nhập kích thước chunk giống split_selections (Enter để bỏ qua): ").strip()
+        chunk_size = int(raw_chunk_size) if raw_chunk_size.isdigit() else 0
+
     # 5. Ghi CSS
-    # Lấy prefix cuối cùng được sử dụng
-    final_prefix_selector = prefix.rstrip('-') if prefix else font_name
-    
-    with open(css_path, "w", encoding="utf-8") as f:
-        f.write(f"""/* Generated by generate-css.py (Collection: {collection_title}) */
-@font-face {{
-  font-family: '{font_name}';
-  src: url('{font_file_base}.woff2') format('woff2'),
-       url('{font_file_base}.woff') format('woff');
-  font-weight: normal;
-  font-style: normal;
-  font-display: swap;
-}}
+    if compact:
+        write_compact_css(css_path, all_icons, font_name, prefix, collection_title, font_file_base)
+    else:
+        write_css(css_path, all_icons, font_name, prefix, collection_title, font_file_base)
 
-/* Áp dụng font cho mọi class bắt đầu bằng '{final_prefix_selector}-' */
-i[class^="{final_prefix_selector}-"],
-span[class^="{final_prefix_selector}-"] {{
-  font-family: '{font_name}' !important;
-  speak: never;
-  font-style: normal;
-  font-weight: normal;
-  font-variant: normal;
-  text-transform: none;
-  line-height: 1;
-  -webkit-font-smoothing: antialiased;
-  -moz-osx-font-smoothing: grayscale;
-}}
+    print(f"\n🎉 Hoàn tất! Đã lưu CSS vào:\n   {css_path}")
 
-/* Các icon */
-""")
-        for cls, content in sorted(all_icons.items()):
-            f.write(f".{cls}::before {{ content: \"{content}\"; }}\n")
+    if compact:
+        with open(css_path, "r", encoding="utf-8") as f:
+            css_files = {os.path.basename(css_path): f.read()}
+        texts = []
+        if chunk_size > 0:
+            icons = [item for data in selections for item in data.get("icons", [])]
+            css_dir = os.path.join(os.path.dirname(css_path), CHUNK_CSS_DIR)
+            head = compact_head_css(font_name, prefix, f"../{font_file_base}")
+            for path in write_chunk_css(css_dir, chunk_css_rules(icons, prefix, chunk_size), head):
+                with open(path, "r", encoding="utf-8") as f:
+                    texts.append(f.read())
+            css_files["core + chunk_0"] = texts[0] + texts[1] if len(texts) > 1 else texts[0]
+            print(f"✅ Đã tách {len(texts) - 1} file CSS theo chunk vào: {css_dir}")
 
-    print(f"\n🎉 Hoàn tất! Đã lưu CSS vào:\n   {css_path}")
+        errors = verify_css(all_icons, [css_files[os.path.basename(css_path)]])
+        if texts:
+            errors += verify_css(all_icons, texts)
+        print(f"{'❌' if errors else '✅'} Kiểm tra codepoint: "
+              f"{'; '.join(errors[:5]) if errors else 'mọi class khớp'}")
+        print("📊 Kích thước:")
+        print("\n".join(css_size_report({"thường": standard_css(all_icons, font_name, prefix, collection_title,
+                                                                 font_file_base), **css_files})))
     print("\n📌 Lưu ý:")
     print(f"- Đảm bảo `{font_file_base}.woff2` và `{font_file_base}.woff` nằm cùng thư mục với file CSS.")
     print(f"- Dùng trong HTML: <i class=\"{prefix}xxx\"></i>")
@@ -0,0 +1,254 @@
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
+from typing import Any, Dict, Iterable, List, Optional
+
+import json_codec
+import svg_path
+from batches import get_icon_name
+from build_cache import write_if_changed, write_json_if_changed
+
+# Sinh SVG sprite (<symbol>) từ icon.paths trong selection IcoMoon: cách hiển thị không cần font,
+# trang chỉ vài chục icon không phải tải cả file WOFF2 nhiều MB.
+#   sprites/chunks/chunk_N.svg       : icon của chunk N (cùng khoảng với split_selections.py)
+#   sprites/categories/<danh mục>.svg: icon theo danh mục (trường 'category' do maketag.py thêm)
+#   sprites/index.json               : danh sách file, số icon của từng file
+# Mỗi icon là <symbol id="<prefix><tên>" viewBox="0 0 w h">, dùng trong HTML:
+#   <svg class="icon"><use href="sprites/chunks/chunk_0.svg#icons-home"></use></svg>
+# Path được rút gọn bằng svg_path.minify_path, song song theo chunk trong process pool.
+#
+# Ví dụ:
+#   python helper/make_sprites.py data/simpleicons/selections-all.json --prefix sicon-
+#   python helper/make_sprites.py data/lawnicons/chunks --by chunk --precision 1
+
+SPRITES_DIR = "sprites"
+INDEX_FILE = "index.json"
+GROUPINGS = ("chunk", "category")
+DEFAULT_HEIGHT = 1024
+DEFAULT_CATEGORY = "general"
+# Thuộc tính trong icon.attrs được giữ lại trên <path> (icon nhiều màu)
+PATH_ATTRS = ("fill", "opacity", "fill-rule", "stroke", "stroke-width")
+
+
+def default_precision(size: float) -> int:
+    """Số chữ số thập phân sao cho bước làm tròn không quá 1/1000 kích thước icon (1024 → 0, 24 → 2)"""
+    return max(0, math.ceil(math.log10(1000 / size))) if size > 0 else 1
+
+
+def category_slug(category: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", category.lower()).strip("-") or DEFAULT_CATEGORY
+
+
+def icon_symbol(icon: Dict[str, Any], prefix: str, height: int, precision: Optional[int]) -> Optional[Dict[str, Any]]:
+    """
+    Markup <symbol> của một icon và số byte path trước/sau khi rút gọn.
+    Trả về None nếu icon không có tên hoặc không có path.
+    """
+    name = get_icon_name(icon)
+    data = icon.get("icon") or {}
+    paths = data.get("paths") or []
+    if not name or not paths:
+        return None
+    width = data.get("width", height)
+    if precision is None:
+        precision = default_precision(max(width, height))
+
+    attrs = data.get("attrs") or []
+    body = []
+    bytes_in = bytes_out = 0
+    for i, d in enumerate(paths):
+        minified = svg_path.minify_path(d, precision)
+        bytes_in += len(d)
+        bytes_out += len(minified)
+        extra = "".join(f' {key}="{escape(str(value))}"'
+                        for key, value in (attrs[i] if i < len(attrs) else {}).items() if key in PATH_ATTRS)
+        body.append(f'<path d="{minified}"{extra}/>')
+    return {
+        "markup": f'<symbol id="{escape(prefix + name)}" viewBox="0 0 {width} {height}">{"".join(body)}</symbol>',
+        "bytes_in": bytes_in,
+        "bytes_out": bytes_out,
+    }
+
+
+def build_symbols(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rút gọn path và tạo <symbol> cho một chunk icon (chạy trong process con).
+    job: {'icons', 'prefix', 'height', 'precision'}.
+    Trả về {'symbols': [markup hoặc None theo từng icon], 'bytes_in', 'bytes_out', 'errors'}.
+    """
+    result = {"symbols": [], "bytes_in": 0, "bytes_out": 0, "errors": []}
+    for icon in job["icons"]:
+        try:
+            symbol = icon_symbol(icon, job["prefix"], job["height"], job["precision"])
+        except ValueError as e:
+            result["errors"].append(f"{get_icon_name(icon)}: {e}")
+            symbol = None
+        result["symbols"].append(symbol["markup"] if symbol else None)
+        if symbol:
+            result["bytes_in"] += symbol["bytes_in"]
+            result["bytes_out"] += symbol["bytes_out"]
+    return result
+
+
+def write_sprite(path: str, symbols: List[str]) -> Dict[str, Any]:
+    """Ghi một file sprite; trả về {'path', 'icons', 'size', 'changed'}"""
+    svg = f'<svg xmlns="http://www.w3.org/2000/svg" style="display:none">{"".join(symbols)}</svg>\n'
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return {"path": path, "icons": len(symbols), "size": len(svg.encode("utf-8")),
+            "changed": write_if_changed(path, svg)}
+
+
+def remove_stale(output_dir: str, keep: Iterable[str]) -> int:
+    """Xoá file .svg không còn thuộc lần sinh này (chunk/danh mục đã bỏ)"""
+    keep = {os.path.abspath(p) for p in keep}
+    removed = 0
+    for sub in ("chunks", "categories"):
+        folder = os.path.join(output_dir, sub)
+        if not os.path.isdir(folder):
+            continue
+        for name in os.listdir(folder):
+            path = os.path.abspath(os.path.join(folder, name))
+            if name.endswith(".svg") and path not in keep:
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+def make_sprites(icons: List[Dict[str, Any]], output_dir: str, prefix: str, height: int = DEFAULT_HEIGHT,
+                 chunk_size: int = 500, by: Iterable[str] = GROUPINGS, precision: Optional[int] = None,
+                 workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Sinh sprite theo chunk và/hoặc danh mục + index.json. Path của mỗi chunk được rút gọn
+    song song đúng một lần, sprite theo danh mục dùng lại các <symbol> đó.
+    Trả về {'files': [...], 'bytes_in', 'bytes_out', 'errors'}.
+    """
+    by = list(by)
+    jobs = [{"icons": icons[start:start + chunk_size], "prefix": prefix, "height": height, "precision": precision}
+            for start in range(0, len(icons), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        built = list(pool.map(build_symbols, jobs))
+    symbols = [markup for b in built for markup in b["symbols"]]
+
+    index = {"prefix": prefix, "chunk_size": chunk_size, "chunks": [], "categories": {}}
+    files = []
+    if "chunk" in by:
+        for i, b in enumerate(built):
+            path = os.path.join(output_dir, "chunks", f"chunk_{i}.svg")
+            files.append(dict(write_sprite(path, [m for m in b["symbols"] if m]), group="chunk"))
+            index["chunks"].append({"file": f"chunks/chunk_{i}.svg", "count": files[-1]["icons"]})
+    if "category" in by:
+        groups = defaultdict(list)
+        for icon, markup in zip(icons, symbols):
+            if markup:
+                groups[icon.get("category") or DEFAULT_CATEGORY].append(markup)
+        for category in sorted(groups):
+            name = f"categories/{category_slug(category)}.svg"
+            files.append(dict(write_sprite(os.path.join(output_dir, name), groups[category]), group="category"))
+            index["categories"][category] = {"file": name, "count": files[-1]["icons"]}
+
+    write_json_if_changed(os.path.join(output_dir, INDEX_FILE), index, separators=(",", ":"))
+    remove_stale(output_dir, [f["path"] for f in files])
+    return {
+        "files": files,
+        "bytes_in": sum(b["bytes_in"] for b in built),
+        "bytes_out": sum(b["bytes_out"] for b in built),
+        "errors": [e for b in built for e in b["errors"]],
+    }
+
+
+def format_size(n: int) -> str:
+    if n >= 1 << 20:
+        return f"{n / (1 << 20):.1f} MB"
+    if n >= 1 << 10:
+        return f"{n / (1 << 10):.1f} KB"
+    return f"{n} B"
+
+
+def format_report(result: Dict[str, Any]) -> List[str]:
+    lines = []
+    for group, label in (("chunk", "chunk"), ("category", "danh mục")):
+        files = [f for f in result["files"] if f["group"] == group]
+        if not files:
+            continue
+        sizes = [f["size"] for f in files]
+        lines.append(f"🧩 {len(files)} sprite theo {label}: {sum(f['icons'] for f in files)} icon, "
+                     f"trung bình {format_size(sum(sizes) // len(sizes))}, lớn nhất {format_size(max(sizes))}")
+    if result["bytes_in"]:
+        lines.append(f"✂️ Path: {format_size(result['bytes_in'])} → {format_size(result['bytes_out'])}"
+                     f" (giảm {1 - result['bytes_out'] / result['bytes_in']:.0%})")
+    changed = sum(1 for f in result["files"] if f["changed"])
+    lines.append(f"💾 Ghi mới {changed}/{len(result['files'])} file")
+    lines.extend(f"⚠️ {error}" for error in result["errors"])
+    return lines
+
+
+def load_source(path: str) -> Dict[str, Any]:
+    """
+    Đọc icon từ selection.json (bất kỳ kiểu mã hoá nào của json_codec) hoặc thư mục chunks.
+    Trả về {'icons', 'height', 'prefix', 'chunk_size'} (prefix/chunk_size có thể None).
+    """
+    if os.path.isdir(path):
+        with open(os.path.join(path, "metadata.json"), "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        icons = []
+        for entry in metadata.get("chunks", []):
+            icons.extend(json_codec.load_file(os.path.join(path, entry["file"])).get("icons", []))
+        return {"icons": icons, "height": DEFAULT_HEIGHT, "prefix": None,
+                "chunk_size": metadata.get("chunk_size")}
+
+    data = json_codec.load_file(path)
+    prefix = ((data.get("preferences") or {}).get("fontPref") or {}).get("prefix")
+    return {"icons": data.get("icons", []), "height": data.get("height", DEFAULT_HEIGHT),
+            "prefix": prefix, "chunk_size": None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sinh SVG sprite (<symbol>) theo chunk / danh mục từ selection')
+    parser.add_argument('source', nargs='?', help='selection.json (đã gộp) hoặc thư mục chunks có metadata.json')
+    parser.add_argument('--output', help=f'Thư mục ghi sprite (mặc định: <thư mục nguồn>/{SPRITES_DIR})')
+    parser.add_argument('--prefix', help='Tiền tố id symbol, trùng class CSS (mặc định: theo selection)')
+    parser.add_argument('--chunk-size', type=int, help='Số icon mỗi chunk (mặc định: theo metadata, hoặc 500)')
+    parser.add_argument('--by', default=",".join(GROUPINGS), help='Cách chia: chunk, category hoặc chunk,category')
+    parser.add_argument('--precision', type=int, help='Số chữ số thập phân của toạ độ (mặc định: theo kích thước icon)')
+    parser.add_argument('--workers', type=int, help='Số process song song (mặc định: số CPU)')
+    args = parser.parse_args()
+
+    print("=== 🧩 SINH SVG SPRITE TỪ SELECTION ===")
+    source = args.source or input("📁 Nhập đường dẫn selection.json hoặc thư mục chunks: ").strip().strip('"')
+    if not os.path.exists(source):
+        print("❌ Đường dẫn không hợp lệ.")
+        sys.exit(1)
+
+    by = [b.strip() for b in args.by.split(",") if b.strip()]
+    unknown = [b for b in by if b not in GROUPINGS]
+    if unknown:
+        print(f"❌ Cách chia không hợp lệ: {', '.join(unknown)} (chọn: {', '.join(GROUPINGS)})")
+        sys.exit(1)
+
+    loaded = load_source(source)
+    if not loaded["icons"]:
+        print("❌ Không tìm thấy icon nào.")
+        sys.exit(1)
+    prefix = args.prefix if args.prefix is not None else (loaded["prefix"] or "icon-")
+    chunk_size = args.chunk_size or loaded["chunk_size"] or 500
+    source_dir = source if os.path.isdir(source) else os.path.dirname(source)
+    output_dir = args.output or os.path.join(source_dir, SPRITES_DIR)
+    print(f"✅ Đã đọc {len(loaded['icons'])} icon (prefix '{prefix}', {chunk_size} icon/chunk)")
+
+    started = time.perf_counter()
+    result = make_sprites(loaded["icons"], output_dir, prefix, loaded["height"], chunk_size, by,
+                          args.precision, args.workers)
+    print("\n".join(format_report(result)))
+    print(f"📁 Đã lưu vào: {output_dir}")
+    print(f"⏱️ Thời gian: {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,11 @@ import json
 import os
 import re
 import sys
-from collections import defaultdict
 from typing import List, Dict, Any, Optional, Tuple, Union # Đã thêm Optional để sửa lỗi
 
+import json_codec
+from rule_matcher import RuleMatcher
+
 # --- Quy tắc làm giàu dữ liệu ---
 # Các quy tắc được định nghĩa dưới dạng danh sách, giúp dễ dàng mở rộng.
 # Mỗi quy tắc có thể là:
@@ -77,32 +79,57 @@ def load_enrichment_rules() -> List[Dict[str, Any]]:
         
     return rules
 
-def enrich_icon_data(input_file: str, output_file: str, external_mapping_file: Optional[str] = None):
+def enrich_icon_data(input_file: str, output_file: str, external_mapping_file: Optional[str] = None,
+                     encoding: str = "pretty"):
     """
     Đọc file JSON, thêm keywords và description dựa trên bộ quy tắc, lưu file mới.
     Tự động phát hiện cấu trúc JSON và áp dụng logic phù hợp.
+    encoding: 'pretty' hoặc 'min' (xem json_codec.JSON_ENCODINGS).
     """
     if not os.path.exists(input_file):
         print(f"Lỗi: File không tồn tại: {input_file}")
         return False
     
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = json_codec.load_file(input_file)
     except Exception as e:
         print(f"Lỗi khi đọc file JSON: {e}")
         return False
     
+    # Tải mapping bên ngoài nếu có
+    external_mapping = load_external_mapping(external_mapping_file)
+    
+    if enrich_icons(data, external_mapping) is None:
+        return False
+    
+    # Lưu file mới
+    try:
+        output_dir = os.path.dirname(output_file)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir, exist_ok=True)
+        
+        with open(output_file, 'wb') as f:
+            f.write(json_codec.dumps(data, encoding))
+        print(f"💾 Đã lưu file kết quả: {output_file}")
+        return True
+    except Exception as e:
+        print(f"Lỗi khi lưu file: {e}")
+        return False
+
+def enrich_icons(data: Dict, external_mapping: Optional[Dict[str, Dict[str, Any]]] = None) -> Optional[int]:
+    """
+    Làm giàu dữ liệu icon trực tiếp trên dict đã parse (không đọc/ghi file).
+    Trả về số icon đã làm giàu, hoặc None nếu không nhận diện được cấu trúc JSON.
+    """
+    external_mapping = external_mapping or {}
+    
     # Phát hiện cấu trúc JSON
     structure_type = detect_json_structure(data)
     print(f"🔍 Phát hiện cấu trúc JSON: {structure_type}")
     
     if structure_type == 'unknown':
         print("❌ Không thể xác định cấu trúc JSON. Vui lòng kiểm tra file đầu vào.")
-        return False
-    
-    # Tải mapping bên ngoài nếu có
-    external_mapping = load_external_mapping(external_mapping_file)
+        return None
     
     # Trích xuất danh sách icon và tên
     if structure_type == 'icomoon':
@@ -122,8 +149,9 @@ def enrich_icon_data(input_file: str, output_file: str, external_mapping_file: O
     
     print(f"📊 Phát hiện {len(icons)} icons trong file")
     
-    # Tạo mapping mặc định dựa trên tên icon
-    default_mapping = generate_default_mapping(icon_names)
+    # Tạo mapping mặc định dựa trên tên icon (một matcher cho mọi quy tắc)
+    matcher = compile_rules()
+    default_mapping = generate_default_mapping(icon_names, matcher)
     
     # Kết hợp mapping bên ngoài với mapping mặc định
     combined_mapping = {}
@@ -163,8 +191,8 @@ def enrich_icon_data(input_file: str, output_file: str, external_mapping_file: O
         elif 'tags' in icon:
             existing_tags = icon['tags']
         
-        # Kết hợp tags mới và cũ
-        new_tags = list(set(existing_tags + icon_mapping['tags']))
+        # Kết hợp tags mới và cũ (giữ thứ tự để output ổn định giữa các lần build)
+        new_tags = list(dict.fromkeys(existing_tags + icon_mapping['tags']))
         
         # Cập nhật icon với dữ liệu mới
         if 'icon' not in icon:
@@ -177,20 +205,11 @@ def enrich_icon_data(input_file: str, output_file: str, external_mapping_file: O
         enriched_count += 1
     
     print(f"✅ Đã làm giàu {enriched_count}/{len(icons)} icons")
+    print("📈 Thống kê quy tắc khớp nhiều nhất:")
+    for line in matcher.report():
+        print(f"   {line}")
     
-    # Lưu file mới
-    try:
-        output_dir = os.path.dirname(output_file)
-        if output_dir and not os.path.exists(output_dir):
-            os.makedirs(output_dir, exist_ok=True)
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        print(f"💾 Đã lưu file kết quả: {output_file}")
-        return True
-    except Exception as e:
-        print(f"Lỗi khi lưu file: {e}")
-        return False
+    return enriched_count
 
 def detect_json_structure(data: Dict) -> str:
     """Phát hiện cấu trúc JSON tự động."""
@@ -228,48 +247,69 @@ def parse_icon_name(raw_name: str) -> str:
     # Chuẩn hóa khoảng trắng và viết thường
     return ' '.join(name.lower().split())
 
-def generate_default_mapping(icon_names: List[str]) -> Dict[str, Dict[str, Any]]:
+# Xác định danh mục dựa trên từ khóa phổ biến (danh mục đứng trước được ưu tiên)
+CATEGORY_KEYWORDS = {
+    'social': ['facebook', 'twitter', 'instagram', 'linkedin', 'youtube', 'tiktok', 'reddit', 'pinterest'],
+    'finance': ['bank', 'money', 'payment', 'credit', 'wallet', 'coin', 'cash', 'dollar'],
+    'tools': ['settings', 'config', 'gear', 'tool', 'wrench', 'hammer', 'screw', 'adjust', 'utility'],
+    'communication': ['message', 'chat', 'email', 'call', 'phone', 'sms', 'notification', 'talk'],
+    'media': ['music', 'video', 'photo', 'image', 'camera', 'play', 'pause', 'volume', 'film', 'movie'],
+    'travel': ['car', 'plane', 'train', 'bus', 'map', 'location', 'gps', 'direction', 'route', 'journey'],
+    'health': ['medical', 'heart', 'hospital', 'health', 'doctor', 'medicine', 'fitness', 'pulse', 'care'],
+    'business': ['office', 'building', 'chart', 'graph', 'presentation', 'briefcase', 'report', 'analytics'],
+    'nature': ['tree', 'leaf', 'flower', 'mountain', 'water', 'sun', 'moon', 'star', 'weather', 'eco'],
+    'games': ['game', 'play', 'controller', 'dice', 'puzzle', 'chess', 'cards', 'joystick', 'console'],
+    'e-commerce': ['shop', 'cart', 'buy', 'product', 'sale', 'store', 'basket', 'checkout']
+}
+
+# Từ khóa liên quan được thêm theo danh mục
+CATEGORY_TAGS = {
+    'social': ['social', 'network', 'community', 'connect', 'share'],
+    'finance': ['finance', 'business', 'money', 'transaction', 'banking', 'budget'],
+    'tools': ['tool', 'utility', 'function', 'setting', 'configuration', 'management'],
+    'communication': ['message', 'contact', 'talk', 'communicate', 'inbox'],
+    'media': ['media', 'entertainment', 'content', 'playback', 'visual'],
+    'travel': ['travel', 'transportation', 'navigation', 'journey', 'route'],
+    'health': ['health', 'wellness', 'medical', 'fitness', 'therapy'],
+    'business': ['business', 'office', 'corporate', 'analytics', 'professional'],
+    'nature': ['nature', 'environment', 'outdoor', 'eco', 'natural'],
+    'games': ['game', 'entertainment', 'fun', 'play', 'gaming'],
+    'e-commerce': ['e-commerce', 'shopping', 'store', 'purchase', 'market']
+}
+
+def compile_rules(rules: Optional[List[Dict[str, Any]]] = None) -> RuleMatcher:
+    """
+    Biên dịch quy tắc làm giàu + từ khóa danh mục thành một RuleMatcher duy nhất.
+    Quy tắc danh mục được thêm sau quy tắc làm giàu, dạng 'contains' có key 'category'.
+    """
+    if rules is None:
+        rules = load_enrichment_rules()
+    combined = list(rules)
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        for keyword in keywords:
+            combined.append({'type': 'contains', 'keyword': keyword, 'category': category})
+    return RuleMatcher(combined)
+
+def generate_default_mapping(icon_names: List[str], matcher: Optional[RuleMatcher] = None) -> Dict[str, Dict[str, Any]]:
     """
     Tạo mapping mặc định thông minh từ danh sách tên icon.
-    Sử dụng heuristic để tạo keywords và description cơ bản.
+    Mọi quy tắc (exact/prefix/contains/suffix + từ khóa danh mục) được áp dụng
+    trong một lượt so khớp cho mỗi tên; tags của mọi quy tắc khớp đều được thêm,
+    description lấy từ quy tắc khớp đầu tiên (nếu có).
     """
+    if matcher is None:
+        matcher = compile_rules()
+    rules = matcher.rules
     mapping = {}
-    common_words = defaultdict(int)
-    
-    # Phân tích các từ thường xuất hiện
-    for name in icon_names:
-        parsed = parse_icon_name(name)
-        words = parsed.split()
-        for word in words:
-            if len(word) > 2:  # Bỏ qua từ quá ngắn
-                common_words[word] += 1
-    
-    # Xác định danh mục dựa trên từ khóa phổ biến
-    categories = {
-        'social': ['facebook', 'twitter', 'instagram', 'linkedin', 'youtube', 'tiktok', 'reddit', 'pinterest'],
-        'finance': ['bank', 'money', 'payment', 'credit', 'wallet', 'coin', 'cash', 'dollar'],
-        'tools': ['settings', 'config', 'gear', 'tool', 'wrench', 'hammer', 'screw', 'adjust', 'utility'],
-        'communication': ['message', 'chat', 'email', 'call', 'phone', 'sms', 'notification', 'talk'],
-        'media': ['music', 'video', 'photo', 'image', 'camera', 'play', 'pause', 'volume', 'film', 'movie'],
-        'travel': ['car', 'plane', 'train', 'bus', 'map', 'location', 'gps', 'direction', 'route', 'journey'],
-        'health': ['medical', 'heart', 'hospital', 'health', 'doctor', 'medicine', 'fitness', 'pulse', 'care'],
-        'business': ['office', 'building', 'chart', 'graph', 'presentation', 'briefcase', 'report', 'analytics'],
-        'nature': ['tree', 'leaf', 'flower', 'mountain', 'water', 'sun', 'moon', 'star', 'weather', 'eco'],
-        'games': ['game', 'play', 'controller', 'dice', 'puzzle', 'chess', 'cards', 'joystick', 'console'],
-        'e-commerce': ['shop', 'cart', 'buy', 'product', 'sale', 'store', 'basket', 'checkout']
-    }
     
     # Tạo mapping cho từng icon
     for name in icon_names:
         parsed_name = parse_icon_name(name)
         words = parsed_name.split()
+        matched = [rules[i] for i in matcher.match(parsed_name)]
         
-        # Tìm danh mục phù hợp
-        category = 'general'
-        for cat, keywords in categories.items():
-            if any(keyword in parsed_name for keyword in keywords):
-                category = cat
-                break
+        # Tìm danh mục phù hợp (quy tắc danh mục đã theo đúng thứ tự ưu tiên)
+        category = next((rule['category'] for rule in matched if 'category' in rule), 'general')
         
         # Tạo keywords thông minh
         keywords = []
@@ -277,36 +317,27 @@ def generate_default_mapping(icon_names: List[str]) -> Dict[str, Dict[str, Any]]
         keywords.extend(words)
         
         # Thêm từ khóa liên quan theo danh mục
-        if category == 'social':
-            keywords.extend(['social', 'network', 'community', 'connect', 'share'])
-        elif category == 'finance':
-            keywords.extend(['finance', 'business', 'money', 'transaction', 'banking', 'budget'])
-        elif category == 'tools':
-            keywords.extend(['tool', 'utility', 'function', 'setting', 'configuration', 'management'])
-        elif category == 'communication':
-            keywords.extend(['message', 'contact', 'talk', 'communicate', 'inbox'])
-        elif category == 'media':
-            keywords.extend(['media', 'entertainment', 'content', 'playback', 'visual'])
-        elif category == 'travel':
-            keywords.extend(['travel', 'transportation', 'navigation', 'journey', 'route'])
-        elif category == 'health':
-            keywords.extend(['health', 'wellness', 'medical', 'fitness', 'therapy'])
-        elif category == 'business':
-            keywords.extend(['business', 'office', 'corporate', 'analytics', 'professional'])
-        elif category == 'nature':
-            keywords.extend(['nature', 'environment', 'outdoor', 'eco', 'natural'])
-        elif category == 'games':
-            keywords.extend(['game', 'entertainment', 'fun', 'play', 'gaming'])
-        elif category == 'e-commerce':
-            keywords.extend(['e-commerce', 'shopping', 'store', 'purchase', 'market'])
+        keywords.extend(CATEGORY_TAGS.get(category, []))
+        
+        # Thêm tags của các quy tắc làm giàu đã khớp
+        rule_description = None
+        for rule in matched:
+            if 'category' in rule:
+                continue
+            keywords.extend(rule.get('tags', []))
+            if rule_description is None and rule.get('description'):
+                rule_description = rule['description']
         
         # Tạo description tự động
-        description = f"Icon representing {parsed_name}"
-        if category != 'general':
-            description += f" in the {category} category"
+        if rule_description:
+            description = rule_description
+        else:
+            description = f"Icon representing {parsed_name}"
+            if category != 'general':
+                description += f" in the {category} category"
         
         mapping[name] = {
-            'tags': list(set(keywords)),  # Loại bỏ trùng lặp
+            'tags': list(dict.fromkeys(keywords)),  # Loại bỏ trùng lặp, giữ thứ tự
             'description': description,
             'category': category
         }
@@ -354,8 +385,11 @@ def main():
         print("⚠️ File mapping không tồn tại. Sẽ sử dụng mapping tự động.")
         external_mapping_file = None
     
+    minified = input("🗜️ Ghi file output dạng minified? (y/N): ").strip().lower() == 'y'
+
     print("\n🚀 Bắt đầu xử lý...")
-    success = enrich_icon_data(input_file, output_file, external_mapping_file)
+    success = enrich_icon_data(input_file, output_file, external_mapping_file,
+                               "min" if minified else "pretty")
     
     if success:
         print("\n🎉 Hoàn tất! File đã được làm giàu với dữ liệu từ khóa và mô tả.")
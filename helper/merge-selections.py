@@ -2,6 +2,11 @@
 import os
 import json
 import sys
+import argparse
+
+from batches import find_batch_dirs, get_icon_name
+import json_codec
+from build_cache import replace_if_changed, write_bytes_if_changed
 
 def input_path(prompt):
     path = input(prompt).strip().strip('"')
@@ -12,106 +17,296 @@ def input_path(prompt):
 
 def input_save_path(prompt):
     path = input(prompt).strip().strip('"')
+    ensure_parent_dir(path)
+    return path
+
+def ensure_parent_dir(path):
     dir_part = os.path.dirname(path)
     if dir_part and not os.path.isdir(dir_part):
         try:
             os.makedirs(dir_part)
-        except:
+        except OSError:
             print("❌ Không thể tạo thư mục đích.")
             sys.exit(1)
-    return path
 
-print("=== 📂 GỘP selection.json TỪ NHIỀU BATCH ===")
-root_dir = input_path("📁 Nhập đường dẫn chứa các batch (batch1-v1.0, batch2-v1.0, ...): ")
-
-# Tự động tìm batch theo pattern batch{N}-v1.0
-batch_dirs = []
-for entry in os.listdir(root_dir):
-    full_path = os.path.join(root_dir, entry)
-    if os.path.isdir(full_path) and entry.startswith("batch") and "-v1.0" in entry:
-        batch_dirs.append(entry)
-
-if not batch_dirs:
-    print("❌ Không tìm thấy batch nào có dạng batchX-v1.0")
-    sys.exit(1)
-
-batch_dirs.sort(key=lambda x: int(''.join(filter(str.isdigit, x.split('-')[0]))) if any(c.isdigit() for c in x) else 999)
-print(f"🔍 Phát hiện {len(batch_dirs)} batch: {', '.join(batch_dirs)}")
-
-# Gộp dữ liệu
-merged = {
-    "icons": [],
-    "height": 1024,
-    "metadata": {
-        "author": "merged-by-script",
-        "homepage": "",
-        "name": "lawnicons-all",
-        "url": ""
-    },
-    "preferences": {
-        "fontPref": {
-            "prefix": "icons-",
-            "metadata": "",
-            "embed": True
+def new_merged_selection(name="lawnicons-all", prefix="icons-"):
+    """Khung selection.json gộp (định dạng IcoMoon)"""
+    return {
+        "icons": [],
+        "height": 1024,
+        "metadata": {
+            "author": "merged-by-script",
+            "homepage": "",
+            "name": name,
+            "url": ""
+        },
+        "preferences": {
+            "fontPref": {
+                "prefix": prefix,
+                "metadata": "",
+                "embed": True
+            }
         }
     }
-}
 
-seen_names = set()
-total_icons = 0
+def unique_icon_name(icon, seen_names):
+    """
+    Lấy tên duy nhất để tránh trùng: home → home_2, home_3...
+    Cập nhật lại tên trong icon nếu phải đổi. Trả về None nếu icon không có tên.
+    """
+    name = get_icon_name(icon)
+    if not name:
+        return None
+    if name in seen_names:
+        base = name
+        counter = 2
+        while name in seen_names:
+            name = f"{base}_{counter}"
+            counter += 1
+        # Cập nhật lại tên trong icon
+        if "properties" in icon and "name" in icon["properties"]:
+            icon["properties"]["name"] = name
+        elif "attrs" in icon and icon["attrs"] and "name" in icon["attrs"][0]:
+            icon["attrs"][0]["name"] = name
+    seen_names.add(name)
+    return name
 
-for i, batch in enumerate(batch_dirs, 1):
-    sel_path = os.path.join(root_dir, batch, "selection.json")
-    if not os.path.isfile(sel_path):
-        print(f"⚠️  Batch {i}: thiếu selection.json → bỏ qua")
-        continue
+def merge_selection_data(batches, name="lawnicons-all", prefix="icons-"):
+    """
+    Gộp dữ liệu selection của nhiều batch (đã parse sẵn, xem batches.load_batches).
+    Trả về (merged, total_icons).
+    """
+    merged = new_merged_selection(name, prefix)
+    seen_names = set()
+    total_icons = 0
 
-    try:
-        with open(sel_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception as e:
-        print(f"❌ Batch {i} ({batch}): lỗi đọc JSON → {e}")
-        continue
+    for i, batch in enumerate(batches, 1):
+        icons = batch["data"].get("icons", [])
+        print(f"✅ Batch {i} ({batch['name']}): {len(icons)} icon")
+
+        for icon in icons:
+            if not unique_icon_name(icon, seen_names):
+                continue
+            merged["icons"].append(icon)
+            total_icons += 1
+
+    return merged, total_icons
+
+def find_selection_paths(root_dir):
+    """Danh sách (batch, selection.json) của các batch dạng batchX-v1.0"""
+    batch_dirs = [b for b in find_batch_dirs(root_dir) if "-v1.0" in b]
+    if not batch_dirs:
+        print("❌ Không tìm thấy batch nào có dạng batchX-v1.0")
+        sys.exit(1)
+    print(f"🔍 Phát hiện {len(batch_dirs)} batch: {', '.join(batch_dirs)}")
 
-    icons = data.get("icons", [])
-    print(f"✅ Batch {i} ({batch}): {len(icons)} icon")
+    sel_paths = []
+    for i, batch in enumerate(batch_dirs, 1):
+        sel_path = os.path.join(root_dir, batch, "selection.json")
+        if not os.path.isfile(sel_path):
+            print(f"⚠️  Batch {i}: thiếu selection.json → bỏ qua")
+            continue
+        sel_paths.append((batch, sel_path))
+    return sel_paths
 
-    for icon in icons:
-        # Lấy tên duy nhất để tránh trùng
-        name = icon.get("properties", {}).get("name") or icon.get("attrs", [{}])[0].get("name", "")
-        if not name:
+def load_batch_selections(root_dir):
+    """Đọc selection.json của các batch dạng batchX-v1.0 (giữ hành vi cũ của script)"""
+    batches = []
+    for i, (batch, sel_path) in enumerate(find_selection_paths(root_dir), 1):
+        try:
+            with open(sel_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"❌ Batch {i} ({batch}): lỗi đọc JSON → {e}")
             continue
-        if name in seen_names:
-            # Tự động đổi tên nếu trùng: home → home_2, home_3...
-            base = name
-            counter = 2
-            while name in seen_names:
-                name = f"{base}_{counter}"
-                counter += 1
-            # Cập nhật lại tên trong icon
-            if "properties" in icon and "name" in icon["properties"]:
-                icon["properties"]["name"] = name
-            elif "attrs" in icon and icon["attrs"] and "name" in icon["attrs"][0]:
-                icon["attrs"][0]["name"] = name
-
-        seen_names.add(name)
-        merged["icons"].append(icon)
-        total_icons += 1
-
-print(f"\n📊 Tổng cộng: {total_icons} icon sau khi gộp (đã xử lý trùng tên)")
-
-# Hỏi nơi lưu
-output_path = input_save_path(
-    "💾 Nhập đường dẫn lưu file gộp (ví dụ: D:/icon/data/lawnicons/selection-all.json): "
-)
-
-try:
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(merged, f, indent=2, ensure_ascii=False)
-    print(f"\n🎉 Thành công! Đã lưu vào:\n   {output_path}")
-    print("\n💡 Bạn có thể:")
-    print("- Import file này vào Icomoon (Import Icons → JSON)")
-    print("- Dùng để sinh lại font/CSS nếu cần")
-except Exception as e:
-    print(f"❌ Lỗi khi ghi file: {e}")
-    sys.exit(1)
\ No newline at end of file
+
+        batches.append({"name": batch, "selection_path": sel_path, "data": data})
+    return batches
+
+class SelectionStreamReader:
+    """
+    Đọc file JSON theo luồng bằng json.JSONDecoder.raw_decode: chỉ giữ trong bộ nhớ
+    phần buffer chưa xử lý và giá trị đang đọc (một icon), không phải toàn bộ file.
+    """
+
+    def __init__(self, f, read_size=1 << 16):
+        self.f = f
+        self.read_size = read_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self, size=None):
+        chunk = self.f.read(size or self.read_size)
+        if not chunk:
+            self.eof = True
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+
+    def peek(self):
+        """Ký tự kế tiếp (bỏ qua khoảng trắng), '' nếu hết file"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\n\r":
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos] if self.pos < len(self.buf) else ""
+            self.fill()
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"JSON không hợp lệ: cần '{char}' tại vị trí {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        """Đọc một giá trị JSON hoàn chỉnh, nạp thêm dữ liệu nếu giá trị bị cắt ngang buffer"""
+        self.peek()
+        size = self.read_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # Số ở cuối buffer có thể chưa đọc hết chữ số
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill(size)
+            size *= 2
+
+def iter_selection_icons(sel_path):
+    """Đọc selection.json theo luồng, yield lần lượt từng icon trong mảng 'icons'"""
+    with open(sel_path, "r", encoding="utf-8") as f:
+        reader = SelectionStreamReader(f)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            key = reader.value()
+            reader.expect(":")
+            if key == "icons":
+                reader.expect("[")
+                if reader.peek() == "]":
+                    reader.pos += 1
+                else:
+                    while True:
+                        yield reader.value()
+                        if reader.peek() == ",":
+                            reader.pos += 1
+                        else:
+                            reader.expect("]")
+                            break
+            else:
+                reader.value()  # Bỏ qua giá trị không cần (height, metadata, ...)
+            if reader.peek() == ",":
+                reader.pos += 1
+            else:
+                reader.expect("}")
+                return
+
+def stream_merge_selections(sel_paths, output_path, name="lawnicons-all", prefix="icons-", encoding="pretty"):
+    """
+    Gộp selection theo luồng: đọc từng icon của từng batch và ghi ngay ra file,
+    chỉ giữ lại tập tên icon để xử lý trùng tên. Bộ nhớ gần như không đổi theo
+    số batch/icon. File ra giống hệt từng byte với save_merged(merge_selection_data(...)).
+    sel_paths: danh sách (tên batch, đường dẫn selection.json).
+    encoding: 'pretty' hoặc 'min' (xem json_codec.JSON_ENCODINGS).
+    Trả về tổng số icon đã gộp.
+    """
+    if encoding not in json_codec.JSON_ENCODINGS:
+        raise ValueError(f"Chế độ streaming chỉ hỗ trợ: {', '.join(json_codec.JSON_ENCODINGS)}")
+    pretty = encoding == "pretty"
+    # Dấu phân cách/thụt lề giống hệt json.dumps(indent=2) hoặc separators=(',', ':')
+    dump_kwargs = {"indent": 2} if pretty else {"separators": (",", ":")}
+    item_sep, level1, level2 = (",\n    ", "\n  ", "\n    ") if pretty else (",", "", "")
+    header = new_merged_selection(name, prefix)
+    del header["icons"]
+    seen_names = set()
+    total_icons = 0
+
+    tmp_path = output_path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            out.write('{' + level1 + '"icons":' + (" [" if pretty else "["))
+            for i, (batch, sel_path) in enumerate(sel_paths, 1):
+                batch_icons = 0
+                for icon in iter_selection_icons(sel_path):
+                    if not unique_icon_name(icon, seen_names):
+                        continue
+                    # Thụt lề cho phần tử nằm ở cấp thứ 2
+                    encoded = json.dumps(icon, ensure_ascii=False, **dump_kwargs).replace("\n", level2)
+                    out.write((item_sep if total_icons else level2) + encoded)
+                    total_icons += 1
+                    batch_icons += 1
+                print(f"✅ Batch {i} ({batch}): {batch_icons} icon")
+            out.write(level1 + "]" if total_icons else "]")
+            for key, value in header.items():
+                encoded = json.dumps(value, ensure_ascii=False, **dump_kwargs).replace("\n", level1)
+                out.write("," + level1 + json.dumps(key) + (": " if pretty else ":") + encoded)
+            out.write(("\n" if pretty else "") + "}")
+    except BaseException:
+        # Lỗi giữa chừng (JSON hỏng, đĩa đầy, Ctrl+C...): không để lại file tạm dở dang
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    # Giữ nguyên file cũ nếu nội dung không đổi (giống save_merged)
+    replace_if_changed(tmp_path, output_path)
+    return total_icons
+
+def save_merged(merged, output_path, encoding="pretty"):
+    # Không ghi lại nếu nội dung không đổi (giữ nguyên file cho cache)
+    write_bytes_if_changed(output_path, json_codec.dumps(merged, encoding))
+
+def main():
+    parser = argparse.ArgumentParser(description='Gộp selection.json từ nhiều batch')
+    parser.add_argument('--root', help='Thư mục chứa các batch (batch1-v1.0, batch2-v1.0, ...)')
+    parser.add_argument('--output', help='Đường dẫn lưu file gộp')
+    parser.add_argument('--stream', action='store_true',
+                        help='Gộp theo luồng (đọc/ghi từng icon, bộ nhớ không tăng theo số icon)')
+    parser.add_argument('--encoding', choices=json_codec.JSON_ENCODINGS, default='pretty',
+                        help='Định dạng file gộp: pretty (thụt lề) hoặc min (minified)')
+    args = parser.parse_args()
+
+    print("=== 📂 GỘP selection.json TỪ NHIỀU BATCH ===")
+    if args.root:
+        if not os.path.isdir(args.root):
+            print("❌ Đường dẫn không hợp lệ.")
+            sys.exit(1)
+        root_dir = args.root
+    else:
+        root_dir = input_path("📁 Nhập đường dẫn chứa các batch (batch1-v1.0, batch2-v1.0, ...): ")
+
+    if not args.stream:
+        batches = load_batch_selections(root_dir)
+        merged, total_icons = merge_selection_data(batches)
+        print(f"\n📊 Tổng cộng: {total_icons} icon sau khi gộp (đã xử lý trùng tên)")
+
+    # Hỏi nơi lưu
+    if args.output:
+        output_path = args.output
+        ensure_parent_dir(output_path)
+    else:
+        output_path = input_save_path(
+            "💾 Nhập đường dẫn lưu file gộp (ví dụ: D:/icon/data/lawnicons/selection-all.json): "
+        )
+
+    try:
+        if args.stream:
+            print("🌊 Chế độ streaming: đọc và ghi từng icon")
+            total_icons = stream_merge_selections(find_selection_paths(root_dir), output_path,
+                                                  encoding=args.encoding)
+            print(f"\n📊 Tổng cộng: {total_icons} icon sau khi gộp (đã xử lý trùng tên)")
+        else:
+            save_merged(merged, output_path, args.encoding)
+        print(f"\n🎉 Thành công! Đã lưu vào:\n   {output_path}")
+        print("\n💡 Bạn có thể:")
+        print("- Import file này vào Icomoon (Import Icons → JSON)")
+        print("- Dùng để sinh lại font/CSS nếu cần")
+    except Exception as e:
+        print(f"❌ Lỗi khi ghi file: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import argparse
+import gzip
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+from build_cache import write_bytes_if_changed
+
+try:
+    import brotli
+except ImportError:  # brotli là tuỳ chọn: thiếu thì chỉ tạo .gz
+    brotli = None
+
+# Nén sẵn các file tĩnh: mỗi file CSS/JSON/HTML/JS/... có thêm file .gz (gzip mức 9)
+# và .br (Brotli quality 11) nằm cạnh, để nginx (gzip_static / brotli_static) hoặc CDN
+# trả thẳng bản nén mà không tốn CPU nén lúc phục vụ.
+# File nén được bỏ qua nếu mới hơn file gốc (file gốc không đổi thì giữ nguyên mtime,
+# xem build_cache.write_if_changed). gzip ghi mtime=0 để cùng nội dung cho cùng byte.
+#
+# Ví dụ:
+#   python helper/precompress.py                  # toàn bộ data/ và file tĩnh ở thư mục gốc
+#   python helper/precompress.py data/lawnicons   # chỉ một thư mục
+
+DEFAULT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXTENSIONS = (".css", ".json", ".html", ".js", ".svg", ".xml", ".txt", ".bin", ".geo")
+# extracted_folder chứa batch gốc từ IcoMoon (đầu vào build), trang web không tải
+SKIP_DIRS = {".git", ".github", ".vscode", ".build-cache", "__pycache__", "node_modules", "downloads", "helper",
+             "extracted_folder"}
+SIDECARS = {"gzip": ".gz", "brotli": ".br"}
+# File quá nhỏ thì bản nén không đáng (header HTTP còn lớn hơn phần tiết kiệm)
+MIN_SIZE = 1024
+
+
+def available_formats(use_brotli: bool = True) -> List[str]:
+    formats = ["gzip"]
+    if use_brotli and brotli is not None:
+        formats.append("brotli")
+    return formats
+
+
+def find_artifacts(paths: Iterable[str], extensions: Iterable[str] = EXTENSIONS,
+                   skip: Iterable[str] = ()) -> List[str]:
+    """
+    Các file tĩnh cần nén trong danh sách file/thư mục (bỏ qua thư mục không phục vụ
+    và các file trong skip)
+    """
+    extensions = tuple(extensions)
+    skip = {os.path.abspath(p) for p in skip}
+    found = []
+    for path in paths:
+        if os.path.isfile(path):
+            if path.endswith(extensions):
+                found.append(path)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+            found.extend(os.path.join(dirpath, f) for f in sorted(filenames) if f.endswith(extensions))
+    return [p for p in found if os.path.abspath(p) not in skip]
+
+
+def compress_bytes(data: bytes, fmt: str) -> bytes:
+    if fmt == "gzip":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if fmt == "brotli":
+        return brotli.compress(data, quality=11)
+    raise ValueError(f"Định dạng nén không hỗ trợ: {fmt}")
+
+
+def is_up_to_date(source: str, sidecar: str) -> bool:
+    return os.path.exists(sidecar) and os.path.getmtime(sidecar) >= os.path.getmtime(source)
+
+
+def remove_sidecar(sidecar: str):
+    if os.path.exists(sidecar):
+        os.remove(sidecar)
+
+
+def precompress_file(path: str, formats: List[str], min_size: int = MIN_SIZE) -> Dict[str, Any]:
+    """
+    Tạo file nén cạnh một file (chạy trong process con).
+    Trả về {'path', 'size', 'gzip', 'brotli', 'written'}; kích thước None nghĩa là
+    không có bản nén (file quá nhỏ hoặc nén không nhỏ hơn).
+    """
+    size = os.path.getsize(path)
+    result = {"path": path, "size": size, "written": 0}
+    data = None
+    for fmt in formats:
+        sidecar = path + SIDECARS[fmt]
+        if size < min_size:
+            remove_sidecar(sidecar)
+            result[fmt] = None
+            continue
+        if is_up_to_date(path, sidecar):
+            result[fmt] = os.path.getsize(sidecar)
+            continue
+
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+        compressed = compress_bytes(data, fmt)
+        if len(compressed) >= size:
+            remove_sidecar(sidecar)
+            result[fmt] = None
+            continue
+        if write_bytes_if_changed(sidecar, compressed):
+            result["written"] += 1
+        else:
+            os.utime(sidecar)  # Nội dung không đổi: chỉ đánh dấu là mới
+        result[fmt] = len(compressed)
+    return result
+
+
+def remove_orphans(paths: Iterable[str]) -> int:
+    """Xoá file .gz/.br không còn file gốc"""
+    removed = 0
+    for path in paths:
+        if not os.path.isdir(path):
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+            for name in filenames:
+                for ext in SIDECARS.values():
+                    source = os.path.join(dirpath, name[:-len(ext)])
+                    if name.endswith(ext) and source.endswith(EXTENSIONS) and not os.path.exists(source):
+                        os.remove(os.path.join(dirpath, name))
+                        removed += 1
+    return removed
+
+
+def precompress(paths: Iterable[str], formats: Optional[List[str]] = None, workers: Optional[int] = None,
+                min_size: int = MIN_SIZE, skip: Iterable[str] = ()) -> List[Dict[str, Any]]:
+    """
+    Nén song song mọi file tĩnh trong paths. Trả về kết quả từng file.
+    skip: file không nén (bản nén cũ của chúng bị xoá để không phục vụ nội dung cũ).
+    """
+    paths = list(paths)
+    skip = list(skip)
+    formats = formats or available_formats()
+    files = find_artifacts(paths, skip=skip)
+    for path in skip:
+        for sidecar in SIDECARS.values():
+            remove_sidecar(path + sidecar)
+    removed = remove_orphans(paths)
+    if removed:
+        print(f"🧹 Đã xoá {removed} file nén không còn file gốc")
+    if not files:
+        return []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(files) // ((workers or os.cpu_count() or 1) * 4))
+        return list(pool.map(precompress_file, files, [formats] * len(files), [min_size] * len(files),
+                             chunksize=chunksize))
+
+
+def format_size(n: Optional[int]) -> str:
+    if n is None:
+        return "-"
+    if n >= 1 << 20:
+        return f"{n / (1 << 20):.1f} MB"
+    if n >= 1 << 10:
+        return f"{n / (1 << 10):.1f} KB"
+    return f"{n} B"
+
+
+def format_report(results: List[Dict[str, Any]], root: str = DEFAULT_ROOT, top: int = 10) -> List[str]:
+    """Bảng kích thước: các file lớn nhất và tổng cộng"""
+    lines = [f"   {'file':<60}{'gốc':>11}{'gzip':>11}{'brotli':>11}"]
+    for r in sorted(results, key=lambda r: r["size"], reverse=True)[:top]:
+        name = os.path.relpath(r["path"], root)
+        if len(name) > 58:
+            name = "…" + name[-57:]
+        lines.append(f"   {name:<60}{format_size(r['size']):>11}"
+                     f"{format_size(r.get('gzip')):>11}{format_size(r.get('brotli')):>11}")
+
+    total = sum(r["size"] for r in results)
+    for fmt in SIDECARS:
+        compressed = [r for r in results if r.get(fmt)]
+        if not compressed:
+            continue
+        raw = sum(r["size"] for r in compressed)
+        packed = sum(r[fmt] for r in compressed)
+        lines.append(f"📦 {fmt}: {len(compressed)} file, {format_size(raw)} → {format_size(packed)}"
+                     f" (giảm {1 - packed / raw:.0%})")
+    written = sum(r["written"] for r in results)
+    lines.append(f"📊 Tổng {len(results)} file ({format_size(total)}), ghi mới {written} file nén")
+    return lines
+
+
+def default_paths(root: str) -> List[str]:
+    """Thư mục data/ và các file tĩnh ở thư mục gốc site"""
+    paths = [os.path.join(root, "data")]
+    paths.extend(os.path.join(root, f) for f in sorted(os.listdir(root))
+                 if os.path.isfile(os.path.join(root, f)) and f.endswith(EXTENSIONS))
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tạo file .br/.gz nén sẵn cho các file tĩnh')
+    parser.add_argument('paths', nargs='*', help='File hoặc thư mục (mặc định: data/ và file tĩnh ở thư mục gốc)')
+    parser.add_argument('--root', default=DEFAULT_ROOT, help='Thư mục gốc của site')
+    parser.add_argument('--workers', type=int, help='Số process nén song song (mặc định: số CPU)')
+    parser.add_argument('--no-brotli', action='store_true', help='Chỉ tạo .gz')
+    parser.add_argument('--min-size', type=int, default=MIN_SIZE, help=f'Bỏ qua file nhỏ hơn (byte, mặc định {MIN_SIZE})')
+    parser.add_argument('--top', type=int, default=10, help='Số file lớn nhất hiển thị trong báo cáo')
+    args = parser.parse_args()
+
+    print("=== 🗜️ NÉN SẴN FILE TĨNH (.br / .gz) ===")
+    formats = available_formats(not args.no_brotli)
+    if "brotli" not in formats and not args.no_brotli:
+        print("⚠️ Thiếu thư viện brotli (pip install brotli) → chỉ tạo .gz")
+
+    paths = args.paths or default_paths(args.root)
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        print(f"❌ Không tìm thấy: {', '.join(missing)}")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    results = precompress(paths, formats, args.workers, args.min_size)
+    print("\n".join(format_report(results, args.root, args.top)))
+    print(f"⏱️ Thời gian: {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+import argparse
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import make_css
+import precompress
+
+# Bước publish: tạo thư mục dist/ để deploy với cache dài hạn.
+# - Toàn bộ site (file tĩnh ở gốc, css/, images/, downloads/, data/) được hardlink sang dist/
+#   (không hardlink được thì copy), giữ nguyên tên để trang demo, sprite, link ngoài vẫn chạy.
+# - Mọi file đi tới được từ hai manifest (data/collections-manifest.json, data/collections-database.json)
+#   có thêm một bản tên theo hash nội dung: chunk_0.json → chunk_0.<hash>.json, all.css → all.<hash>.css,
+#   font, shard, metadata.json, index.json của style Font Awesome...
+# - File có tham chiếu (CSS: url(...); metadata.json / index.json / manifest: chuỗi là đường dẫn file)
+#   được viết lại trỏ tới tên hash trước khi tính hash của chính nó, nên đổi một chunk sẽ đổi cả
+#   metadata.json chứa nó, còn chunk khác giữ nguyên tên (cache trình duyệt/IndexedDB vẫn dùng được).
+# - Mẫu "{index}" trong collections-database.json (chunkPattern, chunkCss) không hash được: đường dẫn
+#   của từng chunk được ghi thẳng vào metadata.json (chunks[i].file / chunks[i].css) rồi bỏ mẫu.
+# - Hai manifest giữ tên cố định (điểm vào) và được viết lại tại chỗ; dist/asset-manifest.json
+#   ghi bảng tên gốc → tên hash.
+# - CSS theo chunk (build với css_chunks) không được commit nên collections-database.json không khai báo;
+#   khi core.css và mọi chunk_N.css có trong site, bản publish thêm coreCss/chunkCss cho collection.
+# File tên hash phục vụ với "Cache-Control: public, max-age=31536000, immutable";
+# manifest, HTML và file giữ tên gốc nên dùng "no-cache" (revalidate bằng ETag).
+#
+# Ví dụ:
+#   python helper/publish.py                      # site ở thư mục gốc → dist/
+#   python helper/publish.py --dist /srv/icons    # thư mục đích khác
+
+DEFAULT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DIST = "dist"
+ENTRY_POINTS = ["data/collections-manifest.json", "data/collections-database.json"]
+ASSET_MANIFEST = "asset-manifest.json"
+MANIFEST_VERSION = 1
+HASH_LENGTH = 10
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# downloads/ không nén sẵn nhưng vẫn phải có trong site
+SKIP_DIRS = (precompress.SKIP_DIRS - {"downloads"}) | {".pytest_cache", ".mypy_cache", ".ruff_cache", ".venv", "venv"}
+# Chỉ đổi tên file tài nguyên; trang HTML là điểm vào, giữ tên gốc
+HASHED_EXTENSIONS = (".css", ".json", ".woff", ".woff2", ".ttf", ".otf", ".eot", ".svg", ".geo", ".bin", ".js")
+# File tải về giữ tên gốc (tên hiện cho người dùng khi lưu)
+UNHASHED_PREFIXES = ("downloads/",)
+# File chứa tham chiếu tới file khác (được viết lại); file khác chỉ đổi tên
+REFERENCE_JSON = {"metadata.json", "index.json"}
+# Khoá mẫu trong collections-database.json → khoá trong chunks[i] của metadata.json
+PATTERN_KEYS = {"chunkPattern": "file", "chunkCss": "css"}
+CSS_URL_PATTERN = re.compile(r"""url\(\s*(["']?)([^"')]+)\1\s*\)""")
+# Đường dẫn nằm trong chuỗi dài hơn (ví dụ thẻ <link> trong "cdn")
+EMBEDDED_PATH_PATTERN = re.compile(r"""(?<![\w./-])data/[^\s"'<>()]+""")
+
+
+def hashed_name(path: str, digest: str) -> str:
+    """data/x/all.css + hash → data/x/all.<hash>.css"""
+    directory, filename = posixpath.split(path)
+    stem, ext = posixpath.splitext(filename)
+    return posixpath.join(directory, f"{stem}.{digest[:HASH_LENGTH]}{ext}")
+
+
+def link_or_copy(source: str, target: str):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def write_new(path: str, data: bytes):
+    """Ghi file mới; xoá hardlink cũ trước để không sửa nhầm file gốc"""
+    if os.path.lexists(path):
+        os.remove(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def site_files(root: str, dist: str) -> List[str]:
+    """Đường dẫn (tương đối, dạng posix) của mọi file thuộc site: file tĩnh ở gốc và các thư mục con"""
+    files = []
+    dist = os.path.abspath(dist)
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if name.startswith(".") or name in SKIP_DIRS or os.path.abspath(path) == dist:
+            continue
+        if os.path.isfile(path):
+            if name.endswith(precompress.EXTENSIONS) or name.endswith(tuple(precompress.SIDECARS.values())):
+                files.append(name)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS and not d.startswith("."))
+            rel_dir = os.path.relpath(dirpath, root).replace(os.sep, "/")
+            files.extend(posixpath.join(rel_dir, f) for f in sorted(filenames))
+    return files
+
+
+class Publisher:
+    """Đổi tên theo hash các file đi tới được từ manifest (duyệt theo chiều sâu, file được tham chiếu trước)"""
+
+    def __init__(self, root: str, dist: str):
+        self.root = root
+        self.dist = dist
+        self.assets: Dict[str, str] = {}
+        self.rewritten: List[str] = []
+        self.in_progress: Set[str] = set()
+        self.chunk_extras: Dict[str, Dict[str, str]] = {}
+
+    def exists(self, rel: str) -> bool:
+        return os.path.isfile(os.path.join(self.root, rel))
+
+    def resolve(self, base: str, ref: str) -> Optional[Tuple[str, bool]]:
+        """
+        (đường dẫn tương đối dạng posix, có tính từ thư mục của base không) của file mà ref trỏ tới;
+        None nếu ref không phải file của site
+        """
+        if not ref or "://" in ref or ref.startswith(("data:", "#", "/")) or "{index}" in ref:
+            return None
+        path = ref.split("#", 1)[0].split("?", 1)[0]
+        if not path.endswith(HASHED_EXTENSIONS):
+            return None
+        candidates = ((posixpath.normpath(posixpath.join(posixpath.dirname(base), path)), True),
+                      (posixpath.normpath(path), False))
+        for candidate, from_base in candidates:
+            if not candidate.startswith(("../",) + UNHASHED_PREFIXES) and self.exists(candidate):
+                return candidate, from_base
+        return None
+
+    def rewrite_ref(self, base: str, ref: str) -> str:
+        """Tham chiếu tới bản tên hash, cùng kiểu với ref (tính từ thư mục file hay từ gốc site), giữ ?query/#fragment"""
+        resolved = self.resolve(base, ref)
+        if resolved is None:
+            return ref
+        source, from_base = resolved
+        target = self.publish(source)
+        path = ref.split("#", 1)[0].split("?", 1)[0]
+        new = posixpath.relpath(target, posixpath.dirname(base) or ".") if from_base else target
+        return new + ref[len(path):]
+
+    def rewrite_css(self, rel: str, text: str) -> str:
+        return CSS_URL_PATTERN.sub(lambda m: f"url({m.group(1)}{self.rewrite_ref(rel, m.group(2))}{m.group(1)})", text)
+
+    def rewrite_json(self, rel: str, value: Any, embedded: bool = False) -> Any:
+        if isinstance(value, dict):
+            return {k: self.rewrite_json(rel, v, embedded) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.rewrite_json(rel, v, embedded) for v in value]
+        if isinstance(value, str):
+            if self.resolve(rel, value):
+                return self.rewrite_ref(rel, value)
+            if embedded:
+                return EMBEDDED_PATH_PATTERN.sub(lambda m: self.rewrite_ref(rel, m.group(0)), value)
+        return value
+
+    def expand_patterns(self, rel: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        chunkPattern/chunkCss của một collection → đường dẫn từng chunk trong metadata.json của nó.
+        Chỉ bỏ mẫu khi mọi chunk đều có file tương ứng.
+        """
+        resolved = self.resolve(rel, entry.get("metadata") or "")
+        if not resolved:
+            return entry
+        metadata = resolved[0]
+        with open(os.path.join(self.root, metadata), "r", encoding="utf-8") as f:
+            count = len(json.load(f).get("chunks") or [])
+        entry = self.add_chunk_css(entry, count)
+        for key, chunk_key in PATTERN_KEYS.items():
+            pattern = entry.get(key)
+            if not isinstance(pattern, str) or "{index}" not in pattern or not count:
+                continue
+            files = [posixpath.normpath(pattern.replace("{index}", str(i))) for i in range(count)]
+            if not all(self.exists(p) for p in files):
+                continue
+            extras = self.chunk_extras.setdefault(metadata, {})
+            extras[chunk_key] = pattern
+            del entry[key]
+        return entry
+
+    def add_chunk_css(self, entry: Dict[str, Any], count: int) -> Dict[str, Any]:
+        """coreCss/chunkCss cho collection đã build CSS theo chunk (css/ cạnh file css) mà chưa khai báo"""
+        entry = dict(entry)
+        css = entry.get("css")
+        if "coreCss" in entry or not isinstance(css, str) or not count:
+            return entry
+        css_dir = posixpath.join(posixpath.dirname(css), make_css.CHUNK_CSS_DIR)
+        core = posixpath.join(css_dir, make_css.CORE_CSS_FILE)
+        pattern = posixpath.join(css_dir, "chunk_{index}.css")
+        if self.exists(core) and all(self.exists(pattern.replace("{index}", str(i))) for i in range(count)):
+            entry["coreCss"] = core
+            entry["chunkCss"] = pattern
+        return entry
+
+    def add_chunk_extras(self, rel: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Ghi đường dẫn từng chunk (tính từ thư mục metadata.json) thay cho mẫu {index}"""
+        for chunk_key, pattern in self.chunk_extras.get(rel, {}).items():
+            for i, chunk in enumerate(data.get("chunks") or []):
+                if chunk_key not in chunk:
+                    target = posixpath.normpath(pattern.replace("{index}", str(i)))
+                    chunk[chunk_key] = posixpath.relpath(target, posixpath.dirname(rel))
+        return data
+
+    def content(self, rel: str, entry_point: bool = False) -> Optional[bytes]:
+        """Nội dung đã viết lại của file có tham chiếu, None nếu file chỉ cần đổi tên"""
+        name = posixpath.basename(rel)
+        if rel.endswith(".css"):
+            with open(os.path.join(self.root, rel), "r", encoding="utf-8") as f:
+                return self.rewrite_css(rel, f.read()).encode("utf-8")
+        if entry_point or name in REFERENCE_JSON:
+            with open(os.path.join(self.root, rel), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if entry_point and isinstance(data, dict):
+                data = {k: self.expand_patterns(rel, v) if isinstance(v, dict) else v for k, v in data.items()}
+            if isinstance(data, dict):
+                data = self.add_chunk_extras(rel, data)
+            data = self.rewrite_json(rel, data, embedded=entry_point)
+            return (json.dumps(data, ensure_ascii=False, indent=2) + "\n").encode("utf-8")
+        return None
+
+    def publish(self, rel: str) -> str:
+        """Tạo bản tên hash của rel trong dist (một lần cho mỗi file), trả về tên hash"""
+        if rel in self.assets:
+            return self.assets[rel]
+        if rel in self.in_progress:
+            raise ValueError(f"Tham chiếu vòng tới {rel}")
+        self.in_progress.add(rel)
+        data = self.content(rel)
+        source = os.path.join(self.root, rel)
+        if data is None:
+            digest = hashlib.sha256()
+            with open(source, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            target = hashed_name(rel, digest.hexdigest())
+            link_or_copy(source, os.path.join(self.dist, target))
+            # Bản nén sẵn cùng nội dung thì dùng lại
+            for sidecar in precompress.SIDECARS.values():
+                if os.path.isfile(source + sidecar):
+                    link_or_copy(source + sidecar, os.path.join(self.dist, target + sidecar))
+        else:
+            target = hashed_name(rel, hashlib.sha256(data).hexdigest())
+            write_new(os.path.join(self.dist, target), data)
+            self.rewritten.append(os.path.join(self.dist, target))
+        self.in_progress.discard(rel)
+        self.assets[rel] = target
+        return target
+
+    def publish_entry_point(self, rel: str):
+        """Manifest giữ tên cố định, chỉ viết lại nội dung"""
+        data = self.content(rel, entry_point=True)
+        path = os.path.join(self.dist, rel)
+        write_new(path, data)
+        for sidecar in precompress.SIDECARS.values():
+            if os.path.lexists(path + sidecar):
+                os.remove(path + sidecar)
+        self.rewritten.append(path)
+
+
+def clean_dist(dist: str):
+    """Xoá dist cũ; chỉ xoá khi đúng là thư mục do publish tạo (có asset-manifest.json) hoặc rỗng"""
+    if not os.path.isdir(dist):
+        return
+    if os.listdir(dist) and not os.path.isfile(os.path.join(dist, ASSET_MANIFEST)):
+        raise ValueError(f"{dist} không phải thư mục publish (thiếu {ASSET_MANIFEST}), không xoá")
+    shutil.rmtree(dist)
+
+
+def publish(root: str, dist: str, compress: bool = True, workers: Optional[int] = None,
+            log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """Tạo dist từ site ở root. Trả về nội dung asset-manifest.json."""
+    clean_dist(dist)
+    files = site_files(root, dist)
+    for rel in files:
+        link_or_copy(os.path.join(root, rel), os.path.join(dist, rel))
+    log(f"🔗 Đã liên kết {len(files)} file của site sang {dist}")
+
+    publisher = Publisher(root, dist)
+    entry_points = [rel for rel in ENTRY_POINTS if publisher.exists(rel)]
+    for rel in entry_points:
+        publisher.publish_entry_point(rel)
+    log(f"#️⃣ Đổi tên theo hash {len(publisher.assets)} file, viết lại tham chiếu trong {len(publisher.rewritten)} file")
+
+    if compress and publisher.rewritten:
+        precompress.precompress(publisher.rewritten, workers=workers)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "entry_points": entry_points,
+        "cache_control": IMMUTABLE_CACHE_CONTROL,
+        "assets": dict(sorted(publisher.assets.items())),
+    }
+    with open(os.path.join(dist, ASSET_MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tạo thư mục deploy với tên file theo hash nội dung (cache dài hạn)')
+    parser.add_argument('--root', default=DEFAULT_ROOT, help='Thư mục gốc của site (mặc định: thư mục cha của helper/)')
+    parser.add_argument('--dist', help=f'Thư mục đích (mặc định: <root>/{DEFAULT_DIST})')
+    parser.add_argument('--no-compress', action='store_true', help='Không tạo .br/.gz cho các file được viết lại')
+    parser.add_argument('--workers', type=int, help='Số process nén song song')
+    args = parser.parse_args()
+
+    print("=== 📦 PUBLISH ===")
+    root = os.path.abspath(args.root)
+    dist = os.path.abspath(args.dist or os.path.join(root, DEFAULT_DIST))
+    started = time.perf_counter()
+    try:
+        manifest = publish(root, dist, not args.no_compress, args.workers)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    for source, target in list(manifest["assets"].items())[:5]:
+        print(f"   {source} → {target}")
+    if len(manifest["assets"]) > 5:
+        print(f"   ... và {len(manifest['assets']) - 5} file khác")
+    print(f"✅ Đã tạo {dist} ({time.perf_counter() - started:.2f}s)")
+    print(f"💡 File tên hash: Cache-Control: {IMMUTABLE_CACHE_CONTROL}; manifest và HTML: no-cache")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+from collections import Counter, deque
+from typing import Any, Dict, Iterable, List, Set
+
+# Bộ so khớp quy tắc đã biên dịch cho maketag.
+# Mọi quy tắc ({'type', 'keyword', ...}) được gom vào một matcher duy nhất:
+# - 'exact'    → tra bảng băm
+# - 'prefix'   → trie theo keyword
+# - 'suffix'   → trie theo keyword đảo ngược
+# - 'contains' → automaton Aho-Corasick
+# Mỗi tên chỉ cần một lượt duyệt cho mỗi loại, bất kể số lượng quy tắc.
+
+
+class Trie:
+    """Trie ký tự; mỗi nút có thể mang danh sách chỉ số quy tắc"""
+
+    def __init__(self):
+        self.root: Dict[str, Any] = {}
+
+    def add(self, word: str, payload: int):
+        node = self.root
+        for char in word:
+            node = node.setdefault(char, {})
+        node.setdefault(None, []).append(payload)
+
+    def match_prefixes(self, text: Iterable[str]) -> List[int]:
+        """Chỉ số quy tắc của mọi keyword là tiền tố của text"""
+        found = []
+        node = self.root
+        for char in text:
+            node = node.get(char)
+            if node is None:
+                break
+            found.extend(node.get(None, ()))
+        return found
+
+
+class AhoCorasick:
+    """Automaton Aho-Corasick: tìm mọi keyword xuất hiện trong text trong một lượt"""
+
+    def __init__(self):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[int]] = [[]]
+        self.built = False
+
+    def add(self, word: str, payload: int):
+        state = 0
+        for char in word:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        self.output[state].append(payload)
+        self.built = False
+
+    def build(self):
+        """Tính liên kết fail theo BFS và gộp output của trạng thái fail"""
+        queue = deque(self.goto[0].values())
+        for state in queue:
+            self.fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+        self.built = True
+
+    def search(self, text: str) -> Set[int]:
+        if not self.built:
+            self.build()
+        found = set()
+        state = 0
+        goto, fail, output = self.goto, self.fail, self.output
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class RuleMatcher:
+    """
+    Biên dịch danh sách quy tắc thành một matcher.
+    match(text) trả về chỉ số (theo thứ tự trong danh sách) của mọi quy tắc khớp,
+    đồng thời đếm số lần khớp của từng quy tắc trong self.hits.
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.rules = rules
+        self.exact: Dict[str, List[int]] = {}
+        self.prefix = Trie()
+        self.suffix = Trie()
+        self.contains = AhoCorasick()
+        self.hits: Counter = Counter()
+
+        for index, rule in enumerate(rules):
+            keyword = rule['keyword'].lower()
+            rule_type = rule.get('type', 'contains')
+            if rule_type == 'exact':
+                self.exact.setdefault(keyword, []).append(index)
+            elif rule_type == 'prefix':
+                self.prefix.add(keyword, index)
+            elif rule_type == 'suffix':
+                self.suffix.add(keyword[::-1], index)
+            elif rule_type == 'contains':
+                self.contains.add(keyword, index)
+            else:
+                raise ValueError(f"Loại quy tắc không hỗ trợ: {rule_type} (keyword: {keyword})")
+        self.contains.build()
+
+    def match(self, text: str) -> List[int]:
+        matched = set(self.exact.get(text, ()))
+        matched.update(self.prefix.match_prefixes(text))
+        matched.update(self.suffix.match_prefixes(reversed(text)))
+        matched.update(self.contains.search(text))
+        result = sorted(matched)
+        self.hits.update(result)
+        return result
+
+    def rule_key(self, index: int):
+        rule = self.rules[index]
+        return rule.get('type', 'contains'), rule['keyword'].lower()
+
+    def report(self, limit: int = 10) -> List[str]:
+        """
+        Các dòng thống kê: (loại, keyword) khớp nhiều nhất và số (loại, keyword) không khớp lần nào.
+        Nhiều quy tắc cùng loại và keyword (ví dụ ở các bộ quy tắc khác nhau) luôn khớp cùng lúc
+        nên được gộp thành một dòng.
+        """
+        rule_counts = Counter(self.rule_key(index) for index in range(len(self.rules)))
+        hits: Counter = Counter()
+        for index, count in self.hits.items():
+            key = self.rule_key(index)
+            hits[key] = max(hits[key], count)
+
+        lines = []
+        for (rule_type, keyword), count in hits.most_common(limit):
+            shared = f" ({rule_counts[rule_type, keyword]} quy tắc)" if rule_counts[rule_type, keyword] > 1 else ""
+            lines.append(f"{rule_type:>8} '{keyword}': {count}{shared}")
+        unused = len(rule_counts) - len(hits)
+        lines.append(f"{unused}/{len(rule_counts)} keyword không khớp icon nào")
+        return lines
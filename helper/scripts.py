@@ -1,9 +1,18 @@
+import io
 import os
 import sys
-import subprocess
+import argparse
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from fontTools.merge import Merger
 from fontTools.ttLib import TTFont
 
+from batches import scan_batches
+from build_cache import write_bytes_if_changed
+from font_subset import load_chunk_code_sets, subset_font, unicode_range
+from make_css import font_face_css
+
 def input_path(prompt):
     """
     Yêu cầu người dùng nhập đường dẫn và kiểm tra tính hợp lệ của thư mục.
@@ -14,28 +23,6 @@ def input_path(prompt):
         sys.exit(1)
     return path
 
-def find_batch_dirs(root_dir):
-    """
-    Tìm tất cả các thư mục con khớp với mẫu 'batchX-vY.Z' và sắp xếp chúng theo thứ tự số.
-    Trả về danh sách các tên thư mục đã được sắp xếp.
-    """
-    found_batches = []
-    # Mẫu regex: batch[số]-v[số].[số]
-    batch_pattern = re.compile(r'batch(\d+)-v\d+\.\d+')
-
-    for item in os.listdir(root_dir):
-        if os.path.isdir(os.path.join(root_dir, item)):
-            match = batch_pattern.match(item)
-            if match:
-                # Lấy số thứ tự (ví dụ: '1' từ 'batch1-v1.0')
-                batch_number = int(match.group(1))
-                found_batches.append((batch_number, item))
-
-    # Sắp xếp theo số thứ tự batch
-    found_batches.sort(key=lambda x: x[0])
-    
-    return [name for num, name in found_batches]
-
 def input_font_name():
     """
     Yêu cầu người dùng nhập tên font mong muốn và trả về tên đó.
@@ -51,95 +38,244 @@ def input_font_name():
         else:
             return name
 
-print("=== 🛠️ MERGE FONT ICONS (Dynamic Batch) ===")
-root_dir = input_path("📁 Nhập đường dẫn thư mục chứa các thư mục batch (ví dụ: D:\\icons\\all_batches): ")
-
-# 1. Tự động tìm kiếm các thư mục batch
-batch_dirs = find_batch_dirs(root_dir)
-
-if not batch_dirs:
-    print("❌ Không tìm thấy thư mục batch nào theo mẫu 'batchX-vY.Z' bên trong thư mục này.")
-    sys.exit(1)
-    
-print(f"✅ Đã tìm thấy {len(batch_dirs)} thư mục batch. Danh sách: {', '.join(batch_dirs)}")
-
-# *** PHẦN THÊM MỚI/CHỈNH SỬA ***
-# 2. Hỏi tên font mong muốn
-custom_font_name = input_font_name()
-print(f"→ Tên font sẽ là: **{custom_font_name}**")
-# *** KẾT THÚC PHẦN THÊM MỚI/CHỈNH SỬA ***
-
-# 3. Xây dựng danh sách đường dẫn font WOFF
-woff_paths = []
-for b in batch_dirs:
-    # Tên font (ví dụ: 'batch1' từ 'batch1-v1.0')
-    font_name = b.split('-')[0]
-    woff_path = os.path.join(root_dir, b, "fonts", f"{font_name}.woff")
-    
-    if not os.path.isfile(woff_path):
-        print(f"❌ Không tìm thấy font: {woff_path}. Vui lòng kiểm tra cấu trúc thư mục.")
-        sys.exit(1)
-        
-    woff_paths.append(woff_path)
-
-print(f"\n🔧 Đang merge {len(woff_paths)} font bằng pyftmerge...")
-
-# 4. Thực hiện merge font
-try:
-    # Lệnh pyftmerge yêu cầu danh sách các đường dẫn font
-    result = subprocess.run(["pyftmerge"] + woff_paths, cwd=root_dir, capture_output=True, text=True)
-    if result.returncode != 0:
-        print("❌ Lỗi khi chạy pyftmerge:")
-        print(result.stderr)
-        sys.exit(1)
-except FileNotFoundError:
-    print("❌ 'pyftmerge' không tìm thấy. Vui lòng cài fonttools: pip install fonttools")
-    sys.exit(1)
-
-# Tìm merged.ttf (pyftmerge tạo file này trong thư mục làm việc)
-merged_ttf = os.path.join(root_dir, "merged.ttf")
-if not os.path.exists(merged_ttf):
-    print("❌ merged.ttf không được tạo. Có thể do lỗi font hoặc quyền truy cập.")
-    sys.exit(1)
-
-# *** PHẦN CHỈNH SỬA: Đổi tên thành tên font người dùng nhập ***
-# Đổi tên → custom_font_name.ttf
-ttf_path = os.path.join(root_dir, f"{custom_font_name}.ttf")
-os.replace(merged_ttf, ttf_path)
-print(f"✅ Đã tạo: {ttf_path}")
-
-# 5. Nén → .woff & .woff2
-print("🔧 Đang tạo .woff & .woff2...")
-try:
-    font = TTFont(ttf_path)
-    
-    # Tạo WOFF
-    woff_path = os.path.join(root_dir, f"{custom_font_name}.woff")
-    font.flavor = "woff"
-    font.save(woff_path)
-    print(f"✅ {woff_path}")
-
-    # Tạo WOFF2 (Yêu cầu thư viện brotli)
-    woff2_path = os.path.join(root_dir, f"{custom_font_name}.woff2")
-    font.flavor = "woff2"
-    font.save(woff2_path)
-    print(f"✅ {woff2_path}")
+FONT_FLAVORS = ("woff", "woff2")
 
+def merge_font_data(font_paths):
+    """
+    Gộp các font batch trong process bằng fontTools.merge (thay cho lệnh pyftmerge),
+    trả về bytes TTF. Glyph của font nguồn đã có bbox nên không tính lại khi ghi: glyph
+    giữ nguyên dạng nén, không phải giải mã rồi biên dịch lại (nhanh hơn nhiều lần);
+    timestamp lấy theo font nguồn để cùng đầu vào cho cùng byte.
+    """
+    font = Merger().merge(font_paths)
+    font.recalcBBoxes = False
+    font.recalcTimestamp = False
+    # Merger ghi giờ hiện tại vào head.created/modified: lấy theo các font nguồn
+    heads = []
+    for path in font_paths:
+        with TTFont(path, lazy=True) as source:
+            heads.append((source["head"].created, source["head"].modified))
+    font["head"].created = min(created for created, _ in heads)
+    font["head"].modified = max(modified for _, modified in heads)
+    buffer = io.BytesIO()
+    font.save(buffer)
     font.close()
-except Exception as e:
-    print(f"⚠️ Lỗi tạo .woff2 (có thể thiếu brotli): {e}")
-    print("→ Đang thử tạo .woff thôi...")
+    return buffer.getvalue()
+
+def merge_fonts(font_paths, work_dir, ttf_path):
+    """
+    Gộp các font batch → ttf_path (work_dir giữ cho tương thích, không còn file tạm).
+    Trả về bytes TTF đã gộp, hoặc None nếu thất bại.
+    """
+    print(f"\n🔧 Đang merge {len(font_paths)} font bằng fontTools.merge...")
     try:
-        font = TTFont(ttf_path)
-        # Tạo WOFF (fallback)
-        woff_path = os.path.join(root_dir, f"{custom_font_name}.woff") # Cần phải khai báo lại trong khối này nếu nó là khối độc lập
-        font.flavor = "woff"
-        font.save(woff_path)
-        font.close()
-        print(f"✅ {woff_path} (chỉ có .woff)")
-    except Exception as e_fallback:
-        print(f"❌ Không thể tạo font. Dừng. Lỗi: {e_fallback}")
+        data = merge_font_data(font_paths)
+    except Exception as e:
+        print(f"❌ Lỗi khi merge font: {e}")
+        return None
+    write_bytes_if_changed(ttf_path, data)
+    print(f"✅ Đã tạo: {ttf_path}")
+    return data
+
+def encode_font(ttf_data, flavor):
+    """TTF (bytes) → WOFF/WOFF2 (bytes); chạy trong process con. Cùng TTF → cùng byte."""
+    font = TTFont(io.BytesIO(ttf_data))
+    font.recalcTimestamp = False
+    font.flavor = flavor
+    buffer = io.BytesIO()
+    font.save(buffer)
+    font.close()
+    return buffer.getvalue()
+
+def collect_encoded(futures):
+    """
+    Ghi kết quả encode_font: futures là {(output_base, flavor): future}.
+    Trả về {output_base: [file đã tạo]}; WOFF2 lỗi (thường do thiếu brotli) chỉ cảnh báo.
+    """
+    created = {}
+    for (output_base, flavor), future in futures.items():
+        path = f"{output_base}.{flavor}"
+        try:
+            data = future.result()
+        except Exception as e:
+            if flavor == "woff2":
+                print(f"⚠️ Lỗi tạo {path} (có thể thiếu brotli): {e}")
+            else:
+                print(f"❌ Lỗi tạo {path}: {e}")
+            continue
+        write_bytes_if_changed(path, data)
+        created.setdefault(output_base, []).append(path)
+        print(f"✅ {path} ({len(data):,} byte)")
+    return created
+
+def compress_font(ttf_path, output_base, ttf_data=None, workers=None):
+    """
+    Nén TTF → output_base.woff & output_base.woff2 (woff2 cần thư viện brotli), hai định dạng
+    mã hoá song song trong process pool từ cùng một bytes TTF (ttf_data nếu có, không đọc lại file).
+    Trả về danh sách file đã tạo, hoặc None nếu không tạo được file nào.
+    """
+    print("🔧 Đang tạo .woff & .woff2...")
+    if ttf_data is None:
+        with open(ttf_path, "rb") as f:
+            ttf_data = f.read()
+    with ProcessPoolExecutor(max_workers=workers or len(FONT_FLAVORS)) as pool:
+        futures = {(output_base, flavor): pool.submit(encode_font, ttf_data, flavor) for flavor in FONT_FLAVORS}
+        created = collect_encoded(futures).get(output_base)
+    if not created:
+        print("❌ Không thể tạo font. Dừng.")
+        return None
+    if len(created) < len(FONT_FLAVORS):
+        print(f"→ Chỉ có {', '.join(os.path.basename(p) for p in created)}")
+    return created
+
+def build_fonts(jobs, workers=None):
+    """
+    Build font cho nhiều collection trong một lần chạy: jobs là danh sách
+    (danh sách font batch, ttf_path, output_base). Các bước merge chạy song song, rồi mọi
+    cặp (collection, WOFF/WOFF2) được mã hoá cùng lúc trong cùng một process pool.
+    Trả về {output_base: [file đã tạo]} (collection lỗi không có trong kết quả).
+    """
+    created = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        merges = [pool.submit(merge_font_data, font_paths) for font_paths, _, _ in jobs]
+        futures = {}
+        for (font_paths, ttf_path, output_base), merge in zip(jobs, merges):
+            try:
+                ttf_data = merge.result()
+            except Exception as e:
+                print(f"❌ Lỗi khi merge {ttf_path}: {e}")
+                continue
+            write_bytes_if_changed(ttf_path, ttf_data)
+            print(f"✅ Đã tạo: {ttf_path} ({len(font_paths)} font, {len(ttf_data):,} byte)")
+            futures.update(((output_base, flavor), pool.submit(encode_font, ttf_data, flavor))
+                           for flavor in FONT_FLAVORS)
+        created = collect_encoded(futures)
+    return created
+
+def font_codes(ttf_data):
+    """Các mã unicode có trong cmap của font (bytes)"""
+    with TTFont(io.BytesIO(ttf_data), lazy=True) as font:
+        return list(font.getBestCmap() or {})
+
+def drop_glyphs(ttf_data, keep_codes):
+    """
+    TTF (bytes) chỉ giữ glyph của keep_codes (bỏ glyph của icon đã gộp thành alias,
+    xem dedup_icons.py); giữ nguyên bảng layout (ligature). Timestamp giữ theo font gộp
+    (subset_font) nên cùng đầu vào cho cùng byte, write_bytes_if_changed bỏ qua được lần ghi.
+    """
+    return subset_font(io.BytesIO(ttf_data), keep_codes, flavor=None, layout_features=["*"])
+
+def shard_font(ttf_path, code_sets, output_dir, base_name, workers=None):
+    """
+    Chia font gộp thành các shard WOFF2, shard thứ i chứa đúng các glyph của chunk i
+    (xem split_selections) → output_dir/base_name-i.woff2.
+    Trả về danh sách (tên file, unicode-range); chunk không có mã nào được bỏ qua.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(i, codes) for i, codes in enumerate(code_sets) if codes]
+    print(f"🔪 Đang chia font thành {len(jobs)} shard WOFF2...")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        fonts = pool.map(subset_font, [ttf_path] * len(jobs), [codes for _, codes in jobs])
+        shards = []
+        total = 0
+        for (i, codes), data in zip(jobs, fonts):
+            file_name = f"{base_name}-{i}.woff2"
+            write_bytes_if_changed(os.path.join(output_dir, file_name), data)
+            shards.append((file_name, unicode_range(codes)))
+            total += len(data)
+
+    # Xoá shard cũ thừa ra khi số chunk giảm
+    shard_pattern = re.compile(rf'^{re.escape(base_name)}-(\d+)\.woff2$')
+    kept = {name for name, _ in shards}
+    for name in os.listdir(output_dir):
+        if shard_pattern.match(name) and name not in kept:
+            os.remove(os.path.join(output_dir, name))
+
+    print(f"✅ {len(shards)} shard, tổng {total:,} byte (trung bình {total // max(len(shards), 1):,} byte/shard)")
+    return shards
+
+def batch_font_paths(root_dir):
+    """Đường dẫn font WOFF của các batch trong root_dir (thoát nếu thiếu)"""
+    # 1. Tự động tìm kiếm các thư mục batch
+    batches = scan_batches(root_dir)
+
+    if not batches:
+        print(f"❌ Không tìm thấy thư mục batch nào theo mẫu 'batchX...' bên trong {root_dir}.")
         sys.exit(1)
 
-print("\n🎉 Hoàn tất! Font đã sẵn sàng.")
-print("→ Tiếp theo: chạy `generate-css.py`")
\ No newline at end of file
+    print(f"✅ {root_dir}: tìm thấy {len(batches)} thư mục batch. Danh sách: {', '.join(b['name'] for b in batches)}")
+
+    woff_paths = []
+    for b in batches:
+        # Font IcoMoon của batch (ví dụ: batch1-v1.0/fonts/batch1.woff)
+        if not b["font_path"]:
+            print(f"❌ Không tìm thấy font: {os.path.join(b['path'], 'fonts')}. Vui lòng kiểm tra cấu trúc thư mục.")
+            sys.exit(1)
+
+        woff_paths.append(b["font_path"])
+    return woff_paths
+
+def main():
+    parser = argparse.ArgumentParser(description='Gộp font icon từ nhiều batch và nén sang WOFF/WOFF2')
+    parser.add_argument('--root', action='append',
+                        help='Thư mục chứa các thư mục batch (lặp lại để build nhiều collection trong một lần chạy)')
+    parser.add_argument('--name', action='append', help='Tên font mới (ví dụ: my-icon-font), mỗi --root một --name')
+    parser.add_argument('--shards', metavar='CHUNKS_DIR',
+                        help='Chia font thành shard WOFF2 theo các chunk trong thư mục này (có metadata.json)')
+    parser.add_argument('--family',
+                        help='font-family trong @font-face của shard, phải trùng với CSS của collection '
+                             '(mặc định: tên font bỏ hậu tố -all, giống make_css.py)')
+    parser.add_argument('--workers', type=int, help='Số process merge/nén song song (mặc định: số CPU)')
+    args = parser.parse_args()
+
+    print("=== 🛠️ MERGE FONT ICONS (Dynamic Batch) ===")
+    roots = args.root or [input_path("📁 Nhập đường dẫn thư mục chứa các thư mục batch (ví dụ: D:\\icons\\all_batches): ")]
+    for root_dir in roots:
+        if not os.path.isdir(root_dir):
+            print(f"❌ Đường dẫn không hợp lệ: {root_dir}")
+            sys.exit(1)
+    if args.name and len(args.name) != len(roots):
+        print("❌ Số --name phải bằng số --root.")
+        sys.exit(1)
+    if args.shards and len(roots) > 1:
+        print("❌ --shards chỉ dùng được với một --root.")
+        sys.exit(1)
+
+    # 2. Tên font mong muốn cho từng collection
+    names = args.name or [input_font_name()]
+    jobs = []
+    for root_dir, custom_font_name in zip(roots, names):
+        print(f"→ Tên font sẽ là: **{custom_font_name}**")
+        # 3. Font WOFF của các batch → 4. merge → custom_font_name.ttf → 5. nén .woff & .woff2
+        jobs.append((batch_font_paths(root_dir), os.path.join(root_dir, f"{custom_font_name}.ttf"),
+                     os.path.join(root_dir, custom_font_name)))
+
+    started = time.perf_counter()
+    created = build_fonts(jobs, args.workers)
+    print(f"⏱️ Merge + nén {len(jobs)} collection: {time.perf_counter() - started:.2f}s")
+    if len(created) < len(jobs):
+        sys.exit(1)
+    root_dir, custom_font_name = roots[0], names[0]
+    ttf_path = jobs[0][1]
+
+    # 6. (Tuỳ chọn) Chia shard theo chunk → @font-face với unicode-range
+    if args.shards:
+        if not os.path.isfile(os.path.join(args.shards, "metadata.json")):
+            print(f"❌ Không tìm thấy metadata.json trong {args.shards}")
+            sys.exit(1)
+        shard_dir = os.path.join(root_dir, "shards")
+        shards = shard_font(ttf_path, load_chunk_code_sets(args.shards), shard_dir, custom_font_name)
+        # make_css.py đặt tên file font là <family>-all
+        family = args.family or re.sub(r'-all$', '', custom_font_name)
+        css_path = os.path.join(root_dir, f"{custom_font_name}-shards.css")
+        with open(css_path, "w", encoding="utf-8") as f:
+            f.write("".join(font_face_css(family, [(f"shards/{name}", "woff2")], urange)
+                            for name, urange in shards))
+        print(f"✅ {css_path} (thay khối @font-face trong CSS bằng nội dung file này)")
+
+    print("\n🎉 Hoàn tất! Font đã sẵn sàng.")
+    print("→ Tiếp theo: chạy `generate-css.py`")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,549 @@
+import argparse
+import os
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from fontTools.svgLib.path import parse_path
+
+import json_codec
+import svg_path
+from batches import get_icon_name
+
+# Đơn giản hoá outline icon (icon.paths) trước khi tạo font / sprite / chunk:
+# mọi path của selection được đọc một lượt thành mảng đoạn (đường thẳng hoặc cubic, toạ độ tuyệt đối),
+# rồi từng bước xử lý trên cả mảng bằng NumPy:
+#   1. bỏ đoạn suy biến (dài 0)
+#   2. cubic có điểm điều khiển nằm sát dây cung (≤ tolerance) → đoạn thẳng
+#   3. bỏ điểm thẳng hàng (sai số ~0) rồi Douglas-Peucker trên các dãy đoạn thẳng liên tiếp
+#   4. ghép hai cubic nối trơn liên tiếp thành một cubic (bình phương tối thiểu, giữ hai đầu mút và
+#      hướng tiếp tuyến), chấp nhận khi độ lệch hai chiều giữa hai đường ≤ tolerance
+# Sai số cộng dồn qua các bước được theo dõi theo từng đoạn, mọi icon đều lệch ≤ tolerance
+# (đơn vị lưới = đơn vị font vì unitsPerEm = chiều cao lưới, xem font_compiler.py).
+# Path không bị thay đổi được giữ nguyên chuỗi gốc.
+#
+# Ví dụ:
+#   python helper/simplify_outlines.py data/lawnicons/selection-all.json                  # chỉ báo cáo
+#   python helper/simplify_outlines.py data/lawnicons/selection-all.json --tolerance 1 --font
+#   python helper/simplify_outlines.py selection.json --output simplified.json
+
+DEFAULT_TOLERANCE = 0.5
+DEFAULT_PRECISION = 2
+COLLINEAR_EPS = 1e-3  # bỏ điểm thẳng hàng: lệch khỏi đường thẳng không quá sai số làm tròn
+SMOOTH_SIN = 0.02     # hai cubic nối trơn khi sin góc giữa hai tiếp tuyến tại điểm nối nhỏ hơn
+FIT_SAMPLES = 8       # số điểm lấy mẫu trên mỗi cubic khi ghép
+CHECK_SAMPLES = 16    # số điểm kiểm tra trên mỗi cubic khi đo độ lệch
+NEWTON_STEPS = 4      # số bước Newton khi chiếu điểm lên cubic
+MERGE_PASSES = 4
+CHUNK = 4096          # số cặp cubic đo độ lệch cùng lúc (giới hạn bộ nhớ mảng tạm)
+
+LINE, CURVE = 0, 1
+
+
+class SegmentPen:
+    """Pen nhận lệnh vẽ từ fontTools.svgLib: gom các contour thành (đóng?, [(loại, c1, c2, p3)])"""
+
+    def __init__(self):
+        self.contours = []
+        self.current = (0.0, 0.0)
+
+    def moveTo(self, pt):
+        self.contours.append([False, pt, []])
+        self.current = pt
+
+    def lineTo(self, pt):
+        self.contours[-1][2].append((LINE, self.current, pt, pt))
+        self.current = pt
+
+    def curveTo(self, *points):
+        c1, c2, pt = points
+        self.contours[-1][2].append((CURVE, c1, c2, pt))
+        self.current = pt
+
+    def qCurveTo(self, *points):
+        # SVG chỉ có một điểm điều khiển mỗi đoạn Q/T → nâng bậc thành cubic (chính xác)
+        (qx, qy), (x, y) = points
+        x0, y0 = self.current
+        c1 = (x0 + 2 / 3 * (qx - x0), y0 + 2 / 3 * (qy - y0))
+        c2 = (x + 2 / 3 * (qx - x), y + 2 / 3 * (qy - y))
+        self.curveTo(c1, c2, (x, y))
+
+    def closePath(self):
+        self.contours[-1][0] = True
+
+    def endPath(self):
+        pass
+
+
+def load_outlines(icons: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Đọc mọi path thành mảng đoạn (p0, c1, c2, p3, kind, contour) + bảng contour/path/icon"""
+    rows, contour_path, contour_closed, contour_start, path_icon, originals = [], [], [], [], [], []
+    for i, icon in enumerate(icons):
+        for d in (icon.get("icon") or {}).get("paths") or []:
+            pen = SegmentPen()
+            try:
+                parse_path(d, pen)
+            except Exception:
+                pen.contours = []  # path lỗi: giữ nguyên chuỗi gốc
+            path = len(path_icon)
+            path_icon.append(i)
+            originals.append(d)
+            for closed, start, segments in pen.contours:
+                contour = len(contour_path)
+                contour_path.append(path)
+                contour_closed.append(closed)
+                contour_start.append(start)
+                previous = start
+                for kind, c1, c2, p3 in segments:
+                    rows.append((*previous, *c1, *c2, *p3, kind, contour))
+                    previous = p3
+
+    table = np.array(rows, dtype=np.float64).reshape(-1, 10)
+    return {
+        "p0": table[:, 0:2].copy(), "c1": table[:, 2:4].copy(), "c2": table[:, 4:6].copy(),
+        "p3": table[:, 6:8].copy(),
+        "kind": table[:, 8].astype(np.int8), "contour": table[:, 9].astype(np.int64),
+        "error": np.zeros(len(table)),
+        "contour_path": np.array(contour_path, dtype=np.int64),
+        "contour_closed": np.array(contour_closed, dtype=bool),
+        "contour_start": np.array(contour_start, dtype=np.float64).reshape(-1, 2),
+        "path_icon": np.array(path_icon, dtype=np.int64),
+        "originals": originals,
+        "changed_paths": np.zeros(len(path_icon), dtype=bool),
+        "icon_count": len(icons),
+    }
+
+
+def segment_distance(p, a, b):
+    """Khoảng cách từ điểm p tới đoạn thẳng ab (broadcast theo trục cuối = (x, y))"""
+    ab = b - a
+    ap = p - a
+    length = (ab * ab).sum(-1)
+    t = np.clip((ap * ab).sum(-1) / np.where(length > 0, length, 1), 0, 1)
+    return np.hypot(*np.moveaxis(ap - t[..., None] * ab, -1, 0))
+
+
+def cubic_points(p0, c1, c2, p3, t):
+    """Điểm trên cubic tại các tham số t: (n, k, 2) với p* dạng (n, 2), t dạng (k,) hoặc (n, k)"""
+    t = np.broadcast_to(t, (len(p0),) + np.shape(t)[-1:])[..., None]
+    u = 1 - t
+    return (u ** 3 * p0[:, None] + 3 * u * u * t * c1[:, None]
+            + 3 * u * t * t * c2[:, None] + t ** 3 * p3[:, None])
+
+
+def project_distance(points, p0, c1, c2, p3, t):
+    """
+    Khoảng cách từ points tới cubic (p0, c1, c2, p3), tìm điểm gần nhất bằng Newton từ tham số t.
+    Mọi mảng broadcast theo (n, k, ...); kết quả không nhỏ hơn khoảng cách thật (ước lượng an toàn).
+    """
+    t = np.array(t, dtype=np.float64)
+    for _ in range(NEWTON_STEPS):
+        u = (1 - t)[..., None]
+        tt = t[..., None]
+        point = u ** 3 * p0 + 3 * u * u * tt * c1 + 3 * u * tt * tt * c2 + tt ** 3 * p3
+        d1 = 3 * (u * u * (c1 - p0) + 2 * u * tt * (c2 - c1) + tt * tt * (p3 - c2))
+        d2 = 6 * (u * (c2 - 2 * c1 + p0) + tt * (p3 - 2 * c2 + c1))
+        delta = point - points
+        numerator = (delta * d1).sum(-1)
+        denominator = (d1 * d1).sum(-1) + (delta * d2).sum(-1)
+        t = np.clip(t - numerator / np.where(np.abs(denominator) > 1e-12, denominator, np.inf), 0, 1)
+    u = (1 - t)[..., None]
+    tt = t[..., None]
+    point = u ** 3 * p0 + 3 * u * u * tt * c1 + 3 * u * tt * tt * c2 + tt ** 3 * p3
+    return np.hypot(*np.moveaxis(point - points, -1, 0))
+
+
+def drop_segments(outlines: Dict[str, Any], drop: np.ndarray) -> int:
+    """Bỏ các đoạn trong mask, nối lại p0 của đoạn kế tiếp trong cùng contour"""
+    count = int(drop.sum())
+    if not count:
+        return 0
+    outlines["changed_paths"][outlines["contour_path"][outlines["contour"][drop]]] = True
+    keep = ~drop
+    for key in ("p0", "c1", "c2", "p3", "kind", "contour", "error"):
+        outlines[key] = outlines[key][keep]
+    contour = outlines["contour"]
+    first = np.ones(len(contour), dtype=bool)
+    first[1:] = contour[1:] != contour[:-1]
+    p0 = outlines["p0"]
+    p0[1:][~first[1:]] = outlines["p3"][:-1][~first[1:]]
+    p0[first] = outlines["contour_start"][contour[first]]
+    return count
+
+
+def mark_changed(outlines: Dict[str, Any], mask: np.ndarray):
+    outlines["changed_paths"][outlines["contour_path"][outlines["contour"][mask]]] = True
+
+
+def drop_degenerate(outlines: Dict[str, Any]) -> int:
+    """Đoạn dài 0 (kể cả cubic có điểm điều khiển trùng đầu mút) không vẽ gì"""
+    o = outlines
+    same = lambda a, b: (np.abs(a - b) < 1e-9).all(axis=1)
+    degenerate = same(o["p0"], o["p3"]) & ((o["kind"] == LINE) | (same(o["c1"], o["p0"]) & same(o["c2"], o["p3"])))
+    return drop_segments(o, degenerate)
+
+
+def flatten_curves(outlines: Dict[str, Any], tolerance: float) -> int:
+    """Cubic nằm gần như trên dây cung → đoạn thẳng (độ lệch ≤ khoảng cách điểm điều khiển tới dây cung)"""
+    o = outlines
+    deviation = np.maximum(segment_distance(o["c1"], o["p0"], o["p3"]), segment_distance(o["c2"], o["p0"], o["p3"]))
+    flat = (o["kind"] == CURVE) & (deviation + o["error"] <= tolerance)
+    o["kind"][flat] = LINE
+    o["error"][flat] += deviation[flat]
+    o["c1"][flat] = o["p0"][flat]
+    o["c2"][flat] = o["p3"][flat]
+    mark_changed(o, flat)
+    return int(flat.sum())
+
+
+def simplify_lines(outlines: Dict[str, Any], tolerance: float) -> int:
+    """
+    Douglas-Peucker trên mọi dãy đoạn thẳng liên tiếp cùng lúc: mỗi vòng lặp xử lý tất cả các khoảng
+    đang mở của mọi dãy (tìm điểm xa nhất bằng NumPy), khoảng nào lệch ≤ tolerance thì bỏ điểm giữa.
+    Trả về số điểm bị bỏ.
+    """
+    o = outlines
+    line = o["kind"] == LINE
+    n = len(line)
+    if not n:
+        return 0
+    # Dãy: các đoạn thẳng liên tiếp trong cùng contour
+    starts = line & np.r_[True, (o["contour"][1:] != o["contour"][:-1]) | ~line[:-1]]
+    run_first = np.flatnonzero(starts)
+    run_id = np.cumsum(starts) - 1
+    run_length = np.bincount(run_id[line], minlength=len(run_first))
+    multi = run_length >= 2
+    run_first, run_length = run_first[multi], run_length[multi]
+    if not len(run_first):
+        return 0
+
+    # Đỉnh của mỗi dãy: p0 đoạn đầu rồi p3 từng đoạn; đỉnh j ≥ 1 là điểm cuối đoạn first + j - 1
+    vertex_offsets = np.r_[0, np.cumsum(run_length + 1)]
+    total = vertex_offsets[-1]
+    local = np.arange(total) - np.repeat(vertex_offsets[:-1], run_length + 1)
+    vertex_segment = np.repeat(run_first, run_length + 1) + local - 1
+    vertices = o["p3"][np.maximum(vertex_segment, 0)]
+    vertices[vertex_offsets[:-1]] = o["p0"][run_first]
+    vertex_error = np.where(local > 0, o["error"][np.maximum(vertex_segment, 0)], 0.0)
+
+    removed = np.zeros(total, dtype=bool)
+    new_error = vertex_error.copy()
+    a, b = vertex_offsets[:-1].copy(), vertex_offsets[1:] - 1
+    while len(a):
+        inner = b - a - 1
+        group = np.repeat(np.arange(len(a)), inner)
+        index = a[group] + 1 + np.arange(inner.sum()) - np.repeat(np.cumsum(inner) - inner, inner)
+        distance = segment_distance(vertices[index], vertices[a[group]], vertices[b[group]])
+        order = np.lexsort((-distance, group))
+        heads = np.cumsum(inner) - inner
+        far, far_distance = index[order][heads], distance[order][heads]
+        # Sai số đã có của các đoạn bị ghép cộng thêm vào
+        inherited = vertex_error[b].copy()
+        np.maximum.at(inherited, group, vertex_error[index])
+        bound = far_distance + inherited
+
+        merge = bound <= tolerance
+        removed[index[merge[group]]] = True
+        new_error[b[merge]] = bound[merge]
+        split = ~merge
+        a, b = np.r_[a[split], far[split]], np.r_[far[split], b[split]]
+        keep = b - a >= 2
+        a, b = a[keep], b[keep]
+
+    # Đỉnh j bị bỏ ⇔ đoạn kết thúc tại j được ghép vào đoạn sau
+    kept = ~removed & (local > 0)
+    o["error"][vertex_segment[kept]] = new_error[kept]
+    drop = np.zeros(n, dtype=bool)
+    drop[vertex_segment[removed]] = True
+    mark_changed(o, drop)
+    return drop_segments(o, drop)
+
+
+def fit_pairs(p0, t0, p3, t1, samples, params):
+    """Bình phương tối thiểu cho độ dài tay nắm (alpha, beta) của cubic p0 → p3 với hướng tiếp tuyến cho trước"""
+    u = 1 - params
+    b1, b2 = 3 * u * u * params, 3 * u * params * params
+    base = (u ** 3 + b1)[..., None] * p0[:, None] + (b2 + params ** 3)[..., None] * p3[:, None]
+    residual = samples - base
+    a11 = (b1 * b1).sum(1)
+    a22 = (b2 * b2).sum(1)
+    a12 = (b1 * b2).sum(1) * (t0 * t1).sum(1)
+    r1 = (b1 * (residual * t0[:, None]).sum(2)).sum(1)
+    r2 = (b2 * (residual * t1[:, None]).sum(2)).sum(1)
+    det = a11 * a22 - a12 * a12
+    safe = np.where(np.abs(det) > 1e-12, det, 1)
+    alpha = (r1 * a22 - r2 * a12) / safe
+    beta = (a11 * r2 - a12 * r1) / safe
+    return alpha, beta, np.abs(det) > 1e-12
+
+
+def tangent(a, b, c):
+    """Hướng b - a, nếu trùng điểm thì c - a (đơn vị)"""
+    d = b - a
+    short = np.hypot(*d.T) < 1e-9
+    d[short] = (c - a)[short]
+    length = np.hypot(*d.T)
+    return d / np.where(length > 0, length, 1)[:, None], length > 0
+
+
+def fit_candidates(o: Dict[str, Any], i: np.ndarray, j: np.ndarray, room: np.ndarray):
+    """
+    Thử ghép cubic i với cubic j = i + 1: trả về (mask nhận, c1, c2, sai số) theo từng cặp.
+    Độ lệch hai chiều giữa đường gốc (hai cubic) và cubic ghép được đo bằng cách chiếu điểm của
+    đường này lên đường kia; chiều thứ hai chỉ tính cho các cặp đã qua chiều thứ nhất.
+    """
+    sample_t = np.linspace(0, 1, FIT_SAMPLES + 1)[1:]
+    check_t = np.linspace(0, 1, CHECK_SAMPLES + 1)
+    wide_t = np.linspace(0, 1, 2 * CHECK_SAMPLES + 1)
+    expand = lambda p: p[:, None]
+    start, end = o["p0"][i], o["p3"][j]
+    t0, _ = tangent(start, o["c1"][i], o["c2"][i])
+    t1, _ = tangent(end, o["c2"][j], o["c1"][j])
+    samples = np.concatenate([cubic_points(start, o["c1"][i], o["c2"][i], o["p3"][i], sample_t),
+                              cubic_points(o["p0"][j], o["c1"][j], o["c2"][j], end, sample_t[:-1])], axis=1)
+    # Tham số theo độ dài dây cung của các điểm mẫu
+    chain = np.concatenate([start[:, None], samples, end[:, None]], axis=1)
+    length = np.cumsum(np.hypot(*np.moveaxis(np.diff(chain, axis=1), -1, 0)), axis=1)
+    params = length[:, :-1] / np.where(length[:, -1:] > 0, length[:, -1:], 1)
+    alpha, beta, solvable = fit_pairs(start, t0, end, t1, samples, params)
+    c1 = start + alpha[:, None] * t0
+    c2 = end + beta[:, None] * t1
+    error = np.full(len(i), np.inf)
+    good = solvable & (alpha > 0) & (beta > 0)
+
+    # Đường gốc → cubic ghép
+    k = np.flatnonzero(good)
+    join = params[k, FIT_SAMPLES - 1:FIT_SAMPLES]
+    original = np.concatenate([cubic_points(start[k], o["c1"][i[k]], o["c2"][i[k]], o["p3"][i[k]], check_t),
+                               cubic_points(o["p0"][j[k]], o["c1"][j[k]], o["c2"][j[k]], end[k], check_t)], axis=1)
+    guess = np.concatenate([check_t * join, join + check_t * (1 - join)], axis=1)
+    error[k] = project_distance(original, expand(start[k]), expand(c1[k]), expand(c2[k]), expand(end[k]),
+                                guess).max(axis=1)
+
+    # Cubic ghép → đường gốc (điểm trước điểm nối chiếu lên cubic đầu, sau đó lên cubic sau)
+    k = np.flatnonzero(error <= room)
+    join = params[k, FIT_SAMPLES - 1:FIT_SAMPLES]
+    fitted = cubic_points(start[k], c1[k], c2[k], end[k], wide_t)
+    on_first = wide_t <= join
+    local = np.where(on_first, wide_t / np.maximum(join, 1e-9), (wide_t - join) / np.maximum(1 - join, 1e-9))
+    pick = lambda a, b: np.where(on_first[..., None], expand(a[k]), expand(b[k]))
+    back = project_distance(fitted, pick(start, o["p0"][j]), pick(o["c1"][i], o["c1"][j]),
+                            pick(o["c2"][i], o["c2"][j]), pick(o["p3"][i], end), local)
+    error[k] = np.maximum(error[k], back.max(axis=1))
+    return error <= room, c1, c2, error
+
+
+def merge_curves(outlines: Dict[str, Any], tolerance: float) -> int:
+    """
+    Ghép cặp cubic nối trơn liên tiếp thành một cubic; lặp vài lượt, lượt sau chỉ thử các cặp có
+    đoạn vừa được ghép ở lượt trước. Trả về số đoạn bớt đi.
+    """
+    o = outlines
+    merged_total = 0
+    fresh = None
+    for _ in range(MERGE_PASSES):
+        kind, contour = o["kind"], o["contour"]
+        candidate = (kind[:-1] == CURVE) & (kind[1:] == CURVE) & (contour[:-1] == contour[1:])
+        if fresh is not None:
+            candidate &= fresh[:-1] | fresh[1:]
+        first = np.flatnonzero(candidate)
+        second = first + 1
+        t_out, ok_out = tangent(o["p3"][first], o["c2"][first], o["c1"][first])
+        t_in, ok_in = tangent(o["p0"][second], o["c1"][second], o["c2"][second])
+        t_out = -t_out  # hướng đi ra của cubic đầu tại điểm nối
+        sine = t_out[:, 0] * t_in[:, 1] - t_out[:, 1] * t_in[:, 0]
+        smooth = ok_out & ok_in & (np.abs(sine) < SMOOTH_SIN) & ((t_out * t_in).sum(1) > 0)
+        budget = tolerance - np.maximum(o["error"][first], o["error"][second])
+        keep = smooth & (budget > 0)
+        first, second, budget = first[keep], second[keep], budget[keep]
+        if not len(first):
+            break
+
+        accepted, controls, errors = [], [], []
+        for lo in range(0, len(first), CHUNK):
+            good, c1, c2, error = fit_candidates(o, first[lo:lo + CHUNK], second[lo:lo + CHUNK],
+                                                 budget[lo:lo + CHUNK])
+            accepted.append(np.flatnonzero(good) + lo)
+            controls.append(np.stack([c1, c2], axis=1))
+            errors.append(error)
+        accepted = np.concatenate(accepted)
+        controls = np.concatenate(controls)
+        errors = np.concatenate(errors)
+
+        # Các cặp được nhận không được dùng chung đoạn: (i, i+1) và (i+1, i+2) chỉ lấy cặp đầu
+        chosen, last = [], -2
+        for k in accepted.tolist():
+            if first[k] > last + 1:
+                chosen.append(k)
+                last = first[k]
+        if not chosen:
+            break
+        chosen = np.array(chosen)
+        i, j = first[chosen], second[chosen]
+        o["c1"][i] = controls[chosen, 0]
+        o["c2"][i] = controls[chosen, 1]
+        o["p3"][i] = o["p3"][j]
+        o["error"][i] = np.maximum(o["error"][i], o["error"][j]) + errors[chosen]
+        drop = np.zeros(len(o["kind"]), dtype=bool)
+        drop[j] = True
+        merged_total += drop_segments(o, drop)
+        # Vị trí mới của các đoạn vừa ghép (mỗi j bị bỏ trước i làm lùi một chỗ)
+        fresh = np.zeros(len(o["kind"]), dtype=bool)
+        fresh[i - np.searchsorted(j, i)] = True
+    return merged_total
+
+
+def serialize_outlines(outlines: Dict[str, Any], precision: int) -> List[str]:
+    """Chuỗi d mới cho từng path (path không đổi giữ nguyên chuỗi gốc)"""
+    o = outlines
+    result = list(o["originals"])
+    changed = np.flatnonzero(o["changed_paths"])
+    if not len(changed):
+        return result
+    contour_segments = np.searchsorted(o["contour"], np.arange(len(o["contour_path"]) + 1))
+    p3, c1, c2, kind = o["p3"].tolist(), o["c1"].tolist(), o["c2"].tolist(), o["kind"].tolist()
+    contours_by_path = {}
+    for contour, path in enumerate(o["contour_path"].tolist()):
+        contours_by_path.setdefault(path, []).append(contour)
+    for path in changed.tolist():
+        segments = []
+        for contour in contours_by_path.get(path, []):
+            lo, hi = contour_segments[contour], contour_segments[contour + 1]
+            if lo == hi:
+                continue
+            start = o["contour_start"][contour].tolist()
+            closed = bool(o["contour_closed"][contour])
+            segments.append(("M", start))
+            for s in range(lo, hi):
+                # Đoạn thẳng cuối quay về điểm đầu đã được Z vẽ
+                if closed and s == hi - 1 and kind[s] == LINE and p3[s] == start:
+                    continue
+                segments.append(("L", p3[s]) if kind[s] == LINE else ("C", c1[s] + c2[s] + p3[s]))
+            if closed:
+                segments.append(("Z", []))
+        if segments:
+            result[path] = svg_path.serialize_path(segments, precision)
+    return result
+
+
+def simplify_icons(icons: List[Dict[str, Any]], tolerance: float = DEFAULT_TOLERANCE,
+                   precision: int = DEFAULT_PRECISION) -> Dict[str, Any]:
+    """
+    Đơn giản hoá icon.paths của danh sách icon (sửa tại chỗ).
+    Trả về báo cáo: số đoạn trước/sau, số thao tác từng bước, byte path trước/sau,
+    sai số lớn nhất theo icon ('errors': [(tên, sai số)] giảm dần) và thời gian.
+    """
+    started = time.perf_counter()
+    outlines = load_outlines(icons)
+    segments_before = len(outlines["kind"])
+    curves_before = int((outlines["kind"] == CURVE).sum())
+    steps = {
+        "degenerate": drop_degenerate(outlines),
+        "flattened": flatten_curves(outlines, tolerance),
+        "collinear": simplify_lines(outlines, COLLINEAR_EPS),
+        "douglas_peucker": simplify_lines(outlines, tolerance),
+        "merged_curves": merge_curves(outlines, tolerance),
+    }
+    paths = serialize_outlines(outlines, precision)
+
+    icon_error = np.zeros(outlines["icon_count"])
+    segment_icon = outlines["path_icon"][outlines["contour_path"][outlines["contour"]]]
+    np.maximum.at(icon_error, segment_icon, outlines["error"])
+    bytes_before = bytes_after = 0
+    path_index = 0
+    for icon in icons:
+        data = icon.get("icon") or {}
+        count = len(data.get("paths") or [])
+        if not count:
+            continue
+        new_paths = paths[path_index:path_index + count]
+        bytes_before += sum(len(d) for d in data["paths"])
+        bytes_after += sum(len(d) for d in new_paths)
+        data["paths"] = new_paths
+        path_index += count
+
+    errors = sorted(((get_icon_name(icon) or str(i), float(icon_error[i])) for i, icon in enumerate(icons)),
+                    key=lambda item: -item[1])
+    return {
+        "icons": len(icons),
+        "tolerance": tolerance,
+        "segments_before": segments_before,
+        "segments_after": len(outlines["kind"]),
+        "curves_before": curves_before,
+        "curves_after": int((outlines["kind"] == CURVE).sum()),
+        "steps": steps,
+        "changed_paths": int(outlines["changed_paths"].sum()),
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "errors": errors,
+        "max_error": errors[0][1] if errors else 0.0,
+        "mean_error": float(icon_error.mean()) if len(icon_error) else 0.0,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def format_report(report: Dict[str, Any], examples: int = 5) -> List[str]:
+    steps = report["steps"]
+    saved = report["bytes_before"] - report["bytes_after"]
+    lines = [f"✂️ Đơn giản hoá outline (tolerance {report['tolerance']}): {report['segments_before']:,} → "
+             f"{report['segments_after']:,} đoạn, cubic {report['curves_before']:,} → {report['curves_after']:,}"
+             f" ({report['seconds']}s)",
+             f"   đoạn suy biến {steps['degenerate']:,} · cubic → thẳng {steps['flattened']:,}"
+             f" · điểm thẳng hàng {steps['collinear']:,} · Douglas-Peucker {steps['douglas_peucker']:,}"
+             f" · ghép cubic {steps['merged_curves']:,}",
+             f"   path: {report['bytes_before']:,} → {report['bytes_after']:,} B"
+             f" (giảm {saved:,} B, {saved / max(report['bytes_before'], 1):.1%}), {report['changed_paths']:,} path đổi",
+             f"   sai số theo icon: lớn nhất {report['max_error']:.3f}, trung bình {report['mean_error']:.3f}"]
+    for name, error in report["errors"][:examples]:
+        if error > 0:
+            lines.append(f"   • {name}: {error:.3f}")
+    return lines
+
+
+def font_sizes(icons: List[Dict[str, Any]], height: int) -> Tuple[int, int]:
+    """(byte TTF, byte WOFF2) khi biên dịch font từ các icon"""
+    import font_compiler
+    import scripts
+    ttf_data, _ = font_compiler.build_font(icons, "simplify", height)
+    return len(ttf_data), len(scripts.encode_font(ttf_data, "woff2"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Đơn giản hoá outline icon (bỏ điểm thừa, ghép cubic) trong giới hạn sai số')
+    parser.add_argument('selection', help='File selection (IcoMoon) đã gộp')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f'Sai số tối đa mỗi icon, đơn vị font/lưới (mặc định {DEFAULT_TOLERANCE})')
+    parser.add_argument('--precision', type=int, default=DEFAULT_PRECISION,
+                        help=f'Số chữ số thập phân khi ghi path mới (mặc định {DEFAULT_PRECISION})')
+    parser.add_argument('--output', help='Ghi selection đã đơn giản hoá ra file này (mặc định chỉ báo cáo)')
+    parser.add_argument('--encoding', default="pretty", choices=json_codec.ENCODINGS,
+                        help='Kiểu mã hoá file ra (mặc định pretty)')
+    parser.add_argument('--font', action='store_true', help='Biên dịch font trước/sau để so kích thước TTF/WOFF2')
+    parser.add_argument('--top', type=int, default=10, help='Số icon sai số lớn nhất hiển thị')
+    args = parser.parse_args()
+
+    print("=== ✂️ ĐƠN GIẢN HOÁ OUTLINE ===")
+    if not os.path.isfile(args.selection):
+        print(f"❌ Không tìm thấy: {args.selection}")
+        sys.exit(1)
+
+    data = json_codec.load_file(args.selection)
+    icons = data.get("icons", [])
+    height = data.get("height", 1024)
+    before = font_sizes(icons, height) if args.font else None
+    report = simplify_icons(icons, args.tolerance, args.precision)
+    print("\n".join(format_report(report, examples=args.top)))
+    if before:
+        after = font_sizes(icons, height)
+        for label, a, b in (("TTF", before[0], after[0]), ("WOFF2", before[1], after[1])):
+            print(f"   {label}: {a:,} → {b:,} B (giảm {a - b:,} B, {(a - b) / max(a, 1):.1%})")
+
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(json_codec.dumps(data, args.encoding))
+        print(f"💾 Đã lưu: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,16 @@
+import hashlib
 import json
 import os
+import re
 import sys
 from pathlib import Path
 
+import json_codec
+from build_cache import json_hash, write_bytes_if_changed, write_json_if_changed
+
+# Độ dài (ký tự hex) của hash chunk và data_version trong metadata.json
+CHUNK_HASH_LENGTH = 16
+
 
 def validate_json_file(file_path):
     """Kiểm tra file tồn tại và là JSON hợp lệ"""
@@ -63,15 +71,68 @@ def get_user_input():
         except ValueError:
             print("⚠️  Vui lòng nhập số nguyên hợp lệ!")
 
-    return input_file, output_dir, chunk_size
+    slim_input = input("Tạo thêm chunk rút gọn cho tìm kiếm (search_N.json + geometry_N.json)? (y/N): ").strip().lower()
+    slim = slim_input == 'y'
+
+    while True:
+        encoding = input(f"Kiểu mã hoá chunk ({'/'.join(json_codec.ENCODINGS)}, mặc định pretty): ").strip().lower() or "pretty"
+        if encoding in json_codec.ENCODINGS:
+            break
+        print("⚠️  Kiểu mã hoá không hợp lệ!")
+
+    return input_file, output_dir, chunk_size, slim, encoding
+
+
+def build_search_projection(icon):
+    """Rút gọn icon về đúng các trường mà scripts.js dùng để hiển thị và tìm kiếm"""
+    icon_data = icon.get('icon', {})
+    name = icon.get('properties', {}).get('name') or icon.get('name') or 'unknown'
+    projection = {
+        "n": name,
+        "t": icon_data.get('tags') or icon.get('tags') or [],
+        "d": icon.get('description', ''),
+        "c": icon.get('category', '')
+    }
+    aliases = icon.get('properties', {}).get('aliases')
+    if aliases:
+        # Tên của glyph trùng hình học đã gộp vào icon này (xem dedup_icons.py)
+        projection["al"] = aliases
+    return projection
+
+
+def build_geometry_sidecar(icon):
+    """Tách phần hình học SVG (paths, attrs, ...) của icon ra file riêng"""
+    geometry = {k: v for k, v in icon.get('icon', {}).items() if k != 'tags'}
+    geometry["n"] = icon.get('properties', {}).get('name') or icon.get('name') or 'unknown'
+    geometry["u"] = icon.get('properties', {}).get('code')
+    return geometry
 
 
-def split_into_chunks(input_file, output_dir, chunk_size=500):
-    """Chia file JSON thành các chunk nhỏ"""
+def split_into_chunks(input_file, output_dir, chunk_size=500, slim=False, encoding="pretty", geometry_scale=None):
+    """
+    Chia file JSON thành các chunk nhỏ.
+    Nếu slim=True, mỗi chunk có thêm search_N.json (chỉ tên, tags, mô tả, danh mục)
+    và geometry_N.json (SVG paths), được ghi vào metadata để trang web tải bản rút gọn.
+    encoding: kiểu mã hoá file chunk (xem json_codec.ENCODINGS), được ghi vào metadata.
+    geometry_scale: nếu có (cần slim), ghi thêm geometry_N.geo nhị phân (xem geometry_codec)
+    với toạ độ lượng tử hoá theo 1/geometry_scale đơn vị.
+    Metadata có "hash" của từng chunk và "data_version" của cả bộ chunk để trang web
+    biết chunk nào đã lưu trong IndexedDB còn dùng được (xem loadChunk trong scripts.js).
+    """
     print(f"\n🔄 Đang đọc file: {input_file}")
     with open(input_file, 'r', encoding='utf-8') as f:
         data = json.load(f)
 
+    write_chunks(data, output_dir, chunk_size, slim, encoding, geometry_scale)
+
+
+def write_chunks(data, output_dir, chunk_size=500, slim=False, encoding="pretty", geometry_scale=None,
+                 search_index=None):
+    """
+    Chia dữ liệu selection đã parse sẵn (dict có key 'icons') thành các chunk.
+    search_index: tên file chỉ mục tìm kiếm ghi vào metadata (xem build_search_index);
+    nếu không truyền thì giữ key search_index của metadata.json cũ khi file chỉ mục còn đó.
+    """
     if 'icons' not in data:
         print("❌ Lỗi: File JSON phải chứa key 'icons' là một mảng!")
         sys.exit(1)
@@ -90,16 +151,26 @@ def split_into_chunks(input_file, output_dir, chunk_size=500):
         "total_icons": total,
         "chunk_size": chunk_size,
         "prefix": data.get("prefix", "icon-"),
+        "encoding": encoding,
         "chunks": []
     }
+    ext = json_codec.file_extension(encoding)
+    # search/geometry là file trang web tải nên tối thiểu cũng minified
+    slim_encoding = "min" if encoding == "pretty" else encoding
+    slim_ext = json_codec.file_extension(slim_encoding)
+    geometry_binary = slim and bool(geometry_scale)
+    if geometry_binary:
+        import geometry_codec  # cần NumPy, chỉ nạp khi dùng
+        metadata["geometry_scale"] = geometry_scale
 
     print(f"🔪 Đang chia thành các chunk (kích thước ~{chunk_size} icons/chunk)...")
     chunks_created = 0
+    files_changed = 0
 
     for i in range(0, total, chunk_size):
         chunk_icons = icons[i:i + chunk_size]
         chunk_index = chunks_created
-        chunk_file = f"chunk_{chunk_index}.json"
+        chunk_file = f"chunk_{chunk_index}{ext}"
 
         chunk_data = {
             "icons": chunk_icons,
@@ -109,42 +180,108 @@ def split_into_chunks(input_file, output_dir, chunk_size=500):
             "count": len(chunk_icons)
         }
 
-        # Lưu chunk
+        # Lưu chunk (chỉ ghi lại khi nội dung thay đổi để giữ nguyên byte cho cache)
         chunk_path = output_path / chunk_file
-        with open(chunk_path, 'w', encoding='utf-8') as f:
-            json.dump(chunk_data, f, ensure_ascii=False, indent=2)
+        chunk_bytes = json_codec.dumps(chunk_data, encoding)
+        if write_bytes_if_changed(chunk_path, chunk_bytes):
+            files_changed += 1
+        digest = hashlib.sha256(chunk_bytes)
 
-        # Cập nhật metadata
-        metadata["chunks"].append({
+        chunk_entry = {
             "file": chunk_file,
             "start": i,
             "end": chunk_data["end"],
             "count": chunk_data["count"]
-        })
+        }
+
+        if slim:
+            # Bản rút gọn cho tìm kiếm
+            search_file = f"search_{chunk_index}{slim_ext}"
+            search_data = dict(chunk_data, icons=[build_search_projection(icon) for icon in chunk_icons])
+            search_bytes = json_codec.dumps(search_data, slim_encoding)
+            if write_bytes_if_changed(output_path / search_file, search_bytes):
+                files_changed += 1
+            digest.update(search_bytes)
+
+            geometry_file = f"geometry_{chunk_index}{slim_ext}"
+            geometry_data = dict(chunk_data, icons=[build_geometry_sidecar(icon) for icon in chunk_icons])
+            if write_bytes_if_changed(output_path / geometry_file, json_codec.dumps(geometry_data, slim_encoding)):
+                files_changed += 1
+
+            chunk_entry["search"] = search_file
+            chunk_entry["geometry"] = geometry_file
+
+            if geometry_binary:
+                binary_file = f"geometry_{chunk_index}{geometry_codec.EXTENSION}"
+                if write_bytes_if_changed(output_path / binary_file,
+                                          geometry_codec.encode_icons(chunk_icons, geometry_scale)):
+                    files_changed += 1
+                chunk_entry["geometry_bin"] = binary_file
+
+        # Hash nội dung (chunk + bản rút gọn): chunk không đổi thì bản trong IndexedDB vẫn dùng được
+        chunk_entry["hash"] = digest.hexdigest()[:CHUNK_HASH_LENGTH]
+
+        # Cập nhật metadata
+        metadata["chunks"].append(chunk_entry)
 
         chunks_created += 1
         if chunks_created % 10 == 0 or chunks_created == 1:
             print(f"   → Đã tạo: {chunk_file} ({chunk_data['count']} icons)")
 
-    # Lưu metadata
+    # Xoá chunk cũ thừa ra khi số chunk giảm (ví dụ: đổi chunk size) hoặc khi đổi kiểu mã hoá
+    stale_pattern = re.compile(r'^(chunk|search|geometry)_(\d+)(\.json|\.bin|\.geo)$')
+    for existing in output_path.iterdir():
+        match = stale_pattern.match(existing.name)
+        if not match:
+            continue
+        if match.group(3) == ".geo":
+            stale = int(match.group(2)) >= chunks_created or match.group(1) != "geometry" or not geometry_binary
+        else:
+            expected_ext = ext if match.group(1) == "chunk" else slim_ext
+            stale = (int(match.group(2)) >= chunks_created
+                     or match.group(3) != expected_ext
+                     or (match.group(1) != "chunk" and not slim))
+        if stale:
+            existing.unlink()
+            files_changed += 1
+
     metadata_path = output_path / "metadata.json"
-    with open(metadata_path, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    if search_index is None and metadata_path.exists():
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            search_index = json.load(f).get("search_index")
+        if search_index and not (output_path / search_index).exists():
+            search_index = None
+    if search_index:
+        metadata["search_index"] = search_index
+
+    # Phiên bản dữ liệu: đổi khi bất kỳ chunk, chunk size, mã hoá hay prefix thay đổi
+    metadata["data_version"] = json_hash(metadata)[:CHUNK_HASH_LENGTH]
+
+    # Lưu metadata
+    if write_json_if_changed(metadata_path, metadata, indent=2):
+        files_changed += 1
 
     print("\n" + "=" * 50)
     print(f"🎉 HOÀN TẤT!")
     print(f"   • Tổng icons: {total}")
     print(f"   • Số chunk: {chunks_created}")
     print(f"   • Chunk size: {chunk_size}")
+    print(f"   • Mã hoá: {encoding}")
+    print(f"   • File thay đổi: {files_changed}")
     print(f"   • Metadata: {metadata_path.name}")
+    if slim:
+        print(f"   • Chunk rút gọn: search_N.json + geometry_N.json")
+    if geometry_binary:
+        print(f"   • Hình học nhị phân: geometry_N{geometry_codec.EXTENSION} (scale {geometry_scale})")
     print(f"   • Output: {output_path.resolve()}")
     print("=" * 50)
+    return files_changed
 
 
 def main():
     try:
-        input_file, output_dir, chunk_size = get_user_input()
-        split_into_chunks(input_file, output_dir, chunk_size)
+        input_file, output_dir, chunk_size, slim, encoding = get_user_input()
+        split_into_chunks(input_file, output_dir, chunk_size, slim, encoding)
     except KeyboardInterrupt:
         print("\n\n⚠️  Đã hủy bởi người dùng.")
         sys.exit(0)
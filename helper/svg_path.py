@@ -0,0 +1,288 @@
+import re
+from functools import lru_cache
+from typing import List, Tuple
+
+# Đọc và rút gọn thuộc tính d của SVG path (dữ liệu icon.paths trong selection IcoMoon).
+# - parse_path : tách lệnh, mỗi nhóm tham số lặp lại thành một đoạn riêng (M lặp → L)
+# - absolutize : đổi mọi đoạn sang toạ độ tuyệt đối (chữ hoa)
+# - serialize_path: làm tròn theo precision, mỗi đoạn chọn dạng tương đối/tuyệt đối ngắn hơn,
+#   L thẳng đứng/nằm ngang → V/H, bỏ chữ lệnh lặp lại và khoảng trắng thừa
+# Toạ độ được làm tròn ở dạng tuyệt đối rồi mới tính độ lệch tương đối (số nguyên theo
+# 10^precision), nên sai số không cộng dồn dọc theo path: mọi điểm lệch tối đa nửa đơn vị làm tròn.
+#
+# Ví dụ:
+#   minify_path("M0 0 L 10.000 0 L 10 10 Z")  →  "M0 0H10V10z"
+
+Segment = Tuple[str, List[float]]
+
+# Số tham số của mỗi lệnh
+ARG_COUNTS = {"M": 2, "L": 2, "H": 1, "V": 1, "C": 6, "S": 4, "Q": 4, "T": 2, "A": 7, "Z": 0}
+NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+TOKEN = re.compile(r"[A-Za-z]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+SEPARATORS = " \t\r\n,"
+
+
+def parse_path(d: str) -> List[Segment]:
+    """Tách chuỗi d thành danh sách (lệnh, tham số); lệnh giữ nguyên hoa/thường như nguồn"""
+    # Path không có lệnh A: tách token bằng regex (nhanh); có A thì cờ có thể viết liền nhau
+    # ("011") nên phải đọc từng ký tự
+    if "a" in d or "A" in d:
+        return _parse_path_with_arcs(d)
+    segments = []
+    command = None
+    args: List[float] = []
+    for token in TOKEN.findall(d):
+        if token.isalpha():
+            if args:
+                raise ValueError(f"Path không hợp lệ: thiếu tham số cho lệnh {command!r}")
+            command = token
+            count = ARG_COUNTS.get(command.upper())
+            if count is None:
+                raise ValueError(f"Lệnh path không hỗ trợ: {token!r}")
+            if count == 0:
+                segments.append((command, []))
+            continue
+        if command is None:
+            raise ValueError("Path phải bắt đầu bằng lệnh M")
+        if count == 0:
+            raise ValueError(f"Path không hợp lệ: số sau lệnh {command!r}")
+        args.append(float(token))
+        if len(args) == count:
+            segments.append((command, args))
+            args = []
+            if command in "Mm":
+                command = "l" if command == "m" else "L"
+    if args:
+        raise ValueError(f"Path không hợp lệ: thiếu tham số cho lệnh {command!r}")
+    return segments
+
+
+def _parse_path_with_arcs(d: str) -> List[Segment]:
+    segments = []
+    pos = 0
+    length = len(d)
+    command = None
+
+    def skip():
+        nonlocal pos
+        while pos < length and d[pos] in SEPARATORS:
+            pos += 1
+
+    def number():
+        nonlocal pos
+        skip()
+        match = NUMBER.match(d, pos)
+        if not match:
+            raise ValueError(f"Path không hợp lệ: cần số tại vị trí {pos}: {d[pos:pos + 20]!r}")
+        pos = match.end()
+        return float(match.group())
+
+    def flag():
+        # Cờ của lệnh A có thể viết liền nhau ("011")
+        nonlocal pos
+        skip()
+        if pos >= length or d[pos] not in "01":
+            raise ValueError(f"Path không hợp lệ: cần cờ 0/1 tại vị trí {pos}")
+        pos += 1
+        return float(d[pos - 1])
+
+    while True:
+        skip()
+        if pos >= length:
+            break
+        char = d[pos]
+        if char.isalpha():
+            if char.upper() not in ARG_COUNTS:
+                raise ValueError(f"Lệnh path không hỗ trợ: {char!r}")
+            command = char
+            pos += 1
+        elif command is None:
+            raise ValueError("Path phải bắt đầu bằng lệnh M")
+        elif command in "Zz":
+            raise ValueError(f"Path không hợp lệ: số sau lệnh Z tại vị trí {pos}")
+
+        upper = command.upper()
+        if upper == "Z":
+            segments.append((command, []))
+            continue
+        if upper == "A":
+            args = [number(), number(), number(), flag(), flag(), number(), number()]
+        else:
+            args = [number() for _ in range(ARG_COUNTS[upper])]
+        segments.append((command, args))
+        # Cặp toạ độ lặp lại sau M là L
+        if upper == "M":
+            command = "l" if command == "m" else "L"
+    return segments
+
+
+def absolutize(segments: List[Segment]) -> List[Segment]:
+    """Đổi mọi đoạn sang toạ độ tuyệt đối (lệnh chữ hoa)"""
+    result = []
+    x = y = start_x = start_y = 0.0
+    for command, args in segments:
+        upper = command.upper()
+        relative = command != upper
+        args = list(args)
+        if upper == "Z":
+            x, y = start_x, start_y
+        elif upper == "H":
+            if relative:
+                args[0] += x
+            x = args[0]
+        elif upper == "V":
+            if relative:
+                args[0] += y
+            y = args[0]
+        elif upper == "A":
+            if relative:
+                args[5] += x
+                args[6] += y
+            x, y = args[5], args[6]
+        else:
+            if relative:
+                for i in range(0, len(args), 2):
+                    args[i] += x
+                    args[i + 1] += y
+            x, y = args[-2], args[-1]
+            if upper == "M":
+                start_x, start_y = x, y
+        result.append((upper, args))
+    return result
+
+
+@lru_cache(maxsize=1 << 16)
+def format_number(value: int, scale: int) -> str:
+    """Số nguyên đã nhân scale → chuỗi ngắn nhất (bỏ 0 đầu/cuối: 0.50 → .5, -0.5 → -.5)"""
+    if scale == 1:
+        return str(value)
+    sign = "-" if value < 0 else ""
+    whole, frac = divmod(abs(value), scale)
+    digits = len(str(scale)) - 1
+    frac_str = f"{frac:0{digits}d}".rstrip("0")
+    if not frac_str:
+        return f"{sign}{whole}"
+    return f"{sign}{whole if whole else ''}.{frac_str}"
+
+
+def needs_space(previous: str, number: str) -> bool:
+    """Cần khoảng trắng giữa hai số? Không cần nếu số sau bắt đầu bằng '-' hoặc là '.5' sau '1.5'"""
+    return not (number.startswith("-") or (number.startswith(".") and "." in previous))
+
+
+def join_numbers(numbers: List[str]) -> str:
+    """Nối các số, chỉ chèn khoảng trắng khi cần để tách số (xem needs_space)"""
+    if not numbers:
+        return ""
+    out = [numbers[0]]
+    for previous, number in zip(numbers, numbers[1:]):
+        if number[0] != "-" and not (number[0] == "." and "." in previous):
+            out.append(" ")
+        out.append(number)
+    return "".join(out)
+
+
+def _shorter(letter_a: str, numbers_a: List[str], letter_b: str, numbers_b: List[str]):
+    """Chọn dạng ghi ngắn hơn; trả về (chữ lệnh, (danh sách số, chuỗi đã nối))"""
+    joined_a = join_numbers(numbers_a)
+    joined_b = join_numbers(numbers_b)
+    if len(joined_b) < len(joined_a):
+        return letter_b, (numbers_b, joined_b)
+    return letter_a, (numbers_a, joined_a)
+
+
+def serialize_path(segments: List[Segment], precision: int = 1) -> str:
+    """Ghi danh sách đoạn tuyệt đối (xem absolutize) thành chuỗi d ngắn nhất"""
+    scale = 10 ** max(0, precision)
+    fmt = lambda n: format_number(n, scale)
+    rnd = lambda v: int(round(v * scale))
+
+    parts = []
+    last_letter = last_number = None
+    x = y = start_x = start_y = 0
+
+    for command, args in segments:
+        if command == "Z":
+            letter, body = "z", []
+            x, y = start_x, start_y
+        elif command == "A":
+            ex, ey = rnd(args[5]), rnd(args[6])
+            head = [fmt(rnd(args[0])), fmt(rnd(args[1])), fmt(rnd(args[2])), str(int(args[3])), str(int(args[4]))]
+            letter, body = _shorter("A", head + [fmt(ex), fmt(ey)], "a", head + [fmt(ex - x), fmt(ey - y)])
+            x, y = ex, ey
+        else:
+            if command == "H":
+                points = [(rnd(args[0]), y)]
+            elif command == "V":
+                points = [(x, rnd(args[0]))]
+            else:
+                points = [(rnd(args[i]), rnd(args[i + 1])) for i in range(0, len(args), 2)]
+            ex, ey = points[-1]
+
+            kind = command
+            if kind in ("L", "H", "V"):
+                # Đoạn thẳng đứng/nằm ngang (sau làm tròn) viết bằng V/H
+                kind = "V" if ex == x else "H" if ey == y else "L"
+            if kind == "H":
+                letter, body = _shorter("H", [fmt(ex)], "h", [fmt(ex - x)])
+            elif kind == "V":
+                letter, body = _shorter("V", [fmt(ey)], "v", [fmt(ey - y)])
+            else:
+                letter, body = _shorter(kind, [fmt(v) for p in points for v in p],
+                                        kind.lower(), [fmt(v) for px, py in points for v in (px - x, py - y)])
+            x, y = ex, ey
+            if command == "M":
+                start_x, start_y = x, y
+
+        numbers = body[1] if body else ""
+        # Bỏ chữ lệnh nếu trùng lệnh trước (cặp toạ độ sau M/m được hiểu là L/l)
+        implicit = bool(body) and last_number is not None and (
+            (letter == last_letter and letter not in "Mm")
+            or (letter == "l" and last_letter == "m") or (letter == "L" and last_letter == "M"))
+        if implicit:
+            parts.append((" " if needs_space(last_number, body[0][0]) else "") + numbers)
+        else:
+            parts.append(letter + numbers)
+            last_letter = letter
+        last_number = body[0][-1] if body else None
+    return "".join(parts)
+
+
+def minify_path(d: str, precision: int = 1) -> str:
+    """Rút gọn chuỗi d: làm tròn, toạ độ tương đối/tuyệt đối ngắn hơn, bỏ khoảng trắng"""
+    return serialize_path(absolutize(parse_path(d)), precision)
+
+
+def path_points(segments: List[Segment]) -> List[Tuple[float, float]]:
+    """Mọi điểm (điểm điều khiển + điểm cuối) của danh sách đoạn tuyệt đối; H/V đổi thành điểm đầy đủ"""
+    points = []
+    x = y = start_x = start_y = 0.0
+    for command, args in segments:
+        if command == "Z":
+            x, y = start_x, start_y
+            continue
+        if command == "H":
+            x = args[0]
+            points.append((x, y))
+        elif command == "V":
+            y = args[0]
+            points.append((x, y))
+        elif command == "A":
+            x, y = args[5], args[6]
+            points.append((x, y))
+        else:
+            pairs = [(args[i], args[i + 1]) for i in range(0, len(args), 2)]
+            points.extend(pairs)
+            x, y = pairs[-1]
+            if command == "M":
+                start_x, start_y = x, y
+    return points
+
+
+def max_deviation(original: str, minified: str) -> float:
+    """Độ lệch lớn nhất giữa các điểm của hai path (cùng cấu trúc lệnh)"""
+    a = path_points(absolutize(parse_path(original)))
+    b = path_points(absolutize(parse_path(minified)))
+    if len(a) != len(b):
+        raise ValueError(f"Hai path khác số điểm: {len(a)} ≠ {len(b)}")
+    return max((max(abs(ax - bx), abs(ay - by)) for (ax, ay), (bx, by) in zip(a, b)), default=0.0)
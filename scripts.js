@@ -68,7 +68,16 @@ function updateURL(collectionId) {
 function setupUI(config) {
     elements.pageTitle.textContent = config.title;
     document.title = `${config.title} - Copy Icons`;
-    document.getElementById('fontawesomeCss').href = config.css;
+    // Có subsetEndpoint: không tải all.css (font đầy đủ), CSS được tải theo từng trang
+    if (config.subsetEndpoint) {
+        document.getElementById('fontawesomeCss').removeAttribute('href');
+    } else if (config.coreCss) {
+        // CSS theo chunk: chỉ tải @font-face + rule chung, rule icon tải cùng chunk (loadChunkCss)
+        // theo mẫu chunkCss, hoặc chunks[i].css trong metadata.json (helper/publish.py)
+        document.getElementById('fontawesomeCss').href = config.coreCss;
+    } else {
+        document.getElementById('fontawesomeCss').href = config.css;
+    }
     elements.downloadBtn.href = config.download;
     elements.downloadBtn.download = config.download.split('/').pop();
 
@@ -98,8 +107,18 @@ function populateFontAwesomeVersions(currentId) {
     elements.fontawesome_version.value = currentId;
 }
 
+// Mỗi collection một IndexedDB; registry trong localStorage ghi lần dùng gần nhất và dung lượng ước tính
+// của từng DB để xoá collection ít dùng nhất khi vượt quota (LRU).
+const CACHE_REGISTRY_KEY = 'iconCacheRegistry';
+const CACHE_MAX_COLLECTIONS = 4;
+const CACHE_QUOTA_BYTES = 50 * 1024 * 1024;
+
+function collectionDbName(collectionId) {
+    return `${collectionId.replace(/[^a-z0-9]/gi, '_')}_icons_db`;
+}
+
 async function openDB(collectionId) {
-    const dbName = `${collectionId.replace(/[^a-z0-9]/gi, '_')}_icons_db`;
+    const dbName = collectionDbName(collectionId);
     if (state.db[dbName]) return state.db[dbName];
 
     return new Promise((resolve, reject) => {
@@ -120,6 +139,60 @@ async function openDB(collectionId) {
     });
 }
 
+function readCacheRegistry() {
+    try {
+        return JSON.parse(localStorage.getItem(CACHE_REGISTRY_KEY)) || {};
+    } catch {
+        return {};
+    }
+}
+
+function writeCacheRegistry(registry) {
+    try {
+        localStorage.setItem(CACHE_REGISTRY_KEY, JSON.stringify(registry));
+    } catch (err) {
+        console.warn('Không ghi được registry cache:', err);
+    }
+}
+
+// Đánh dấu collection vừa được dùng; bytes là dung lượng thêm (âm khi xoá bớt chunk)
+function touchCollectionCache(collectionId, bytes = 0) {
+    const registry = readCacheRegistry();
+    const entry = registry[collectionId] || { bytes: 0 };
+    entry.lastUsed = Date.now();
+    entry.bytes = Math.max(0, entry.bytes + bytes);
+    registry[collectionId] = entry;
+    writeCacheRegistry(registry);
+}
+
+function deleteCollectionDB(collectionId) {
+    const dbName = collectionDbName(collectionId);
+    state.db[dbName]?.close();
+    delete state.db[dbName];
+    return new Promise(resolve => {
+        const req = indexedDB.deleteDatabase(dbName);
+        req.onsuccess = req.onerror = req.onblocked = () => resolve();
+    });
+}
+
+// Xoá DB của các collection dùng lâu nhất cho tới khi đủ số lượng và dung lượng cho phép (giữ collection hiện tại)
+async function evictCollectionCaches(currentId) {
+    const registry = readCacheRegistry();
+    const ids = Object.keys(registry).sort((a, b) => registry[a].lastUsed - registry[b].lastUsed);
+    let total = ids.reduce((sum, id) => sum + (registry[id].bytes || 0), 0);
+    let count = ids.length;
+    for (const id of ids) {
+        if (count <= CACHE_MAX_COLLECTIONS && total <= CACHE_QUOTA_BYTES) break;
+        if (id === currentId) continue;
+        await deleteCollectionDB(id);
+        total -= registry[id].bytes || 0;
+        count--;
+        delete registry[id];
+        console.log(`🧹 Đã xoá cache của collection ${id} (ít dùng nhất)`);
+    }
+    writeCacheRegistry(registry);
+}
+
 async function dbPut(storeName, data, collectionId) {
     const db = await openDB(collectionId);
     return new Promise(resolve => {
@@ -145,17 +218,30 @@ let numberOfChunks = 0;
 async function initLazyLoading(config) {
     try {
         await openDB(config.id);
-        let cachedMeta = await dbGet('metadata', 'metadata', config.id);
+        touchCollectionCache(config.id);
+        await evictCollectionCaches(config.id);
+        const cachedMeta = await dbGet('metadata', 'metadata', config.id);
 
-        if (cachedMeta && cachedMeta.data) {
-            lazyMetadata = cachedMeta.data;
-            console.log(`✅ Metadata từ IndexedDB cho ${config.title}`);
-        } else {
+        // metadata.json luôn được kiểm tra lại (nhỏ, HTTP cache/ETag lo phần còn lại);
+        // bản trong IndexedDB chỉ dùng khi không tải được (offline)
+        try {
             const res = await fetch(config.metadata);
             if (!res.ok) throw new Error('Không tải được metadata');
             lazyMetadata = await res.json();
-            await dbPut('metadata', { id: 'metadata', data: lazyMetadata }, config.id);
-            console.log(`✅ Đã lưu metadata cho ${config.title}`);
+        } catch (err) {
+            if (!cachedMeta?.data) throw err;
+            lazyMetadata = cachedMeta.data;
+            console.log(`✅ Metadata từ IndexedDB cho ${config.title}`);
+        }
+
+        // data_version đổi (build lại): chỉ xoá các chunk có hash khác, chunk không đổi vẫn dùng tiếp
+        if (cachedMeta?.data && cachedMeta.data.data_version !== lazyMetadata.data_version) {
+            const freed = await pruneStaleChunks(config.id, lazyMetadata);
+            touchCollectionCache(config.id, -freed);
+            console.log(`🔄 Dữ liệu ${config.title} đã đổi phiên bản, bỏ các chunk cũ`);
+        }
+        if (cachedMeta?.data !== lazyMetadata) {
+            await dbPut('metadata', { id: 'metadata', data: lazyMetadata, src: config.metadata }, config.id);
         }
 
         chunkSize = lazyMetadata.chunk_size || 500;
@@ -181,37 +267,7 @@ async function loadLazyPage(page, config) {
         let allChunkIcons = [];
 
         for (let ci = firstChunk; ci <= lastChunk; ci++) {
-            let result = await dbGet('chunks', ci, config.id);
-            let chunk = result ? result.icons : null;
-
-            if (!chunk || !Array.isArray(chunk)) {
-                const chunkPath = config.chunkPattern.replace('{index}', ci);
-                const res = await fetch(chunkPath);
-                if (!res.ok) {
-                    console.warn(`Không tải được chunk ${ci} cho ${config.title}`);
-                    continue;
-                }
-                const rawData = await res.json();
-
-                if (!rawData || !Array.isArray(rawData.icons)) {
-                    console.error(`Chunk ${ci} có cấu trúc sai cho ${config.title}:`, rawData);
-                    continue;
-                }
-
-                const prefix = config.classPrefix || 'icon-';
-                chunk = rawData.icons.map(icon => ({
-                    name: icon.properties?.name || icon.name || 'unknown',
-                    label: icon.properties?.name || icon.name || 'unknown',
-                    terms: icon.icon?.tags || (icon.tags || []),
-                    tags: icon.tags || [],
-                    description: icon.description || '',
-                    category: icon.category || '',
-                    htmlCode: `<i class="${prefix}${icon.properties?.name || icon.name}"></i>`
-                }));
-
-                await dbPut('chunks', { chunkIndex: ci, icons: chunk }, config.id);
-                console.log(`✅ Parsed chunk ${ci} cho ${config.title}: ${chunk.length} icons`);
-            }
+            const chunk = await loadChunk(ci, config);
 
             if (Array.isArray(chunk)) {
                 allChunkIcons = allChunkIcons.concat(chunk);
@@ -231,6 +287,215 @@ async function loadLazyPage(page, config) {
     }
 }
 
+// Xoá chunk đã lưu không còn khớp metadata (hash khác, hoặc chunk không còn). Trả về số byte ước tính đã xoá.
+async function pruneStaleChunks(collectionId, metadata) {
+    const db = await openDB(collectionId);
+    return new Promise(resolve => {
+        let freed = 0;
+        const tx = db.transaction('chunks', 'readwrite');
+        tx.objectStore('chunks').openCursor().onsuccess = e => {
+            const cursor = e.target.result;
+            if (!cursor) return;
+            const record = cursor.value;
+            const entry = metadata.chunks?.[record.chunkIndex];
+            if (!entry || (entry.hash && record.hash !== entry.hash)) {
+                freed += record.bytes || 0;
+                cursor.delete();
+            }
+            cursor.continue();
+        };
+        tx.oncomplete = () => resolve(freed);
+    });
+}
+
+// Chunk đã lưu còn dùng được: cùng hash nội dung (metadata do split_selections.py tạo),
+// nếu metadata cũ không có hash thì phải cùng đường dẫn; và cùng classPrefix (htmlCode phụ thuộc prefix)
+function isChunkFresh(record, entry, chunkPath, prefix) {
+    if (!record || !Array.isArray(record.icons) || record.prefix !== prefix) return false;
+    return entry?.hash ? record.hash === entry.hash : record.src === chunkPath;
+}
+
+// Đường dẫn file nằm cùng thư mục với metadata.json
+function resolveMetadataPath(config, file) {
+    return config.metadata.replace(/[^/]*$/, file);
+}
+
+// CSS theo chunk (helper/make_css.py, css_chunks): css/chunk_N.css chứa rule của các icon trong chunk N.
+// Sau publish, tên file có hash nên đường dẫn nằm trong metadata (chunks[i].css) thay cho mẫu chunkCss.
+// Nếu không tải được thì quay về CSS đầy đủ.
+const chunkCssLoaded = new Set();
+
+function chunkCssPath(ci, config) {
+    const file = lazyMetadata?.chunks?.[ci]?.css;
+    if (file) return resolveMetadataPath(config, file);
+    return config.chunkCss ? config.chunkCss.replace('{index}', ci) : null;
+}
+
+function loadChunkCss(ci, config) {
+    if (!config.coreCss || chunkCssLoaded.has(ci)) return;
+    const href = chunkCssPath(ci, config);
+    if (!href) return;
+    chunkCssLoaded.add(ci);
+
+    const link = document.createElement('link');
+    link.rel = 'stylesheet';
+    link.href = href;
+    link.onerror = () => {
+        console.warn(`Không tải được CSS của chunk ${ci} cho ${config.title}, dùng CSS đầy đủ`);
+        document.getElementById('fontawesomeCss').href = config.css;
+    };
+    document.head.appendChild(link);
+}
+
+// Ưu tiên chunk rút gọn search_N.json (nếu metadata có), nếu không thì dùng chunk đầy đủ
+async function loadChunk(ci, config) {
+    loadChunkCss(ci, config);
+    const entry = lazyMetadata.chunks?.[ci];
+    const slim = Boolean(entry?.search);
+    const chunkPath = slim
+        ? resolveMetadataPath(config, entry.search)
+        : entry?.file
+            ? resolveMetadataPath(config, entry.file)
+            : config.chunkPattern.replace('{index}', ci);
+
+    const prefix = config.classPrefix || 'icon-';
+    const result = await dbGet('chunks', ci, config.id);
+    if (isChunkFresh(result, entry, chunkPath, prefix)) return result.icons;
+
+    const res = await fetch(chunkPath);
+    if (!res.ok) {
+        console.warn(`Không tải được chunk ${ci} cho ${config.title}`);
+        return null;
+    }
+    const rawData = await decodeChunkResponse(res, lazyMetadata.encoding);
+
+    if (!rawData || !Array.isArray(rawData.icons)) {
+        console.error(`Chunk ${ci} có cấu trúc sai cho ${config.title}:`, rawData);
+        return null;
+    }
+
+    const chunk = slim
+        ? rawData.icons.map(icon => parseSearchIcon(icon, prefix))
+        : rawData.icons.map(icon => ({
+            name: icon.properties?.name || icon.name || 'unknown',
+            label: icon.properties?.name || icon.name || 'unknown',
+            terms: icon.icon?.tags || (icon.tags || []),
+            tags: icon.tags || [],
+            description: icon.description || '',
+            category: icon.category || '',
+            aliases: icon.properties?.aliases || [],
+            htmlCode: `<i class="${prefix}${icon.properties?.name || icon.name}"></i>`
+        }));
+
+    const bytes = JSON.stringify(chunk).length * 2;  // UTF-16, ước tính
+    await dbPut('chunks', { chunkIndex: ci, icons: chunk, src: chunkPath, hash: entry?.hash, prefix, bytes }, config.id);
+    touchCollectionCache(config.id, bytes - (result?.bytes || 0));
+    console.log(`✅ Parsed chunk ${ci} cho ${config.title}: ${chunk.length} icons`);
+    return chunk;
+}
+
+// Giải mã chunk theo metadata.encoding (xem helper/json_codec.py):
+// pretty/min là JSON thường, short là JSON với key rút gọn, packed là nhị phân ICPK
+async function decodeChunkResponse(res, encoding) {
+    if (encoding === 'packed') return decodePacked(await res.arrayBuffer());
+    const data = await res.json();
+    return encoding === 'short' ? decodeShortKeys(data) : data;
+}
+
+const SHORT_KEYS = {
+    is: 'icons', i: 'icon', p: 'paths', a: 'attrs', m: 'isMulticolor', m2: 'isMulticolor2',
+    cp: 'colorPermutations', g: 'grid', tg: 'tags', P: 'properties', o: 'order', nm: 'name',
+    ps: 'prevSize', cd: 'code', si: 'setIdx', sd: 'setId', ii: 'iconIdx', ds: 'description',
+    ct: 'category', op: 'opacity', x: 'index', s: 'start', e: 'end', k: 'count'
+};
+
+function decodeShortKeys(value, root = true) {
+    if (Array.isArray(value)) return value.map(v => decodeShortKeys(v, false));
+    if (!value || typeof value !== 'object') return value;
+    const out = {};
+    for (const [key, v] of Object.entries(value)) {
+        if (root && key === '$schema') continue;
+        const full = key.startsWith('~') ? key.slice(1) : (SHORT_KEYS[key] || key);
+        out[full] = decodeShortKeys(v, false);
+    }
+    return out;
+}
+
+function decodePacked(buffer) {
+    const bytes = new Uint8Array(buffer);
+    const view = new DataView(buffer);
+    const utf8 = new TextDecoder();
+    if (utf8.decode(bytes.subarray(0, 4)) !== 'ICPK' || bytes[4] !== 1) {
+        throw new Error('Dữ liệu packed không hợp lệ');
+    }
+    let pos = 5;
+    // Varint có thể vượt 32 bit nên dùng phép nhân thay cho phép dịch bit
+    const varint = () => {
+        let result = 0, scale = 1, byte;
+        do {
+            byte = bytes[pos++];
+            result += (byte & 0x7f) * scale;
+            scale *= 128;
+        } while (byte & 0x80);
+        return result;
+    };
+
+    const strings = new Array(varint());
+    for (let i = 0; i < strings.length; i++) {
+        const length = varint();
+        strings[i] = utf8.decode(bytes.subarray(pos, pos + length));
+        pos += length;
+    }
+
+    const read = () => {
+        const tag = bytes[pos++];
+        switch (tag) {
+            case 0: return null;
+            case 1: return false;
+            case 2: return true;
+            case 3: {
+                const n = varint();
+                return n % 2 ? -(n + 1) / 2 : n / 2;
+            }
+            case 4: {
+                const v = view.getFloat64(pos, true);
+                pos += 8;
+                return v;
+            }
+            case 5: return strings[varint()];
+            case 6: {
+                const arr = new Array(varint());
+                for (let i = 0; i < arr.length; i++) arr[i] = read();
+                return arr;
+            }
+            case 7: {
+                const obj = {};
+                for (let n = varint(); n > 0; n--) {
+                    const key = strings[varint()];
+                    obj[key] = read();
+                }
+                return obj;
+            }
+            default: throw new Error(`Tag packed không hợp lệ: ${tag}`);
+        }
+    };
+    return read();
+}
+
+// Chunk rút gọn: { n: name, t: tags, d: description, c: category, al: aliases }
+function parseSearchIcon(icon, prefix) {
+    return {
+        name: icon.n,
+        label: icon.n,
+        terms: icon.t || [],
+        tags: [],
+        description: icon.d || '',
+        category: icon.c || '',
+        aliases: icon.al || [],
+        htmlCode: `<i class="${prefix}${icon.n}"></i>`
+    };
+}
+
 async function loadCollectionData(config) {
     const parser = {
         'fa-optimized': parseFontAwesome,
@@ -240,6 +505,11 @@ async function loadCollectionData(config) {
 
     if (!parser) throw new Error(`Processor không hỗ trợ: ${config.processorType}`);
 
+    // Font Awesome có bản chia theo style: tải dần thay vì cả icons-optimized.json
+    if (config.processorType === 'fa-optimized' && config.styles) {
+        return loadFontAwesomeStyles(config);
+    }
+
     // SỬA: Kiểm tra config.json tồn tại trước khi map
     if (!config.json || !Array.isArray(config.json)) {
         throw new Error(`Config.json không hợp lệ cho ${config.title}`);
@@ -260,11 +530,13 @@ async function loadCollectionData(config) {
     renderPagination();
 }
 
-function parseFontAwesome([data], config) {
-    const getPrefix = style => config.fa_style === 'old' 
-        ? { solid: 'fas', regular: 'far', brands: 'fab' }[style] || 'fas' 
+function faStylePrefix(style, config) {
+    return config.fa_style === 'old'
+        ? { solid: 'fas', regular: 'far', brands: 'fab' }[style] || 'fas'
         : `fa-${style}`;
+}
 
+function parseFontAwesome([data], config) {
     const icons = [];
     for (const [name, info] of Object.entries(data)) {
         (info.f || []).forEach(style => {
@@ -272,13 +544,62 @@ function parseFontAwesome([data], config) {
                 name,
                 label: info.l,
                 terms: info.t || [],
-                htmlCode: `<i class="${getPrefix(style)} fa-${name}"></i>`
+                htmlCode: `<i class="${faStylePrefix(style, config)} fa-${name}"></i>`
             });
         });
     }
     return icons;
 }
 
+// Font Awesome chia theo style (helper/fa_metadata.py): styles/index.json liệt kê các style,
+// nhiều icon nhất trước; mỗi style một file { tên: { l, t } }. Lần đầu chỉ tải style đầu tiên,
+// các style còn lại tải khi cần (chuyển tới trang chưa có icon, hoặc tìm kiếm).
+const faStyles = { index: null, baseUrl: '', loaded: 0, pending: Promise.resolve() };
+
+async function fetchFontAwesomeStyle(entry, config) {
+    const res = await fetch(faStyles.baseUrl + entry.file);
+    if (!res.ok) throw new Error(`Không thể tải style ${entry.name} của ${config.title}`);
+    const data = await res.json();
+    const prefix = faStylePrefix(entry.name, config);
+    return Object.entries(data).map(([name, info]) => ({
+        name,
+        label: info.l,
+        terms: info.t || [],
+        htmlCode: `<i class="${prefix} fa-${name}"></i>`
+    }));
+}
+
+// Tải thêm style (theo thứ tự trong index) cho tới khi có ít nhất minCount icon
+function loadMoreFontAwesomeStyles(minCount, config) {
+    const run = faStyles.pending.then(async () => {
+        const styles = faStyles.index.styles;
+        while (faStyles.loaded < styles.length && state.icons.length < minCount) {
+            const icons = await fetchFontAwesomeStyle(styles[faStyles.loaded], config);
+            state.icons = state.icons.concat(icons);
+            faStyles.loaded++;
+        }
+    });
+    faStyles.pending = run.catch(() => {});
+    return run;
+}
+
+async function loadFontAwesomeStyles(config) {
+    const res = await fetch(config.styles);
+    if (!res.ok) throw new Error(`Không thể tải danh sách style của ${config.title}`);
+    faStyles.index = await res.json();
+    faStyles.baseUrl = config.styles.slice(0, config.styles.lastIndexOf('/') + 1);
+
+    await loadMoreFontAwesomeStyles(state.iconsPerPage, config);
+    state.filteredIcons = state.icons;
+
+    const total = faStyles.index.styles.reduce((sum, entry) => sum + entry.count, 0);
+    updateTotal(total);
+    state.totalPages = Math.ceil(total / state.iconsPerPage);
+    state.currentPage = 1;
+    displayIcons(state.icons.slice(0, state.iconsPerPage));
+    renderPagination();
+}
+
 function parseIcoMoon([data], config) {
     const prefix = config.classPrefix || 'icon-';
     return (data.icons || []).map(icon => ({
@@ -288,6 +609,7 @@ function parseIcoMoon([data], config) {
         tags: icon.tags || [],
         description: icon.description || '',
         category: icon.category || '',
+        aliases: icon.properties?.aliases || [],
         htmlCode: `<i class="${prefix}${icon.properties?.name || 'unknown'}"></i>`
     }));
 }
@@ -323,6 +645,106 @@ function showLoading(show = true) {
     }
 }
 
+function matchesQuery(icon, query) {
+    return icon.name.toLowerCase().includes(query) ||
+        (icon.label || '').toLowerCase().includes(query) ||
+        (icon.terms || []).some(t => t.toLowerCase().includes(query)) ||
+        (icon.tags || []).some(t => t.toLowerCase().includes(query)) ||
+        (icon.description || '').toLowerCase().includes(query) ||
+        (icon.category || '').toLowerCase().includes(query) ||
+        (icon.aliases || []).some(a => a.toLowerCase().includes(query));
+}
+
+// Chỉ mục tìm kiếm do helper/build_search_index.py tạo (khai báo trong metadata.json)
+let searchIndex = null;
+
+async function loadSearchIndex(config) {
+    if (searchIndex) return searchIndex;
+    if (!lazyMetadata?.search_index) return null;
+    try {
+        const res = await fetch(resolveMetadataPath(config, lazyMetadata.search_index));
+        if (!res.ok) return null;
+        searchIndex = await res.json();
+        return searchIndex;
+    } catch (err) {
+        console.warn('Không tải được chỉ mục tìm kiếm:', err);
+        return null;
+    }
+}
+
+// Posting list: mảng delta tăng dần, hoặc phần bù { x: [delta...] }
+function decodePostings(postings, count) {
+    const undelta = deltas => {
+        let value = 0;
+        return deltas.map(d => (value += d));
+    };
+    if (Array.isArray(postings)) return undelta(postings);
+
+    const excluded = new Set(undelta(postings.x));
+    const ordinals = [];
+    for (let i = 0; i < count; i++) {
+        if (!excluded.has(i)) ordinals.push(i);
+    }
+    return ordinals;
+}
+
+function intersectSorted(a, b) {
+    const result = [];
+    let i = 0, j = 0;
+    while (i < a.length && j < b.length) {
+        if (a[i] === b[j]) {
+            result.push(a[i]);
+            i++;
+            j++;
+        } else if (a[i] < b[j]) {
+            i++;
+        } else {
+            j++;
+        }
+    }
+    return result;
+}
+
+// Trả về danh sách ordinal ứng viên, hoặc null nếu không dùng được chỉ mục.
+// Truy vấn ngắn hơn gram ký tự trả về null: quét toàn bộ để giữ kiểu khớp chuỗi con (includes).
+async function searchCandidates(query, config) {
+    const index = await loadSearchIndex(config);
+    const chars = Array.from(query);
+    if (!index || chars.length < index.gram) return null;
+
+    const tokens = new Set();
+    for (let i = 0; i + index.gram <= chars.length; i++) {
+        tokens.add(chars.slice(i, i + index.gram).join(''));
+    }
+
+    let candidates = null;
+    for (const token of tokens) {
+        const postings = index.trigram[token];
+        if (!postings) return [];
+        const ordinals = decodePostings(postings, index.count);
+        candidates = candidates ? intersectSorted(candidates, ordinals) : ordinals;
+        if (candidates.length === 0) break;
+    }
+    return candidates;
+}
+
+async function loadIconsByOrdinal(ordinals, config) {
+    const byChunk = new Map();
+    ordinals.forEach(ordinal => {
+        const ci = Math.floor(ordinal / chunkSize);
+        if (!byChunk.has(ci)) byChunk.set(ci, []);
+        byChunk.get(ci).push(ordinal - ci * chunkSize);
+    });
+
+    const icons = [];
+    for (const [ci, offsets] of byChunk) {
+        const chunk = await loadChunk(ci, config);
+        if (!Array.isArray(chunk)) continue;
+        offsets.forEach(offset => chunk[offset] && icons.push(chunk[offset]));
+    }
+    return icons;
+}
+
 async function handleSearch() {
     showLoading(true);
     const query = elements.searchInput.value.toLowerCase();
@@ -335,49 +757,28 @@ async function handleSearch() {
             state.currentPage = 1;
             await loadLazyPage(state.currentPage, state.currentConfig);
         } else {
-            if (state.icons.length === 0) {
-                console.log('🔄 Đang load full icons cho search...');
-                let allIcons = [];
-                for (let ci = 0; ci < numberOfChunks; ci++) {
-                    let result = await dbGet('chunks', ci, state.currentConfig.id);
-                    let chunk = result ? result.icons : null;
-
-                    if (!chunk || !Array.isArray(chunk)) {
-                        const chunkPath = state.currentConfig.chunkPattern.replace('{index}', ci);
-                        const res = await fetch(chunkPath);
-                        if (!res.ok) continue;
-                        const rawData = await res.json();
-                        if (!Array.isArray(rawData.icons)) continue;
-
-                        const prefix = state.currentConfig.classPrefix || 'icon-';
-                        chunk = rawData.icons.map(icon => ({
-                            name: icon.properties?.name || icon.name || 'unknown',
-                            label: icon.properties?.name || icon.name || 'unknown',
-                            terms: icon.icon?.tags || (icon.tags || []),
-                            tags: icon.tags || [],
-                            description: icon.description || '',
-                            category: icon.category || '',
-                            htmlCode: `<i class="${prefix}${icon.properties?.name || icon.name}"></i>`
-                        }));
-                        await dbPut('chunks', { chunkIndex: ci, icons: chunk }, state.currentConfig.id);
-                    }
+            const candidates = await searchCandidates(query, state.currentConfig);
 
-                    if (Array.isArray(chunk)) {
-                        allIcons = allIcons.concat(chunk);
+            if (candidates) {
+                // Có chỉ mục: chỉ tải các chunk chứa icon ứng viên rồi kiểm tra lại
+                const icons = await loadIconsByOrdinal(candidates, state.currentConfig);
+                state.filteredIcons = icons.filter(icon => matchesQuery(icon, query));
+            } else {
+                if (state.icons.length === 0) {
+                    console.log('🔄 Đang load full icons cho search...');
+                    let allIcons = [];
+                    for (let ci = 0; ci < numberOfChunks; ci++) {
+                        const chunk = await loadChunk(ci, state.currentConfig);
+                        if (Array.isArray(chunk)) {
+                            allIcons = allIcons.concat(chunk);
+                        }
                     }
+                    state.icons = allIcons;
+                    console.log(`✅ Loaded full ${state.icons.length} icons cho search`);
                 }
-                state.icons = allIcons;
-                console.log(`✅ Loaded full ${state.icons.length} icons cho search`);
-            }
 
-            state.filteredIcons = state.icons.filter(icon =>
-                icon.name.toLowerCase().includes(query) ||
-                (icon.label || '').toLowerCase().includes(query) ||
-                (icon.terms || []).some(t => t.toLowerCase().includes(query)) ||
-                (icon.tags || []).some(t => t.toLowerCase().includes(query)) ||
-                (icon.description || '').toLowerCase().includes(query) ||
-                (icon.category || '').toLowerCase().includes(query)
-            );
+                state.filteredIcons = state.icons.filter(icon => matchesQuery(icon, query));
+            }
             updateTotal(state.filteredIcons.length);
             state.totalPages = Math.ceil(state.filteredIcons.length / state.iconsPerPage);
             state.currentPage = 1;
@@ -385,6 +786,10 @@ async function handleSearch() {
         }
         renderPagination();
     } else {
+        // Tìm kiếm cần đủ mọi style
+        if (faStyles.index) {
+            await loadMoreFontAwesomeStyles(Infinity, state.currentConfig);
+        }
         state.filteredIcons = state.icons.filter(icon =>
             icon.name.toLowerCase().includes(query) ||
             (icon.label || '').toLowerCase().includes(query) ||
@@ -401,6 +806,27 @@ async function handleSearch() {
     showLoading(false);
 }
 
+// Font subset: chỉ tải glyph của các icon đang hiển thị (xem helper/font_subset.py).
+// Mỗi lần tải thêm một <link> cho các icon chưa có; nếu endpoint lỗi thì quay về all.css.
+const subsetLoaded = new Set();
+
+function loadSubsetCss(icons, config) {
+    if (!config?.subsetEndpoint) return;
+    const names = icons.map(icon => icon.name).filter(name => name && !subsetLoaded.has(name));
+    if (names.length === 0) return;
+    names.forEach(name => subsetLoaded.add(name));
+
+    const link = document.createElement('link');
+    link.rel = 'stylesheet';
+    link.href = `${config.subsetEndpoint.replace(/\/$/, '')}/subset.css`
+        + `?collection=${encodeURIComponent(config.id)}&icons=${names.map(encodeURIComponent).join(',')}`;
+    link.onerror = () => {
+        console.warn(`Không tải được font subset cho ${config.title}, dùng font đầy đủ`);
+        document.getElementById('fontawesomeCss').href = config.css;
+    };
+    document.head.appendChild(link);
+}
+
 function displayIcons(iconsToShow) {
     const grid = elements.iconGrid;
     grid.innerHTML = '';
@@ -410,6 +836,8 @@ function displayIcons(iconsToShow) {
         return;
     }
 
+    loadSubsetCss(iconsToShow, state.currentConfig);
+
     const frag = document.createDocumentFragment();
     iconsToShow.forEach(icon => {
         const card = document.createElement('div');
@@ -480,6 +908,10 @@ async function refreshPage() {
     } else {
         const start = (state.currentPage - 1) * state.iconsPerPage;
         const end = start + state.iconsPerPage;
+        if (faStyles.index && elements.searchInput.value === '' && end > state.icons.length) {
+            await loadMoreFontAwesomeStyles(end, state.currentConfig);
+            state.filteredIcons = state.icons;
+        }
         const pageIcons = state.filteredIcons.slice(start, end);
         displayIcons(pageIcons);
     }
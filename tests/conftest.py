@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Các helper import lẫn nhau theo tên module (import json_codec, ...) như khi chạy python helper/<file>.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "helper"))
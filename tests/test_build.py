@@ -0,0 +1,89 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("fontTools")
+
+import build  # noqa: E402
+
+CONFIG = {
+    "id": "demo",
+    "title": "Demo",
+    "batch_root": "src",
+    "output_dir": "out",
+    "selection_file": "selections-all.json",
+    "prefix": "d-",
+    "font_name": "demo",
+    "font_source": "selection",
+    "chunk_size": 3,
+    "dedup": True,
+    "font_shards": True,
+    "css_mode": "compact",
+    "css_chunks": True,
+    "sprites": True,
+}
+
+
+def write_batch(root, index, icons):
+    path = os.path.join(root, "src", f"batch{index}", "selection.json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"icons": icons, "height": 1024}, f)
+
+
+def make_icons(start, count, tags=("shape",)):
+    return [{"icon": {"paths": [f"M{i * 10} 0h100v100h-100z"], "tags": list(tags), "width": 1024},
+             "properties": {"name": f"icon-{i}", "code": 0xE900 + i}}
+            for i in range(start, start + count)]
+
+
+def build_once(root):
+    summary = build.run_collection(CONFIG, build.resolve_stages(list(build.STAGE_DEPENDENCIES)), str(root))
+    assert summary["error"] is None, summary["error"]
+    return set(summary["stages"])
+
+
+@pytest.fixture
+def site(tmp_path):
+    write_batch(tmp_path, 1, make_icons(0, 4))
+    # icon-4 trùng hình học icon-0 → bị dedup gộp thành alias
+    duplicate = make_icons(4, 1)
+    duplicate[0]["icon"]["paths"] = ["M0 0h100v100h-100z"]
+    write_batch(tmp_path, 2, duplicate + make_icons(5, 3))
+    assert build_once(tmp_path) == set(build.STAGE_DEPENDENCIES)
+    return tmp_path
+
+
+def test_unchanged_build_runs_nothing(site):
+    assert build_once(site) == set()
+
+
+def test_tag_only_change_skips_fonts_and_css(site):
+    write_batch(site, 1, make_icons(0, 4, tags=("shape", "square")))
+    ran = build_once(site)
+    # Selection gộp đã lưu chứa tag nên chuỗi selection chạy lại; bước đầu ra chỉ còn split/index/nén
+    assert ran - set(build.SELECTION_CHAIN) == {"split", "index", "compress"}
+
+
+def test_geometry_change_rebuilds_fonts(site):
+    icons = make_icons(0, 4)
+    icons[1]["icon"]["paths"] = ["M0 0h50v50h-50z"]
+    write_batch(site, 1, icons)
+    ran = build_once(site)
+    assert {"fonts", "shards", "sprites", "split", "compress"} <= ran
+    # Tên, mã và alias không đổi nên CSS/demo vẫn giữ
+    assert not {"css", "demo"} & ran
+
+
+def test_compress_skips_merged_selection(tmp_path):
+    write_batch(tmp_path, 1, make_icons(0, 40))
+    selection = os.path.join(tmp_path, "out", CONFIG["selection_file"])
+    os.makedirs(os.path.dirname(selection), exist_ok=True)
+    with open(selection + ".gz", "wb") as f:
+        f.write(b"stale")
+    build_once(tmp_path)
+    assert os.path.getsize(selection) > 1024
+    # Bản nén cũ bị xoá, không tạo bản mới; chunk vẫn được nén
+    assert not any(os.path.exists(selection + ext) for ext in (".gz", ".br"))
+    assert os.path.exists(os.path.join(tmp_path, "out", "chunks", "chunk_0.json.gz"))
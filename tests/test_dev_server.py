@@ -0,0 +1,71 @@
+import asyncio
+
+import dev_server
+import publish
+
+BODY = bytes(range(256)) * 300
+
+
+def make_root(tmp_path):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "font.woff2").write_bytes(BODY)
+    return str(tmp_path)
+
+
+async def read_response(reader):
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    headers = {}
+    for line in head[1:]:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", "0")))
+    return int(head[0].split()[1]), headers, body
+
+
+async def exchange(root, requests):
+    """Gửi lần lượt các request trên cùng một kết nối keep-alive, trả về các response"""
+    server = dev_server.StaticServer(root, [], quiet=True)
+    listener = await asyncio.start_server(server.handle, "127.0.0.1", 0, limit=dev_server.MAX_HEADER_BYTES)
+    port = listener.sockets[0].getsockname()[1]
+    async with listener:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        responses = []
+        for request in requests:
+            writer.write(request)
+            await writer.drain()
+            responses.append(await read_response(reader))
+        writer.close()
+        return responses
+
+
+def test_post_body_is_drained_before_next_request(tmp_path):
+    root = make_root(tmp_path)
+    payload = b"x" * 5000 + b"GET /evil HTTP/1.1\r\n\r\n"
+    responses = asyncio.run(exchange(root, [
+        b"POST /data/font.woff2 HTTP/1.1\r\nHost: t\r\nContent-Length: %d\r\n\r\n" % len(payload) + payload,
+        b"GET /data/font.woff2 HTTP/1.1\r\nHost: t\r\n\r\n",
+    ]))
+    assert responses[0][0] == 405
+    status, _, body = responses[1]
+    assert status == 200 and body == BODY
+
+
+def test_range_is_sent_from_file(tmp_path):
+    root = make_root(tmp_path)
+    (status, headers, body), = asyncio.run(exchange(root, [
+        b"GET /data/font.woff2 HTTP/1.1\r\nHost: t\r\nRange: bytes=1000-1999\r\n\r\n",
+    ]))
+    assert status == 206
+    assert headers["content-range"] == f"bytes 1000-1999/{len(BODY)}"
+    assert body == BODY[1000:2000]
+
+
+def test_explicit_cache_rule_wins_over_hashed_names(tmp_path):
+    hashed = "data/x/chunk_0.0123456789.json"
+    server = dev_server.StaticServer(str(tmp_path), dev_server.parse_cache_rules(["data/x/*=no-store"]))
+    assert server.cache_control(hashed) == "no-store"
+    server = dev_server.StaticServer(str(tmp_path), [])
+    assert server.cache_control(hashed) == publish.IMMUTABLE_CACHE_CONTROL
+    assert server.cache_control("render.html") == "no-cache"
+    assert server.cache_control("data/x.json") == "public, max-age=600"
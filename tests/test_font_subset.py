@@ -0,0 +1,54 @@
+import io
+
+import pytest
+
+pytest.importorskip("fontTools")
+
+from fontTools.ttLib import TTFont  # noqa: E402
+
+import font_compiler  # noqa: E402
+import font_subset  # noqa: E402
+
+ICONS = [
+    {"icon": {"paths": [f"M{i * 10} 0h100v100h-100z"], "width": 1024},
+     "properties": {"name": f"icon-{i}", "code": 0xE900 + i}}
+    for i in range(8)
+]
+
+
+@pytest.fixture(scope="module")
+def ttf_data():
+    data, report = font_compiler.build_font(ICONS, "test", workers=1)
+    assert not report["errors"]
+    return data
+
+
+def head_modified(data: bytes) -> int:
+    with TTFont(io.BytesIO(data)) as font:
+        return font["head"].modified
+
+
+@pytest.mark.parametrize("flavor", ["woff2", None])
+def test_subset_is_byte_stable(ttf_data, flavor):
+    codes = [0xE900, 0xE903, 0xE905]
+    first = font_subset.subset_font(io.BytesIO(ttf_data), codes, flavor=flavor)
+    second = font_subset.subset_font(io.BytesIO(ttf_data), list(reversed(codes)), flavor=flavor)
+    assert first == second
+    # Timestamp lấy theo font gốc, không phải thời điểm ghi
+    assert head_modified(first) == head_modified(ttf_data)
+
+
+def test_subset_keeps_only_requested_codes(ttf_data):
+    data = font_subset.subset_font(io.BytesIO(ttf_data), [0xE901, 0xE902], flavor=None)
+    with TTFont(io.BytesIO(data)) as font:
+        assert set(font.getBestCmap()) == {0xE901, 0xE902}
+
+
+def test_drop_glyphs_is_byte_stable(ttf_data):
+    import scripts
+    keep = [0xE900, 0xE901, 0xE907]
+    first = scripts.drop_glyphs(ttf_data, keep)
+    assert first == scripts.drop_glyphs(ttf_data, keep)
+    assert head_modified(first) == head_modified(ttf_data)
+    # WOFF/WOFF2 của font sau dedup cũng lặp lại được
+    assert scripts.encode_font(first, "woff2") == scripts.encode_font(scripts.drop_glyphs(ttf_data, keep), "woff2")
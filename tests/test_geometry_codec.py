@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")  # geometry_codec cần NumPy
+
+import geometry_codec  # noqa: E402
+from test_svg_path import random_path  # noqa: E402
+
+
+def random_icons(rng, count=30, spread=1024.0):
+    return [
+        {
+            "icon": {"paths": [random_path(rng, spread=spread) for _ in range(rng.randint(0, 3))],
+                     "width": rng.choice([1024, 960, 1200])},
+            "properties": {"name": f"icon-{i}-nhà", "code": 0xE900 + i},
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("scale", [1, 16, 10, 3])
+def test_round_trip_within_error_bound(scale):
+    rng = random.Random(scale)
+    icons = random_icons(rng)
+    geometry = geometry_codec.GeometryFile(geometry_codec.encode_icons(icons, scale))
+    assert len(geometry) == len(icons)
+    assert geometry.names == [icon["properties"]["name"] for icon in icons]
+    assert list(geometry.codes) == [icon["properties"]["code"] for icon in icons]
+    assert list(geometry.widths) == [icon["icon"]["width"] for icon in icons]
+    # Lượng tử hoá ở dạng tuyệt đối: mọi điểm lệch tối đa nửa bước lưới
+    assert geometry_codec.max_error(icons, geometry) <= 0.5 / scale + 1e-9
+
+
+def test_large_coordinates_use_escape_words():
+    # 5000 * 16 vượt int16 → ghi dạng ESCAPE + int32
+    icons = [{"icon": {"paths": ["M0 0L5000 -5000H-4000V4000Z"]}, "properties": {"name": "big", "code": "0xe900"}}]
+    data = geometry_codec.encode_icons(icons, 16)
+    geometry = geometry_codec.GeometryFile(data)
+    assert (np.asarray(geometry.coords) == geometry_codec.ESCAPE).any()
+    assert list(geometry.codes) == [0xE900]
+    assert geometry_codec.max_error(icons, geometry) <= 0.5 / 16
+    assert geometry.paths(0) == ["M0 0 5000-5000H-4000V4000z"]
+
+
+def test_decoded_paths_reencode_identically():
+    rng = random.Random(99)
+    icons = random_icons(rng, count=10)
+    geometry = geometry_codec.GeometryFile(geometry_codec.encode_icons(icons, 16))
+    decoded = [{"icon": {"paths": geometry.paths(i), "width": int(geometry.widths[i])},
+                "properties": {"name": geometry.name(i), "code": int(geometry.codes[i])}} for i in range(len(geometry))]
+    assert geometry_codec.encode_icons(decoded, 16) == geometry_codec.encode_icons(icons, 16)
+
+
+def test_empty_and_invalid_input():
+    geometry = geometry_codec.GeometryFile(geometry_codec.encode_icons([], 16))
+    assert len(geometry) == 0
+    with pytest.raises(ValueError):
+        geometry_codec.GeometryFile(b"NOPE" + bytes(geometry_codec.HEADER.size))
@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+import json_codec
+
+
+def sample_chunk():
+    """Chunk giống đầu ra của split_selections: key IcoMoon dài, chuỗi lặp lại, unicode"""
+    return {
+        "icons": [
+            {
+                "icon": {"paths": ["M0 0h10v10z"], "attrs": [{}], "tags": ["nhà", "home"], "width": 1024},
+                "properties": {"name": f"icon-{i}", "code": 0xE900 + i, "aliases": []},
+                "description": "Biểu tượng 🏠",
+                "category": "ui",
+            }
+            for i in range(20)
+        ],
+        "index": 0,
+        "start": 0,
+        "end": 19,
+        "count": 20,
+    }
+
+
+def edge_values():
+    return [
+        None, True, False, 0, -1, 127, 128, -(1 << 40), 1 << 62, 0.5, -3.25, 1e-300, "", "~", "~x", [], {},
+        # Key gốc trùng key ngắn, bắt đầu bằng "~" hoặc trùng "$schema" phải giữ nguyên sau giải mã
+        {key: "x" for key in list(json_codec.LONG_KEYS)[:5]},
+        {"~escaped": 1, json_codec.SHORT_MARKER: "not-a-schema", "properties": {"name": "a"}},
+        [[[]], [{}], {"a": [1, {"b": None}]}],
+    ]
+
+
+@pytest.mark.parametrize("encoding", json_codec.ENCODINGS)
+def test_round_trip_chunk(encoding):
+    value = sample_chunk()
+    assert json_codec.loads(json_codec.dumps(value, encoding)) == value
+
+
+@pytest.mark.parametrize("encoding", json_codec.ENCODINGS)
+@pytest.mark.parametrize("value", edge_values(), ids=repr)
+def test_round_trip_edge_values(encoding, value):
+    assert json_codec.loads(json_codec.dumps(value, encoding)) == value
+
+
+def random_value(rng, depth=0):
+    kind = rng.randrange(8 if depth < 3 else 5)
+    if kind == 0:
+        return None
+    if kind == 1:
+        return rng.random() < 0.5
+    if kind == 2:
+        return rng.randint(-(1 << 50), 1 << 50)
+    if kind == 3:
+        return rng.uniform(-1e6, 1e6)
+    if kind == 4:
+        return rng.choice(["", "a", "~", "nhà", "😀", "name", "n"]) * rng.randrange(3)
+    if kind == 5:
+        return [random_value(rng, depth + 1) for _ in range(rng.randrange(4))]
+    keys = ["name", "n", "properties", "p", "~", "~p", "$schema", "x", "tags", "t"]
+    return {rng.choice(keys): random_value(rng, depth + 1) for _ in range(rng.randrange(4))}
+
+
+@pytest.mark.parametrize("encoding", ["short", "packed"])
+def test_round_trip_random(encoding):
+    rng = random.Random(1024)
+    for _ in range(300):
+        value = random_value(rng)
+        assert json_codec.loads(json_codec.dumps(value, encoding)) == value
+
+
+def test_packed_header_and_string_table():
+    data = json_codec.dumps(sample_chunk(), "packed")
+    assert data[:4] == json_codec.PACKED_MAGIC
+    assert data[4] == json_codec.PACKED_VERSION
+    # Mỗi chuỗi chỉ lưu một lần trong bảng chuỗi
+    assert data.count("Biểu tượng 🏠".encode("utf-8")) == 1
+
+
+def test_unknown_encoding():
+    with pytest.raises(ValueError):
+        json_codec.dumps({}, "yaml")
@@ -0,0 +1,92 @@
+import json
+import os
+
+import pytest
+
+import publish
+
+
+def write(root, rel, text):
+    path = os.path.join(root, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def make_site(root, chunk_css=True):
+    """Site tối thiểu: một collection hai chunk, font, all.css và (tuỳ chọn) CSS theo chunk"""
+    write(root, "data/collections-database.json", json.dumps({
+        "demo": {
+            "title": "Demo",
+            "css": "data/demo/all.css",
+            "metadata": "data/demo/chunks/metadata.json",
+            "chunkPattern": "data/demo/chunks/chunk_{index}.json",
+        }
+    }))
+    write(root, "data/demo/chunks/metadata.json", json.dumps({"chunks": [{"count": 1}, {"count": 1}]}))
+    for i in range(2):
+        write(root, f"data/demo/chunks/chunk_{i}.json", json.dumps({"icons": [{"name": f"icon-{i}"}]}))
+    write(root, "data/demo/demo.woff2", "font")
+    write(root, "data/demo/all.css", '@font-face{src:url("demo.woff2")}.i-0:before{content:"\\e900"}')
+    if chunk_css:
+        write(root, "data/demo/css/core.css", '@font-face{src:url("../demo.woff2")}')
+        for i in range(2):
+            write(root, f"data/demo/css/chunk_{i}.css", f'.i-{i}:before{{content:"\\e90{i}"}}')
+
+
+def published_entry(dist):
+    with open(os.path.join(dist, "data/collections-database.json"), encoding="utf-8") as f:
+        return json.load(f)["demo"]
+
+
+def published_chunks(dist, entry):
+    with open(os.path.join(dist, entry["metadata"]), encoding="utf-8") as f:
+        return json.load(f)["chunks"]
+
+
+def test_chunk_css_declared_only_when_built(tmp_path):
+    root, dist = str(tmp_path / "site"), str(tmp_path / "dist")
+    make_site(root)
+    manifest = publish.publish(root, dist, compress=False, log=lambda _: None)
+    entry = published_entry(dist)
+    assert entry["coreCss"] == manifest["assets"]["data/demo/css/core.css"]
+    # Mẫu {index} được thay bằng đường dẫn (tên hash) của từng chunk trong metadata.json
+    assert "chunkCss" not in entry
+    chunks = published_chunks(dist, entry)
+    for i, chunk in enumerate(chunks):
+        target = manifest["assets"][f"data/demo/css/chunk_{i}.css"]
+        assert os.path.normpath(os.path.join(os.path.dirname(entry["metadata"]), chunk["css"])) == target
+
+    root, dist = str(tmp_path / "plain"), str(tmp_path / "plain-dist")
+    make_site(root, chunk_css=False)
+    publish.publish(root, dist, compress=False, log=lambda _: None)
+    entry = published_entry(dist)
+    assert "coreCss" not in entry and "chunkCss" not in entry
+    assert all("css" not in chunk for chunk in published_chunks(dist, entry))
+
+
+def test_rebuild_keeps_hashed_names(tmp_path, monkeypatch):
+    pytest.importorskip("fontTools")
+    from fontTools.ttLib.tables import _h_e_a_d
+    import build
+    from test_build import CONFIG, make_icons, write_batch
+
+    root = str(tmp_path / "site")
+    config = dict(CONFIG, output_dir="data/demo")
+    write_batch(root, 1, make_icons(0, 7))
+    write(root, "data/collections-database.json", json.dumps({
+        "demo": {"title": "Demo", "css": "data/demo/all.css", "metadata": "data/demo/chunks/metadata.json",
+                 "chunkPattern": "data/demo/chunks/chunk_{index}.json"}
+    }))
+    stages = build.resolve_stages(list(build.STAGE_DEPENDENCIES))
+    assets = []
+    for run in range(2):
+        # Lần build sau chạy vào "ngày khác"; --force: mọi đầu ra (font, shard, CSS, chunk) được tạo lại
+        monkeypatch.setattr(_h_e_a_d, "timestampNow", lambda run=run: 3_800_000_000 + run * 86400)
+        summary = build.run_collection(config, stages, root, force=True)
+        assert summary["error"] is None, summary["error"]
+        dist = str(tmp_path / f"dist-{run}")
+        assets.append(publish.publish(root, dist, compress=False, log=lambda _: None)["assets"])
+    assert any(name.startswith("data/demo/shards/") for name in assets[0])
+    assert any(name.endswith(".woff2") for name in assets[0])
+    assert assets[0] == assets[1]
@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from rule_matcher import AhoCorasick, RuleMatcher, Trie
+
+RULE_TYPES = ["exact", "prefix", "suffix", "contains"]
+
+
+def brute_force(rules, text):
+    """Cách so khớp cũ của maketag: duyệt từng quy tắc"""
+    matched = []
+    for index, rule in enumerate(rules):
+        keyword = rule["keyword"].lower()
+        rule_type = rule.get("type", "contains")
+        if ((rule_type == "exact" and text == keyword)
+                or (rule_type == "prefix" and text.startswith(keyword))
+                or (rule_type == "suffix" and text.endswith(keyword))
+                or (rule_type == "contains" and keyword in text)):
+            matched.append(index)
+    return matched
+
+
+def random_word(rng, alphabet="abc-", max_length=5):
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(1, max_length)))
+
+
+def test_matches_brute_force_on_random_rules():
+    # Bảng chữ nhỏ để keyword chồng lấn nhau nhiều (kiểm tra liên kết fail của Aho-Corasick)
+    rng = random.Random(1024)
+    for _ in range(50):
+        rules = [{"type": rng.choice(RULE_TYPES), "keyword": random_word(rng, max_length=4)}
+                 for _ in range(rng.randint(1, 30))]
+        matcher = RuleMatcher(rules)
+        for _ in range(40):
+            text = random_word(rng, max_length=12)
+            assert matcher.match(text) == brute_force(rules, text), (rules, text)
+
+
+def test_matches_brute_force_on_enrichment_rules():
+    import maketag
+    rules = maketag.load_enrichment_rules()
+    matcher = RuleMatcher(rules)
+    names = ["home", "arrow-left", "bar-chart", "github", "play-circle", "chartreuse", "a", "", "shopping-cart"]
+    for name in names:
+        assert matcher.match(name) == brute_force(rules, name)
+
+
+def test_aho_corasick_overlapping_keywords():
+    automaton = AhoCorasick()
+    for index, word in enumerate(["he", "she", "his", "hers"]):
+        automaton.add(word, index)
+    assert automaton.search("ushers") == {0, 1, 3}
+    assert automaton.search("") == set()
+
+
+def test_trie_prefixes():
+    trie = Trie()
+    for index, word in enumerate(["a", "ab", "abc", "b"]):
+        trie.add(word, index)
+    assert trie.match_prefixes("abd") == [0, 1]
+
+
+def test_unknown_rule_type():
+    with pytest.raises(ValueError):
+        RuleMatcher([{"type": "regex", "keyword": "x"}])
+
+
+def test_report_groups_same_keyword():
+    rules = [{"type": "contains", "keyword": "play"}, {"type": "contains", "keyword": "Play"},
+             {"type": "prefix", "keyword": "play"}, {"type": "exact", "keyword": "unused"}]
+    matcher = RuleMatcher(rules)
+    for name in ["play", "replay", "player"]:
+        matcher.match(name)
+    lines = matcher.report()
+    assert lines[0] == "contains 'play': 3 (2 quy tắc)"
+    assert lines[1] == "  prefix 'play': 2"
+    assert lines[-1] == "1/3 keyword không khớp icon nào"
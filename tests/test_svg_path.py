@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+import svg_path
+
+
+def random_path(rng, segments=12, spread=1024.0):
+    """Path ngẫu nhiên: lệnh hoa/thường, tham số lặp (lệnh ngầm định), có cả A và Z"""
+    parts = [f"M{rng.uniform(0, spread):.3f} {rng.uniform(0, spread):.3f}"]
+    for _ in range(segments):
+        command = rng.choice("LHVCSQTAZlhvcsqtaz")
+        if command in "Zz":
+            parts.append(command)
+            parts.append(f"M{rng.uniform(0, spread):.3f},{rng.uniform(0, spread):.3f}")
+            continue
+        groups = []
+        for _ in range(rng.randint(1, 2)):
+            if command in "Aa":
+                args = [rng.uniform(1, 50), rng.uniform(1, 50), rng.uniform(0, 90), rng.randint(0, 1),
+                        rng.randint(0, 1), rng.uniform(-50, 50), rng.uniform(-50, 50)]
+            else:
+                args = [rng.uniform(-50, 50) for _ in range(svg_path.ARG_COUNTS[command.upper()])]
+            groups.append(" ".join(f"{a:.4f}" if isinstance(a, float) else str(a) for a in args))
+        parts.append(command + " ".join(groups))
+    return " ".join(parts)
+
+
+def test_docstring_example():
+    assert svg_path.minify_path("M0 0 L 10.000 0 L 10 10 Z") == "M0 0H10V10z"
+
+
+@pytest.mark.parametrize("precision", [0, 1, 2])
+def test_minified_points_within_rounding_error(precision):
+    rng = random.Random(precision)
+    bound = 0.5 * 10 ** -precision + 1e-9
+    for _ in range(200):
+        d = random_path(rng)
+        minified = svg_path.minify_path(d, precision)
+        # Sai số không cộng dồn dọc theo path: mọi điểm lệch tối đa nửa đơn vị làm tròn
+        assert svg_path.max_deviation(d, minified) <= bound, (d, minified)
+
+
+def test_minify_is_idempotent_and_shorter():
+    rng = random.Random(7)
+    for _ in range(100):
+        d = random_path(rng)
+        minified = svg_path.minify_path(d)
+        assert svg_path.minify_path(minified) == minified
+        assert len(minified) <= len(d)
+
+
+def test_implicit_commands_and_compact_numbers():
+    # M lặp tham số → L; số âm / thập phân không cần khoảng trắng phân cách
+    segments = svg_path.parse_path("M1 2 3 4-5.5.5")
+    assert segments == [("M", [1.0, 2.0]), ("L", [3.0, 4.0]), ("L", [-5.5, 0.5])]
+    absolute = svg_path.absolutize(svg_path.parse_path("m1 1 2 2h3v-1z"))
+    assert [command for command, _ in absolute] == ["M", "L", "H", "V", "Z"]
+    assert absolute[1][1] == [3.0, 3.0]
+
+
+def test_max_deviation_rejects_different_structure():
+    with pytest.raises(ValueError):
+        svg_path.max_deviation("M0 0L1 1", "M0 0")